@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Aggregate Cube
+--------------
+Pre-aggregated session measures for dashboard KPIs and charts.
+
+Net weights are rolled up once into a cube keyed by entry hour, company,
+vehicle, location and delivery type (with date, local hour, day of week,
+company name and license plate carried along as attributes of those keys).
+Every dashboard filter maps onto cube dimensions, so the tabs answer KPI
+cards and charts by selecting a few cube rows and grouping them again,
+instead of rescanning row-level data on every tick.
+"""
+
+import numpy as np
+import pandas as pd
+
+from filter_cache import filter_state_mask
+
+# Cube dimensions; the date range filter applies to entry_hour
+KEY_COLUMNS = ['entry_hour', 'company_id', 'vehicle_id', 'location', 'is_recycle']
+
+# Columns that are functions of the keys, kept so roll-ups can group by them
+ATTRIBUTE_COLUMNS = ['date', 'hour', 'day_of_week', 'company_name', 'license_plate']
+
+MEASURE_COLUMNS = ['sessions', 'net_weight', 'net_weight_max', 'fee_amount']
+
+CUBE_COLUMNS = KEY_COLUMNS + ATTRIBUTE_COLUMNS + MEASURE_COLUMNS
+
+
+def aggregate(net_weights_df):
+    """Roll net weight rows up into cube rows"""
+    if net_weights_df is None or net_weights_df.empty:
+        return pd.DataFrame(columns=CUBE_COLUMNS)
+
+    df = pd.DataFrame({
+        'entry_hour': pd.to_datetime(net_weights_df['entry_time']).dt.floor('h'),
+        'net_weight': net_weights_df['net_weight'].astype(float),
+        'fee_amount': (net_weights_df['fee_amount'].astype(float)
+                       if 'fee_amount' in net_weights_df.columns else 0.0),
+    })
+    for column in KEY_COLUMNS[1:] + ATTRIBUTE_COLUMNS:
+        df[column] = net_weights_df[column].values if column in net_weights_df.columns else None
+    df['is_recycle'] = df['is_recycle'].fillna(False).astype(bool)
+
+    cube = df.groupby(KEY_COLUMNS + ATTRIBUTE_COLUMNS, dropna=False, sort=False, observed=True).agg(
+        sessions=('net_weight', 'size'),
+        net_weight=('net_weight', 'sum'),
+        net_weight_max=('net_weight', 'max'),
+        fee_amount=('fee_amount', 'sum'),
+    ).reset_index()
+    return cube[CUBE_COLUMNS]
+
+
+def rollup(cube_rows, by=None):
+    """
+    Re-aggregate cube rows.
+
+    Args:
+        cube_rows: Rows of a cube (or the output of aggregate())
+        by: Columns to group by; None for a single grand total row
+
+    Returns:
+        DataFrame with the group columns, sessions, net_weight,
+        net_weight_max, fee_amount and avg_weight (kg per session)
+    """
+    measures = {
+        'sessions': 'sum',
+        'net_weight': 'sum',
+        'net_weight_max': 'max',
+        'fee_amount': 'sum'
+    }
+    if by:
+        result = cube_rows.groupby(by, dropna=False, observed=True).agg(measures).reset_index()
+    else:
+        result = cube_rows.agg(measures).to_frame().T if not cube_rows.empty else pd.DataFrame(
+            [{'sessions': 0, 'net_weight': 0.0, 'net_weight_max': 0.0, 'fee_amount': 0.0}]
+        )
+    result['sessions'] = result['sessions'].astype(int)
+    sessions = result['sessions'].astype(float)
+    result['avg_weight'] = np.where(sessions > 0, result['net_weight'] / sessions.where(sessions > 0, 1), 0.0)
+    return result
+
+
+class AggregateCube:
+    """
+    Cube over the dashboard's net weights, refreshed per entry hour.
+
+    select() answers a filter state from the cube when the date range falls
+    on whole hours (dates from the date picker always do); otherwise it
+    returns None and the caller aggregates the filtered rows instead.
+    """
+
+    def __init__(self, net_weights_df=None):
+        # The table and its id string cache are swapped together so readers
+        # never pair a new table with stale strings
+        self._state = (pd.DataFrame(columns=CUBE_COLUMNS), {})
+        if net_weights_df is not None:
+            self.rebuild(net_weights_df)
+
+    def rebuild(self, net_weights_df):
+        """Aggregate the full net weights frame"""
+        self._set_table(aggregate(net_weights_df))
+
+    def refresh(self, net_weights_df, changed_sessions_df):
+        """
+        Re-aggregate only the entry hours touched by changed sessions.
+
+        Args:
+            net_weights_df: The current full net weights frame
+            changed_sessions_df: Old and new rows of every session that was
+                added, removed or re-derived
+        """
+        if changed_sessions_df is None or changed_sessions_df.empty:
+            return
+        if self.table.empty:
+            self.rebuild(net_weights_df)
+            return
+
+        hours = pd.to_datetime(changed_sessions_df['entry_time']).dt.floor('h').dropna().unique()
+        entry_hours = pd.to_datetime(net_weights_df['entry_time']).dt.floor('h')
+        rows = net_weights_df[entry_hours.isin(hours).values]
+        kept = self.table[~self.table['entry_hour'].isin(hours)]
+        self._set_table(pd.concat([kept, aggregate(rows)], ignore_index=True))
+
+    @property
+    def table(self):
+        return self._state[0]
+
+    def _set_table(self, table):
+        self._state = (table.reset_index(drop=True), {})
+
+    def select(self, filter_state):
+        """Cube rows matching a filter state, or None if the cube can't answer it"""
+        if filter_state.get('filters_applied', False):
+            for key in ('start_date', 'end_date'):
+                value = filter_state.get(key)
+                if value and pd.to_datetime(value) != pd.to_datetime(value).floor('h'):
+                    return None
+        table, id_strings = self._state
+
+        def cached_id_strings(column):
+            # String form of an id column, cast once per cube table
+            if column not in id_strings:
+                id_strings[column] = table[column].astype(str)
+            return id_strings[column]
+
+        mask = filter_state_mask(table, filter_state, time_column='entry_hour', id_strings=cached_id_strings)
+        return table[mask]
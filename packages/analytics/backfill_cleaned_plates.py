@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Backfill vehicle.cleaned_plate (migration 006_add_vehicle_cleaned_plate.sql)
+
+Normalizes the plates of vehicles whose cleaned_plate is not set yet (or of
+every vehicle with --all) and, once no two vehicles share a plate, creates
+the unique index uq_vehicle_cleaned_plate. Plates are read through a
+server-side cursor and written back in batches, so the table is never held
+in memory. Safe to run again, e.g. after rows were written by other tools.
+
+Usage:
+    python backfill_cleaned_plates.py [--all] [--batch-rows 10000]
+"""
+
+import argparse
+import logging
+
+from database_connection import TABLES, get_column_type, get_db_connection
+from plate_normalizer import normalize_series
+
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BATCH_ROWS = 10000
+
+UNIQUE_INDEX = 'uq_vehicle_cleaned_plate'
+
+
+def backfill_cleaned_plates(conn, rebuild=False, batch_rows=BATCH_ROWS):
+    """
+    Set cleaned_plate from license_plate and commit.
+
+    Args:
+        conn: psycopg2 connection
+        rebuild: Normalize every vehicle, not only those without cleaned_plate
+        batch_rows: Vehicles read and updated per round-trip
+
+    Returns:
+        int: Number of vehicles updated
+    """
+    table = TABLES['vehicle']
+    id_type = get_column_type(table, 'vehicle_id')
+    where = "" if rebuild else "WHERE cleaned_plate IS NULL"
+    updated = 0
+    try:
+        with conn.cursor(name='backfill_cleaned_plates') as reader, conn.cursor() as writer:
+            reader.itersize = batch_rows
+            reader.execute(f"SELECT vehicle_id, license_plate FROM {table} {where}")
+            while True:
+                rows = reader.fetchmany(batch_rows)
+                if not rows:
+                    break
+                batch = pd.DataFrame(rows, columns=['vehicle_id', 'license_plate'])
+                writer.execute(f"""
+                    UPDATE {table} AS v
+                    SET cleaned_plate = c.cleaned_plate
+                    FROM unnest(CAST(%s AS {id_type}[]), CAST(%s AS text[])) AS c(vehicle_id, cleaned_plate)
+                    WHERE v.vehicle_id = c.vehicle_id
+                """, ([str(vehicle_id) for vehicle_id in batch['vehicle_id']],
+                      normalize_series(batch['license_plate']).tolist()))
+                updated += writer.rowcount
+                logger.info(f"Normalized {updated} plates")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return updated
+
+
+def has_unnormalized_plates(conn):
+    """Whether any vehicle has no cleaned_plate yet"""
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {TABLES['vehicle']} WHERE cleaned_plate IS NULL)")
+        return cursor.fetchone()[0]
+
+
+def ensure_cleaned_plates(conn, batch_rows=BATCH_ROWS):
+    """
+    Backfill cleaned_plate if any vehicle lacks it, so that lookups through
+    the cleaned_plate index see every vehicle.
+
+    Returns:
+        int: Number of vehicles updated
+    """
+    if not has_unnormalized_plates(conn):
+        conn.commit()
+        return 0
+    return backfill_cleaned_plates(conn, batch_rows=batch_rows)
+
+
+def create_unique_plate_index(conn):
+    """
+    Create the unique index on cleaned_plate unless vehicles still share a
+    plate.
+
+    Returns:
+        int: Number of plates shared by more than one vehicle (0 when the
+        index exists)
+    """
+    table = TABLES['vehicle']
+    with conn.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT COUNT(*) FROM (
+                SELECT cleaned_plate FROM {table}
+                WHERE cleaned_plate <> ''
+                GROUP BY cleaned_plate
+                HAVING COUNT(*) > 1
+            ) d
+        """)
+        shared = cursor.fetchone()[0]
+        if not shared:
+            cursor.execute(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS {UNIQUE_INDEX} ON {table}(cleaned_plate) WHERE cleaned_plate <> ''"
+            )
+    conn.commit()
+    return shared
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--all', action='store_true', help='Normalize every vehicle again')
+    parser.add_argument('--batch-rows', type=int, default=BATCH_ROWS)
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    if not conn:
+        logger.error("Could not establish database connection")
+        return 1
+    try:
+        updated = backfill_cleaned_plates(conn, rebuild=args.all, batch_rows=args.batch_rows)
+        logger.info(f"Backfilled cleaned_plate for {updated} vehicles")
+
+        shared = create_unique_plate_index(conn)
+        if shared:
+            logger.warning(f"{shared} plates are shared by more than one vehicle; merge them with the "
+                           f"plate cleaner and run again to create {UNIQUE_INDEX}")
+        else:
+            logger.info(f"Unique index {UNIQUE_INDEX} is in place")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark for blocked duplicate detection in CompanyUnifier.
+
+Generates synthetic company names with realistic variants (typos, legal
+suffixes, spacing, reordered words), checks on a sample that the trigram
+candidate index finds the same duplicate groups as comparing every pair, and
+prints how candidate generation plus scoring scales with the number of
+companies.
+
+Usage:
+    python benchmark_company_unifier.py [--companies 50000] [--legacy-companies 1500]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from flask_app.utils.company_unifier import CompanyUnifier
+from name_blocking import NGramIndex
+
+ONSETS = [
+    'b', 'bl', 'br', 'ch', 'd', 'dr', 'f', 'fl', 'fr', 'g', 'gr', 'h', 'j', 'k', 'kh', 'kw', 'l', 'm', 'mb',
+    'n', 'nd', 'ng', 'ny', 'p', 'ph', 'pr', 'r', 's', 'sh', 'sk', 'st', 't', 'th', 'tr', 'v', 'w', 'y', 'z',
+]
+VOWELS = ['a', 'e', 'i', 'o', 'u', 'ai', 'ea', 'ee', 'ia', 'io', 'oo', 'ou', 'ua', 'y']
+CODAS = ['', '', '', '', 'b', 'ck', 'd', 'g', 'k', 'l', 'm', 'n', 'nd', 'ng', 'nt', 'p', 'r', 'rs', 's', 'st', 't', 'x']
+TRADES = [
+    'transport', 'logistics', 'enterprises', 'construction', 'mining', 'waste management', 'trading',
+    'farms', 'builders', 'hardware', 'haulage', 'recycling', 'investments', 'services', 'contractors',
+    'engineering', 'holdings', 'agro', 'supplies', 'motors', 'freight', 'couriers', 'cleaning',
+    'quarries', 'cement', 'timber', 'steel', 'plastics', 'paper', 'packaging', 'foods', 'milling',
+    'distributors', 'general dealers', 'properties', 'developers', 'civil works', 'fuels', 'energy',
+    'water', 'chemicals', 'textiles', 'electricals', 'plant hire', 'scrap metals', 'glass', 'tyres',
+]
+SUFFIXES = ['ltd', 'limited', 'co', 'company', 'and sons', '']
+
+
+def make_word(rng):
+    """Pronounceable random word of two or three syllables"""
+    syllables = int(rng.integers(2, 4))
+    return ''.join(rng.choice(ONSETS) + rng.choice(VOWELS) + rng.choice(CODAS) for _ in range(syllables))
+
+
+def typo(name, rng):
+    """Insert, drop or swap one character"""
+    if len(name) < 4:
+        return name
+    i = int(rng.integers(1, len(name) - 1))
+    kind = rng.integers(3)
+    if kind == 0:
+        return name[:i] + name[i - 1] + name[i:]
+    if kind == 1:
+        return name[:i] + name[i + 1:]
+    return name[:i - 1] + name[i] + name[i - 1] + name[i + 1:]
+
+
+def variant(name, rng):
+    """A plausible alternative spelling of a company name"""
+    kind = rng.integers(5)
+    if kind == 0:
+        return typo(name, rng)
+    if kind == 1:
+        return name.upper()
+    if kind == 2:
+        return name.replace(' ', '  ', 1)
+    if kind == 3:
+        words = name.split()
+        return ' '.join(words[1:] + words[:1]) if len(words) > 2 else name + ' ltd'
+    return f"{name} {rng.choice(SUFFIXES)}".strip()
+
+
+def generate_companies(n_companies, seed=42):
+    """
+    Synthetic companies: names built from random words, a third of them with
+    1-3 variants. Variants share the 'cluster' number of their original.
+    """
+    rng = np.random.default_rng(seed)
+    names, clusters = [], []
+    cluster = 0
+    while len(names) < n_companies:
+        words = [make_word(rng) for _ in range(int(rng.integers(1, 3)))]
+        base = f"{' '.join(words)} {rng.choice(TRADES)} {rng.choice(SUFFIXES)}".strip()
+        copies = [base.title()]
+        if rng.random() < 0.33:
+            copies.extend(variant(base, rng).title() for _ in range(int(rng.integers(1, 4))))
+        clusters.extend([cluster] * len(copies))
+        cluster += 1
+        names.extend(copies)
+    return pd.DataFrame({
+        'company_id': [f"c{i:06d}" for i in range(n_companies)],
+        'name': names[:n_companies],
+        'cluster': clusters[:n_companies],
+        'type_code': rng.choice([6, 7, 8, 9], n_companies),
+    })
+
+
+def planted_recall(companies_df, left, right):
+    """Share of the pairs of variants of the same original that are candidates"""
+    clusters = companies_df['cluster'].to_numpy()
+    candidates = set((left * len(clusters) + right).tolist())
+    planted = 0
+    found = 0
+    for members in companies_df.groupby('cluster').indices.values():
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                planted += 1
+                found += int(members[a] * len(clusters) + members[b]) in candidates
+    return found / planted if planted else 1.0
+
+
+def legacy_find_duplicate_groups(unifier):
+    """The original full comparison: every company against every other company"""
+    companies = unifier.companies_df.to_dict('records')
+    groups = []
+    processed_ids = set()
+    for i, company in enumerate(companies):
+        if company['company_id'] in processed_ids:
+            continue
+        similar = []
+        for j, other in enumerate(companies):
+            if i != j and other['company_id'] not in processed_ids:
+                if unifier.calculate_similarity(company['name'], other['name']) >= unifier.similarity_threshold:
+                    similar.append(other['company_id'])
+                    processed_ids.add(other['company_id'])
+        if similar:
+            groups.append([company['company_id']] + similar)
+            processed_ids.add(company['company_id'])
+    return groups
+
+
+def blocked_groups(unifier):
+    return [
+        [group['main_company']['company_id']] + [c['company_id'] for c in group['similar_companies']]
+        for group in unifier.find_duplicate_groups()
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark blocked company duplicate detection")
+    parser.add_argument('--companies', type=int, default=50_000, help="Largest number of synthetic companies")
+    parser.add_argument('--legacy-companies', type=int, default=1_500,
+                        help="Companies used to compare against the full pairwise scan (0 to skip)")
+    args = parser.parse_args()
+
+    if args.legacy_companies:
+        unifier = CompanyUnifier()
+        unifier.companies_df = generate_companies(args.legacy_companies)
+        start = time.perf_counter()
+        legacy = legacy_find_duplicate_groups(unifier)
+        legacy_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        blocked = blocked_groups(unifier)
+        blocked_seconds = time.perf_counter() - start
+        print(f"{args.legacy_companies:,} companies: full scan {legacy_seconds:.2f}s ({len(legacy)} groups), "
+              f"blocked {blocked_seconds:.2f}s ({len(blocked)} groups)")
+        if legacy == blocked:
+            print(f"Groups match. Speedup: {legacy_seconds / blocked_seconds:.1f}x")
+        else:
+            blocked_set = {tuple(group) for group in blocked}
+            missing = [group for group in legacy if tuple(group) not in blocked_set]
+            print(f"Groups differ: {len(missing)} of {len(legacy)} full-scan groups not reproduced. "
+                  f"Speedup: {legacy_seconds / blocked_seconds:.1f}x")
+
+    print(f"\n{'companies':>10} {'candidates':>11} {'recall':>7} {'index (s)':>10} {'scoring (s)':>12} {'us/company':>11}")
+    sizes = sorted({size for size in (args.companies // 8, args.companies // 4, args.companies // 2, args.companies) if size})
+    for size in sizes:
+        unifier = CompanyUnifier()
+        unifier.companies_df = generate_companies(size)
+
+        start = time.perf_counter()
+        left, right = NGramIndex(unifier.companies_df['name']).candidate_pairs()
+        index_seconds = time.perf_counter() - start
+        recall = planted_recall(unifier.companies_df, left, right)
+
+        start = time.perf_counter()
+        unifier.find_duplicate_groups()
+        total_seconds = time.perf_counter() - start
+
+        print(f"{size:>10,} {len(left):>11,} {recall:>7.1%} {index_seconds:>10.2f} {total_seconds - index_seconds:>12.2f} "
+              f"{total_seconds / size * 1e6:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
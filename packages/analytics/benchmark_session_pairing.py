@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the vectorized session pairing engine.
+
+Generates synthetic weigh events, runs the original per-session groupby loop
+and calculate_session_net_weights on the same data, checks that both return
+the same values and prints the timings.
+
+Usage:
+    python benchmark_session_pairing.py [--events 1000000] [--skip-legacy]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from session_pairing import calculate_session_net_weights
+
+
+def legacy_tiered_pricing(net_weight_kg, company_type, is_recycle=False):
+    """Scalar pricing rules as used by the original per-session loop"""
+    if is_recycle:
+        return 0, 0, "Recycle (No Charge)"
+    tonnes = int(net_weight_kg / 1000) + (1 if (net_weight_kg % 1000) > 0 else 0)
+    if company_type == 8:
+        return 0, 0, "Type 8 (No Charge)"
+    elif company_type == 7:
+        return 50, tonnes * 50, "Type 7 (K50/tonne)"
+    elif company_type == 6:
+        if tonnes <= 5:
+            fee_per_tonne, tier = 50, "0-5 tonnes"
+        elif tonnes <= 10:
+            fee_per_tonne, tier = 100, "5-10 tonnes"
+        else:
+            fee_per_tonne, tier = 150, "10+ tonnes"
+        return fee_per_tonne, tonnes * fee_per_tonne, f"Type 6 ({tier}: K{fee_per_tonne}/tonne)"
+    return 150, tonnes * 150, "Standard (K150/tonne)"
+
+
+def legacy_calculate_net_weights(df):
+    """The original per-session loop from db_dashboard.calculate_net_weights"""
+    results = []
+    for session_id, group in df.groupby('session_id'):
+        if len(group) < 2:
+            continue
+        group = group.sort_values('event_time')
+        entry = group[group['event_type_std'] == 1]
+        exit = group[group['event_type_std'] == 2]
+        if entry.empty or exit.empty:
+            continue
+        entry_row = entry.iloc[0]
+        exit_row = exit.iloc[0]
+        remarks = str(entry_row.get('remarks', '')).strip()
+        is_recycle = 'R' in remarks.upper() and not remarks.startswith('CORRECTED:')
+        net_weight = abs(entry_row['weight_kg'] - exit_row['weight_kg'])
+        company_type = entry_row.get('type_code', None)
+        fee_per_tonne, fee_amount, pricing_tier = legacy_tiered_pricing(net_weight, company_type, is_recycle)
+        location = entry_row.get('clean_location') if not is_recycle else 'Recycle Collection'
+        results.append({
+            'session_id': session_id,
+            'pricing_tier': pricing_tier,
+            'entry_time': entry_row['event_time'],
+            'exit_time': exit_row['event_time'],
+            'duration_minutes': (exit_row['event_time'] - entry_row['event_time']).total_seconds() / 60,
+            'net_weight': net_weight,
+            'fee_per_tonne': fee_per_tonne,
+            'fee_amount': fee_amount,
+            'is_recycle': is_recycle,
+            'location': location,
+        })
+    return pd.DataFrame(results)
+
+
+def generate_events(n_events, seed=42):
+    """Synthetic weigh events: mostly entry/exit pairs plus some open sessions"""
+    rng = np.random.default_rng(seed)
+    n_sessions = n_events // 2
+    session_ids = np.repeat(np.arange(n_sessions), 2)[:n_events]
+    event_type = np.tile([1, 2], n_sessions + 1)[:n_events]
+
+    # Drop a few exits to leave open sessions behind
+    keep = ~((event_type == 2) & (rng.random(n_events) < 0.02))
+    session_ids, event_type = session_ids[keep], event_type[keep]
+    n = len(session_ids)
+
+    start = pd.Timestamp('2024-01-01')
+    entry_offsets = rng.integers(0, 365 * 24 * 60, n_sessions)
+    event_time = start + pd.to_timedelta(entry_offsets[session_ids], unit='m')
+    event_time = event_time + pd.to_timedelta(np.where(event_type == 2, rng.integers(5, 240, n), 0), unit='m')
+
+    weight = np.where(event_type == 1, rng.integers(3000, 30000, n), rng.integers(1000, 12000, n)).astype(float)
+    remarks = rng.choice(['Chunga', 'Matero', 'R', 'Kabwata', 'CORRECTED: x Original remarks: Roma'], n)
+
+    return pd.DataFrame({
+        'event_id': np.arange(n),
+        'session_id': [f"s{sid:08d}" for sid in session_ids],
+        'vehicle_id': session_ids % 500,
+        'company_id': session_ids % 120,
+        'company_name': [f"Company {cid}" for cid in session_ids % 120],
+        'type_code': rng.choice([6, 7, 8, 9, np.nan], n),
+        'event_type': event_type,
+        'event_type_std': event_type,
+        'event_time': event_time,
+        'weight_kg': weight,
+        'remarks': remarks,
+        'clean_location': pd.Series(remarks).str.title().values,
+    })
+
+
+def compare(legacy_df, vectorized_df):
+    """Assert the vectorized output matches the legacy loop"""
+    columns = list(legacy_df.columns)
+    left = legacy_df.sort_values('session_id').reset_index(drop=True)
+    right = vectorized_df[columns].sort_values('session_id').reset_index(drop=True)
+    right['pricing_tier'] = right['pricing_tier'].astype(str)
+    pd.testing.assert_frame_equal(left, right, check_dtype=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark session pairing")
+    parser.add_argument('--events', type=int, default=1_000_000, help="Number of synthetic weigh events")
+    parser.add_argument('--skip-legacy', action='store_true', help="Only time the vectorized engine")
+    args = parser.parse_args()
+
+    print(f"Generating {args.events:,} synthetic weigh events...")
+    events_df = generate_events(args.events)
+
+    start = time.perf_counter()
+    vectorized_df = calculate_session_net_weights(events_df)
+    vectorized_seconds = time.perf_counter() - start
+    print(f"Vectorized engine: {vectorized_seconds:.2f}s ({len(vectorized_df):,} sessions)")
+
+    if args.skip_legacy:
+        return
+
+    start = time.perf_counter()
+    legacy_df = legacy_calculate_net_weights(events_df)
+    legacy_seconds = time.perf_counter() - start
+    print(f"Per-session loop:  {legacy_seconds:.2f}s ({len(legacy_df):,} sessions)")
+
+    compare(legacy_df, vectorized_df)
+    print(f"Outputs match. Speedup: {legacy_seconds / vectorized_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Equivalence check for batch name scoring in name_similarity.
+
+score_matrix only rescores pairs whose rapidfuzz bound reaches the cutoff,
+so its results are exact only if the bound is never below the score of
+calculate_similarity. For each unifier (company cleaner, location unifier,
+company unifier) this script scores every pair of a set of synthetic names
+plus edge cases (empty and punctuation-only names, non-ASCII names, names
+that are prefixes of each other) and checks that:
+
+- the bound from _bound is at least the exact score for every pair
+- score_matrix at several cutoffs equals the exact scores cut at the cutoff
+
+Exits with status 1 if any pair fails.
+
+Usage:
+    python check_name_similarity.py [--names 360] [--cutoffs 0.4 0.5 0.7 0.9]
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+import name_similarity
+from benchmark_company_unifier import generate_companies
+from company_cleaner import CompanyDeduplicationEngine
+from flask_app.utils.company_unifier import CompanyUnifier
+from location_unifier import LocationUnificationEngine
+from name_similarity import score_matrix
+
+EDGE_CASES = [
+    '', ' ', '.', '&', '  -- ',
+    'Ñandu Trading', 'ñandu trading ltd', 'Zambézi Haulage', 'Café Lusaka', 'Łódź Motors', '株式会社',
+    'Lusaka', 'Lusaka City', 'lusaka city council', 'LUSAKA CITY COUNCIL', ' lusaka city council. ',
+    'BL', 'BL-12', 'bl 12', 'Green', 'Green Waste', 'Green Waste Recycling Ltd',
+    'A', 'AB', 'A & B', 'A and B Co', 'Co.', 'Ltd',
+]
+
+ENGINES = [
+    ('company cleaner', CompanyDeduplicationEngine),
+    ('location unifier', LocationUnificationEngine),
+    ('company unifier', CompanyUnifier),
+]
+
+
+def exact_scores(names, similarity):
+    """calculate_similarity of every pair, one pair at a time"""
+    return np.array([[similarity(name1, name2) for name2 in names] for name1 in names])
+
+
+def bound_scores(names, weights):
+    """The rapidfuzz upper bound of every pair"""
+    normalized = name_similarity._normalize(names)
+    lengths = np.fromiter(map(len, normalized), dtype=np.int64, count=len(normalized))
+    scores, common_prefix = name_similarity._rapidfuzz_scores(normalized, normalized, workers=-1)
+    return name_similarity._bound(scores, weights, lengths, lengths, common_prefix)
+
+
+def report(label, names, mask, exact, other, limit=5):
+    """Print the first failing pairs; return their number"""
+    failures = np.argwhere(mask)
+    for row, column in failures[:limit]:
+        print(f"  {label}: {names[row]!r} vs {names[column]!r}: exact {exact[row, column]:.6f}, "
+              f"got {other[row, column]:.6f}")
+    return len(failures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check batch name scoring against per-pair scoring")
+    parser.add_argument('--names', type=int, default=360, help="Synthetic names besides the edge cases")
+    parser.add_argument('--cutoffs', type=float, nargs='+', default=[0.4, 0.5, 0.7, 0.9])
+    args = parser.parse_args()
+
+    if not name_similarity.RAPIDFUZZ_AVAILABLE:
+        print("rapidfuzz is not installed; every pair is scored with calculate_similarity, nothing to check")
+        return 0
+
+    names = list(generate_companies(args.names)['name']) + EDGE_CASES
+    print(f"{len(names):,} names, {len(names) ** 2:,} pairs")
+
+    failures = 0
+    for label, engine_class in ENGINES:
+        engine = engine_class()
+        exact = exact_scores(names, engine.calculate_similarity)
+
+        bound = bound_scores(names, engine.similarity_weights)
+        below = report(f"{label} bound", names, bound < exact, exact, bound)
+        print(f"{label}: bound below the exact score for {below} pairs")
+        failures += below
+
+        for cutoff in args.cutoffs:
+            expected = np.where(exact >= cutoff, exact, 0.0)
+            batch = score_matrix(names, names, engine.calculate_similarity, engine.similarity_weights,
+                                 score_cutoff=cutoff)
+            differ = report(f"{label} cutoff {cutoff}", names, batch != expected, expected, batch)
+            print(f"{label}: score_matrix differs at cutoff {cutoff} for {differ} pairs")
+            failures += differ
+
+    print("All scores match" if not failures else f"{failures} failures")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
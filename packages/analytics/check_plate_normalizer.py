@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Equivalence check for vectorized plate cleaning in plate_normalizer.
+
+normalize_series runs the plate rules with pandas string operations instead
+of calling normalize_plate on every value. This script builds random raw
+plates from letters, digits, GRZ, dots, dashes, underscores, whitespace and
+non-ASCII characters, adds edge cases (numeric, boolean and missing values,
+decimal plates, short plates), and checks that normalize_series returns
+normalize_plate's result for every value. It also prints the time taken by
+.apply(normalize_plate) and by normalize_series on the same column.
+
+Exits with status 1 if any value differs.
+
+Usage:
+    python check_plate_normalizer.py [--plates 200000] [--seed 0]
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from plate_normalizer import _normalize_text, normalize_plate, normalize_series
+
+ALPHABET = list('ABCDGRZabgrz0123456789') + ['GRZ', ' ', '  ', '\t', '.', '-', '_', '/', '#', 'é', 'Ñ', '١']
+
+EDGE_CASES = [
+    'GRZ 123', 'grz-12a', 'GRZ', 'GRZ-', 'BAD52.00', 'AB12.5.6', '.AB12', 'A.B', '12.5', '1234',
+    'ABC 1234', 'AB 123', 'ABCD 12345', 'ABC', 'AB1', 'A1', '', '  ', '  abc 123 ', 'ABC\t123',
+    'ABC\n123', 'ÀBC123', 'abc١٢٣٤', 'nan', 'None',
+    None, np.nan, 0, 12345, 1.5, 123.0, True, False,
+]
+
+
+def random_plates(n_plates, seed=0):
+    """Raw plates of 0-11 random characters or fragments"""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(0, 12, n_plates)
+    return [''.join(rng.choice(ALPHABET, length)) for length in lengths]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check normalize_series against normalize_plate")
+    parser.add_argument('--plates', type=int, default=200_000, help="Random raw plates besides the edge cases")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    plates = pd.Series(random_plates(args.plates, args.seed) + EDGE_CASES, dtype=object)
+    print(f"{len(plates):,} plates, {plates.nunique(dropna=False):,} distinct")
+
+    _normalize_text.cache_clear()
+    start = time.perf_counter()
+    expected = plates.apply(normalize_plate)
+    apply_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cleaned = normalize_series(plates)
+    series_seconds = time.perf_counter() - start
+    print(f".apply(normalize_plate) {apply_seconds:.2f}s, normalize_series {series_seconds:.2f}s")
+
+    if not cleaned.index.equals(plates.index):
+        print("normalize_series changed the index")
+        return 1
+
+    differ = (cleaned != expected).to_numpy()
+    for raw, plate, series_plate in list(zip(plates[differ], expected[differ], cleaned[differ]))[:10]:
+        print(f"  {raw!r}: normalize_plate {plate!r}, normalize_series {series_plate!r}")
+    print("All plates match" if not differ.any() else f"{int(differ.sum())} plates differ")
+    return 1 if differ.any() else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,6 +11,15 @@ from dataclasses import dataclass, field
 from pathlib import Path
 import logging
 
+from duplicate_clustering import DisjointSet, cluster_edges
+from name_similarity import iter_score_rows, score_matrix
+from parallel_dedup import score_blocks
+
+# Largest duplicate group offered for review. At low thresholds near-matches
+# chain whole prefix blocks into one component; larger components are split
+# along their weakest links.
+MAX_GROUP_SIZE = 20
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -81,11 +90,26 @@ class DuplicateGroup:
 class CompanyDeduplicationEngine:
     """High-performance company deduplication engine"""
     
-    def __init__(self, similarity_threshold: float = 0.7):
+    # Component weights of calculate_similarity, for batch scoring
+    similarity_weights = {'sequence': 0.2, 'ratio': 0.2, 'token_sort': 0.2, 'token_set': 0.2, 'prefix': 0.2}
+    
+    def __init__(self, similarity_threshold: float = 0.7, max_group_size: Optional[int] = MAX_GROUP_SIZE):
+        """
+        Args:
+            similarity_threshold: Lowest similarity of a duplicate
+            max_group_size: Largest duplicate group (default MAX_GROUP_SIZE);
+                larger connected components are split along their weakest
+                links. None groups whole components, which chain together
+                into very large groups at low thresholds.
+        """
         self.similarity_threshold = similarity_threshold
+        self.max_group_size = max_group_size  # Split larger groups along their weakest links
         self.companies: List[Company] = []
         self.duplicate_groups: List[DuplicateGroup] = []
         self.decisions: Dict[str, Dict] = {}
+        # Pairs of company ids scoring above the threshold, and their connected components
+        self.similarity_edges: Dict[Tuple[str, str], float] = {}
+        self.clusters = DisjointSet()
         
     def load_csv(self, file_path: str) -> pd.DataFrame:
         """Load companies from CSV file"""
@@ -154,80 +178,114 @@ class CompanyDeduplicationEngine:
         """Find duplicate company groups"""
         logger.info("Finding duplicate groups...")
         
-        processed = set()
-        self.duplicate_groups = []
+        score_rows = iter_score_rows(
+            [company.cleaned_name for company in self.companies],
+            self.calculate_similarity, self.similarity_weights, score_cutoff=self.similarity_threshold
+        )
         
-        for i, company1 in enumerate(self.companies):
-            if company1.id in processed:
-                continue
-                
-            similar_matches = []
-            
-            for j, company2 in enumerate(self.companies):
-                if i != j and company2.id not in processed:
-                    similarity = self.calculate_similarity(company1.cleaned_name, company2.cleaned_name)
-                    
-                    if similarity > self.similarity_threshold:
-                        match = SimilarityMatch(company1, company2, similarity)
-                        similar_matches.append(match)
-                        processed.add(company2.id)
-            
-            if similar_matches:
-                group_id = f"group_{i}"
-                group = DuplicateGroup(
-                    group_id=group_id,
-                    main_company=company1,
-                    similar_companies=similar_matches
-                )
-                group.suggested_merge = self._suggest_merge(group)
-                self.duplicate_groups.append(group)
-                processed.add(company1.id)
+        edges = []
+        for i, (company1, scores) in enumerate(zip(self.companies, score_rows)):
+            for j in np.flatnonzero(scores[i + 1:] > self.similarity_threshold) + i + 1:
+                edges.append((company1.id, self.companies[j].id, float(scores[j])))
         
+        self._group_duplicates(edges)
         logger.info(f"Found {len(self.duplicate_groups)} duplicate groups")
         return self.duplicate_groups
     
-    def find_duplicates_with_blocking(self, prefix_length=2):
-        """Find duplicate company groups using blocking for efficiency"""
-        logger.info(f"Finding duplicate groups with prefix blocking (length={prefix_length})...")
+    def find_duplicates_with_blocking(self, prefix_length=2, workers=1):
+        """
+        Find duplicate company groups using blocking for efficiency
         
-        self.duplicate_groups = []
-        processed = set()
+        Args:
+            prefix_length: Length of the name prefix that defines a block
+            workers: Processes scoring the blocks (None for every core)
+        """
+        logger.info(f"Finding duplicate groups with prefix blocking (length={prefix_length}, workers={workers})...")
+        
+        # Create blocks, skipping blocks with only one company
+        blocks = [block for block in self.prefix_block_companies(self.companies, prefix_length).values()
+                  if len(block) > 1]
+        block_matches = score_blocks([[company.cleaned_name for company in block] for block in blocks],
+                                     self, score_cutoff=self.similarity_threshold, workers=workers)
+        
+        edges = []
+        for block_companies, matches in zip(blocks, block_matches):
+            for i, company_matches in matches.items():
+                for j, similarity in company_matches:
+                    if j > i and similarity > self.similarity_threshold:
+                        edges.append((block_companies[i].id, block_companies[j].id, similarity))
+        
+        self._group_duplicates(edges)
+        logger.info(f"Found {len(self.duplicate_groups)} duplicate groups")
+        return self.duplicate_groups
+    
+    def add_companies(self, companies: List[Company]) -> List[DuplicateGroup]:
+        """
+        Add companies to the current grouping.
         
-        # Create blocks
-        blocks = self.prefix_block_companies(self.companies, prefix_length)
+        Only the new companies are scored (against every company); their
+        edges join the existing components without regrouping from scratch.
+        """
+        existing = len(self.companies)
+        self.companies.extend(companies)
+        names = [company.cleaned_name for company in self.companies]
+        scores = score_matrix(names, names[existing:], self.calculate_similarity,
+                              self.similarity_weights, score_cutoff=self.similarity_threshold)
         
-        # Process each block
-        for block_key, block_companies in blocks.items():
-            if len(block_companies) <= 1:
-                continue  # Skip blocks with only one company
-                
-            for i, company1 in enumerate(block_companies):
-                if company1.id in processed:
-                    continue
-                    
-                similar_matches = []
-                
-                for j, company2 in enumerate(block_companies):
-                    if i != j and company2.id not in processed:
-                        similarity = self.calculate_similarity(company1.cleaned_name, company2.cleaned_name)
-                        
-                        if similarity > self.similarity_threshold:
-                            match = SimilarityMatch(company1, company2, similarity)
-                            similar_matches.append(match)
-                            processed.add(company2.id)
-                
-                if similar_matches:
-                    group_id = f"group_{len(self.duplicate_groups)}"
-                    group = DuplicateGroup(
-                        group_id=group_id,
-                        main_company=company1,
-                        similar_companies=similar_matches
-                    )
-                    group.suggested_merge = self._suggest_merge(group)
-                    self.duplicate_groups.append(group)
-                    processed.add(company1.id)
+        edges = []
+        for i, k in zip(*np.nonzero(scores > self.similarity_threshold)):
+            if i < existing + k:
+                edges.append((self.companies[i].id, companies[k].id, float(scores[i, k])))
         
-        logger.info(f"Found {len(self.duplicate_groups)} duplicate groups")
+        for company in companies:
+            self.clusters.add(company.id)
+        self.similarity_edges.update(((a, b), score) for a, b, score in edges)
+        if self.max_group_size is None:
+            for a, b, _ in edges:
+                self.clusters.union(a, b)
+        else:
+            # Splits depend on all edge weights, so capped groups are rebuilt
+            self.clusters = cluster_edges([company.id for company in self.companies],
+                                          [(a, b, score) for (a, b), score in self.similarity_edges.items()],
+                                          max_size=self.max_group_size)
+        
+        self._build_groups()
+        logger.info(f"Added {len(companies)} companies, {len(self.duplicate_groups)} duplicate groups")
+        return self.duplicate_groups
+    
+    def _group_duplicates(self, edges):
+        """Group companies into the connected components of the similarity edges, at most max_group_size each"""
+        self.similarity_edges = {(a, b): score for a, b, score in edges}
+        self.clusters = cluster_edges([company.id for company in self.companies], edges,
+                                      max_size=self.max_group_size)
+        return self._build_groups()
+    
+    def _build_groups(self) -> List[DuplicateGroup]:
+        """Duplicate groups from the current components, main company first in load order"""
+        companies_by_id = {company.id: company for company in self.companies}
+        
+        # Strongest edge of each company within its group
+        strongest = {}
+        for (a, b), score in self.similarity_edges.items():
+            if self.clusters.find(a) == self.clusters.find(b):
+                strongest[a] = max(strongest.get(a, 0.0), score)
+                strongest[b] = max(strongest.get(b, 0.0), score)
+        
+        self.duplicate_groups = []
+        for member_ids in self.clusters.groups(min_size=2):
+            main_company = companies_by_id[member_ids[0]]
+            similar_matches = []
+            for company_id in member_ids[1:]:
+                # Score against the main company, or the company's best link into the group
+                score = self.similarity_edges.get((main_company.id, company_id), strongest[company_id])
+                similar_matches.append(SimilarityMatch(main_company, companies_by_id[company_id], score))
+            group = DuplicateGroup(
+                group_id=f"group_{len(self.duplicate_groups)}",
+                main_company=main_company,
+                similar_companies=similar_matches
+            )
+            group.suggested_merge = self._suggest_merge(group)
+            self.duplicate_groups.append(group)
         return self.duplicate_groups
     
     def find_prefix_duplicates(self, prefix_len=2, min_similarity=0.5):
@@ -333,6 +391,13 @@ class CompanyDeduplicationEngine:
         # Sort by name length (shortest first)
         bl_companies.sort(key=lambda c: len(c.cleaned_name))
         
+        # Lower threshold specifically for BL companies
+        bl_threshold = 0.5  # Lower threshold for BL-type companies
+        
+        bl_names = [company.cleaned_name for company in bl_companies]
+        scores = score_matrix(bl_names, bl_names, self.calculate_similarity,
+                              self.similarity_weights, score_cutoff=bl_threshold)
+        
         for i, company1 in enumerate(bl_companies):
             if company1.id in processed:
                 continue
@@ -342,10 +407,7 @@ class CompanyDeduplicationEngine:
             for j, company2 in enumerate(bl_companies):
                 if i != j and company2.id not in processed:
                     # Direct BL comparison logic with lower threshold
-                    similarity = self.calculate_similarity(company1.cleaned_name, company2.cleaned_name)
-                    
-                    # Lower threshold specifically for BL companies
-                    bl_threshold = 0.5  # Lower threshold for BL-type companies
+                    similarity = float(scores[i, j])
                     
                     if similarity > bl_threshold:
                         match = SimilarityMatch(company1, company2, similarity)
@@ -1058,10 +1120,20 @@ class DeduplicationOptimizer:
 
 
 # Run the complete deduplication process with optimizations
-def run_optimized_deduplication(file_path: str, similarity_threshold: float = 0.4):
-    """Run optimized deduplication process for catching 'BL' type duplicates"""
+def run_optimized_deduplication(file_path: str, similarity_threshold: float = 0.4, workers: Optional[int] = 1,
+                                max_group_size: Optional[int] = MAX_GROUP_SIZE):
+    """
+    Run optimized deduplication process for catching 'BL' type duplicates
+    
+    Args:
+        file_path: CSV file of companies
+        similarity_threshold: Lowest similarity of a duplicate
+        workers: Processes scoring the blocks of large datasets (None for every core)
+        max_group_size: Largest duplicate group; larger connected components
+            are split along their weakest links (None for no limit)
+    """
     # Initialize engine with lower threshold
-    engine = CompanyDeduplicationEngine(similarity_threshold=similarity_threshold)
+    engine = CompanyDeduplicationEngine(similarity_threshold=similarity_threshold, max_group_size=max_group_size)
     
     # Load data
     engine.load_csv(file_path)
@@ -1077,7 +1149,7 @@ def run_optimized_deduplication(file_path: str, similarity_threshold: float = 0.
             logger.info(f"{strategy}: {stats['comparisons']} comparisons, {stats['estimated_time_seconds']:.1f} seconds")
         
         # Use blocking for large datasets
-        engine.find_duplicates_with_blocking(prefix_length=2)
+        engine.find_duplicates_with_blocking(prefix_length=2, workers=workers)
     else:
         # For smaller datasets, use comprehensive approach
         engine.find_all_duplicates(bl_specific=True)
@@ -29,6 +29,34 @@ class AnalyticsConfig:
     # Ensure upload directory exists
     UPLOAD_DIR.mkdir(exist_ok=True)
     
+    # Disposal pricing (Kwacha per tonne, billed on whole tonnes rounded up).
+    # Company types map to tiers ordered by max_tonnes; a max_tonnes of None
+    # means no upper bound. Types not listed use the default tier.
+    # Set PRICING_CONFIG_FILE to a JSON file with the same shape to override.
+    PRICING_TIERS = {
+        'recycle': {'fee_per_tonne': 0, 'label': 'Recycle (No Charge)'},
+        'default': {'fee_per_tonne': 150, 'label': 'Standard (K150/tonne)'},
+        'company_types': {
+            8: [{'max_tonnes': None, 'fee_per_tonne': 0, 'label': 'Type 8 (No Charge)'}],
+            7: [{'max_tonnes': None, 'fee_per_tonne': 50, 'label': 'Type 7 (K50/tonne)'}],
+            6: [
+                {'max_tonnes': 5, 'fee_per_tonne': 50, 'label': 'Type 6 (0-5 tonnes: K50/tonne)'},
+                {'max_tonnes': 10, 'fee_per_tonne': 100, 'label': 'Type 6 (5-10 tonnes: K100/tonne)'},
+                {'max_tonnes': None, 'fee_per_tonne': 150, 'label': 'Type 6 (10+ tonnes: K150/tonne)'},
+            ],
+        },
+    }
+    PRICING_CONFIG_FILE = os.environ.get('PRICING_CONFIG_FILE')
+    
+    # Columnar snapshots of the loaded frames (see snapshot_store.py).
+    # SNAPSHOT_FORMAT is 'arrow' (uncompressed Arrow IPC, memory-mappable)
+    # or 'parquet' (smaller files, decoded on load).
+    SNAPSHOT_ENABLED = os.environ.get('SNAPSHOT_ENABLED', 'true').lower() == 'true'
+    SNAPSHOT_DIR = Path(os.environ.get('SNAPSHOT_DIR', BASE_DIR / 'snapshots'))
+    SNAPSHOT_FORMAT = os.environ.get('SNAPSHOT_FORMAT', 'arrow')
+    SNAPSHOT_MAX_AGE_HOURS = float(os.environ.get('SNAPSHOT_MAX_AGE_HOURS', 24))
+    SNAPSHOT_SAVE_INTERVAL_MINUTES = float(os.environ.get('SNAPSHOT_SAVE_INTERVAL_MINUTES', 30))
+    
     @classmethod
     def get_portal_url(cls):
         """Get the Portal URL"""
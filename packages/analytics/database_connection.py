@@ -1,9 +1,23 @@
+import csv
+import io
+import json
 import pandas as pd
 import logging
 import os
+import threading
+import zlib
+from datetime import timedelta
 import psycopg2
+from psycopg2.extensions import quote_ident
 from sqlalchemy import create_engine, text
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -37,10 +51,64 @@ def get_db_connection():
         logger.error(f"Error creating database connection: {e}")
         return None
 
+# Connection pool settings for the process-wide SQLAlchemy engine
+DB_POOL_SETTINGS = {
+    'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+    'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+    'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+    'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),  # seconds, below RDS idle timeouts
+    'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+}
+
+_engine = None
+_engine_pid = None
+_engine_lock = threading.Lock()
+
 def get_db_engine():
-    """Get SQLAlchemy engine for database operations"""
-    conn_string = get_connection_string()
-    return create_engine(conn_string)
+    """
+    Get the process-wide pooled SQLAlchemy engine.
+
+    The engine is created lazily on first use and shared by every caller in
+    the process. A forked worker (e.g. under Gunicorn) builds its own engine
+    instead of reusing connections inherited from the parent.
+    """
+    global _engine, _engine_pid
+    if _engine is None or _engine_pid != os.getpid():
+        with _engine_lock:
+            if _engine is None or _engine_pid != os.getpid():
+                _engine = create_engine(get_connection_string(), **DB_POOL_SETTINGS)
+                _engine_pid = os.getpid()
+                logger.info(f"Created pooled database engine (pool_size={DB_POOL_SETTINGS['pool_size']}, "
+                            f"max_overflow={DB_POOL_SETTINGS['max_overflow']})")
+    return _engine
+
+def dispose_db_engine():
+    """Close all pooled connections; the next get_db_engine() call creates a new engine"""
+    global _engine, _engine_pid
+    with _engine_lock:
+        if _engine is not None and _engine_pid == os.getpid():
+            _engine.dispose()
+        _engine = None
+        _engine_pid = None
+
+def get_pool_stats():
+    """Get connection pool statistics for the shared engine"""
+    stats = {
+        'engine_created': _engine is not None and _engine_pid == os.getpid(),
+        'pid': os.getpid(),
+        'settings': dict(DB_POOL_SETTINGS)
+    }
+    if stats['engine_created']:
+        pool = _engine.pool
+        stats.update({
+            'pool_class': type(pool).__name__,
+            'size': pool.size() if hasattr(pool, 'size') else None,
+            'checked_in': pool.checkedin() if hasattr(pool, 'checkedin') else None,
+            'checked_out': pool.checkedout() if hasattr(pool, 'checkedout') else None,
+            'overflow': pool.overflow() if hasattr(pool, 'overflow') else None,
+            'status': pool.status()
+        })
+    return stats
 
 def read_companies():
     """Read companies from database"""
@@ -66,6 +134,57 @@ def read_vehicles():
         logger.error(f"Error reading vehicles from database: {e}")
         return pd.DataFrame()
 
+def read_duplicate_plate_vehicles():
+    """
+    Read the vehicles that share a normalized plate with another vehicle.
+
+    Uses the persisted cleaned_plate column (migration 006), so duplicates
+    are found by one grouped scan of its index instead of cleaning every
+    plate in Python.
+    """
+    try:
+        engine = get_db_engine()
+        query = f"""
+            SELECT v.*
+            FROM {TABLES['vehicle']} v
+            JOIN (
+                SELECT cleaned_plate
+                FROM {TABLES['vehicle']}
+                WHERE cleaned_plate <> ''
+                GROUP BY cleaned_plate
+                HAVING COUNT(*) > 1
+            ) d ON d.cleaned_plate = v.cleaned_plate
+            ORDER BY v.cleaned_plate
+        """
+        vehicles_df = pd.read_sql(query, engine)
+        logger.info(f"Read {len(vehicles_df)} vehicles with duplicate plates from database")
+        return vehicles_df
+    except Exception as e:
+        logger.error(f"Error reading duplicate plate vehicles from database: {e}")
+        return pd.DataFrame()
+
+def find_existing_plates(conn, cleaned_plates):
+    """
+    Normalized plates among cleaned_plates that are already in the vehicle
+    table, looked up through the cleaned_plate index in one query.
+
+    Args:
+        conn: psycopg2 connection
+        cleaned_plates: Iterable of normalized plates
+
+    Returns:
+        set: The plates that exist
+    """
+    cleaned_plates = sorted({plate for plate in cleaned_plates if plate})
+    if not cleaned_plates:
+        return set()
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT cleaned_plate FROM {TABLES['vehicle']} WHERE cleaned_plate = ANY(%s)",
+            (cleaned_plates,)
+        )
+        return {row[0] for row in cursor.fetchall()}
+
 def read_weigh_events(use_csv_fallback=True):
     """Read weigh events from database or CSV fallback"""
     try:
@@ -86,6 +205,144 @@ def read_weigh_events(use_csv_fallback=True):
                 return weigh_df
         return pd.DataFrame()
 
+# Incremental loads re-read this many minutes behind the high-water mark so
+# that late-arriving rows and rows edited shortly after insert are picked up
+INCREMENTAL_OVERLAP_MINUTES = int(os.getenv('WEIGH_EVENT_OVERLAP_MINUTES', 15))
+
+class WeighEventLoader:
+    """
+    Incremental reader for the weigh_event table.
+
+    The first load reads the whole table and records a high-water mark
+    (latest event_time and its event_id). Later calls to load_new_events()
+    only fetch rows at or after that mark, minus a small overlap window, so
+    a periodic refresh costs proportional to the number of new events.
+
+    The mark is keyed on event_time, as weigh_event has no modification
+    timestamp. Edits to rows whose event_time is older than the mark minus
+    the overlap window are therefore not seen by load_new_events(); only a
+    full load (load_all_events() or reset()) picks them up.
+    """
+
+    def __init__(self, overlap_minutes=INCREMENTAL_OVERLAP_MINUTES):
+        self.overlap = timedelta(minutes=overlap_minutes)
+        self.last_event_time = None
+        self.last_event_id = None
+        self.columns = []
+
+    @property
+    def has_watermark(self):
+        """Whether a full load has been done and deltas can be fetched"""
+        return self.last_event_time is not None
+
+    def reset(self):
+        """Forget the high-water mark so the next load is a full reload"""
+        self.last_event_time = None
+        self.last_event_id = None
+
+    def get_state(self):
+        """JSON-serializable high-water mark, e.g. for storing with a snapshot"""
+        if not self.has_watermark:
+            return None
+        last_event_id = self.last_event_id
+        if hasattr(last_event_id, 'item'):  # NumPy scalar
+            last_event_id = last_event_id.item()
+        if last_event_id is not None and not isinstance(last_event_id, (int, float, str)):
+            last_event_id = str(last_event_id)
+        return {
+            'last_event_time': self.last_event_time.isoformat(),
+            'last_event_id': last_event_id,
+            'columns': list(self.columns)
+        }
+
+    def restore_state(self, state):
+        """Resume from a high-water mark saved with get_state()"""
+        if not state or not state.get('last_event_time'):
+            self.reset()
+            return
+        self.last_event_time = pd.Timestamp(state['last_event_time'])
+        self.last_event_id = state.get('last_event_id')
+        self.columns = list(state.get('columns') or self.columns)
+
+    def load_all_events(self, use_csv_fallback=True):
+        """Read the full weigh_event table and set the high-water mark"""
+        weigh_df = read_weigh_events(use_csv_fallback=use_csv_fallback)
+        self.reset()
+        self.columns = list(weigh_df.columns)
+        self._advance(weigh_df)
+        return weigh_df
+
+    def load_new_events(self):
+        """
+        Read only the weigh events at or after the high-water mark.
+
+        Falls back to a full load when no mark has been recorded yet. On a
+        database error an empty DataFrame is returned and the mark is kept,
+        so the next call retries the same window.
+        """
+        if not self.has_watermark:
+            return self.load_all_events()
+
+        since = self.last_event_time - self.overlap
+        try:
+            engine = get_db_engine()
+            query = text(f"SELECT * FROM {TABLES['weigh_event']} WHERE event_time >= :since")
+            delta_df = pd.read_sql(query, engine, params={'since': since.to_pydatetime()})
+            logger.info(f"Read {len(delta_df)} weigh events since {since}")
+        except Exception as e:
+            logger.error(f"Error reading new weigh events from database: {e}")
+            return pd.DataFrame()
+
+        self._advance(delta_df)
+        return delta_df
+
+    def _advance(self, events_df):
+        """Move the high-water mark to the latest event in events_df"""
+        if events_df.empty or 'event_time' not in events_df.columns:
+            return
+
+        event_times = pd.to_datetime(events_df['event_time'], errors='coerce')
+        if event_times.dt.tz is not None:
+            event_times = event_times.dt.tz_convert(None)
+        if event_times.notna().sum() == 0:
+            return
+
+        latest_idx = event_times.idxmax()
+        latest_time = event_times.loc[latest_idx]
+        if self.last_event_time is None or latest_time >= self.last_event_time:
+            self.last_event_time = latest_time
+            if 'event_id' in events_df.columns:
+                self.last_event_id = events_df.loc[latest_idx, 'event_id']
+
+def merge_weigh_events(existing_df, new_df, key='event_id'):
+    """
+    Upsert new weigh event rows into an existing frame.
+
+    Rows in new_df replace rows in existing_df with the same key. Rows
+    without a key (synthetic events not yet read back) are kept, unless
+    new_df has a keyed row for the same session_id and event_type, i.e. the
+    persisted copy of that synthetic event.
+    """
+    if existing_df.empty:
+        return new_df.reset_index(drop=True)
+    if new_df.empty:
+        return existing_df.reset_index(drop=True)
+
+    combined = pd.concat([existing_df, new_df], ignore_index=True)
+    if key not in combined.columns:
+        return combined
+
+    has_key = combined[key].notna()
+    keyed = combined[has_key].drop_duplicates(subset=key, keep='last')
+    keyless = combined[~has_key]
+
+    match_columns = ['session_id', 'event_type']
+    if not keyless.empty and key in new_df.columns and all(col in combined.columns for col in match_columns):
+        read_back = pd.MultiIndex.from_frame(new_df.loc[new_df[key].notna(), match_columns])
+        keyless = keyless[~pd.MultiIndex.from_frame(keyless[match_columns]).isin(read_back)]
+
+    return pd.concat([keyed, keyless]).sort_index().reset_index(drop=True)
+
 def read_table(table_name):
     """Read data from a specific table"""
     if table_name not in TABLES.values():
@@ -120,7 +377,7 @@ def write_weigh_event(event_data):
     """Write a single weigh event to the database"""
     try:
         engine = get_db_engine()
-        with engine.connect() as conn:
+        with engine.begin() as conn:
             # Convert to DataFrame for easier insertion
             df = pd.DataFrame([event_data])
             df.to_sql(TABLES['weigh_event'], conn, if_exists='append', index=False)
@@ -134,7 +391,7 @@ def write_multiple_weigh_events(events_df):
     """Write multiple weigh events to the database"""
     try:
         engine = get_db_engine()
-        with engine.connect() as conn:
+        with engine.begin() as conn:
             events_df.to_sql(TABLES['weigh_event'], conn, if_exists='append', index=False)
             logger.info(f"Successfully wrote {len(events_df)} weigh events to database")
             return True
@@ -142,6 +399,516 @@ def write_multiple_weigh_events(events_df):
         logger.error(f"Error writing weigh events to database: {e}")
         return False
 
+_column_types = {}
+
+def get_column_type(table_name, column_name):
+    """Get the SQL type of a column (cached per process)"""
+    key = (table_name, column_name)
+    if key not in _column_types:
+        engine = get_db_engine()
+        with engine.connect() as conn:
+            _column_types[key] = conn.execute(text("""
+                SELECT format_type(atttypid, atttypmod)
+                FROM pg_attribute
+                WHERE attrelid = CAST(:table_name AS regclass) AND attname = :column_name
+            """), {'table_name': table_name, 'column_name': column_name}).scalar()
+    return _column_types[key]
+
+def bulk_update_weigh_event_remarks(event_ids, remarks, skip_corrected=True):
+    """
+    Update the remarks of many weigh events in a single statement.
+
+    The new values are sent as two parallel arrays and joined against
+    weigh_event with UPDATE ... FROM unnest(...), so any number of events
+    is updated in one round-trip and one transaction.
+
+    Args:
+        event_ids: Sequence of event IDs to update
+        remarks: Sequence of new remarks, aligned with event_ids
+        skip_corrected: Leave events whose remarks already start with CORRECTED:
+
+    Returns:
+        int: Number of rows updated, or -1 on error
+    """
+    if len(event_ids) == 0:
+        return 0
+
+    try:
+        id_type = get_column_type(TABLES['weigh_event'], 'event_id')
+        skip_clause = "AND (w.remarks IS NULL OR w.remarks NOT LIKE 'CORRECTED:%')" if skip_corrected else ""
+        update_sql = text(f"""
+            UPDATE {TABLES['weigh_event']} AS w
+            SET remarks = v.remarks
+            FROM unnest(CAST(:event_ids AS {id_type}[]), CAST(:remarks AS text[])) AS v(event_id, remarks)
+            WHERE w.event_id = v.event_id
+            {skip_clause}
+        """)
+        engine = get_db_engine()
+        with engine.begin() as conn:
+            result = conn.execute(update_sql, {
+                'event_ids': [str(event_id) for event_id in event_ids],
+                'remarks': [str(remark) for remark in remarks]
+            })
+        logger.info(f"Updated remarks for {result.rowcount} weigh events")
+        return result.rowcount
+    except Exception as e:
+        logger.error(f"Error bulk updating weigh event remarks: {e}")
+        return -1
+
+# Staging rows merged into the target per INSERT; a failing batch is split
+# until the rows that cause the failure are isolated
+BULK_MERGE_BATCH_SIZE = int(os.getenv('BULK_MERGE_BATCH_SIZE', 50000))
+
+# SQLSTATE of a COPY that rejects a line with missing or extra columns
+BAD_COPY_FILE_FORMAT = '22P04'
+
+class BulkImporter:
+    """
+    COPY-based bulk ingest of CSV rows into one table.
+
+    Rows are streamed with COPY ... FROM STDIN into a temporary staging
+    table of text columns, then merged into the target in large batches
+    with INSERT ... SELECT ... ON CONFLICT DO NOTHING. Values are cast to
+    the target column types during the merge, and empty values fall back
+    to the column default. A batch that fails (a value that does not cast,
+    a NOT NULL or foreign key violation) is split in half until the bad
+    rows are isolated, so a bad row rejects only itself.
+
+    Nothing is committed; the staging table is dropped on commit.
+
+    Usage:
+        importer = BulkImporter(conn, 'weigh_event')
+        with open(file_path, newline='') as f:
+            importer.stage_csv(f)  # or importer.stage_frame(df)
+        result = importer.merge()  # {'inserted': ..., 'skipped': ..., 'rejected': ...}
+        conn.commit()
+    """
+
+    STAGING_TABLE = 'bulk_import_staging'
+
+    # Number of rejected rows whose errors are kept for reporting
+    MAX_REPORTED_REJECTS = 20
+
+    def __init__(self, conn, table, batch_size=None):
+        self.conn = conn
+        self.table = table
+        self.batch_size = batch_size or BULK_MERGE_BATCH_SIZE
+        self.target_columns = self._read_target_columns()
+        self.source_columns = None
+        self.staged_rows = 0
+        self.counts = {'inserted': 0, 'skipped': 0, 'rejected': 0}
+        self.rejected_rows = []
+
+    def _quote(self, name):
+        return quote_ident(name, self.conn)
+
+    def _read_target_columns(self):
+        """Insertable columns of the target table: name -> (SQL type, default expression)"""
+        with self.conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT a.attname, format_type(a.atttypid, a.atttypmod), pg_get_expr(d.adbin, d.adrelid)
+                FROM pg_attribute a
+                LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+                WHERE a.attrelid = CAST(%s AS regclass) AND a.attnum > 0 AND NOT a.attisdropped
+                  AND a.attidentity <> 'a' AND a.attgenerated = ''
+                ORDER BY a.attnum
+            """, (self.table,))
+            return {name: (sql_type, default) for name, sql_type, default in cursor.fetchall()}
+
+    def stage_csv(self, source):
+        """
+        COPY a CSV file object (with a header row) into the staging table.
+
+        Header columns that are not in the target table are staged but
+        ignored by the merge. If COPY rejects a line with missing or extra
+        columns, the file is staged again row by row: short rows are padded
+        with missing values (as pandas reads them) and rows with extra
+        columns are rejected with their line number.
+
+        Returns:
+            int: Number of rows staged from this file
+        """
+        header = next(csv.reader([source.readline()]), [])
+        if not header:
+            return 0
+        self._create_staging_table(header)
+
+        data_start = source.tell() if source.seekable() else None
+        with self.conn.cursor() as cursor:
+            cursor.execute("SET LOCAL statement_timeout = '600000'")  # 10 minutes
+            cursor.execute("SAVEPOINT bulk_stage")
+            try:
+                cursor.copy_expert(self._copy_sql(len(header)), source)
+            except psycopg2.Error as e:
+                if e.pgcode != BAD_COPY_FILE_FORMAT or data_start is None:
+                    raise
+                cursor.execute("ROLLBACK TO SAVEPOINT bulk_stage")
+                logger.warning(f"COPY into '{self.table}' failed ({str(e).strip()}), staging rows one by one")
+                source.seek(data_start)
+                self._stage_ragged_rows(cursor, source, len(header))
+            cursor.execute("RELEASE SAVEPOINT bulk_stage")
+            cursor.execute(f"SELECT count(*) FROM {self.STAGING_TABLE}")
+            total_rows = cursor.fetchone()[0]
+
+        staged = total_rows - self.staged_rows
+        self.staged_rows = total_rows
+        logger.info(f"Staged {staged} rows for '{self.table}'")
+        return staged
+
+    def _copy_sql(self, width):
+        staging_columns = ', '.join(f"c{i}" for i in range(width))
+        return f"COPY {self.STAGING_TABLE} ({staging_columns}) FROM STDIN WITH (FORMAT csv)"
+
+    def _stage_ragged_rows(self, cursor, source, width):
+        """
+        COPY the data rows of source in batches after fixing their width.
+        Blank lines are dropped; a row with extra columns is staged empty,
+        so it keeps its row number and the merge inserts nothing for it.
+        """
+        # Sequence values taken by the failed COPY are not rolled back
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, 'row_number'), %s, %s)",
+            (self.STAGING_TABLE, max(self.staged_rows, 1), self.staged_rows > 0)
+        )
+        reader = csv.reader(source)
+        row_number = self.staged_rows
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in reader:
+            if not row:
+                continue
+            row_number += 1
+            if len(row) > width:
+                # The header is line 1 and was read before the reader
+                self._reject(row_number, f"Line {reader.line_num + 1} has {len(row)} columns, expected {width}")
+                row = []
+            writer.writerow(row + [None] * (width - len(row)))
+            if (row_number - self.staged_rows) % self.batch_size == 0:
+                self._copy_buffer(cursor, buffer, width)
+        self._copy_buffer(cursor, buffer, width)
+
+    def _copy_buffer(self, cursor, buffer, width):
+        """COPY the rows written to buffer and empty it"""
+        buffer.seek(0)
+        cursor.copy_expert(self._copy_sql(width), buffer)
+        buffer.seek(0)
+        buffer.truncate()
+
+    def stage_frame(self, df):
+        """
+        COPY a DataFrame into the staging table; missing values are staged
+        as NULL so they fall back to the column defaults.
+
+        Returns:
+            int: Number of rows staged from this frame
+        """
+        if df.empty:
+            return 0
+        buffer = io.StringIO()
+        df.to_csv(buffer, index=False)
+        buffer.seek(0)
+        return self.stage_csv(buffer)
+
+    def _create_staging_table(self, header):
+        """Create the staging table for a header, or check it matches the one already staged"""
+        source_columns = {}
+        for position, name in enumerate(header):
+            name = name.strip()
+            if name in self.target_columns and name not in source_columns:
+                source_columns[name] = f"c{position}"
+
+        if self.source_columns is not None:
+            if source_columns != self.source_columns:
+                raise ValueError("All staged files must have the same columns")
+            return
+        if not source_columns:
+            raise ValueError(f"No columns of '{self.table}' found in the file header")
+
+        self.source_columns = source_columns
+        column_defs = ', '.join(f"c{i} text" for i in range(len(header)))
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"""
+                CREATE TEMP TABLE {self.STAGING_TABLE} (
+                    row_number bigserial PRIMARY KEY,
+                    {column_defs}
+                ) ON COMMIT DROP
+            """)
+
+    def _column_expression(self, name, staging_column):
+        """Cast of a staged text value to the target column type"""
+        sql_type, default = self.target_columns[name]
+        # Quoted empty strings count as missing, as they did when read with pandas
+        value = f"NULLIF(s.{staging_column}, '')"
+        if sql_type in ('smallint', 'integer', 'bigint'):
+            # Integer columns exported through pandas may carry a trailing .0
+            value = f"CAST(CAST({value} AS numeric) AS {sql_type})"
+        else:
+            value = f"CAST({value} AS {sql_type})"
+        if default is not None:
+            # The merge statement is parameterized, so a literal % must be doubled
+            value = f"COALESCE({value}, {default.replace('%', '%%')})"
+        return value
+
+    def merge(self, progress_callback=None):
+        """
+        Merge the staged rows into the target table.
+
+        Args:
+            progress_callback: Called after each batch with the number of
+                rows merged so far and the counts
+
+        Returns:
+            dict: Counts of inserted rows, skipped rows (empty or already
+            present) and rejected rows, plus 'rejected_rows' with the row
+            numbers and errors of the first rejects
+        """
+        if not self.staged_rows:
+            return self.result()
+
+        target_columns = ', '.join(self._quote(name) for name in self.source_columns)
+        expressions = ', '.join(
+            self._column_expression(name, staging_column)
+            for name, staging_column in self.source_columns.items()
+        )
+        staged_values = ', '.join(f"NULLIF(s.{staging_column}, '')" for staging_column in self.source_columns.values())
+        self._insert_sql = f"""
+            INSERT INTO {self._quote(self.table)} ({target_columns})
+            SELECT {expressions}
+            FROM {self.STAGING_TABLE} s
+            WHERE s.row_number BETWEEN %s AND %s
+              AND COALESCE({staged_values}) IS NOT NULL
+            ON CONFLICT DO NOTHING
+        """
+
+        with self.conn.cursor() as cursor:
+            cursor.execute("SET LOCAL statement_timeout = '600000'")  # 10 minutes
+            for first in range(1, self.staged_rows + 1, self.batch_size):
+                last = min(first + self.batch_size - 1, self.staged_rows)
+                self._merge_range(cursor, first, last)
+                logger.info(f"Progress: {last}/{self.staged_rows} rows merged, "
+                            f"{self.counts['inserted']} inserted, {self.counts['rejected']} rejected")
+                if progress_callback:
+                    progress_callback(last, dict(self.counts))
+
+        self.counts['skipped'] = self.staged_rows - self.counts['inserted'] - self.counts['rejected']
+        return self.result()
+
+    def _merge_range(self, cursor, first, last):
+        """Insert staging rows first..last, splitting the range when it fails"""
+        cursor.execute("SAVEPOINT bulk_merge")
+        try:
+            cursor.execute(self._insert_sql, (first, last))
+            inserted = cursor.rowcount
+        except psycopg2.Error as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT bulk_merge")
+            if first == last:
+                self._reject(first, str(e).strip())
+                return
+            middle = (first + last) // 2
+            self._merge_range(cursor, first, middle)
+            self._merge_range(cursor, middle + 1, last)
+            return
+        cursor.execute("RELEASE SAVEPOINT bulk_merge")
+        self.counts['inserted'] += inserted
+
+    def _reject(self, row, error):
+        self.counts['rejected'] += 1
+        if len(self.rejected_rows) < self.MAX_REPORTED_REJECTS:
+            self.rejected_rows.append({'row': row, 'error': error})
+
+    def result(self):
+        return dict(self.counts, rejected_rows=list(self.rejected_rows))
+
+def _run_bulk_import(conn, table, stage, batch_size=None, progress_callback=None):
+    """Stage rows with stage(importer), merge them and commit; rolls back on error"""
+    try:
+        importer = BulkImporter(conn, table, batch_size=batch_size)
+        stage(importer)
+        result = importer.merge(progress_callback)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    logger.info(f"Bulk import into '{table}': {result['inserted']} inserted, "
+                f"{result['skipped']} skipped, {result['rejected']} rejected")
+    return result
+
+def bulk_import_csv(conn, table, file_path, batch_size=None, progress_callback=None):
+    """
+    Import a CSV file into a table with BulkImporter and commit.
+
+    The file is streamed to the server by COPY, so client memory does not
+    grow with the file size.
+
+    Returns:
+        dict: inserted, skipped and rejected counts plus rejected_rows
+    """
+    def stage(importer):
+        with open(file_path, newline='', encoding='utf-8-sig') as source:
+            importer.stage_csv(source)
+    return _run_bulk_import(conn, table, stage, batch_size, progress_callback)
+
+def bulk_import_frame(conn, table, df, batch_size=None):
+    """
+    Import a DataFrame (e.g. one cleaned chunk of an upload) into a table
+    with BulkImporter and commit.
+
+    Returns:
+        dict: inserted, skipped and rejected counts plus rejected_rows, with
+        row numbers counted from 1 within df
+    """
+    return _run_bulk_import(conn, table, lambda importer: importer.stage_frame(df), batch_size)
+
+# Rows fetched per round-trip by streaming exports
+EXPORT_BATCH_ROWS = int(os.getenv('EXPORT_BATCH_ROWS', 10000))
+
+EXPORT_FORMATS = ('csv', 'parquet')
+
+# Parquet column types for common PostgreSQL type OIDs; other types are exported as text
+_ARROW_TYPE_NAMES = {
+    16: 'bool_',
+    20: 'int64',
+    21: 'int16',
+    23: 'int32',
+    700: 'float32',
+    701: 'float64',
+    1700: 'float64',  # numeric
+    1082: 'date32',
+    1114: 'timestamp',
+    1184: 'timestamptz',
+}
+
+class _ChunkSink(io.RawIOBase):
+    """Write target that hands the bytes written so far back to a generator"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def _arrow_type(type_code):
+    name = _ARROW_TYPE_NAMES.get(type_code)
+    if name == 'timestamp':
+        return pa.timestamp('us')
+    if name == 'timestamptz':
+        return pa.timestamp('us', tz='UTC')
+    if name is None:
+        return pa.string()
+    return getattr(pa, name)()
+
+def _arrow_array(values, arrow_type):
+    """Arrow array of one column of fetched rows"""
+    if pa.types.is_string(arrow_type):
+        values = [
+            v if v is None or isinstance(v, str)
+            else json.dumps(v, default=str) if isinstance(v, (dict, list))
+            else str(v)
+            for v in values
+        ]
+    elif pa.types.is_floating(arrow_type):
+        values = [None if v is None else float(v) for v in values]
+    return pa.array(values, type=arrow_type)
+
+def _export_csv(cursor, batch_rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    rows = cursor.fetchmany(batch_rows)
+    writer.writerow([column.name for column in cursor.description])
+    while True:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        rows = cursor.fetchmany(batch_rows)
+        if not rows:
+            break
+
+def _export_parquet(cursor, batch_rows):
+    rows = cursor.fetchmany(batch_rows)
+    schema = pa.schema([(column.name, _arrow_type(column.type_code)) for column in cursor.description])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        while rows:
+            columns = list(zip(*rows))
+            arrays = [_arrow_array(values, field.type) for values, field in zip(columns, schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))  # One row group per batch
+            yield sink.take()
+            rows = cursor.fetchmany(batch_rows)
+    finally:
+        writer.close()
+    yield sink.take()
+
+def iter_table_export(conn, table, file_format='csv', compress=False, batch_rows=None):
+    """
+    Stream a whole table as CSV or Parquet bytes.
+
+    Rows are read through a named (server-side) cursor batch_rows at a time
+    and encoded as they arrive, so neither the table nor the output file is
+    ever held in memory. With compress=True the output is gzipped on the
+    fly. The connection is closed when the generator is exhausted or closed.
+
+    The SELECT is issued before the generator is returned, so a missing
+    table or a query error is raised by this call rather than partway
+    through the output; the connection is then left to the caller.
+
+    Args:
+        conn: psycopg2 connection, owned by the generator once it is returned
+        table: Table name
+        file_format: 'csv' or 'parquet' (one row group per batch)
+        compress: Gzip the output
+        batch_rows: Rows per fetch; defaults to EXPORT_BATCH_ROWS
+
+    Yields:
+        bytes
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {file_format}")
+    if file_format == 'parquet' and not PYARROW_AVAILABLE:
+        raise ValueError("Parquet export requires pyarrow")
+    batch_rows = batch_rows or EXPORT_BATCH_ROWS
+    encode = _export_csv if file_format == 'csv' else _export_parquet
+
+    cursor = conn.cursor(name=f"export_{table}")
+    cursor.itersize = batch_rows
+    try:
+        cursor.execute(f"SELECT * FROM {quote_ident(table, conn)}")
+    except Exception:
+        cursor.close()
+        conn.rollback()
+        raise
+
+    def generate():
+        compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip container
+        exported = 0
+        try:
+            with cursor:
+                for data in encode(cursor, batch_rows):
+                    exported += len(data)
+                    if compressor:
+                        data = compressor.compress(data)
+                    if data:
+                        yield data
+            if compressor:
+                yield compressor.flush()
+            logger.info(f"Exported table '{table}' as {file_format} ({exported} bytes before compression)")
+        finally:
+            conn.rollback()
+            conn.close()
+
+    return generate()
+
 def check_connection():
     """Check if database connection is working"""
     try:
@@ -9,6 +9,7 @@ from pathlib import Path
 import json
 import time
 from datetime import datetime
+from database_connection import bulk_import_csv, find_existing_plates
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -269,11 +270,12 @@ class DatabaseManager:
             elif table == 'company':
                 return self.import_companies(file_path)
             
-            # Read the CSV file
-            df = pd.read_csv(file_path)
+            # Stream the file through COPY into a staging table and merge
+            # it with ON CONFLICT DO NOTHING
+            csv_columns = pd.read_csv(file_path, nrows=0).columns.tolist()
             
             with self.status_output:
-                print(f"🔄 Importing {len(df)} rows to table '{table}' from '{file_path}'...")
+                print(f"🔄 Importing '{file_path}' to table '{table}'...")
                 
                 # Get column information from the table
                 engine = self.get_engine()
@@ -282,118 +284,30 @@ class DatabaseManager:
                     table_columns = table_cols['column_name'].tolist()
                 
                 print(f"  - Table columns: {', '.join(table_columns)}")
-                print(f"  - CSV columns: {', '.join(df.columns)}")
+                print(f"  - CSV columns: {', '.join(csv_columns)}")
                 
                 # Check for required columns
-                missing_cols = [col for col in table_columns if col not in df.columns and col not in ['id', 'created_at', 'updated_at']]
+                missing_cols = [col for col in table_columns if col not in csv_columns and col not in ['id', 'created_at', 'updated_at']]
                 if missing_cols:
                     print(f"⚠️ Missing columns in CSV: {', '.join(missing_cols)}")
-                    print("Will proceed with import anyway, missing columns will be NULL")
+                    print("Will proceed with import anyway, missing columns will use their defaults")
                     print("Please wait...")
                 
-                # Connect to database
                 conn = self.get_connection()
-                cursor = conn.cursor()
-                
-                # Set longer timeout for batch operations
-                cursor.execute("SET statement_timeout = '600000'")  # 10 minutes
-                
-                # Import in smaller batches with more error handling
-                BATCH_SIZE = 50  # Smaller batch size for more frequent commits
-                imported = 0
-                skipped = 0
-                error_count = 0
-                
-                # Save failed rows to retry later
-                failed_rows = []
-                
-                for i in range(0, len(df), BATCH_SIZE):
-                    batch = df.iloc[i:i+BATCH_SIZE]
-                    batch_failed = False
-                    
-                    try:
-                        for _, row in batch.iterrows():
-                            try:
-                                # Prepare columns and values
-                                valid_cols = [col for col in row.index if col in table_columns and pd.notna(row[col])]
-                                values = [row[col] for col in valid_cols]
-                                placeholders = ['%s'] * len(valid_cols)
-                                
-                                # Skip empty rows
-                                if not valid_cols:
-                                    skipped += 1
-                                    continue
-                                
-                                # Create and execute SQL
-                                sql = f"INSERT INTO {table} ({', '.join(valid_cols)}) VALUES ({', '.join(placeholders)})"
-                                
-                                try:
-                                    cursor.execute(sql, values)
-                                    imported += 1
-                                except psycopg2.errors.UniqueViolation:
-                                    # Skip duplicates
-                                    skipped += 1
-                                    conn.rollback()  # Roll back transaction to continue
-                                except Exception as e:
-                                    # Save failed row for retry
-                                    failed_rows.append(row)
-                                    skipped += 1
-                                    error_count += 1
-                                    conn.rollback()
-                            
-                            except Exception as e:
-                                skipped += 1
-                                error_count += 1
-                                print(f"  ⚠️ Error processing row: {e}")
-                        
-                        # Commit after processing all rows in batch (if no errors)
-                        conn.commit()
-                        
-                    except Exception as batch_error:
-                        # If batch fails, rollback and try individual rows
-                        print(f"  ⚠️ Batch error: {batch_error}")
-                        conn.rollback()
-                        batch_failed = True
-                    
-                    # Report progress
-                    if i % (BATCH_SIZE * 10) == 0 or batch_failed:
-                        print(f"  - Progress: {imported} imported, {skipped} skipped, {error_count} errors")
-                
-                # Try to import failed rows one by one
-                if failed_rows:
-                    print(f"Retrying {len(failed_rows)} failed rows individually...")
-                    retry_success = 0
-                    
-                    for row in failed_rows:
-                        try:
-                            # Prepare columns and values
-                            valid_cols = [col for col in row.index if col in table_columns and pd.notna(row[col])]
-                            values = [row[col] for col in valid_cols]
-                            placeholders = ['%s'] * len(valid_cols)
-                            
-                            # Create and execute SQL
-                            sql = f"INSERT INTO {table} ({', '.join(valid_cols)}) VALUES ({', '.join(placeholders)})"
-                            
-                            cursor.execute(sql, values)
-                            conn.commit()
-                            retry_success += 1
-                            imported += 1
-                            skipped -= 1  # Adjust since we counted this as skipped earlier
-                            
-                        except Exception as retry_error:
-                            conn.rollback()
-                    
-                    print(f"Retry results: {retry_success} of {len(failed_rows)} succeeded")
-                
-                cursor.close()
-                conn.close()
+                try:
+                    result = bulk_import_csv(conn, table, file_path)
+                finally:
+                    conn.close()
                 
-                print(f"✅ Import complete: {imported} rows imported, {skipped} rows skipped, {error_count} errors")
+                for rejected in result['rejected_rows']:
+                    print(f"  ⚠️ Rejected row {rejected['row']}: {rejected['error']}")
+                print(f"✅ Import complete: {result['inserted']} rows imported, {result['skipped']} rows skipped, "
+                      f"{result['rejected']} rows rejected")
                 
                 # Update table counts
                 self.get_table_counts()
                 
-                return True
+                return result
         
         except Exception as e:
             with self.status_output:
@@ -443,12 +357,12 @@ class DatabaseManager:
                 
                 # Using the existing license plate cleaner if available
                 try:
-                    from vehicle_plate_cleaner import clean_license_plate
+                    from plate_normalizer import normalize_series
                     has_cleaner = True
-                    print("  ✓ Using vehicle_plate_cleaner for standardization")
+                    print("  ✓ Using plate_normalizer for standardization")
                 except ImportError:
                     has_cleaner = False
-                    print("  ⚠️ vehicle_plate_cleaner not found, using basic cleaning")
+                    print("  ⚠️ plate_normalizer not found, using basic cleaning")
                     
                 # Basic cleaning function if the cleaner is not available
                 def basic_clean_plate(plate):
@@ -458,7 +372,7 @@ class DatabaseManager:
                 
                 # Apply cleaning function to all plates
                 if has_cleaner:
-                    df['cleaned_plate'] = df['license_plate'].apply(clean_license_plate)
+                    df['cleaned_plate'] = normalize_series(df['license_plate'])
                 else:
                     df['cleaned_plate'] = df['license_plate'].apply(basic_clean_plate)
                 
@@ -496,17 +410,37 @@ class DatabaseManager:
                     table_cols = pd.read_sql("SELECT column_name FROM information_schema.columns WHERE table_name = 'vehicle'", connection)
                     table_columns = table_cols['column_name'].tolist()
                     
-                    # Also check for existing license plates in the database
-                    existing_plates_df = pd.read_sql("SELECT license_plate FROM vehicle", connection)
+                # The persisted cleaned_plate column only holds plates
+                # normalized by plate_normalizer
+                has_plate_column = 'cleaned_plate' in table_columns
+                if has_plate_column and not has_cleaner:
+                    table_columns.remove('cleaned_plate')
+                
+                # Look up the input plates through the cleaned_plate index,
+                # after normalizing vehicles written without a cleaned_plate
+                use_plate_index = has_cleaner and has_plate_column
+                if use_plate_index:
+                    from backfill_cleaned_plates import ensure_cleaned_plates
+                    conn = self.get_connection()
+                    try:
+                        backfilled = ensure_cleaned_plates(conn)
+                        if backfilled:
+                            print(f"  - Backfilled cleaned_plate for {backfilled} existing vehicles")
+                        existing_plates = find_existing_plates(conn, df['cleaned_plate'])
+                    except Exception as e:
+                        print(f"  ⚠️ Could not backfill cleaned_plate, cleaning every existing plate instead: {e}")
+                        use_plate_index = False
+                    finally:
+                        conn.close()
+                if not use_plate_index:
+                    with engine.connect() as connection:
+                        # Also check for existing license plates in the database
+                        existing_plates_df = pd.read_sql("SELECT license_plate FROM vehicle", connection)
                     existing_plates = set()
                     
                     # Clean existing plates for comparison
                     if has_cleaner:
-                        for plate in existing_plates_df['license_plate']:
-                            if plate and not pd.isna(plate):
-                                cleaned = clean_license_plate(plate)
-                                if cleaned:
-                                    existing_plates.add(cleaned)
+                        existing_plates = set(normalize_series(existing_plates_df['license_plate'])) - {''}
                     else:
                         for plate in existing_plates_df['license_plate']:
                             if plate and not pd.isna(plate):
@@ -514,17 +448,17 @@ class DatabaseManager:
                                 if cleaned:
                                     existing_plates.add(cleaned)
                     
-                    if existing_plates:
-                        print(f"  - Found {len(existing_plates)} existing license plates in the database")
-                        
-                        # Check for conflicts with database
-                        conflicts_with_db = df[df['cleaned_plate'].isin(existing_plates)]
-                        if not conflicts_with_db.empty:
-                            print(f"  ⚠️ Found {len(conflicts_with_db)} plates that already exist in the database")
-                            print(f"    Sample conflicting plates: {', '.join(conflicts_with_db['license_plate'].head(5).tolist())}")
-                            if len(conflicts_with_db) > 5:
-                                print(f"    ... and {len(conflicts_with_db) - 5} more")
-                            print("    These plates will be skipped during import.")
+                if existing_plates:
+                    print(f"  - Found {len(existing_plates)} existing license plates in the database")
+                    
+                    # Check for conflicts with database
+                    conflicts_with_db = df[df['cleaned_plate'].isin(existing_plates)]
+                    if not conflicts_with_db.empty:
+                        print(f"  ⚠️ Found {len(conflicts_with_db)} plates that already exist in the database")
+                        print(f"    Sample conflicting plates: {', '.join(conflicts_with_db['license_plate'].head(5).tolist())}")
+                        if len(conflicts_with_db) > 5:
+                            print(f"    ... and {len(conflicts_with_db) - 5} more")
+                        print("    These plates will be skipped during import.")
                 
                 # Connect to database with psycopg2 for more control
                 conn = self.get_connection()
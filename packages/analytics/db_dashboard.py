@@ -8,14 +8,15 @@ A comprehensive analytics dashboard for waste collection data, reading directly
 import os
 import sys
 import json
+import threading
 import uuid  # Required for UUID type checking
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from tqdm import tqdm
 
 import dash
 from dash import dcc, html, Input, Output, State, callback, dash_table, callback_context
+from flask import abort, jsonify, request
 import plotly.express as px
 import plotly.graph_objects as go
 
@@ -25,11 +26,17 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
 
-from database import read_companies, read_vehicles, read_weigh_events, check_connection, write_multiple_weigh_events, get_db_engine
+from database import read_companies, read_vehicles, check_connection, write_multiple_weigh_events, get_pool_stats, bulk_update_weigh_event_remarks, WeighEventLoader, merge_weigh_events
 
 # Import authentication module
 from auth import AuthManager
 from dash_auth_check import auto_login_from_portal
+from session_pairing import calculate_session_net_weights, NET_WEIGHT_COLUMNS
+from tare_estimation import TareWeightIndex
+from snapshot_store import SnapshotStore
+from filter_cache import FilteredResultCache, filter_state_mask
+from aggregate_cube import AggregateCube, aggregate, rollup
+from filter_options_index import FilterOptionsIndex
 
 # Enable debug mode for console output
 DEBUG = True
@@ -142,6 +149,9 @@ else:
     debug_print(f"WARNING: {connection_msg}")
     debug_print("Dashboard will run but may not display data")
 
+# Tracks the weigh_event high-water mark so auto-refresh only reads new rows
+weigh_event_loader = WeighEventLoader()
+
 # Load datasets
 def load_data():
     debug_print("Loading datasets from database...")
@@ -154,7 +164,7 @@ def load_data():
     try:
         # Load the datasets directly from database
         debug_print("Reading weigh events from database")
-        weigh_df = read_weigh_events()
+        weigh_df = weigh_event_loader.load_all_events()
         debug_print(f"Loaded {len(weigh_df)} weigh event records")
         
         debug_print("Reading vehicles from database")
@@ -168,124 +178,10 @@ def load_data():
         if weigh_df.empty:
             debug_print("WARNING: No weigh events found in database")
             return pd.DataFrame(), pd.DataFrame(), vehicles_df, companies_df
-            
-        # Convert event_time to datetime
-        # Convert event_time to datetime and strip timezone to avoid filtering issues
-        weigh_df['event_time'] = pd.to_datetime(weigh_df['event_time']).dt.tz_localize(None)
-        
-        # Convert from GMT to Zambia time (GMT+2)
-        weigh_df['event_time_local'] = weigh_df['event_time'] + timedelta(hours=2)
-        
-        # Extract date components using local time
-        weigh_df['date'] = weigh_df['event_time_local'].dt.date
-        weigh_df['day'] = weigh_df['event_time_local'].dt.day
-        weigh_df['month'] = weigh_df['event_time_local'].dt.month
-        weigh_df['month_name'] = weigh_df['event_time_local'].dt.strftime('%B')
-        weigh_df['year'] = weigh_df['event_time_local'].dt.year
-        weigh_df['day_of_week'] = weigh_df['event_time_local'].dt.day_name()
-        weigh_df['day_of_week_num'] = weigh_df['event_time_local'].dt.dayofweek
-        weigh_df['hour'] = weigh_df['event_time_local'].dt.hour
-        weigh_df['week'] = weigh_df['event_time_local'].dt.isocalendar().week
-        
-        # Map event types - handles both numeric types (1,2) and string types ('ARRIVAL','DEPARTURE')
-        if 'event_type' in weigh_df.columns:
-            first_event_type = weigh_df['event_type'].iloc[0] if not weigh_df.empty else None
-            
-            if isinstance(first_event_type, (int, float)):
-                # Numeric event types (1 = entry, 2 = exit)
-                event_type_map = {1: 'Entry (Gross Weight)', 2: 'Exit (Tare Weight)'}
-                weigh_df['event_type_name'] = weigh_df['event_type'].map(event_type_map)
-                # Convert to standard values for further processing
-                weigh_df['event_type_std'] = weigh_df['event_type']
-            else:
-                # String event types ('ARRIVAL' = entry, 'DEPARTURE' = exit)
-                event_type_map = {'ARRIVAL': 'Entry (Gross Weight)', 'DEPARTURE': 'Exit (Tare Weight)'}
-                weigh_df['event_type_name'] = weigh_df['event_type'].map(event_type_map)
-                # Convert to standard values for further processing
-                weigh_df['event_type_std'] = weigh_df['event_type'].map({'ARRIVAL': 1, 'DEPARTURE': 2})
-        
-        # Add delivery type (normal vs recycle)
-        # Recycle events have "R" in the remarks, but exclude corrected events
-        # Corrected events start with "CORRECTED:" and should be treated as normal disposal
-        weigh_df['is_recycle'] = (
-            weigh_df['remarks'].str.contains('R', case=False, na=False) & 
-            ~weigh_df['remarks'].str.startswith('CORRECTED:', na=False)
-        )
-        weigh_df['delivery_type'] = weigh_df['is_recycle'].map({True: 'Recycle Collection', False: 'Normal Disposal'})
         
-        # Apply data quality corrections for misclassified recycling events
-        debug_print("Checking for misclassified recycling events...")
-        weigh_df, corrections_made = correct_misclassified_recycling_events(weigh_df, companies_df, persist_to_db=True)
-        if corrections_made:
-            debug_print(f"Applied {len(corrections_made)} data quality corrections")
-        
-        # Clean up location names by extracting original locations from correction messages
-        debug_print("Cleaning up location names...")
-        weigh_df['clean_location'] = weigh_df['remarks'].apply(extract_clean_location)
-        
-        # Calculate initial net weights for historical tare weight estimation
-        debug_print("Calculating initial net weights for historical data...")
-        initial_net_weights_df = calculate_net_weights(weigh_df)
-        
-        # Auto-close sessions that have been open for more than 2 hours
-        debug_print("Checking for open sessions to auto-close...")
-        weigh_df = auto_close_sessions(weigh_df, initial_net_weights_df, max_hours=2)
-        
-        # Recalculate date components for any new synthetic exit events
-        weigh_df['event_time'] = pd.to_datetime(weigh_df['event_time']).dt.tz_localize(None)
-        # Convert from GMT to Zambia time (GMT+2)
-        weigh_df['event_time_local'] = weigh_df['event_time'] + timedelta(hours=2)
-        weigh_df['date'] = weigh_df['event_time_local'].dt.date
-        weigh_df['day'] = weigh_df['event_time_local'].dt.day
-        weigh_df['month'] = weigh_df['event_time_local'].dt.month
-        weigh_df['month_name'] = weigh_df['event_time_local'].dt.strftime('%B')
-        weigh_df['year'] = weigh_df['event_time_local'].dt.year
-        weigh_df['day_of_week'] = weigh_df['event_time_local'].dt.day_name()
-        weigh_df['day_of_week_num'] = weigh_df['event_time_local'].dt.dayofweek
-        weigh_df['hour'] = weigh_df['event_time_local'].dt.hour
-        weigh_df['week'] = weigh_df['event_time_local'].dt.isocalendar().week
-        
-        # Merge with vehicle and company data
-        try:
-            merged_df = weigh_df.merge(vehicles_df, on='vehicle_id', how='left')
-            if 'company_id_x' in merged_df.columns and 'company_id_y' in merged_df.columns:
-                # Handle case where company_id appears in both tables
-                merged_df = merged_df.rename(columns={'company_id_x': 'company_id'})
-                merged_df = merged_df.drop(columns=['company_id_y'])
-            
-            # Check if name column exists in companies_df
-            if 'name' in companies_df.columns:
-                # Include type_code in the merge for pricing calculations
-                company_cols = ['company_id', 'name']
-                if 'type_code' in companies_df.columns:
-                    company_cols.append('type_code')
-                merged_df = merged_df.merge(companies_df[company_cols], on='company_id', how='left')
-                merged_df.rename(columns={'name': 'company_name'}, inplace=True)
-            else:
-                # Add placeholder for company_name and type_code
-                merged_df['company_name'] = 'Unknown'
-                merged_df['type_code'] = None
-            
-            # Ensure company_name is properly formatted as strings
-            merged_df['company_name'] = merged_df['company_name'].astype(str)
-            
-            # Add clean location field to merged_df as well
-            if 'clean_location' in weigh_df.columns:
-                merged_df['clean_location'] = weigh_df['clean_location']
-            
-            return merged_df, weigh_df, vehicles_df, companies_df
-            
-        except Exception as e:
-            print(f"Error during merge: {e}")
-            # Create basic merged_df without joins
-            merged_df = weigh_df.copy()
-            merged_df['company_name'] = 'Unknown'
-            # Ensure company_name is properly formatted as strings
-            merged_df['company_name'] = merged_df['company_name'].astype(str)
-            # Add clean location field to merged_df as well
-            if 'clean_location' in weigh_df.columns:
-                merged_df['clean_location'] = weigh_df['clean_location']
-            return merged_df, weigh_df, vehicles_df, companies_df
+        weigh_df = prepare_weigh_events(weigh_df, companies_df)
+        merged_df = merge_reference_data(weigh_df, vehicles_df, companies_df)
+        return merged_df, weigh_df, vehicles_df, companies_df
             
     except Exception as e:
         import traceback
@@ -294,55 +190,135 @@ def load_data():
         return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
 
 
-def calculate_tiered_pricing(net_weight_kg, company_type, is_recycle=False):
+def add_time_components(weigh_df):
+    """Add local-time date components derived from event_time"""
+    # Convert event_time to datetime and strip timezone to avoid filtering issues
+    weigh_df['event_time'] = pd.to_datetime(weigh_df['event_time']).dt.tz_localize(None)
+    
+    # Convert from GMT to Zambia time (GMT+2)
+    weigh_df['event_time_local'] = weigh_df['event_time'] + timedelta(hours=2)
+    
+    # Extract date components using local time
+    weigh_df['date'] = weigh_df['event_time_local'].dt.date
+    weigh_df['day'] = weigh_df['event_time_local'].dt.day
+    weigh_df['month'] = weigh_df['event_time_local'].dt.month
+    weigh_df['month_name'] = weigh_df['event_time_local'].dt.strftime('%B')
+    weigh_df['year'] = weigh_df['event_time_local'].dt.year
+    weigh_df['day_of_week'] = weigh_df['event_time_local'].dt.day_name()
+    weigh_df['day_of_week_num'] = weigh_df['event_time_local'].dt.dayofweek
+    weigh_df['hour'] = weigh_df['event_time_local'].dt.hour
+    weigh_df['week'] = weigh_df['event_time_local'].dt.isocalendar().week
+    return weigh_df
+
+
+def prepare_weigh_events(weigh_df, companies_df, history_net_weights_df=None, tare_index=None):
     """
-    Calculate pricing based on company type and tonnage tiers.
+    Derive dashboard columns for raw weigh events.
     
-    Args:
-        net_weight_kg: Weight in kilograms
-        company_type: Company type code (6, 7, 8, or other)
-        is_recycle: Whether this is a recycle collection
+    Adds time components, standardized event types and delivery type, applies
+    recycling corrections and auto-closes stale sessions. Works on the full
+    table or on the events of a subset of sessions.
     
-    Returns:
-        tuple: (fee_per_tonne, fee_amount, pricing_tier)
+    Args:
+        weigh_df: DataFrame of raw weigh events
+        companies_df: DataFrame with company information
+        history_net_weights_df: Net weights used for tare estimation when
+            auto-closing; computed from weigh_df when not given
+        tare_index: Prebuilt TareWeightIndex to use instead of the history
     """
-    if is_recycle:
-        return 0, 0, "Recycle (No Charge)"
-    
-    # Convert to tonnes and apply ceiling (no fractional billing)
-    tonnes = int(net_weight_kg / 1000) + (1 if (net_weight_kg % 1000) > 0 else 0)
-    
-    if company_type == 8:
-        # Type 8 doesn't pay anything
-        return 0, 0, "Type 8 (No Charge)"
-    elif company_type == 7:
-        # Type 7: K50 per tonne
-        fee_per_tonne = 50
-        fee_amount = tonnes * fee_per_tonne
-        return fee_per_tonne, fee_amount, f"Type 7 (K{fee_per_tonne}/tonne)"
-    elif company_type == 6:
-        # Type 6: Tiered pricing
-        # K50 from 0 to 5 tonnes
-        # K100 from 5.00001 to 10 tonnes  
-        # K150 from 10.00001 tonnes
-        if tonnes <= 5:
-            fee_per_tonne = 50
-            fee_amount = tonnes * fee_per_tonne
-            tier = "0-5 tonnes"
-        elif tonnes <= 10:
-            fee_per_tonne = 100
-            fee_amount = tonnes * fee_per_tonne
-            tier = "5-10 tonnes"
+    weigh_df = add_time_components(weigh_df)
+    
+    # Map event types - handles both numeric types (1,2) and string types ('ARRIVAL','DEPARTURE')
+    if 'event_type' in weigh_df.columns:
+        first_event_type = weigh_df['event_type'].iloc[0] if not weigh_df.empty else None
+        
+        if isinstance(first_event_type, (int, float)):
+            # Numeric event types (1 = entry, 2 = exit)
+            event_type_map = {1: 'Entry (Gross Weight)', 2: 'Exit (Tare Weight)'}
+            weigh_df['event_type_name'] = weigh_df['event_type'].map(event_type_map)
+            # Convert to standard values for further processing
+            weigh_df['event_type_std'] = weigh_df['event_type']
         else:
-            fee_per_tonne = 150
-            fee_amount = tonnes * fee_per_tonne
-            tier = "10+ tonnes"
-        return fee_per_tonne, fee_amount, f"Type 6 ({tier}: K{fee_per_tonne}/tonne)"
-    else:
-        # Everyone else: K150 per tonne
-        fee_per_tonne = 150
-        fee_amount = tonnes * fee_per_tonne
-        return fee_per_tonne, fee_amount, f"Standard (K{fee_per_tonne}/tonne)"
+            # String event types ('ARRIVAL' = entry, 'DEPARTURE' = exit)
+            event_type_map = {'ARRIVAL': 'Entry (Gross Weight)', 'DEPARTURE': 'Exit (Tare Weight)'}
+            weigh_df['event_type_name'] = weigh_df['event_type'].map(event_type_map)
+            # Convert to standard values for further processing
+            weigh_df['event_type_std'] = weigh_df['event_type'].map({'ARRIVAL': 1, 'DEPARTURE': 2})
+    
+    # Add delivery type (normal vs recycle)
+    # Recycle events have "R" in the remarks, but exclude corrected events
+    # Corrected events start with "CORRECTED:" and should be treated as normal disposal
+    weigh_df['is_recycle'] = (
+        weigh_df['remarks'].str.contains('R', case=False, na=False) & 
+        ~weigh_df['remarks'].str.startswith('CORRECTED:', na=False)
+    )
+    weigh_df['delivery_type'] = weigh_df['is_recycle'].map({True: 'Recycle Collection', False: 'Normal Disposal'})
+    
+    # Apply data quality corrections for misclassified recycling events
+    debug_print("Checking for misclassified recycling events...")
+    weigh_df, corrections_made = correct_misclassified_recycling_events(weigh_df, companies_df, persist_to_db=True)
+    if corrections_made:
+        debug_print(f"Applied {len(corrections_made)} data quality corrections")
+    
+    # Clean up location names by extracting original locations from correction messages
+    debug_print("Cleaning up location names...")
+    weigh_df['clean_location'] = weigh_df['remarks'].apply(extract_clean_location)
+    
+    # Calculate initial net weights for historical tare weight estimation
+    if tare_index is None and history_net_weights_df is None:
+        debug_print("Calculating initial net weights for historical data...")
+        history_net_weights_df = calculate_net_weights(weigh_df)
+    
+    # Auto-close sessions that have been open for more than 2 hours
+    debug_print("Checking for open sessions to auto-close...")
+    weigh_df = auto_close_sessions(weigh_df, history_net_weights_df, max_hours=2, tare_index=tare_index)
+    
+    # Recalculate date components for any new synthetic exit events
+    return add_time_components(weigh_df)
+
+
+def merge_reference_data(weigh_df, vehicles_df, companies_df):
+    """Join weigh events with vehicle and company details"""
+    try:
+        merged_df = weigh_df.merge(vehicles_df, on='vehicle_id', how='left')
+        if 'company_id_x' in merged_df.columns and 'company_id_y' in merged_df.columns:
+            # Handle case where company_id appears in both tables
+            merged_df = merged_df.rename(columns={'company_id_x': 'company_id'})
+            merged_df = merged_df.drop(columns=['company_id_y'])
+        
+        # Check if name column exists in companies_df
+        if 'name' in companies_df.columns:
+            # Include type_code in the merge for pricing calculations
+            company_cols = ['company_id', 'name']
+            if 'type_code' in companies_df.columns:
+                company_cols.append('type_code')
+            merged_df = merged_df.merge(companies_df[company_cols], on='company_id', how='left')
+            merged_df.rename(columns={'name': 'company_name'}, inplace=True)
+        else:
+            # Add placeholder for company_name and type_code
+            merged_df['company_name'] = 'Unknown'
+            merged_df['type_code'] = None
+        
+        # Ensure company_name is properly formatted as strings
+        merged_df['company_name'] = merged_df['company_name'].astype(str)
+        
+        # Add clean location field to merged_df as well
+        if 'clean_location' in weigh_df.columns:
+            merged_df['clean_location'] = weigh_df['clean_location']
+        
+        return merged_df
+        
+    except Exception as e:
+        print(f"Error during merge: {e}")
+        # Create basic merged_df without joins
+        merged_df = weigh_df.copy()
+        merged_df['company_name'] = 'Unknown'
+        # Ensure company_name is properly formatted as strings
+        merged_df['company_name'] = merged_df['company_name'].astype(str)
+        # Add clean location field to merged_df as well
+        if 'clean_location' in weigh_df.columns:
+            merged_df['clean_location'] = weigh_df['clean_location']
+        return merged_df
 
 
 # Calculate net weights for entry-exit pairs
@@ -357,110 +333,48 @@ def find_open_sessions(df, max_hours=2):
     try:
         current_time = datetime.now()
         
-        # Group by session_id
-        sessions = df.groupby('session_id')
-        open_sessions = []
-        
-        for session_id, group in sessions:
-            # Check if session has both entry and exit
-            if 'event_type_std' in group.columns:
-                entry = group[group['event_type_std'] == 1]
-                exit = group[group['event_type_std'] == 2]
-            else:
-                # Handle string and numeric event types
-                if isinstance(group['event_type'].iloc[0], str):
-                    entry = group[group['event_type'] == 'ARRIVAL']
-                    exit = group[group['event_type'] == 'DEPARTURE']
-                else:
-                    entry = group[group['event_type'] == 1]
-                    exit = group[group['event_type'] == 2]
-            
-            # If has entry but no exit, check time
-            if not entry.empty and exit.empty:
-                entry_time = entry.iloc[0]['event_time']
-                # Convert to timezone-naive datetime for comparison
-                if hasattr(entry_time, 'tz_localize'):
-                    entry_time = entry_time.tz_localize(None) if entry_time.tz is not None else entry_time
-                
-                time_diff = current_time - entry_time
-                if time_diff.total_seconds() / 3600 > max_hours:
-                    open_sessions.append({
-                        'session_id': session_id,
-                        'entry_time': entry_time,
-                        'vehicle_id': entry.iloc[0]['vehicle_id'],
-                        'license_plate': entry.iloc[0].get('license_plate', 'Unknown'),
-                        'company_name': entry.iloc[0].get('company_name', 'Unknown'),
-                        'entry_weight': entry.iloc[0]['weight_kg'],
-                        'hours_open': time_diff.total_seconds() / 3600,
-                        'remarks': entry.iloc[0].get('remarks', ''),
-                        'is_recycle': 'R' in str(entry.iloc[0].get('remarks', '')).strip().upper()
-                    })
-        
-        return pd.DataFrame(open_sessions)
+        # Split entry and exit events (standardized field, string or numeric types)
+        if 'event_type_std' in df.columns:
+            entry_mask = df['event_type_std'] == 1
+            exit_mask = df['event_type_std'] == 2
+        else:
+            entry_mask = df['event_type'].isin([1, 'ARRIVAL'])
+            exit_mask = df['event_type'].isin([2, 'DEPARTURE'])
+        
+        # Sessions with an entry but no exit, keeping the first entry of each
+        closed_sessions = df.loc[exit_mask, 'session_id'].unique()
+        entries = df[entry_mask & ~df['session_id'].isin(closed_sessions)]
+        entries = entries.drop_duplicates(subset='session_id', keep='first').sort_values('session_id')
+        if entries.empty:
+            return pd.DataFrame()
+        
+        # Convert to timezone-naive datetime for comparison
+        entry_time = pd.to_datetime(entries['event_time'])
+        if entry_time.dt.tz is not None:
+            entry_time = entry_time.dt.tz_localize(None)
+        hours_open = (current_time - entry_time).dt.total_seconds() / 3600
+        
+        overdue = (hours_open > max_hours).values
+        entries = entries[overdue]
+        remarks = entries['remarks'] if 'remarks' in entries.columns else pd.Series('', index=entries.index)
+        
+        return pd.DataFrame({
+            'session_id': entries['session_id'].values,
+            'entry_time': entry_time[overdue].values,
+            'vehicle_id': entries['vehicle_id'].values,
+            'license_plate': entries['license_plate'].values if 'license_plate' in entries.columns else 'Unknown',
+            'company_name': entries['company_name'].values if 'company_name' in entries.columns else 'Unknown',
+            'entry_weight': entries['weight_kg'].values,
+            'hours_open': hours_open[overdue].values,
+            'remarks': remarks.values,
+            'is_recycle': remarks.astype(str).str.strip().str.upper().str.contains('R', regex=False).values
+        })
         
     except Exception as e:
         debug_print(f"Error finding open sessions: {e}")
         return pd.DataFrame()
 
-def estimate_tare_weight(vehicle_id, license_plate, entry_weight, historical_df, is_recycle=False):
-    """
-    Estimate tare weight for a vehicle based on historical data
-    Returns estimated tare weight and confidence level
-    """
-    try:
-        if historical_df.empty:
-            # Default estimates based on entry weight and vehicle type
-            if is_recycle:
-                # Recycle vehicles typically have lower tare weights
-                estimated_tare = max(entry_weight * 0.15, 500)  # 15% of entry weight, min 500kg
-            else:
-                # Regular waste vehicles
-                estimated_tare = max(entry_weight * 0.25, 1000)  # 25% of entry weight, min 1000kg
-            return estimated_tare, "low"
-        
-        # Look for historical data for this specific vehicle
-        vehicle_history = historical_df[
-            (historical_df['vehicle_id'] == vehicle_id) | 
-            (historical_df['license_plate'] == license_plate)
-        ]
-        
-        if not vehicle_history.empty and 'exit_weight' in vehicle_history.columns:
-            # Use average of recent exit weights
-            recent_exits = vehicle_history['exit_weight'].dropna()
-            if len(recent_exits) >= 3:
-                estimated_tare = recent_exits.tail(5).mean()  # Average of last 5 exits
-                return estimated_tare, "high"
-            elif len(recent_exits) >= 1:
-                estimated_tare = recent_exits.mean()
-                return estimated_tare, "medium"
-        
-        # Look for similar vehicles from same company
-        if 'company_name' in historical_df.columns:
-            company_name = historical_df[historical_df['vehicle_id'] == vehicle_id]['company_name'].iloc[0] if not historical_df[historical_df['vehicle_id'] == vehicle_id].empty else None
-            if company_name:
-                company_vehicles = historical_df[historical_df['company_name'] == company_name]
-                if not company_vehicles.empty and 'exit_weight' in company_vehicles.columns:
-                    company_exits = company_vehicles['exit_weight'].dropna()
-                    if len(company_exits) >= 3:
-                        estimated_tare = company_exits.mean()
-                        return estimated_tare, "medium"
-        
-        # Fall back to general estimates based on entry weight ranges
-        if entry_weight < 3000:  # Light vehicle
-            estimated_tare = max(entry_weight * 0.20, 800)
-        elif entry_weight < 8000:  # Medium vehicle
-            estimated_tare = max(entry_weight * 0.25, 1200)
-        else:  # Heavy vehicle
-            estimated_tare = max(entry_weight * 0.30, 2000)
-        
-        return estimated_tare, "low"
-        
-    except Exception as e:
-        debug_print(f"Error estimating tare weight: {e}")
-        # Emergency fallback
-        return max(entry_weight * 0.25, 1000), "low"
-
-def auto_close_sessions(weigh_df, net_weights_df, max_hours=4, persist_to_db=True):
+def auto_close_sessions(weigh_df, net_weights_df, max_hours=4, persist_to_db=True, tare_index=None):
     """
     Automatically close sessions that have been open for more than max_hours
     Returns updated weigh_df with synthetic exit events and notes
@@ -470,6 +384,7 @@ def auto_close_sessions(weigh_df, net_weights_df, max_hours=4, persist_to_db=Tru
         net_weights_df: DataFrame of historical net weights for tare estimation
         max_hours: Maximum hours before auto-closing (default: 2)
         persist_to_db: Whether to save synthetic exits to database (default: True)
+        tare_index: Prebuilt TareWeightIndex; built from net_weights_df if not given
     """
     try:
         max_hours = 6
@@ -481,103 +396,86 @@ def auto_close_sessions(weigh_df, net_weights_df, max_hours=4, persist_to_db=Tru
         
         debug_print(f"Found {len(open_sessions)} sessions to auto-close")
         
-        synthetic_exits = []
+        # Estimate tare weights from the indexed history
+        if tare_index is None:
+            tare_index = TareWeightIndex(net_weights_df)
+        estimated_tares, confidences = tare_index.estimate_many(open_sessions)
+        
+        # Determine event type format based on existing data
+        event_type_exit = 2  # Default numeric
+        if not weigh_df.empty and 'event_type' in weigh_df.columns:
+            first_event = weigh_df['event_type'].iloc[0]
+            if isinstance(first_event, str):
+                event_type_exit = 'DEPARTURE'
+        
+        # Create synthetic exit events
+        synthetic_df = pd.DataFrame({
+            'session_id': open_sessions['session_id'].values,
+            'vehicle_id': open_sessions['vehicle_id'].values,
+            'event_type': event_type_exit,
+            'event_time': pd.to_datetime(open_sessions['entry_time']) + timedelta(hours=max_hours),
+            'weight_kg': estimated_tares,
+            'license_plate': open_sessions['license_plate'].astype(str).values,
+            'company_name': open_sessions['company_name'].astype(str).values,
+            'remarks': [
+                f"AUTO-CLOSED: Session open >{max_hours}h. Estimated tare (confidence: {confidence}). Original: {remarks}"
+                for confidence, remarks in zip(confidences, open_sessions['remarks'])
+            ],
+            'auto_closed': True
+        })
         
-        for _, session in open_sessions.iterrows():
-            # Estimate tare weight
-            estimated_tare, confidence = estimate_tare_weight(
-                session['vehicle_id'],
-                session['license_plate'], 
-                session['entry_weight'],
-                net_weights_df,
-                session['is_recycle']
-            )
-            
-            # Create synthetic exit event
-            exit_time = session['entry_time'] + timedelta(hours=max_hours)
-            
-            # Determine event type format based on existing data
-            event_type_exit = 2  # Default numeric
-            if not weigh_df.empty and 'event_type' in weigh_df.columns:
-                first_event = weigh_df['event_type'].iloc[0]
-                if isinstance(first_event, str):
-                    event_type_exit = 'DEPARTURE'
-            
-            synthetic_exit = {
-                'session_id': session['session_id'],
-                'vehicle_id': session['vehicle_id'],
-                'event_type': event_type_exit,
-                'event_time': exit_time,
-                'weight_kg': float(estimated_tare),
-                'license_plate': str(session['license_plate']),
-                'company_name': str(session['company_name']),
-                'remarks': f"AUTO-CLOSED: Session open >{max_hours}h. Estimated tare (confidence: {confidence}). Original: {session['remarks']}",
-                'auto_closed': True
-            }
-            
-            # Copy other fields from the entry event if they exist in weigh_df
-            if 'company_id' in weigh_df.columns:
-                entry_data = weigh_df[weigh_df['session_id'] == session['session_id']]
-                if not entry_data.empty:
-                    for col in ['company_id', 'company_type', 'type_code', 'delivery_type']:
-                        if col in entry_data.columns:
-                            synthetic_exit[col] = entry_data.iloc[0][col]
-            
-            synthetic_exits.append(synthetic_exit)
+        # Copy other fields from the first event of each session if they exist in weigh_df
+        if 'company_id' in weigh_df.columns:
+            copy_cols = [col for col in ['company_id', 'company_type', 'type_code', 'delivery_type'] if col in weigh_df.columns]
+            first_events = weigh_df.loc[
+                weigh_df['session_id'].isin(open_sessions['session_id']), ['session_id'] + copy_cols
+            ].drop_duplicates(subset='session_id', keep='first')
+            synthetic_df = synthetic_df.merge(first_events, on='session_id', how='left')
         
-        if synthetic_exits:
-            # Convert to DataFrame and add to weigh_df
-            synthetic_df = pd.DataFrame(synthetic_exits)
-            
-            # Add time-based columns to match existing data structure
-            synthetic_df['event_time'] = pd.to_datetime(synthetic_df['event_time'])
-            # Convert from GMT to Zambia time (GMT+2)
-            synthetic_df['event_time_local'] = synthetic_df['event_time'] + timedelta(hours=2)
-            synthetic_df['date'] = synthetic_df['event_time_local'].dt.date
-            synthetic_df['day'] = synthetic_df['event_time_local'].dt.day
-            synthetic_df['month'] = synthetic_df['event_time_local'].dt.month
-            synthetic_df['month_name'] = synthetic_df['event_time_local'].dt.strftime('%B')
-            synthetic_df['year'] = synthetic_df['event_time_local'].dt.year
-            synthetic_df['day_of_week'] = synthetic_df['event_time_local'].dt.day_name()
-            synthetic_df['day_of_week_num'] = synthetic_df['event_time_local'].dt.dayofweek
-            synthetic_df['hour'] = synthetic_df['event_time_local'].dt.hour
-            synthetic_df['week'] = synthetic_df['event_time_local'].dt.isocalendar().week
-            
-            # Add event type mapping if needed
-            if 'event_type_std' in weigh_df.columns:
-                if isinstance(synthetic_df['event_type'].iloc[0], str):
-                    synthetic_df['event_type_std'] = synthetic_df['event_type'].map({'DEPARTURE': 2, 'ARRIVAL': 1})
+        # Add time-based columns to match existing data structure
+        synthetic_df['event_time'] = pd.to_datetime(synthetic_df['event_time'])
+        # Convert from GMT to Zambia time (GMT+2)
+        synthetic_df['event_time_local'] = synthetic_df['event_time'] + timedelta(hours=2)
+        synthetic_df['date'] = synthetic_df['event_time_local'].dt.date
+        synthetic_df['day'] = synthetic_df['event_time_local'].dt.day
+        synthetic_df['month'] = synthetic_df['event_time_local'].dt.month
+        synthetic_df['month_name'] = synthetic_df['event_time_local'].dt.strftime('%B')
+        synthetic_df['year'] = synthetic_df['event_time_local'].dt.year
+        synthetic_df['day_of_week'] = synthetic_df['event_time_local'].dt.day_name()
+        synthetic_df['day_of_week_num'] = synthetic_df['event_time_local'].dt.dayofweek
+        synthetic_df['hour'] = synthetic_df['event_time_local'].dt.hour
+        synthetic_df['week'] = synthetic_df['event_time_local'].dt.isocalendar().week
+        
+        # Add event type mapping if needed
+        if 'event_type_std' in weigh_df.columns:
+            if isinstance(synthetic_df['event_type'].iloc[0], str):
+                synthetic_df['event_type_std'] = synthetic_df['event_type'].map({'DEPARTURE': 2, 'ARRIVAL': 1})
+            else:
+                synthetic_df['event_type_std'] = synthetic_df['event_type']
+        
+        # Concatenate with original data
+        updated_df = pd.concat([weigh_df, synthetic_df], ignore_index=True)
+        
+        # Optionally persist synthetic exits to database
+        if persist_to_db:
+            try:
+                # Prepare data for database insertion (only include columns that exist in DB)
+                db_columns = ['session_id', 'vehicle_id', 'event_type', 'event_time', 'weight_kg', 'remarks']
+                if 'company_id' in synthetic_df.columns:
+                    db_columns.append('company_id')
+                
+                synthetic_db_df = synthetic_df[db_columns].copy()
+                
+                success = write_multiple_weigh_events(synthetic_db_df)
+                if success:
+                    debug_print(f"Successfully persisted {len(synthetic_df)} synthetic exit events to database")
                 else:
-                    synthetic_df['event_type_std'] = synthetic_df['event_type']
-            
-            # Concatenate with original data
-            updated_df = pd.concat([weigh_df, synthetic_df], ignore_index=True)
-            
-            # Optionally persist synthetic exits to database
-            if persist_to_db:
-                try:
-                    # Prepare data for database insertion (only include columns that exist in DB)
-                    db_columns = ['session_id', 'vehicle_id', 'event_type', 'event_time', 'weight_kg', 'remarks']
-                    if 'company_id' in synthetic_df.columns:
-                        db_columns.append('company_id')
-                    
-                    synthetic_db_df = synthetic_df[db_columns].copy()
-                    
-                    # Remove auto_closed column if it exists (not in original DB schema)
-                    synthetic_db_df = synthetic_db_df.drop(columns=['auto_closed'], errors='ignore')
-                    
-                    success = write_multiple_weigh_events(synthetic_db_df)
-                    if success:
-                        debug_print(f"Successfully persisted {len(synthetic_exits)} synthetic exit events to database")
-                    else:
-                        debug_print("Failed to persist synthetic exit events to database")
-                except Exception as e:
-                    debug_print(f"Error persisting synthetic exits to database: {e}")
-            
-            debug_print(f"Added {len(synthetic_exits)} synthetic exit events")
-            return updated_df
+                    debug_print("Failed to persist synthetic exit events to database")
+            except Exception as e:
+                debug_print(f"Error persisting synthetic exits to database: {e}")
         
-        return weigh_df
+        debug_print(f"Added {len(synthetic_df)} synthetic exit events")
+        return updated_df
         
     except Exception as e:
         debug_print(f"Error in auto_close_sessions: {e}")
@@ -600,188 +498,106 @@ def correct_misclassified_recycling_events(weigh_df, companies_df, persist_to_db
         return weigh_df, []
     
     try:
-        corrections_made = []
         df_corrected = weigh_df.copy()
         
         # Get entry and exit events 
         if 'event_type_std' in df_corrected.columns:
-            entry_events = df_corrected[df_corrected['event_type_std'] == 1]  # ARRIVAL
-            exit_events = df_corrected[df_corrected['event_type_std'] == 2]   # DEPARTURE
+            entry_mask = df_corrected['event_type_std'] == 1  # ARRIVAL
+            exit_mask = df_corrected['event_type_std'] == 2   # DEPARTURE
         else:
             # Fallback to original event_type column
-            entry_events = df_corrected[df_corrected['event_type'] == 1]
-            exit_events = df_corrected[df_corrected['event_type'] == 2]
+            entry_mask = df_corrected['event_type'] == 1
+            exit_mask = df_corrected['event_type'] == 2
         
         # Find recycling sessions that need correction
-        recycling_entries = entry_events[entry_events['is_recycle'] == True]
+        recycling_entries = df_corrected[entry_mask & (df_corrected['is_recycle'] == True)]
         debug_print(f"Found {len(recycling_entries)} recycling entries to check for misclassification")
         
-        events_to_update = []
+        # Pair every recycling entry with the first exit of its session in a single merge
+        exit_events = df_corrected.loc[exit_mask, ['session_id', 'event_id', 'weight_kg']]
+        exit_events = exit_events.drop_duplicates(subset='session_id', keep='first')
+        sessions = recycling_entries.merge(exit_events, on='session_id', how='inner', suffixes=('', '_exit'))
         
-        # Add progress bar for the correction process
-        progress_bar = tqdm(
-            recycling_entries.iterrows(), 
-            total=len(recycling_entries),
-            desc="Checking recycling events for misclassification",
-            unit="events",
-            ncols=100,
-            leave=False
-        )
+        # In recycling, trucks should leave heavier than they arrived, so
+        # exit weight < entry weight means this was actually normal disposal
+        sessions = sessions[sessions['weight_kg_exit'] < sessions['weight_kg']]
         
-        for _, entry in progress_bar:
-            session_id = entry['session_id']
-            
-            # Find corresponding exit event
-            exit_event = exit_events[exit_events['session_id'] == session_id]
-            
-            if not exit_event.empty:
-                exit_row = exit_event.iloc[0]
-                entry_weight = entry['weight_kg']
-                exit_weight = exit_row['weight_kg']
-                
-                # Check if this is actually normal disposal (exit weight < entry weight)
-                # In recycling, trucks should leave heavier than they arrived
-                if exit_weight < entry_weight:
-                    # Update progress bar with correction information
-                    progress_bar.set_postfix({
-                        'Session': str(session_id)[:8],
-                        'Status': 'CORRECTING',
-                        'Entry': f'{entry_weight}kg',
-                        'Exit': f'{exit_weight}kg'
-                    })
-                    
-                    # This should be corrected to normal disposal
-                    
-                    # Get company name for location
-                    company_name = entry.get('company_name', 'Unknown Company')
-                    if pd.isna(company_name) or str(company_name).strip() in ['Unknown', 'nan']:
-                        # Try to get from companies_df if available
-                        if not companies_df.empty and 'company_id' in entry:
-                            company_info = companies_df[companies_df['company_id'] == entry['company_id']]
-                            if not company_info.empty and 'name' in company_info.columns:
-                                company_name = company_info['name'].iloc[0]
-                    
-                    # Create correction note and remove recycling marker
-                    original_remarks = str(entry.get('remarks', ''))
-                    
-                    # Skip if already corrected (avoid duplicate corrections)
-                    if 'CORRECTED:' in original_remarks:
-                        continue
-                        
-                    correction_note = f"CORRECTED: Was recycling, now normal disposal. Exit weight ({exit_weight}kg) < Entry weight ({entry_weight}kg). Original remarks: {original_remarks}"
-                    
-                    # Update the DataFrame
-                    entry_mask = df_corrected['event_id'] == entry['event_id']
-                    exit_mask = df_corrected['event_id'] == exit_row['event_id']
-                    
-                    # Update entry event
-                    df_corrected.loc[entry_mask, 'is_recycle'] = False
-                    df_corrected.loc[entry_mask, 'delivery_type'] = 'Normal Disposal' 
-                    df_corrected.loc[entry_mask, 'location'] = str(company_name)
-                    df_corrected.loc[entry_mask, 'remarks'] = correction_note
-                    
-                    # Update exit event
-                    df_corrected.loc[exit_mask, 'is_recycle'] = False
-                    df_corrected.loc[exit_mask, 'delivery_type'] = 'Normal Disposal'
-                    df_corrected.loc[exit_mask, 'location'] = str(company_name)
-                    df_corrected.loc[exit_mask, 'remarks'] = correction_note
-                    
-                    # Prepare database updates - only need event_id and new remarks
-                    events_to_update.extend([
-                        {
-                            'event_id': entry['event_id'],
-                            'remarks': correction_note
-                        },
-                        {
-                            'event_id': exit_row['event_id'],
-                            'remarks': correction_note
-                        }
-                    ])
-                    
-                    correction_info = {
-                        'session_id': session_id,
-                        'entry_weight': entry_weight,
-                        'exit_weight': exit_weight,
-                        'company_name': str(company_name),
-                        'vehicle_id': entry.get('vehicle_id', 'Unknown'),
-                        'correction_time': datetime.now(),
-                        'original_location': entry.get('location', 'N/A')
-                    }
-                    corrections_made.append(correction_info)
-        
-        # Persist corrections to database if requested
-        if persist_to_db and events_to_update:
-            try:
-                # Update existing records in database using individual UPDATE statements
-                from sqlalchemy import text
-                engine = get_db_engine()
-                
-                updated_count = 0
-                
-                # Add progress bar for database updates
-                update_progress = tqdm(
-                    events_to_update,
-                    desc="Updating database records",
-                    unit="records",
-                    ncols=100,
-                    leave=False
-                )
-                
-                # Process updates in smaller batches to avoid deadlocks
-                batch_size = 50
-                for i in range(0, len(events_to_update), batch_size):
-                    batch = events_to_update[i:i + batch_size]
-                    
-                    # Use individual transactions for each batch to reduce deadlock risk
-                    with engine.connect() as conn:
-                        trans = conn.begin()
-                        try:
-                            for event in batch:
-                                # Update specific weigh event record - only update remarks field
-                                update_sql = text("""
-                                UPDATE weigh_event 
-                                SET remarks = :remarks
-                                WHERE event_id = :event_id
-                                AND (remarks IS NULL OR remarks NOT LIKE 'CORRECTED:%')
-                                """)
-                                
-                                result = conn.execute(update_sql, {
-                                    'remarks': event['remarks'],
-                                    'event_id': event['event_id']
-                                })
-                                
-                                if result.rowcount > 0:
-                                    updated_count += 1
-                                
-                                # Update progress bar
-                                update_progress.update(1)
-                                update_progress.set_postfix({
-                                    'Updated': updated_count,
-                                    'Event': str(event['event_id'])[:8],
-                                    'Batch': f"{i//batch_size + 1}"
-                                })
-                            
-                            trans.commit()
-                            
-                        except Exception as batch_error:
-                            trans.rollback()
-                            debug_print(f"Error in batch {i//batch_size + 1}: {batch_error}")
-                            # Continue with next batch
-                
-                debug_print(f"Successfully updated {updated_count} weigh events in database with recycling corrections")
-                    
-            except Exception as e:
-                debug_print(f"Error persisting recycling corrections to database: {e}")
-                import traceback
-                debug_print(traceback.format_exc())
-        
-        if corrections_made:
-            debug_print(f"✅ CORRECTION SUMMARY: Successfully corrected {len(corrections_made)} misclassified recycling sessions")
-            debug_print(f"   Database updates: {len(events_to_update) if events_to_update else 0} events updated")
-            for correction in corrections_made:
-                debug_print(f"   • Session {correction['session_id']}: {correction['entry_weight']}kg → {correction['exit_weight']}kg (corrected to normal disposal)")
-        else:
+        # Skip if already corrected (avoid duplicate corrections)
+        original_remarks = [str(remarks) for remarks in sessions.get('remarks', pd.Series('', index=sessions.index))]
+        not_corrected = np.array(['CORRECTED:' not in remarks for remarks in original_remarks], dtype=bool)
+        sessions = sessions[not_corrected]
+        original_remarks = [remarks for remarks, keep in zip(original_remarks, not_corrected) if keep]
+        
+        if sessions.empty:
             debug_print("✅ No misclassified recycling events found - all data is correct!")
+            return df_corrected, []
+        
+        # Get company name for location, falling back to the companies table
+        if 'company_name' in sessions.columns:
+            company_names = sessions['company_name']
+        else:
+            company_names = pd.Series('Unknown Company', index=sessions.index)
+        missing_name = company_names.isna() | company_names.astype(str).str.strip().isin(['Unknown', 'nan'])
+        if missing_name.any() and not companies_df.empty and 'name' in companies_df.columns and 'company_id' in sessions.columns:
+            name_by_id = companies_df.drop_duplicates(subset='company_id').set_index('company_id')['name']
+            looked_up = sessions['company_id'].map(name_by_id)
+            company_names = company_names.mask(missing_name & looked_up.notna(), looked_up)
+        company_names = [str(name) for name in company_names]
+        
+        # Create correction note and remove recycling marker
+        correction_notes = [
+            f"CORRECTED: Was recycling, now normal disposal. Exit weight ({exit_weight}kg) < Entry weight ({entry_weight}kg). Original remarks: {remarks}"
+            for entry_weight, exit_weight, remarks in zip(sessions['weight_kg'], sessions['weight_kg_exit'], original_remarks)
+        ]
+        
+        # Entry and exit events of a session get the same note and location
+        event_ids = list(sessions['event_id']) + list(sessions['event_id_exit'])
+        note_by_event = pd.Series(correction_notes * 2, index=event_ids)
+        location_by_event = pd.Series(company_names * 2, index=event_ids)
+        note_by_event = note_by_event[~note_by_event.index.duplicated(keep='last')]
+        location_by_event = location_by_event[~location_by_event.index.duplicated(keep='last')]
+        
+        # Update entry and exit events in one pass
+        update_mask = df_corrected['event_id'].isin(note_by_event.index)
+        updated_ids = df_corrected.loc[update_mask, 'event_id']
+        df_corrected.loc[update_mask, 'is_recycle'] = False
+        df_corrected.loc[update_mask, 'delivery_type'] = 'Normal Disposal'
+        df_corrected.loc[update_mask, 'location'] = updated_ids.map(location_by_event)
+        df_corrected.loc[update_mask, 'remarks'] = updated_ids.map(note_by_event)
+        
+        correction_time = datetime.now()
+        corrections_made = [
+            {
+                'session_id': session_id,
+                'entry_weight': entry_weight,
+                'exit_weight': exit_weight,
+                'company_name': company_name,
+                'vehicle_id': vehicle_id,
+                'correction_time': correction_time,
+                'original_location': original_location
+            }
+            for session_id, entry_weight, exit_weight, company_name, vehicle_id, original_location in zip(
+                sessions['session_id'],
+                sessions['weight_kg'],
+                sessions['weight_kg_exit'],
+                company_names,
+                sessions['vehicle_id'] if 'vehicle_id' in sessions.columns else ['Unknown'] * len(sessions),
+                sessions['location'] if 'location' in sessions.columns else ['N/A'] * len(sessions)
+            )
+        ]
+        
+        # Persist corrections to database in a single set-based UPDATE
+        if persist_to_db:
+            updated_count = bulk_update_weigh_event_remarks(list(note_by_event.index), list(note_by_event.values))
+            if updated_count >= 0:
+                debug_print(f"Successfully updated {updated_count} weigh events in database with recycling corrections")
+            else:
+                debug_print("Error persisting recycling corrections to database")
+        
+        debug_print(f"✅ CORRECTION SUMMARY: Successfully corrected {len(corrections_made)} misclassified recycling sessions")
+        debug_print(f"   Database updates: {len(note_by_event) if persist_to_db else 0} events updated")
+        for correction in corrections_made:
+            debug_print(f"   • Session {correction['session_id']}: {correction['entry_weight']}kg → {correction['exit_weight']}kg (corrected to normal disposal)")
         
         return df_corrected, corrections_made
         
@@ -795,13 +611,7 @@ def calculate_net_weights(df):
     if df.empty:
         debug_print("Empty dataframe provided to calculate_net_weights")
         # Return an empty dataframe with the expected columns
-        return pd.DataFrame(columns=[
-            'session_id', 'vehicle_id', 'company_id', 'company_name', 'company_type',
-            'pricing_tier', 'license_plate', 'entry_time', 'exit_time', 'duration_minutes',
-            'entry_weight', 'exit_weight', 'net_weight', 'fee_per_tonne', 'fee_amount',
-            'is_recycle', 'delivery_type', 'date', 'day', 'month', 'month_name', 'year',
-            'day_of_week', 'day_of_week_num', 'hour', 'week', 'location', 'clean_location'
-        ])
+        return pd.DataFrame(columns=NET_WEIGHT_COLUMNS)
     
     try:
         # Check for required columns
@@ -809,128 +619,23 @@ def calculate_net_weights(df):
         for col in required_cols:
             if col not in df.columns:
                 debug_print(f"Missing required column: {col}")
-                return pd.DataFrame(columns=[
-                    'session_id', 'vehicle_id', 'company_id', 'company_name', 'company_type',
-                    'pricing_tier', 'license_plate', 'entry_time', 'exit_time', 'duration_minutes',
-                    'entry_weight', 'exit_weight', 'net_weight', 'fee_per_tonne', 'fee_amount',
-                    'is_recycle', 'delivery_type', 'date', 'day', 'month', 'month_name', 'year',
-                    'day_of_week', 'day_of_week_num', 'hour', 'week', 'location', 'clean_location'
-                ])
+                return pd.DataFrame(columns=NET_WEIGHT_COLUMNS)
         
-        # Group by session_id
-        sessions = df.groupby('session_id')
-        
-        results = []
-        
-        for session_id, group in sessions:
-            if len(group) >= 2:  # Need at least entry and exit
-                # Sort by event_time to get entry first, exit second
-                group = group.sort_values('event_time')
-                
-                # Get entry and exit weights based on event type (ARRIVAL/DEPARTURE or numeric)
-                if 'event_type_std' in group.columns:
-                    # Use standardized field if available
-                    entry = group[group['event_type_std'] == 1]
-                    exit = group[group['event_type_std'] == 2]
-                elif 'event_type' in group.columns:
-                    if isinstance(group['event_type'].iloc[0], str):
-                        # Handle string event types (ARRIVAL/DEPARTURE)
-                        entry = group[group['event_type'] == 'ARRIVAL']
-                        exit = group[group['event_type'] == 'DEPARTURE']
-                    else:
-                        # Handle numeric event types (1/2)
-                        entry = group[group['event_type'] == 1]
-                        exit = group[group['event_type'] == 2]
-                
-                if not entry.empty and not exit.empty:
-                    entry_row = entry.iloc[0]
-                    exit_row = exit.iloc[0]
-                    
-                    # Determine if this is a recycle event based on remarks
-                    # Exclude corrected events (they start with "CORRECTED:")
-                    remarks = str(entry_row.get('remarks', '')).strip()
-                    is_recycle = (
-                        'R' in remarks.upper() and 
-                        not remarks.startswith('CORRECTED:')
-                    )
-                    
-                    # Calculate weights appropriately based on event type
-                    entry_weight = entry_row['weight_kg']
-                    exit_weight = exit_row['weight_kg']
-                    
-                    # Calculate net weight (always positive)
-                    net_weight = abs(entry_weight - exit_weight)
-                    
-                    # Get company information for fee calculation
-                    company_name = entry_row.get('company_name', 'Unknown')
-                    company_type = entry_row.get('type_code', None)
-                    
-                    # Use new tiered pricing system
-                    fee_per_tonne, fee_amount, pricing_tier = calculate_tiered_pricing(
-                        net_weight, company_type, is_recycle
-                    )
-                    
-                    # Get clean location for both location and clean_location columns
-                    clean_location_value = entry_row.get('clean_location', extract_clean_location(entry_row.get('remarks', ''))) if not is_recycle else 'Recycle Collection'
-                    
-                    result = {
-                        'session_id': session_id,
-                        'vehicle_id': entry_row['vehicle_id'],
-                        'company_id': entry_row.get('company_id', 'Unknown'),
-                        'company_name': company_name,
-                        'company_type': company_type,
-                        'pricing_tier': pricing_tier,
-                        'license_plate': entry_row.get('license_plate', 'Unknown'),
-                        'entry_time': entry_row['event_time'],
-                        'exit_time': exit_row['event_time'],
-                        'duration_minutes': (exit_row['event_time'] - entry_row['event_time']).total_seconds() / 60,
-                        'entry_weight': entry_row['weight_kg'],
-                        'exit_weight': exit_row['weight_kg'],
-                        'net_weight': net_weight,
-                        'fee_per_tonne': fee_per_tonne,
-                        'fee_amount': fee_amount,
-                        'is_recycle': is_recycle,
-                        'delivery_type': entry_row.get('delivery_type', 'Normal Disposal'),
-                        'date': entry_row.get('date', None),
-                        'day': entry_row.get('day', None),
-                        'month': entry_row.get('month', None),
-                        'month_name': entry_row.get('month_name', ''),
-                        'year': entry_row.get('year', None),
-                        'day_of_week': entry_row.get('day_of_week', None),
-                        'day_of_week_num': entry_row.get('day_of_week_num', 0),
-                        'hour': entry_row.get('hour', 0),
-                        'week': entry_row.get('week', 0),
-                        'location': clean_location_value,
-                        'clean_location': clean_location_value
-                    }
-                    
-                    results.append(result)
+        # Pair entry/exit events and price every session in one vectorized pass
+        net_weights_df = calculate_session_net_weights(df, location_fn=extract_clean_location)
         
-        if results:
-            net_weights_df = pd.DataFrame(results)
+        if not net_weights_df.empty:
             debug_print(f"Created {len(net_weights_df)} paired entry/exit records")
             return net_weights_df
             
         debug_print("No valid session pairs found in the data")
-        return pd.DataFrame(columns=[
-            'session_id', 'vehicle_id', 'company_id', 'company_name', 'company_type',
-            'pricing_tier', 'license_plate', 'entry_time', 'exit_time', 'duration_minutes',
-            'entry_weight', 'exit_weight', 'net_weight', 'fee_per_tonne', 'fee_amount',
-            'is_recycle', 'delivery_type', 'date', 'day', 'month', 'month_name', 'year',
-            'day_of_week', 'day_of_week_num', 'hour', 'week', 'location', 'clean_location'
-        ])
+        return pd.DataFrame(columns=NET_WEIGHT_COLUMNS)
         
     except Exception as e:
         import traceback
         debug_print(f"Error in calculate_net_weights: {e}")
         debug_print(traceback.format_exc())
-        return pd.DataFrame(columns=[
-            'session_id', 'vehicle_id', 'company_id', 'company_name', 'company_type',
-            'pricing_tier', 'license_plate', 'entry_time', 'exit_time', 'duration_minutes',
-            'entry_weight', 'exit_weight', 'net_weight', 'fee_per_tonne', 'fee_amount',
-            'is_recycle', 'delivery_type', 'date', 'day', 'month', 'month_name', 'year',
-            'day_of_week', 'day_of_week_num', 'hour', 'week', 'location', 'clean_location'
-        ])
+        return pd.DataFrame(columns=NET_WEIGHT_COLUMNS)
 
 # Create a Dash app
 app = dash.Dash(
@@ -949,11 +654,51 @@ weigh_df = pd.DataFrame()
 vehicles_df = pd.DataFrame()
 companies_df = pd.DataFrame()
 net_weights_df = pd.DataFrame()
+tare_weight_index = None
 last_refresh_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
+# Filtered results are cached server-side per filter state and data version
+filter_result_cache = FilteredResultCache(max_entries=int(os.getenv('FILTER_CACHE_SIZE', 64)))
+data_version = 0
+
+# Held while net_weights_df and data_version change, so callbacks never pair
+# one frame with row positions computed on another
+data_lock = threading.Lock()
+
+# Pre-aggregated measures that the tabs roll up for KPIs and charts
+aggregate_cube = AggregateCube()
+
+# Cascading dropdown options, indexed once per data version
+filter_options_index = FilterOptionsIndex(location_label=shorten_location_for_display)
+
+# Filter state meaning "no filters": every session in net_weights_df
+NO_FILTER_STATE = {
+    'start_date': None,
+    'end_date': None,
+    'delivery_type': None,
+    'selected_companies': [],
+    'selected_vehicles': [],
+    'selected_locations': [],
+    'filters_applied': False
+}
+
+def mark_data_changed(new_net_weights_df):
+    """Replace net_weights_df and bump the data version together"""
+    global net_weights_df, data_version
+    with data_lock:
+        net_weights_df = new_net_weights_df
+        data_version += 1
+        filter_result_cache.clear()
+    filter_options_index.rebuild(new_net_weights_df, companies_df, vehicles_df)
+
+def current_net_weights():
+    """net_weights_df and the data version it belongs to, read together"""
+    with data_lock:
+        return net_weights_df, data_version
+
 # Function to refresh data from database
 def refresh_data_from_database():
-    global merged_df, weigh_df, vehicles_df, companies_df, net_weights_df, last_refresh_time
+    global merged_df, weigh_df, vehicles_df, companies_df, net_weights_df, tare_weight_index, last_refresh_time
     
     try:
         merged_df, weigh_df, vehicles_df, companies_df = load_data()
@@ -985,8 +730,12 @@ def refresh_data_from_database():
         else:
             debug_print("- No event_type column found")
         
-        net_weights_df = calculate_net_weights(merged_df)
+        new_net_weights_df = calculate_net_weights(merged_df)
+        tare_weight_index = TareWeightIndex(new_net_weights_df)
+        aggregate_cube.rebuild(new_net_weights_df)
+        mark_data_changed(new_net_weights_df)
         last_refresh_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        save_data_snapshot(force=True)
         
         if net_weights_df.empty:
             debug_print("Warning: No paired entry/exit events found!")
@@ -1001,8 +750,146 @@ def refresh_data_from_database():
         debug_print(traceback.format_exc())
         return False
 
+# Function to apply only the weigh events added since the last refresh
+def refresh_data_incrementally():
+    """
+    Fetch weigh events past the loader's high-water mark and re-derive only
+    the sessions they touch, plus sessions still waiting for an exit so that
+    auto-close keeps working. Falls back to a full reload when nothing has
+    been loaded yet.
+    
+    Edits made elsewhere to weigh events older than the loader's overlap
+    window (WEIGH_EVENT_OVERLAP_MINUTES) are not seen here; they show up
+    after a full reload, e.g. the manual refresh button.
+    """
+    global merged_df, weigh_df, vehicles_df, companies_df, net_weights_df, tare_weight_index, last_refresh_time
+    
+    if weigh_df.empty or not weigh_event_loader.has_watermark:
+        return refresh_data_from_database()
+    
+    try:
+        new_events_df = weigh_event_loader.load_new_events()
+        debug_print(f"Incremental refresh: {len(new_events_df)} new or updated weigh events")
+        
+        affected_session_ids = set()
+        if not new_events_df.empty:
+            new_events_df['event_time'] = pd.to_datetime(new_events_df['event_time']).dt.tz_localize(None)
+            affected_session_ids = set(new_events_df['session_id'].dropna().unique())
+        
+        # Sessions with an entry but no exit yet may need auto-closing as time passes
+        if 'event_type_std' in weigh_df.columns:
+            entry_ids = set(weigh_df.loc[weigh_df['event_type_std'] == 1, 'session_id'].unique())
+            exit_ids = set(weigh_df.loc[weigh_df['event_type_std'] == 2, 'session_id'].unique())
+            affected_session_ids |= entry_ids - exit_ids
+        
+        if not affected_session_ids:
+            last_refresh_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            return True
+        
+        # Rebuild the raw events of the affected sessions from memory plus the delta
+        raw_columns = [col for col in weigh_event_loader.columns if col in weigh_df.columns]
+        if 'auto_closed' in weigh_df.columns:
+            raw_columns.append('auto_closed')
+        session_mask = weigh_df['session_id'].isin(affected_session_ids)
+        session_events_df = merge_weigh_events(weigh_df.loc[session_mask, raw_columns], new_events_df)
+        
+        # Vehicles and companies are small, so they are simply re-read
+        latest_vehicles_df = read_vehicles()
+        latest_companies_df = read_companies()
+        if not latest_vehicles_df.empty:
+            vehicles_df = latest_vehicles_df
+        if not latest_companies_df.empty:
+            companies_df = latest_companies_df
+        
+        if tare_weight_index is None:
+            tare_weight_index = TareWeightIndex(net_weights_df)
+        session_weigh_df = prepare_weigh_events(session_events_df, companies_df, tare_index=tare_weight_index)
+        session_merged_df = merge_reference_data(session_weigh_df, vehicles_df, companies_df)
+        session_net_weights_df = calculate_net_weights(session_merged_df)
+        tare_weight_index.add(session_net_weights_df)
+        
+        # Swap the re-derived sessions into the in-memory frames
+        weigh_df = pd.concat([weigh_df[~session_mask], session_weigh_df], ignore_index=True)
+        merged_df = pd.concat(
+            [merged_df[~merged_df['session_id'].isin(affected_session_ids)], session_merged_df],
+            ignore_index=True
+        )
+        if net_weights_df.empty:
+            new_net_weights_df = session_net_weights_df
+            aggregate_cube.rebuild(new_net_weights_df)
+        else:
+            affected_mask = net_weights_df['session_id'].isin(affected_session_ids)
+            changed_sessions_df = pd.concat([net_weights_df[affected_mask], session_net_weights_df], ignore_index=True)
+            new_net_weights_df = pd.concat([net_weights_df[~affected_mask], session_net_weights_df], ignore_index=True)
+            aggregate_cube.refresh(new_net_weights_df, changed_sessions_df)
+        
+        mark_data_changed(new_net_weights_df)
+        last_refresh_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        debug_print(f"Incremental refresh re-derived {len(affected_session_ids)} sessions "
+                    f"({len(session_net_weights_df)} paired)")
+        save_data_snapshot()
+        return True
+    except Exception as e:
+        import traceback
+        debug_print(f"Error during incremental refresh, falling back to full reload: {e}")
+        debug_print(traceback.format_exc())
+        weigh_event_loader.reset()
+        return refresh_data_from_database()
+
+# Columnar snapshot of the loaded frames, so new workers start without a full load
+snapshot_store = SnapshotStore('db_dashboard')
+
+def save_data_snapshot(force=False):
+    """Write the in-memory frames to the snapshot store if it is due"""
+    if weigh_df.empty or not weigh_event_loader.has_watermark:
+        return
+    if not force and not snapshot_store.is_stale():
+        return
+    try:
+        snapshot_store.save(
+            {
+                'weigh_events': weigh_df,
+                'vehicles': vehicles_df,
+                'companies': companies_df,
+                'net_weights': net_weights_df
+            },
+            metadata={'weigh_event_loader': weigh_event_loader.get_state()}
+        )
+    except Exception as e:
+        debug_print(f"Error saving data snapshot: {e}")
+
+def load_data_from_snapshot():
+    """
+    Start from the latest snapshot and apply only the weigh events added
+    since it was written. Returns False when there is no usable snapshot.
+    """
+    global merged_df, weigh_df, vehicles_df, companies_df, net_weights_df, tare_weight_index
+    
+    frames, metadata = snapshot_store.load()
+    if not frames or not metadata.get('weigh_event_loader'):
+        return False
+    
+    try:
+        weigh_df = frames['weigh_events']
+        vehicles_df = frames['vehicles']
+        companies_df = frames['companies']
+        merged_df = merge_reference_data(weigh_df, vehicles_df, companies_df)
+        tare_weight_index = TareWeightIndex(frames['net_weights'])
+        aggregate_cube.rebuild(frames['net_weights'])
+        weigh_event_loader.restore_state(metadata['weigh_event_loader'])
+        mark_data_changed(frames['net_weights'])
+    except Exception as e:
+        debug_print(f"Error restoring data snapshot: {e}")
+        weigh_df = pd.DataFrame()
+        weigh_event_loader.reset()
+        return False
+    
+    debug_print(f"Loaded snapshot with {len(weigh_df)} weigh events, applying new events...")
+    return refresh_data_incrementally()
+
 # Initial data load
-refresh_data_from_database()
+if not load_data_from_snapshot():
+    refresh_data_from_database()
 
 # Sample data generation function if we need it
 def generate_sample_data():
@@ -1385,18 +1272,10 @@ app.layout = html.Div([
     dcc.Store(id='user-data', storage_type='session'),
     
     # Hidden div to store filtered data
-    dcc.Store(id='filtered-data', data=json.dumps({'session_ids': []})),
+    dcc.Store(id='filtered-data', data=json.dumps({'empty': True})),
     
     # Hidden store to maintain current filter state
-    dcc.Store(id='filter-state', data=json.dumps({
-        'start_date': None,
-        'end_date': None,
-        'delivery_type': None,
-        'selected_companies': [],
-        'selected_vehicles': [],
-        'selected_locations': [],
-        'filters_applied': False
-    })),
+    dcc.Store(id='filter-state', data=json.dumps(NO_FILTER_STATE)),
     
     # Main content - start with login layout
     html.Div(id='main-content', children=create_login_layout()),
@@ -1561,10 +1440,6 @@ def populate_filter_options(start_date, end_date, delivery_type,
                            selected_companies, selected_vehicles, selected_locations, 
                            n_intervals):
     try:
-        # Start with full dataset that will be filtered down
-        filtered_df = net_weights_df.copy()
-        
-        # Debug information
         debug_print(f"Cascading filters - building options with filters:")
         debug_print(f"- Date: {start_date} to {end_date}")
         debug_print(f"- Delivery type: {delivery_type}")
@@ -1572,197 +1447,12 @@ def populate_filter_options(start_date, end_date, delivery_type,
         debug_print(f"- Selected vehicles: {selected_vehicles}")
         debug_print(f"- Selected locations: {selected_locations}")
         
-        # Apply date filter (applied to all other filters)
-        if start_date and end_date:
-            try:
-                start_date = pd.to_datetime(start_date)
-                end_date = pd.to_datetime(end_date) + timedelta(days=1)  # Include full end day
-                debug_print(f"Cascade - filtering by date range: {start_date} to {end_date}")
-                
-                if 'entry_time' in filtered_df.columns:
-                    before_count = len(filtered_df)
-                    
-                    # Ensure entry_time is datetime
-                    filtered_df['entry_time'] = pd.to_datetime(filtered_df['entry_time'])
-                    
-                    # Apply date filter with proper datetime comparison
-                    filtered_df = filtered_df[(filtered_df['entry_time'] >= start_date) & 
-                                           (filtered_df['entry_time'] < end_date)]
-                    
-                    debug_print(f"Date filter reduced data: {before_count} -> {len(filtered_df)} records")
-            except Exception as e:
-                debug_print(f"Date filtering error: {e}")
-                import traceback
-                debug_print(traceback.format_exc())
-        
-        # Apply delivery type filter (applied to all other filters)
-        if delivery_type and delivery_type != 'all':
-            if 'is_recycle' in filtered_df.columns:
-                before_count = len(filtered_df)
-                if delivery_type == 'normal':
-                    filtered_df = filtered_df[~filtered_df['is_recycle']]
-                elif delivery_type == 'recycle':
-                    filtered_df = filtered_df[filtered_df['is_recycle']]
-                debug_print(f"Delivery type filter reduced data: {before_count} -> {len(filtered_df)} records")
-        
-        # Now we'll apply filters for all except the current filter type
-        # This way, each filter only shows values that would return results when combined with the other filters
-        
-        # Create copies for each filter type
-        companies_filtered_df = filtered_df.copy()
-        vehicles_filtered_df = filtered_df.copy()
-        locations_filtered_df = filtered_df.copy()
-        
-        # Apply vehicle filter to companies and locations (but not vehicles options)
-        if selected_vehicles and len(selected_vehicles) > 0:
-            if 'vehicle_id' in filtered_df.columns:
-                # Convert to list if not already
-                if not isinstance(selected_vehicles, list):
-                    selected_vehicles = [selected_vehicles]
-                
-                # Convert to string for comparison and use proper pandas indexing
-                before_count = len(companies_filtered_df)
-                # Create a new string column using loc to avoid SettingWithCopyWarning
-                companies_filtered_df.loc[:, 'vehicle_id_str'] = companies_filtered_df['vehicle_id'].astype(str)
-                valid_vehicles = [str(v) for v in selected_vehicles if v is not None and v != ""]
-                if valid_vehicles:
-                    companies_filtered_df = companies_filtered_df[companies_filtered_df['vehicle_id_str'].isin(valid_vehicles)]
-                    debug_print(f"Vehicle filter reduced company options data: {before_count} -> {len(companies_filtered_df)} records")
-                
-                # Apply to locations filter too
-                before_count = len(locations_filtered_df)
-                # Create a new string column using loc to avoid SettingWithCopyWarning
-                locations_filtered_df.loc[:, 'vehicle_id_str'] = locations_filtered_df['vehicle_id'].astype(str)
-                if valid_vehicles:
-                    locations_filtered_df = locations_filtered_df[locations_filtered_df['vehicle_id_str'].isin(valid_vehicles)]
-                    debug_print(f"Vehicle filter reduced location options data: {before_count} -> {len(locations_filtered_df)} records")
-        
-        # Apply company filter to vehicles and locations (but not companies options)
-        if selected_companies and len(selected_companies) > 0:
-            if 'company_id' in filtered_df.columns:
-                # Convert to list if not already
-                if not isinstance(selected_companies, list):
-                    selected_companies = [selected_companies]
-                
-                # Convert to string for comparison and use proper pandas indexing
-                before_count = len(vehicles_filtered_df)
-                # Create a new string column using loc to avoid SettingWithCopyWarning
-                vehicles_filtered_df.loc[:, 'company_id_str'] = vehicles_filtered_df['company_id'].astype(str)
-                valid_companies = [str(c) for c in selected_companies if c is not None and c != ""]
-                if valid_companies:
-                    vehicles_filtered_df = vehicles_filtered_df[vehicles_filtered_df['company_id_str'].isin(valid_companies)]
-                    debug_print(f"Company filter reduced vehicle options data: {before_count} -> {len(vehicles_filtered_df)} records")
-                
-                # Apply to locations filter too
-                before_count = len(locations_filtered_df)
-                # Create a new string column using loc to avoid SettingWithCopyWarning
-                if 'company_id_str' not in locations_filtered_df.columns:  # Check if column already exists
-                    locations_filtered_df.loc[:, 'company_id_str'] = locations_filtered_df['company_id'].astype(str)
-                if valid_companies:
-                    locations_filtered_df = locations_filtered_df[locations_filtered_df['company_id_str'].isin(valid_companies)]
-                    debug_print(f"Company filter reduced location options data: {before_count} -> {len(locations_filtered_df)} records")
-        
-        # Apply location filter to companies and vehicles (but not locations options)
-        if selected_locations and len(selected_locations) > 0:
-            if 'location' in filtered_df.columns:
-                # Convert to list if not already
-                if not isinstance(selected_locations, list):
-                    selected_locations = [selected_locations]
-                
-                # Filter only on valid locations
-                before_count = len(companies_filtered_df)
-                valid_locations = [l for l in selected_locations if l is not None and l != ""]
-                if valid_locations:
-                    companies_filtered_df = companies_filtered_df[companies_filtered_df['location'].isin(valid_locations)]
-                    debug_print(f"Location filter reduced company options data: {before_count} -> {len(companies_filtered_df)} records")
-                
-                # Apply to vehicles filter too
-                before_count = len(vehicles_filtered_df)
-                if valid_locations:
-                    vehicles_filtered_df = vehicles_filtered_df[vehicles_filtered_df['location'].isin(valid_locations)]
-                    debug_print(f"Location filter reduced vehicle options data: {before_count} -> {len(vehicles_filtered_df)} records")
-        
-        # Now extract unique values from each filtered dataframe for dropdowns
-        
-        # Get active company IDs from filtered data
-        active_company_ids = set()
-        if 'company_id' in companies_filtered_df.columns:
-            active_company_ids = set(companies_filtered_df['company_id'].dropna().unique())
-        
-        # Get active vehicle IDs from filtered data
-        active_vehicle_ids = set()
-        if 'vehicle_id' in vehicles_filtered_df.columns:
-            active_vehicle_ids = set(vehicles_filtered_df['vehicle_id'].dropna().unique())
-        
-        # Get active locations from filtered data
-        active_locations = set()
-        if 'location' in locations_filtered_df.columns:
-            active_locations = set(locations_filtered_df['location'].dropna().unique())
-        
-        # Company options - only include companies present in filtered events
-        company_options = []
-        for _, row in companies_df.iterrows():
-            if 'name' in companies_df.columns and 'company_id' in companies_df.columns:
-                company_id = row['company_id']
-                
-                # Convert UUID to string to make it JSON serializable
-                if hasattr(company_id, 'hex'):  # Check if UUID
-                    company_id_str = str(company_id)
-                elif not isinstance(company_id, str):
-                    company_id_str = str(company_id)
-                else:
-                    company_id_str = company_id
-                
-                # Only include companies that are in filtered events
-                if company_id in active_company_ids:
-                    company_name = row['name'] if pd.notna(row['name']) else 'Unknown'
-                    
-                    # Just display company name without ID to prevent text overflow
-                    company_options.append({
-                        'label': f"{company_name}",
-                        'value': company_id_str
-                    })
-        
-        # Vehicle options - only include vehicles present in filtered events
-        vehicle_options = []
-        for _, row in vehicles_df.iterrows():
-            if 'license_plate' in vehicles_df.columns and 'vehicle_id' in vehicles_df.columns:
-                vehicle_id = row['vehicle_id']
-                
-                # Only include vehicles that are in filtered events
-                if vehicle_id in active_vehicle_ids:
-                    license_plate = row['license_plate'] if pd.notna(row['license_plate']) else 'Unknown'
-                    
-                    # Convert UUID to string to make it JSON serializable
-                    if hasattr(vehicle_id, 'hex'):  # Check if UUID
-                        vehicle_id_str = str(vehicle_id)
-                    elif not isinstance(vehicle_id, str):
-                        vehicle_id_str = str(vehicle_id)
-                    else:
-                        vehicle_id_str = vehicle_id
-                    
-                    # Just display license plate without ID to prevent text overflow
-                    vehicle_options.append({
-                        'label': f"{license_plate}",
-                        'value': vehicle_id_str
-                    })
-        
-        # Location options - only include locations in filtered events
-        location_options = []
-        valid_locations = [loc for loc in active_locations if pd.notna(loc) and loc != 'LEGACY DATA']
-        
-        for loc in sorted(valid_locations):
-            if loc and loc != 'Recycle Collection':
-                # Show shortened name in dropdown but use full name for filtering
-                location_options.append({
-                    'label': shorten_location_for_display(loc), 
-                    'value': loc
-                })
-        
-        # Add Recycle option if it exists in the filtered data
-        if 'Recycle Collection' in valid_locations:
-            location_options.append({'label': 'Recycle Collection', 'value': 'Recycle Collection'})
-    
+        # Each dropdown only shows values that would return results when
+        # combined with the other filters; answered from the inverted index
+        company_options, vehicle_options, location_options = filter_options_index.options(
+            start_date, end_date, delivery_type,
+            selected_companies, selected_vehicles, selected_locations
+        )
     except Exception as e:
         import traceback
         debug_print(f"Error in populate_filter_options: {e}")
@@ -1776,6 +1466,43 @@ def populate_filter_options(start_date, end_date, delivery_type,
     
     return company_options, vehicle_options, location_options
 
+def filter_mask(filter_state, df, version):
+    """Boolean mask over df, net_weights_df at data version version, for a filter state"""
+    return filter_state_mask(
+        df, filter_state,
+        id_strings=lambda column: filter_result_cache.column_strings(df, column, version)
+    )
+
+def cache_filter_result(filter_state, df, version):
+    """
+    Compute (or reuse) the rows of df matching filter_state; returns (token, positions).
+    
+    df and version must come from one current_net_weights() call, since the
+    cached positions are only valid for the frame of their version.
+    """
+    token = FilteredResultCache.make_token(filter_state, version)
+    positions = filter_result_cache.get(token)
+    if positions is None:
+        positions = np.flatnonzero(filter_mask(filter_state, df, version))
+        filter_result_cache.put(token, positions)
+    return token, positions
+
+def filtered_data_payload(filter_state=None):
+    """
+    Value for the filtered-data store: a token for the cached result plus
+    the filter state, so any worker can rebuild the result on a cache miss.
+    """
+    filter_state = filter_state or NO_FILTER_STATE
+    df, version = current_net_weights()
+    if df.empty:
+        return json.dumps({'empty': True})
+    
+    token, positions = cache_filter_result(filter_state, df, version)
+    debug_print(f"Final filtered result: {len(positions)} records")
+    if len(positions) == 0:
+        return json.dumps({'empty': True})
+    return json.dumps({'token': token, 'count': len(positions), 'filter_state': filter_state})
+
 # Filter data based on selected criteria
 @app.callback(
     [Output('filtered-data', 'data', allow_duplicate=True),
@@ -1805,217 +1532,7 @@ def filter_data(n_clicks, start_date, end_date, delivery_type, selected_companie
     }
     
     try:
-        # Use a fresh copy for filtering
-        filtered_df = net_weights_df.copy()
-        
-        # Debug output before filtering
-        debug_print(f"Filtering starting with {len(filtered_df)} records")
-        debug_print(f"Filter params: date={start_date}-{end_date}, type={delivery_type}, companies={selected_companies}, vehicles={selected_vehicles}, locations={selected_locations}")
-        
-        # Add more debugging for key fields
-        if not filtered_df.empty and 'company_id' in filtered_df.columns:
-            unique_companies = filtered_df['company_id'].nunique()
-            first_few = list(filtered_df['company_id'].astype(str).unique())[:5]
-            debug_print(f"Dataset has {unique_companies} unique companies. Examples: {first_few}")
-            
-            # If specific companies are selected, check if they exist in the data
-            if selected_companies and len(selected_companies) > 0:
-                selected_company_strs = [str(c) for c in selected_companies if c is not None and c != ""]
-                existing_companies = set(filtered_df['company_id'].astype(str).unique())
-                matches = [c for c in selected_company_strs if c in existing_companies]
-                debug_print(f"Selected companies {selected_company_strs}, matching in data: {matches}")
-        
-        if filtered_df.empty:
-            # Return empty dataframe if no data
-            debug_print("Empty dataframe, no filtering to do")
-            return json.dumps({'empty': True}), json.dumps(filter_state)
-        
-        # Apply date filter
-        if start_date and end_date:
-            try:
-                start_date = pd.to_datetime(start_date)
-                end_date = pd.to_datetime(end_date) + timedelta(days=1)  # Include full end day
-                
-                debug_print(f"Filtering by date range: {start_date} to {end_date}")
-                
-                if 'entry_time' in filtered_df.columns:
-                    before_count = len(filtered_df)
-                    
-                    # Ensure entry_time is datetime
-                    filtered_df['entry_time'] = pd.to_datetime(filtered_df['entry_time'])
-                    
-                    # Apply date filter with proper datetime comparison
-                    filtered_df = filtered_df[(filtered_df['entry_time'] >= start_date) & 
-                                             (filtered_df['entry_time'] < end_date)]
-                    
-                    debug_print(f"Date filter: {before_count} -> {len(filtered_df)} records")
-            except Exception as e:
-                debug_print(f"Date filtering error: {e}")
-                import traceback
-                debug_print(traceback.format_exc())
-        
-        # Apply delivery type filter
-        if delivery_type and delivery_type != 'all':
-            if 'is_recycle' in filtered_df.columns:
-                before_count = len(filtered_df)
-                if delivery_type == 'normal':
-                    filtered_df = filtered_df[~filtered_df['is_recycle']]
-                elif delivery_type == 'recycle':
-                    filtered_df = filtered_df[filtered_df['is_recycle']]
-                debug_print(f"Delivery type filter: {before_count} -> {len(filtered_df)} records")
-        
-        # Apply company filter
-        if selected_companies and len(selected_companies) > 0:
-            if 'company_id' in filtered_df.columns:
-                before_count = len(filtered_df)
-                # Convert selected_companies to list if it's not already
-                if not isinstance(selected_companies, list):
-                    selected_companies = [selected_companies]
-                
-                # Handle string or UUID company IDs
-                debug_print(f"Company IDs before conversion: {selected_companies}")
-                
-                # Convert filtered_df company_id to string for comparison
-                filtered_df.loc[:, 'company_id_str'] = filtered_df['company_id'].astype(str)
-                
-                # Convert selected company IDs to strings
-                valid_companies = []
-                for c in selected_companies:
-                    if c is not None and c != "":
-                        valid_companies.append(str(c))
-                
-                debug_print(f"Valid company IDs for filtering: {valid_companies}")
-                
-                if valid_companies:
-                    # Check if any company IDs exist in the filtered dataset 
-                    available_ids = set(filtered_df['company_id_str'].unique())
-                    debug_print(f"Available company IDs in filtered data: {available_ids}")
-                    
-                    # Check for matches
-                    matches = [c for c in valid_companies if c in available_ids]
-                    debug_print(f"Matching company IDs: {matches}")
-                    
-                    if matches:
-                        filtered_df = filtered_df[filtered_df['company_id_str'].isin(matches)]
-                        debug_print(f"Company filter: {before_count} -> {len(filtered_df)} records")
-                    else:
-                        debug_print(f"WARNING: No matching company IDs found in filtered data")
-                        # We'll keep the data and apply the date filter only - this will allow
-                        # users to see data from the selected date range
-        
-        # Apply vehicle filter
-        if selected_vehicles and len(selected_vehicles) > 0:
-            if 'vehicle_id' in filtered_df.columns:
-                before_count = len(filtered_df)
-                # Convert selected_vehicles to list if it's not already
-                if not isinstance(selected_vehicles, list):
-                    selected_vehicles = [selected_vehicles]
-                
-                # Handle string or UUID vehicle IDs
-                debug_print(f"Vehicle IDs before conversion: {selected_vehicles}")
-                
-                # Convert filtered_df vehicle_id to string for comparison
-                filtered_df.loc[:, 'vehicle_id_str'] = filtered_df['vehicle_id'].astype(str)
-                
-                # Convert selected vehicle IDs to strings
-                valid_vehicles = []
-                for v in selected_vehicles:
-                    if v is not None and v != "":
-                        valid_vehicles.append(str(v))
-                
-                debug_print(f"Valid vehicle IDs for filtering: {valid_vehicles}")
-                
-                if valid_vehicles:
-                    # Check if any vehicle IDs exist in the filtered dataset 
-                    available_ids = set(filtered_df['vehicle_id_str'].unique())
-                    debug_print(f"Available vehicle IDs in filtered data: {available_ids}")
-                    
-                    # Check for matches
-                    matches = [v for v in valid_vehicles if v in available_ids]
-                    debug_print(f"Matching vehicle IDs: {matches}")
-                    
-                    if matches:
-                        filtered_df = filtered_df[filtered_df['vehicle_id_str'].isin(matches)]
-                        debug_print(f"Vehicle filter: {before_count} -> {len(filtered_df)} records")
-                    else:
-                        debug_print(f"WARNING: No matching vehicle IDs found in filtered data")
-                        # We'll keep the data and apply the date filter only - this will allow
-                        # users to see data from the selected date range
-        
-        # Apply location filter
-        if selected_locations and len(selected_locations) > 0:
-            if 'location' in filtered_df.columns:
-                before_count = len(filtered_df)
-                # Convert selected_locations to list if it's not already
-                if not isinstance(selected_locations, list):
-                    selected_locations = [selected_locations]
-                
-                # Process locations for filtering
-                debug_print(f"Location values before processing: {selected_locations}")
-                
-                # Extract valid location strings
-                valid_locations = [l for l in selected_locations if l is not None and l != ""]
-                debug_print(f"Valid locations for filtering: {valid_locations}")
-                
-                if valid_locations:
-                    # Check if any locations exist in the filtered dataset
-                    available_locations = set(filtered_df['location'].dropna().unique())
-                    debug_print(f"Available locations in filtered data: {available_locations}")
-                    
-                    # Check for matches
-                    matches = [l for l in valid_locations if l in available_locations]
-                    debug_print(f"Matching locations: {matches}")
-                    
-                    if matches:
-                        filtered_df = filtered_df[filtered_df['location'].isin(matches)]
-                        debug_print(f"Location filter: {before_count} -> {len(filtered_df)} records")
-                    else:
-                        debug_print(f"WARNING: No matching locations found in filtered data")
-                        # We'll keep the data and apply the date filter only - this will allow
-                        # users to see data from the selected date range
-        
-        # Return a serialized version of the dataframe
-        if filtered_df.empty:
-            # If we have a date filter but no matches, try ignoring the company filters
-            if start_date and end_date and selected_companies and len(selected_companies) > 0:
-                debug_print("No records match all filters. Trying with just date filter.")
-                # Try with just date filtering
-                date_filtered_df = net_weights_df.copy()
-                
-                try:
-                    start_date_dt = pd.to_datetime(start_date)
-                    end_date_dt = pd.to_datetime(end_date) + timedelta(days=1)
-                    
-                    # Ensure entry_time is datetime
-                    date_filtered_df['entry_time'] = pd.to_datetime(date_filtered_df['entry_time'])
-                    
-                    # Apply just the date filter
-                    date_filtered_df = date_filtered_df[(date_filtered_df['entry_time'] >= start_date_dt) & 
-                                             (date_filtered_df['entry_time'] < end_date_dt)]
-                    
-                    if not date_filtered_df.empty:
-                        debug_print(f"Fallback: Found {len(date_filtered_df)} records with date filter only")
-                        filtered_df = date_filtered_df
-                except Exception as e:
-                    debug_print(f"Error in date-only filtering fallback: {e}")
-            
-            # If still empty, return empty result
-            if filtered_df.empty:
-                debug_print("No records match the filters after fallback attempt")
-                return json.dumps({'empty': True}), json.dumps(filter_state)
-        
-        # Extract just the session IDs which is enough to identify the filtered rows
-        # Convert any UUIDs to strings for JSON serialization
-        session_ids = []
-        for sid in filtered_df['session_id']:
-            if hasattr(sid, 'hex'):  # UUID object
-                session_ids.append(str(sid))
-            else:
-                session_ids.append(str(sid))  # Convert everything to string to be safe
-        
-        debug_print(f"Final filtered result: {len(session_ids)} records")
-        return json.dumps({'session_ids': session_ids}), json.dumps(filter_state)
-    
+        return filtered_data_payload(filter_state), json.dumps(filter_state)
     except Exception as e:
         import traceback
         print(f"Error in filter_data: {e}")
@@ -2024,7 +1541,7 @@ def filter_data(n_clicks, start_date, end_date, delivery_type, selected_companie
         # Clear filter state on error
         error_filter_state = filter_state.copy()
         error_filter_state['filters_applied'] = False
-        return net_weights_df.to_json(date_format='iso', orient='split'), json.dumps(error_filter_state)
+        return filtered_data_payload(error_filter_state), json.dumps(error_filter_state)
 
 # Reset filters
 @app.callback(
@@ -2040,29 +1557,11 @@ def filter_data(n_clicks, start_date, end_date, delivery_type, selected_companie
     prevent_initial_call=True
 )
 def reset_filters(n_clicks):
-    # Create json data with session_ids for filtering - use all available data
-    if not net_weights_df.empty:
-        session_ids = []
-        for sid in net_weights_df['session_id']:
-            if hasattr(sid, 'hex'):  # UUID object
-                session_ids.append(str(sid))
-            else:
-                session_ids.append(str(sid))  # Convert everything to string to be safe
-                
-        filtered_data = json.dumps({'session_ids': session_ids})
-    else:
-        filtered_data = json.dumps({'empty': True})
+    # Use all available data
+    filtered_data = filtered_data_payload(NO_FILTER_STATE)
     
     # Clear filter state
-    clear_filter_state = json.dumps({
-        'start_date': None,
-        'end_date': None,
-        'delivery_type': None,
-        'selected_companies': [],
-        'selected_vehicles': [],
-        'selected_locations': [],
-        'filters_applied': False
-    })
+    clear_filter_state = json.dumps(NO_FILTER_STATE)
     
     return (datetime.now() - timedelta(days=30), datetime.now(), 
             'all', [], [], [], filtered_data, clear_filter_state)
@@ -2078,93 +1577,44 @@ def reset_filters(n_clicks):
 def update_data_info(json_data, n_intervals):
     debug_print(f"Updating data info with: {json_data[:100] if json_data else 'None'}...")
     try:
-        # Get filtered dataframe based on session IDs
-        if not json_data:
-            debug_print("No JSON data, using full dataset for data info")
-            filtered_df = net_weights_df.copy()
-        else:
-            try:
-                filter_data = json.loads(json_data)
-                debug_print(f"Loaded filter data for info panel: {str(filter_data)[:200] if filter_data else 'None'}...")
-                
-                if 'empty' in filter_data and filter_data['empty']:
-                    debug_print("Empty filter data, using empty dataframe for info panel")
-                    filtered_df = pd.DataFrame()
-                elif 'session_ids' in filter_data:
-                    session_ids = filter_data['session_ids']
-                    debug_print(f"Found {len(session_ids)} session IDs in filter data for info panel")
-                    
-                    # Create a new series with string values for comparison
-                    session_id_strings = net_weights_df['session_id'].astype(str)
-                    
-                    # Use the string series for filtering
-                    mask = session_id_strings.isin(session_ids)
-                    filtered_df = net_weights_df[mask]
-                    debug_print(f"After filtering for info panel, got {len(filtered_df)} records")
-                else:
-                    debug_print("No session_ids in filter data, using full dataset for info panel")
-                    filtered_df = net_weights_df.copy()
-            except Exception as e:
-                debug_print(f"Error parsing filtered data for info panel: {e}")
-                import traceback
-                debug_print(traceback.format_exc())
-                filtered_df = net_weights_df.copy()
+        # Pre-aggregated cube rows for the current filters
+        cube_rows = get_filtered_cube(json_data)
         
         # Check for empty dataframe
-        if filtered_df.empty:
+        if cube_rows.empty:
             return [
                 html.P("No data available", className="font-medium text-red-600"),
                 html.P("Please check database connection", className="text-sm")
             ]
-            
-        # Check if required columns exist
-        if 'net_weight' not in filtered_df.columns:
-            return [
-                html.P("Data format error", className="font-medium text-red-600"),
-                html.P("Missing required columns", className="text-sm")
-            ]
         
         # Calculate basic stats
-        total_sessions = len(filtered_df)
-        total_weight = filtered_df['net_weight'].sum() / 1000  # Convert to tons
+        total_sessions = int(cube_rows['sessions'].sum())
+        total_weight = cube_rows['net_weight'].sum() / 1000  # Convert to tons
         
         # Count by delivery type
-        if 'is_recycle' in filtered_df.columns:
-            normal_count = len(filtered_df[~filtered_df['is_recycle']])
-            recycle_count = len(filtered_df[filtered_df['is_recycle']])
-        else:
-            normal_count = total_sessions
-            recycle_count = 0
+        recycle_count = int(cube_rows.loc[cube_rows['is_recycle'], 'sessions'].sum())
+        normal_count = total_sessions - recycle_count
             
-        # Calculate fee stats if available
-        total_fees = 0
-        fee_companies = 0
-        if 'fee_amount' in filtered_df.columns:
-            total_fees = filtered_df['fee_amount'].sum()
-            # Ensure company_name is properly formatted before counting unique values
-            fee_companies_series = filtered_df[filtered_df['fee_amount'] > 0]['company_name']
-            # Convert any Series objects to strings to make them hashable
-            fee_companies_series = fee_companies_series.astype(str)
-            fee_companies = fee_companies_series.nunique()
+        # Calculate fee stats
+        total_fees = cube_rows['fee_amount'].sum()
+        # Convert any Series objects to strings to make them hashable
+        fee_companies = cube_rows.loc[cube_rows['fee_amount'] > 0, 'company_name'].astype(str).nunique()
         
         # Format date ranges if available
         date_range_text = "N/A"
-        if not filtered_df.empty and 'entry_time' in filtered_df.columns:
-            min_date = filtered_df['entry_time'].min()
-            max_date = filtered_df['entry_time'].max()
-            if pd.notna(min_date) and pd.notna(max_date):
-                date_range_text = f"{min_date.strftime('%Y-%m-%d')} to {max_date.strftime('%Y-%m-%d')}"
-        
-        # Add fee information if available
-        fee_info = []
-        if 'fee_amount' in filtered_df.columns:
-            fee_info = [
-                html.Div([
-                    html.P("Fee Information:", className="font-medium mt-2 text-red-600"),
-                    html.P(f"• Total fees: K {total_fees:,.2f}", className="ml-2"),
-                    html.P(f"• Companies charged: {fee_companies}", className="ml-2"),
-                ])
-            ]
+        min_date = cube_rows['entry_hour'].min()
+        max_date = cube_rows['entry_hour'].max()
+        if pd.notna(min_date) and pd.notna(max_date):
+            date_range_text = f"{min_date.strftime('%Y-%m-%d')} to {max_date.strftime('%Y-%m-%d')}"
+        
+        # Add fee information
+        fee_info = [
+            html.Div([
+                html.P("Fee Information:", className="font-medium mt-2 text-red-600"),
+                html.P(f"• Total fees: K {total_fees:,.2f}", className="ml-2"),
+                html.P(f"• Companies charged: {fee_companies}", className="ml-2"),
+            ])
+        ]
             
         return [
             html.P(f"Total Sessions: {total_sessions:,}", className="font-medium"),
@@ -2202,67 +1652,39 @@ def update_overview_tab(json_data, tab_value, n_intervals, n_clicks):
         return []
     
     try:
-        # Get filtered dataframe based on session IDs
-        if not json_data:
-            filtered_df = net_weights_df.copy()
-        else:
-            try:
-                filter_data = json.loads(json_data)
-                if 'empty' in filter_data and filter_data['empty']:
-                    filtered_df = pd.DataFrame()
-                elif 'session_ids' in filter_data:
-                    session_ids = filter_data['session_ids']
-                    # Handle string comparison for session IDs (original might be UUID)
-                    filtered_df = net_weights_df[net_weights_df['session_id'].astype(str).isin(session_ids)]
-                else:
-                    filtered_df = net_weights_df.copy()
-            except Exception as e:
-                debug_print(f"Error parsing filtered data: {e}")
-                filtered_df = net_weights_df.copy()
+        # Pre-aggregated cube rows for the current filters
+        cube_rows = get_filtered_cube(json_data)
         
-        if filtered_df.empty or 'net_weight' not in filtered_df.columns:
+        if cube_rows.empty:
             return html.Div("No data available. Please check database connection.", className="text-gray-500 text-center py-10")
         
-        # Calculate key metrics - overall and by waste type
-        total_sessions = len(filtered_df)
-        total_waste = filtered_df['net_weight'].sum() / 1000  # Convert to tons
-        avg_waste = filtered_df['net_weight'].mean()
-        max_load = filtered_df['net_weight'].max()
-        
         # Normal vs Recycle stats - detailed calculations
-        normal_df = filtered_df[~filtered_df['is_recycle']] if 'is_recycle' in filtered_df.columns else filtered_df
-        recycle_df = filtered_df[filtered_df['is_recycle']] if 'is_recycle' in filtered_df.columns else pd.DataFrame()
+        normal_cube = cube_rows[~cube_rows['is_recycle']]
+        recycle_cube = cube_rows[cube_rows['is_recycle']]
+        normal_stats = rollup(normal_cube).iloc[0]
+        recycle_stats = rollup(recycle_cube).iloc[0]
         
         # Regular waste metrics
-        normal_sessions = len(normal_df) if not normal_df.empty else 0
-        normal_total = normal_df['net_weight'].sum() / 1000 if not normal_df.empty else 0
-        normal_avg = normal_df['net_weight'].mean() if not normal_df.empty else 0
-        normal_fees = normal_df['fee_amount'].sum() if not normal_df.empty and 'fee_amount' in normal_df.columns else 0
+        normal_sessions = int(normal_stats['sessions'])
+        normal_total = normal_stats['net_weight'] / 1000
+        normal_avg = normal_stats['avg_weight']
+        normal_fees = normal_stats['fee_amount']
         
         # Recycled waste metrics
-        recycle_sessions = len(recycle_df) if not recycle_df.empty else 0
-        recycle_total = recycle_df['net_weight'].sum() / 1000 if not recycle_df.empty else 0
-        recycle_avg = recycle_df['net_weight'].mean() if not recycle_df.empty else 0
-        recycle_fees = recycle_df['fee_amount'].sum() if not recycle_df.empty and 'fee_amount' in recycle_df.columns else 0
+        recycle_sessions = int(recycle_stats['sessions'])
+        recycle_total = recycle_stats['net_weight'] / 1000
+        recycle_avg = recycle_stats['avg_weight']
+        recycle_fees = recycle_stats['fee_amount']
         
         # Prepare daily trend data - convert dates to strings to avoid serialization issues
-        # Create a copy with string dates
-        if 'date' in filtered_df.columns and not filtered_df.empty:
-            try:
-                trend_df = filtered_df.copy()
-                # Safer way to create new column - avoid potential column alignment issues
-                trend_df['date_str'] = trend_df['date'].astype(str)
-                daily_data = trend_df.groupby(['date_str', 'is_recycle']).agg({
-                    'net_weight': 'sum',
-                    'session_id': 'count'
-                }).reset_index()
-                daily_data.rename(columns={'date_str': 'date'}, inplace=True)
-            except Exception as e:
-                debug_print(f"Error creating daily trend data: {e}")
-                # Fallback to empty dataframe
-                daily_data = pd.DataFrame(columns=['date', 'is_recycle', 'net_weight', 'session_id'])
-        else:
-            # Create an empty dataframe with the expected columns
+        try:
+            daily_data = rollup(cube_rows, ['date', 'is_recycle'])
+            daily_data['date'] = daily_data['date'].astype(str)
+            daily_data = daily_data.rename(columns={'sessions': 'session_id'})
+            daily_data = daily_data.sort_values(['date', 'is_recycle'])[['date', 'is_recycle', 'net_weight', 'session_id']]
+        except Exception as e:
+            debug_print(f"Error creating daily trend data: {e}")
+            # Fallback to empty dataframe
             daily_data = pd.DataFrame(columns=['date', 'is_recycle', 'net_weight', 'session_id'])
         
         # Create time series chart for the overview
@@ -2334,10 +1756,10 @@ def update_overview_tab(json_data, tab_value, n_intervals, n_clicks):
         # Create hourly heatmap (limited to business hours 8 AM - 5 PM)
         # Filter data to only include business hours (8-17)
         try:
-            business_hours_df = filtered_df[filtered_df['hour'].between(8, 17)] if 'hour' in filtered_df.columns else pd.DataFrame()
+            business_hours_cube = cube_rows[cube_rows['hour'].between(8, 17)]
             
-            if not business_hours_df.empty and 'day_of_week' in business_hours_df.columns:
-                hour_dow = business_hours_df.groupby(['day_of_week', 'hour']).size().reset_index(name='count')
+            if not business_hours_cube.empty:
+                hour_dow = rollup(business_hours_cube, ['day_of_week', 'hour']).rename(columns={'sessions': 'count'})
                 
                 # Custom day order
                 day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
@@ -2422,43 +1844,13 @@ def update_overview_tab(json_data, tab_value, n_intervals, n_clicks):
         def create_company_table(data_subset, table_id, color_scheme='blue'):
             """Create a company ranking table for a specific waste type"""
             companies_data = []
-            if 'company_name' in data_subset.columns and not data_subset.empty:
+            if not data_subset.empty:
                 try:
-                    # Create aggregation dictionary based on available columns
-                    agg_dict = {
-                        'net_weight': ['sum', 'count', 'mean'],
-                        'session_id': 'nunique'
-                    }
-                    
-                    if 'fee_amount' in data_subset.columns:
-                        agg_dict['fee_amount'] = 'sum'
-                    
-                    company_stats = data_subset.groupby('company_name').agg(agg_dict)
-                    
-                    # Flatten column names properly
-                    new_columns = []
-                    for col in company_stats.columns:
-                        if isinstance(col, tuple):
-                            if col[0] == 'net_weight':
-                                if col[1] == 'sum':
-                                    new_columns.append('total_weight')
-                                elif col[1] == 'count':
-                                    new_columns.append('total_trips')
-                                elif col[1] == 'mean':
-                                    new_columns.append('avg_weight')
-                            elif col[0] == 'session_id' and col[1] == 'nunique':
-                                new_columns.append('unique_sessions')
-                            elif col[0] == 'fee_amount' and col[1] == 'sum':
-                                new_columns.append('total_fees')
-                        else:
-                            new_columns.append(str(col))
-                    
-                    company_stats.columns = new_columns
-                    company_stats = company_stats.reset_index()
-                    
-                    # Add total_fees column if it doesn't exist
-                    if 'total_fees' not in company_stats.columns:
-                        company_stats['total_fees'] = 0
+                    company_stats = rollup(data_subset, ['company_name']).rename(columns={
+                        'net_weight': 'total_weight',
+                        'sessions': 'total_trips',
+                        'fee_amount': 'total_fees'
+                    })
                     
                     # Round numeric columns
                     numeric_cols = ['total_weight', 'avg_weight', 'total_fees']
@@ -2482,7 +1874,7 @@ def update_overview_tab(json_data, tab_value, n_intervals, n_clicks):
                             'total_weight_tons': f"{row['total_weight_tons']:,.2f}",
                             'total_trips': int(row['total_trips']),
                             'avg_weight_kg': f"{row['avg_weight']:,.1f}",
-                            'total_fees': f"K {row['total_fees']:,.2f}" if 'fee_amount' in data_subset.columns and row['total_fees'] > 0 else "-"
+                            'total_fees': f"K {row['total_fees']:,.2f}" if row['total_fees'] > 0 else "-"
                         }
                         companies_data.append(company_data)
                         
@@ -2560,17 +1952,9 @@ def update_overview_tab(json_data, tab_value, n_intervals, n_clicks):
                     className="text-gray-500 text-center py-8"
                 )
         
-        # Create separate datasets for regular and recycled waste
-        if 'is_recycle' in filtered_df.columns and not filtered_df.empty:
-            regular_waste_df = filtered_df[~filtered_df['is_recycle']]
-            recycled_waste_df = filtered_df[filtered_df['is_recycle']]
-        else:
-            regular_waste_df = filtered_df.copy()  # All data as regular if no recycle column
-            recycled_waste_df = pd.DataFrame()   # Empty recycled dataset
-        
         # Create both tables
-        regular_waste_table = create_company_table(regular_waste_df, 'top-companies-regular', 'blue')
-        recycled_waste_table = create_company_table(recycled_waste_df, 'top-companies-recycled', 'green')
+        regular_waste_table = create_company_table(normal_cube, 'top-companies-regular', 'blue')
+        recycled_waste_table = create_company_table(recycle_cube, 'top-companies-recycled', 'green')
         
         # Create the overview layout
         return html.Div([
@@ -2603,7 +1987,7 @@ def update_overview_tab(json_data, tab_value, n_intervals, n_clicks):
                                 html.H4("Fees", className="text-sm font-medium text-gray-600"),
                                 html.P(f"K {normal_fees:,.2f}", className="text-3xl font-extrabold text-blue-600"),
                                 html.P("charges collected", className="text-xs text-gray-500")
-                            ], className="text-center") if 'fee_amount' in filtered_df.columns else html.Div()
+                            ], className="text-center")
                             
                         ], className="grid grid-cols-2 md:grid-cols-4 gap-4")
                     ], className="bg-blue-50 rounded-lg p-5 shadow-sm border border-blue-200")
@@ -2636,7 +2020,7 @@ def update_overview_tab(json_data, tab_value, n_intervals, n_clicks):
                                 html.H4("Fees", className="text-sm font-medium text-gray-600"),
                                 html.P(f"K {recycle_fees:,.2f}", className="text-3xl font-extrabold text-green-600"),
                                 html.P("charges collected", className="text-xs text-gray-500")
-                            ], className="text-center") if 'fee_amount' in filtered_df.columns else html.Div()
+                            ], className="text-center")
                             
                         ], className="grid grid-cols-2 md:grid-cols-4 gap-4")
                     ], className="bg-green-50 rounded-lg p-5 shadow-sm border border-green-200")
@@ -2679,7 +2063,7 @@ def update_overview_tab(json_data, tab_value, n_intervals, n_clicks):
                     html.Div([
                         html.Div([
                             html.H4("🗑️ Regular Waste Disposal", className="text-md font-semibold text-blue-700 mb-3"),
-                            html.P(f"Total: {(regular_waste_df['net_weight'].sum() / 1000):,.2f} tons from {len(regular_waste_df)} trips" if not regular_waste_df.empty else "No regular waste data", 
+                            html.P(f"Total: {normal_total:,.2f} tons from {normal_sessions} trips" if normal_sessions else "No regular waste data", 
                                    className="text-sm text-gray-600 mb-4")
                         ]),
                         regular_waste_table
@@ -2689,7 +2073,7 @@ def update_overview_tab(json_data, tab_value, n_intervals, n_clicks):
                     html.Div([
                         html.Div([
                             html.H4("♻️ Recycled Waste Collection", className="text-md font-semibold text-green-700 mb-3"),
-                            html.P(f"Total: {(recycled_waste_df['net_weight'].sum() / 1000):,.2f} tons from {len(recycled_waste_df)} trips" if not recycled_waste_df.empty else "No recycled waste data", 
+                            html.P(f"Total: {recycle_total:,.2f} tons from {recycle_sessions} trips" if recycle_sessions else "No recycled waste data", 
                                    className="text-sm text-gray-600 mb-4")
                         ]),
                         recycled_waste_table
@@ -2721,48 +2105,21 @@ def update_analysis_tab(json_data, tab_value, n_intervals, n_clicks):
         return []
     
     try:
-        # Get filtered dataframe based on session IDs
-        if not json_data:
-            filtered_df = net_weights_df.copy()
-        else:
-            try:
-                filter_data = json.loads(json_data)
-                if 'empty' in filter_data and filter_data['empty']:
-                    filtered_df = pd.DataFrame()
-                elif 'session_ids' in filter_data:
-                    session_ids = filter_data['session_ids']
-                    # Handle string comparison for session IDs (original might be UUID)
-                    filtered_df = net_weights_df[net_weights_df['session_id'].astype(str).isin(session_ids)]
-                else:
-                    filtered_df = net_weights_df.copy()
-            except Exception as e:
-                debug_print(f"Error parsing filtered data: {e}")
-                filtered_df = net_weights_df.copy()
+        # Pre-aggregated cube rows for the current filters
+        cube_rows = get_filtered_cube(json_data)
         
-        if filtered_df.empty or 'net_weight' not in filtered_df.columns:
+        if cube_rows.empty:
             return html.Div("No data available. Please check database connection.", className="text-gray-500 text-center py-10")
         
         # Day of week analysis - use string values to avoid serialization issues
         day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
         
-        if 'day_of_week' in filtered_df.columns:
-            # Create a copy to ensure we have proper string values
-            dow_df = filtered_df.copy()
-            
-            # Ensure day_of_week is a string
-            dow_df.loc[:, 'day_of_week'] = dow_df['day_of_week'].astype(str)
-            
-            day_data = dow_df.groupby(['day_of_week', 'is_recycle']).agg({
-                'net_weight': 'sum',
-                'session_id': 'count'
-            }).reset_index()
-            
-            # Convert to categorical for proper ordering
-            day_data['day_of_week'] = pd.Categorical(day_data['day_of_week'], categories=day_order, ordered=True)
-            day_data = day_data.sort_values('day_of_week')
-        else:
-            # Create an empty dataframe with expected columns
-            day_data = pd.DataFrame(columns=['day_of_week', 'is_recycle', 'net_weight', 'session_id'])
+        day_data = rollup(cube_rows, ['day_of_week', 'is_recycle']).rename(columns={'sessions': 'session_id'})
+        day_data['day_of_week'] = day_data['day_of_week'].astype(str)
+        
+        # Convert to categorical for proper ordering
+        day_data['day_of_week'] = pd.Categorical(day_data['day_of_week'], categories=day_order, ordered=True)
+        day_data = day_data.sort_values('day_of_week')
         
         # Create grouped bar chart for day of week
         dow_fig = go.Figure()
@@ -2799,10 +2156,7 @@ def update_analysis_tab(json_data, tab_value, n_intervals, n_clicks):
         )
         
         # Vehicle analysis
-        vehicle_data = filtered_df.groupby(['license_plate', 'is_recycle']).agg({
-            'net_weight': 'sum',
-            'session_id': 'count'
-        }).reset_index()
+        vehicle_data = rollup(cube_rows, ['license_plate', 'is_recycle']).rename(columns={'sessions': 'session_id'})
         
         vehicle_data = vehicle_data.sort_values('net_weight', ascending=False)
         
@@ -2856,9 +2210,9 @@ def update_analysis_tab(json_data, tab_value, n_intervals, n_clicks):
             name='Recycle Collection' if t.name == 'True' else 'Normal Disposal'
         ))
         
-        # Duration vs weight analysis
+        # Duration vs weight analysis needs the individual sessions
         # Convert weights to metric tons for better readability
-        duration_df = filtered_df.copy()
+        duration_df = get_filtered_dataframe(json_data).copy()
         duration_df['net_weight_tons'] = duration_df['net_weight'] / 1000
         
         duration_fig = px.scatter(
@@ -2906,25 +2260,10 @@ def update_analysis_tab(json_data, tab_value, n_intervals, n_clicks):
         duration_fig.update_xaxes(range=[0, duration_df['duration_minutes'].quantile(0.99)])
         duration_fig.update_yaxes(range=[0, duration_df['net_weight_tons'].quantile(0.99)])
         
-        # Monthly trend analysis - use loc to avoid SettingWithCopyWarning
-        # Create a copy to ensure we're not modifying a view
-        if 'entry_time' in filtered_df.columns:
-            month_analysis_df = filtered_df.copy()
-            
-            # Format the month-year as a string directly to avoid Period objects
-            month_analysis_df.loc[:, 'month_year_str'] = pd.to_datetime(month_analysis_df['entry_time']).dt.strftime('%Y-%m')
-            
-            # Group by the string version of month-year
-            monthly_data = month_analysis_df.groupby(['month_year_str', 'is_recycle']).agg({
-                'net_weight': 'sum',
-                'session_id': 'count'
-            }).reset_index()
-            
-            # Rename column for consistency
-            monthly_data.rename(columns={'month_year_str': 'month_year'}, inplace=True)
-        else:
-            # Create an empty dataframe with expected columns if entry_time is missing
-            monthly_data = pd.DataFrame(columns=['month_year', 'is_recycle', 'net_weight', 'session_id'])
+        # Monthly trend analysis
+        # Format the month-year as a string directly to avoid Period objects
+        month_cube = cube_rows.assign(month_year=pd.to_datetime(cube_rows['entry_hour']).dt.strftime('%Y-%m'))
+        monthly_data = rollup(month_cube, ['month_year', 'is_recycle']).rename(columns={'sessions': 'session_id'})
         
         # Create monthly trend chart
         monthly_fig = go.Figure()
@@ -3012,50 +2351,27 @@ def update_locations_tab(json_data, tab_value, n_intervals, n_clicks):
         return []
     
     try:
-        # Get filtered dataframe based on session IDs
-        if not json_data:
-            filtered_df = net_weights_df.copy()
-        else:
-            try:
-                filter_data = json.loads(json_data)
-                if 'empty' in filter_data and filter_data['empty']:
-                    filtered_df = pd.DataFrame()
-                elif 'session_ids' in filter_data:
-                    session_ids = filter_data['session_ids']
-                    # Handle string comparison for session IDs (original might be UUID)
-                    filtered_df = net_weights_df[net_weights_df['session_id'].astype(str).isin(session_ids)]
-                else:
-                    filtered_df = net_weights_df.copy()
-            except Exception as e:
-                debug_print(f"Error parsing filtered data: {e}")
-                filtered_df = net_weights_df.copy()
+        # Pre-aggregated cube rows for the current filters; the cube's
+        # location dimension holds the clean location
+        cube_rows = get_filtered_cube(json_data)
         
-        if filtered_df.empty or 'net_weight' not in filtered_df.columns:
+        if cube_rows.empty:
             return html.Div("No location data available. Please check database connection.", className="text-gray-500 text-center py-10")
         
-        # Use clean_location if available, otherwise fall back to location
-        location_column = 'clean_location' if 'clean_location' in filtered_df.columns else 'location'
-        
-        if location_column not in filtered_df.columns:
-            return html.Div("No location data available. Please check database connection.", className="text-gray-500 text-center py-10")
+        location_column = 'location'
         
         # Filter out recycle collection to focus on normal disposal with locations
-        normal_df = filtered_df[~filtered_df['is_recycle']] if 'is_recycle' in filtered_df.columns else filtered_df
+        normal_cube = cube_rows[~cube_rows['is_recycle']]
         
         # Skip locations with "LEGACY DATA" or empty values
-        location_df = normal_df[~normal_df[location_column].isin(['LEGACY DATA', '', 'Unknown Location'])]
+        location_df = normal_cube[~normal_cube[location_column].isin(['LEGACY DATA', '', 'Unknown Location'])]
         
         if location_df.empty:
             return html.Div("No location data available after filtering.", className="text-gray-500 text-center py-10")
         
         # Group by clean location
-        location_data = location_df.groupby(location_column).agg({
-            'net_weight': 'sum',
-            'session_id': 'count'
-        }).reset_index()
-        
-        # Rename the column for consistency in charts
-        location_data.rename(columns={location_column: 'location'}, inplace=True)
+        location_totals = rollup(location_df, [location_column])
+        location_data = location_totals[[location_column, 'net_weight', 'sessions']].rename(columns={'sessions': 'session_id'})
         
         # Apply display shortening to location names
         location_data['location'] = location_data['location'].apply(shorten_location_for_display)
@@ -3100,15 +2416,8 @@ def update_locations_tab(json_data, tab_value, n_intervals, n_clicks):
         top_locations_original = [location_mapping.get(loc, loc) for loc in top_locations_short]
         top_locations_df = location_df[location_df[location_column].isin(top_locations_original)]
         
-        # Group by location and date - create a copy and rename column for consistency
-        trend_df = top_locations_df.copy()
-        trend_df['location_clean'] = trend_df[location_column]
-        daily_location_data = trend_df.groupby(['location_clean', 'date']).agg({
-            'net_weight': 'sum'
-        }).reset_index()
-        
-        # Rename column for chart consistency
-        daily_location_data.rename(columns={'location_clean': 'location'}, inplace=True)
+        # Group by location and date
+        daily_location_data = rollup(top_locations_df, [location_column, 'date'])[[location_column, 'date', 'net_weight']]
         
         # Apply display shortening to location names
         daily_location_data['location'] = daily_location_data['location'].apply(shorten_location_for_display)
@@ -3140,12 +2449,7 @@ def update_locations_tab(json_data, tab_value, n_intervals, n_clicks):
         )
         
         # Calculate average weights by location
-        avg_weights = location_df.groupby(location_column).agg({
-            'net_weight': 'mean'
-        }).reset_index()
-        
-        # Rename column for chart consistency
-        avg_weights.rename(columns={location_column: 'location'}, inplace=True)
+        avg_weights = location_totals[[location_column, 'avg_weight']].rename(columns={'avg_weight': 'net_weight'})
         
         # Apply display shortening to location names
         avg_weights['location'] = avg_weights['location'].apply(shorten_location_for_display)
@@ -3223,23 +2527,8 @@ def update_data_table_tab(json_data, tab_value, n_intervals, n_clicks, user_data
         return []
     
     try:
-        # Get filtered dataframe based on session IDs
-        if not json_data:
-            filtered_df = net_weights_df.copy()
-        else:
-            try:
-                filter_data = json.loads(json_data)
-                if 'empty' in filter_data and filter_data['empty']:
-                    filtered_df = pd.DataFrame()
-                elif 'session_ids' in filter_data:
-                    session_ids = filter_data['session_ids']
-                    # Handle string comparison for session IDs (original might be UUID)
-                    filtered_df = net_weights_df[net_weights_df['session_id'].astype(str).isin(session_ids)]
-                else:
-                    filtered_df = net_weights_df.copy()
-            except Exception as e:
-                debug_print(f"Error parsing filtered data: {e}")
-                filtered_df = net_weights_df.copy()
+        # Get the cached filtered rows for the filter token
+        filtered_df = get_filtered_dataframe(json_data)
         
         if filtered_df.empty:
             return html.Div("No data available. Please check database connection.", className="text-gray-500 text-center py-10")
@@ -3577,36 +2866,48 @@ def export_excel_data(n_clicks, json_data, user_data, custom_filename):
 
 # Helper function to get filtered dataframe
 def get_filtered_dataframe(json_data):
+    """
+    Rows of net_weights_df for a filtered-data store value.
+    
+    The positions are looked up under the token for the current data
+    version, so a token issued before a refresh is recomputed on the new
+    frame rather than applied to it.
+    """
+    df, version = current_net_weights()
     if not json_data:
-        filtered_df = net_weights_df.copy()
-        debug_print("Exporting all data (no filter)")
-    else:
-        try:
-            filter_data = json.loads(json_data)
-            debug_print(f"Loaded filter data for export: {str(filter_data)[:200]}...")
-            
-            if 'empty' in filter_data and filter_data['empty']:
-                debug_print("Empty filter data, exporting empty dataframe")
-                filtered_df = pd.DataFrame()
-            elif 'session_ids' in filter_data:
-                session_ids = filter_data['session_ids']
-                debug_print(f"Exporting {len(session_ids)} filtered sessions")
-                
-                # Create mask for string comparison
-                session_id_strings = net_weights_df['session_id'].astype(str)
-                mask = session_id_strings.isin(session_ids)
-                filtered_df = net_weights_df[mask]
-                debug_print(f"Found {len(filtered_df)} records for export")
-            else:
-                debug_print("No session_ids in filter, exporting all data")
-                filtered_df = net_weights_df.copy()
-        except Exception as e:
-            debug_print(f"Error parsing filtered data for export: {e}")
-            import traceback
-            debug_print(traceback.format_exc())
-            filtered_df = net_weights_df.copy()
+        return df.copy()
     
-    return filtered_df
+    try:
+        filter_data = json.loads(json_data)
+    except Exception as e:
+        debug_print(f"Error parsing filtered data: {e}")
+        return df.copy()
+    
+    if filter_data.get('empty'):
+        return pd.DataFrame()
+    if 'token' not in filter_data:
+        return df.copy()
+    
+    # Recomputed when evicted, computed by another worker, or the data was refreshed since
+    _, positions = cache_filter_result(filter_data.get('filter_state') or NO_FILTER_STATE, df, version)
+    return df.iloc[positions]
+
+def get_filtered_cube(json_data):
+    """Aggregate-cube rows for a filtered-data store value"""
+    try:
+        filter_data = json.loads(json_data) if json_data else {}
+    except Exception as e:
+        debug_print(f"Error parsing filtered data: {e}")
+        filter_data = {}
+    
+    if filter_data.get('empty'):
+        return aggregate(pd.DataFrame())
+    
+    cube_rows = aggregate_cube.select(filter_data.get('filter_state') or NO_FILTER_STATE)
+    if cube_rows is None:
+        # Date bounds the cube can't answer exactly; aggregate the filtered rows instead
+        cube_rows = aggregate(get_filtered_dataframe(json_data))
+    return cube_rows
 
 # Helper function to format data for export
 def format_export_data(filtered_df):
@@ -3701,7 +3002,7 @@ def refresh_dashboard_data(n_intervals, n_clicks, auto_refresh_enabled):
         # Only auto-refresh if enabled
         if auto_refresh_enabled and 'enabled' in auto_refresh_enabled:
             debug_print(f"Auto-refresh triggered (interval: {n_intervals})")
-            refresh_success = refresh_data_from_database()
+            refresh_success = refresh_data_incrementally()
             if refresh_success:
                 return [f"Last refreshed: {last_refresh_time} (auto)", ""]
             else:
@@ -3726,112 +3027,11 @@ def reapply_filters_after_refresh(refresh_signal, filter_state_json):
     try:
         if not filter_state_json:
             # No stored filter state, return all data
-            if not net_weights_df.empty:
-                session_ids = []
-                for sid in net_weights_df['session_id']:
-                    if hasattr(sid, 'hex'):
-                        session_ids.append(str(sid))
-                    else:
-                        session_ids.append(str(sid))
-                return json.dumps({'session_ids': session_ids})
-            else:
-                return json.dumps({'empty': True})
+            return filtered_data_payload(NO_FILTER_STATE)
         
         filter_state = json.loads(filter_state_json)
-        
-        # Check if filters are currently applied
-        if not filter_state.get('filters_applied', False):
-            # No active filters, return all data
-            if not net_weights_df.empty:
-                session_ids = []
-                for sid in net_weights_df['session_id']:
-                    if hasattr(sid, 'hex'):
-                        session_ids.append(str(sid))
-                    else:
-                        session_ids.append(str(sid))
-                return json.dumps({'session_ids': session_ids})
-            else:
-                return json.dumps({'empty': True})
-        
         debug_print("Reapplying filters to refreshed data...")
-        
-        # Reapply the stored filters to fresh data
-        filtered_df = net_weights_df.copy()
-        
-        # Extract filter parameters
-        start_date = filter_state.get('start_date')
-        end_date = filter_state.get('end_date')
-        delivery_type = filter_state.get('delivery_type')
-        selected_companies = filter_state.get('selected_companies', [])
-        selected_vehicles = filter_state.get('selected_vehicles', [])
-        selected_locations = filter_state.get('selected_locations', [])
-        
-        debug_print(f"Reapplying filters: date={start_date}-{end_date}, type={delivery_type}, companies={len(selected_companies)}, vehicles={len(selected_vehicles)}, locations={len(selected_locations)}")
-        
-        if filtered_df.empty:
-            return json.dumps({'empty': True})
-        
-        # Apply date filter
-        if start_date and end_date:
-            try:
-                start_date = pd.to_datetime(start_date)
-                end_date = pd.to_datetime(end_date) + timedelta(days=1)
-                
-                if 'entry_time' in filtered_df.columns:
-                    filtered_df['entry_time'] = pd.to_datetime(filtered_df['entry_time'])
-                    filtered_df = filtered_df[(filtered_df['entry_time'] >= start_date) & 
-                                             (filtered_df['entry_time'] < end_date)]
-                    debug_print(f"Date filter reapplied: {len(filtered_df)} records")
-            except Exception as e:
-                debug_print(f"Date filtering error during reapply: {e}")
-        
-        # Apply delivery type filter
-        if delivery_type and delivery_type != 'all':
-            if 'is_recycle' in filtered_df.columns:
-                before_count = len(filtered_df)
-                if delivery_type == 'normal':
-                    filtered_df = filtered_df[~filtered_df['is_recycle']]
-                elif delivery_type == 'recycle':
-                    filtered_df = filtered_df[filtered_df['is_recycle']]
-                debug_print(f"Delivery type filter reapplied: {before_count} -> {len(filtered_df)} records")
-        
-        # Apply company filter
-        if selected_companies and len(selected_companies) > 0:
-            if 'company_id' in filtered_df.columns:
-                before_count = len(filtered_df)
-                selected_company_strs = [str(c) for c in selected_companies if c is not None and c != ""]
-                filtered_df = filtered_df[filtered_df['company_id'].astype(str).isin(selected_company_strs)]
-                debug_print(f"Company filter reapplied: {before_count} -> {len(filtered_df)} records")
-        
-        # Apply vehicle filter
-        if selected_vehicles and len(selected_vehicles) > 0:
-            if 'vehicle_id' in filtered_df.columns:
-                before_count = len(filtered_df)
-                selected_vehicle_strs = [str(v) for v in selected_vehicles if v is not None and v != ""]
-                filtered_df = filtered_df[filtered_df['vehicle_id'].astype(str).isin(selected_vehicle_strs)]
-                debug_print(f"Vehicle filter reapplied: {before_count} -> {len(filtered_df)} records")
-        
-        # Apply location filter
-        if selected_locations and len(selected_locations) > 0:
-            if 'location' in filtered_df.columns:
-                before_count = len(filtered_df)
-                filtered_df = filtered_df[filtered_df['location'].isin(selected_locations)]
-                debug_print(f"Location filter reapplied: {before_count} -> {len(filtered_df)} records")
-        
-        # Return filtered session IDs
-        if filtered_df.empty:
-            debug_print("No records match the reapplied filters")
-            return json.dumps({'empty': True})
-        
-        session_ids = []
-        for sid in filtered_df['session_id']:
-            if hasattr(sid, 'hex'):
-                session_ids.append(str(sid))
-            else:
-                session_ids.append(str(sid))
-        
-        debug_print(f"Filters reapplied successfully: {len(session_ids)} records")
-        return json.dumps({'session_ids': session_ids})
+        return filtered_data_payload(filter_state)
         
     except Exception as e:
         debug_print(f"Error in reapply_filters_after_refresh: {e}")
@@ -3839,16 +3039,7 @@ def reapply_filters_after_refresh(refresh_signal, filter_state_json):
         debug_print(traceback.format_exc())
         
         # Return all data on error
-        if not net_weights_df.empty:
-            session_ids = []
-            for sid in net_weights_df['session_id']:
-                if hasattr(sid, 'hex'):
-                    session_ids.append(str(sid))
-                else:
-                    session_ids.append(str(sid))
-            return json.dumps({'session_ids': session_ids})
-        else:
-            return json.dumps({'empty': True})
+        return filtered_data_payload(NO_FILTER_STATE)
 
 # Initialize filtered data on app start
 @app.callback(
@@ -3858,21 +3049,34 @@ def reapply_filters_after_refresh(refresh_signal, filter_state_json):
     suppress_callback_exceptions=True
 )
 def initialize_filtered_data(dummy):
-    """Initialize filtered data with all session IDs on app start"""
-    if not net_weights_df.empty:
-        session_ids = []
-        for sid in net_weights_df['session_id']:
-            if hasattr(sid, 'hex'):  # UUID object
-                session_ids.append(str(sid))
-            else:
-                session_ids.append(str(sid))
-        return json.dumps({'session_ids': session_ids})
-    else:
-        return json.dumps({'empty': True})
+    """Initialize filtered data with all sessions on app start"""
+    return filtered_data_payload(NO_FILTER_STATE)
 
 # Initialize the auth manager instance
 auth_manager = AuthManager()
 
+# Dashboard logins live in the browser session store, so the monitoring
+# routes cannot check them and only answer local requests (e.g. a
+# monitoring agent on the host)
+def require_local_request():
+    """Abort with 403 unless the request comes from the loopback interface"""
+    if request.remote_addr not in ('127.0.0.1', '::1'):
+        abort(403)
+
+# Connection pool statistics for the shared database engine
+@app.server.route('/db/pool-stats')
+def pool_stats():
+    """Report connection pool usage for monitoring"""
+    require_local_request()
+    return jsonify(get_pool_stats())
+
+# Filtered-result cache statistics
+@app.server.route('/dashboard/filter-cache-stats')
+def filter_cache_stats():
+    """Report filtered-result cache usage for monitoring"""
+    require_local_request()
+    return jsonify(dict(filter_result_cache.stats(), data_version=data_version))
+
 # Run the app
 if __name__ == '__main__':
     # Production vs development configuration
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Duplicate Clustering
+--------------------
+Groups duplicate candidates as connected components of a similarity graph.
+
+Every pair of names scoring above the threshold is an edge, and a group is a
+set of names linked by edges, directly or through other names. Components
+are found with a disjoint set (union-find), so grouping costs about
+O(edges) and does not depend on the order the names or edges come in.
+Edges for new names can be added at any time without regrouping the rest.
+
+Long chains of moderately similar names can merge into one very large
+component. With a maximum group size, edges are applied from strongest to
+weakest and an edge that would grow a component past the maximum is left
+out, which splits such components along their weakest links.
+"""
+
+
+class DisjointSet:
+    """
+    Union-find over hashable items, with union by size and path halving.
+
+    Usage:
+        clusters = DisjointSet(['a', 'b', 'c'])
+        clusters.union('a', 'b')
+        clusters.groups()    # [['a', 'b'], ['c']]
+    """
+
+    def __init__(self, items=()):
+        self._parent = {}
+        self._size = {}
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item):
+        return item in self._parent
+
+    def __len__(self):
+        return len(self._parent)
+
+    def add(self, item):
+        """Add item as a singleton set (no-op if already present)"""
+        if item not in self._parent:
+            self._parent[item] = item
+            self._size[item] = 1
+
+    def find(self, item):
+        """Representative of the set containing item"""
+        parent = self._parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def size(self, item):
+        """Number of items in the set containing item"""
+        return self._size[self.find(item)]
+
+    def union(self, a, b, max_size=None):
+        """
+        Merge the sets containing a and b.
+
+        Returns:
+            bool: True if the sets were merged, False if they were already
+            the same set or the merged set would exceed max_size
+        """
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        if max_size is not None and self._size[root_a] + self._size[root_b] > max_size:
+            return False
+        if self._size[root_a] < self._size[root_b]:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        self._size[root_a] += self._size[root_b]
+        return True
+
+    def groups(self, min_size=1):
+        """
+        Sets with at least min_size items, each in the order its items were
+        added, ordered by their first item
+        """
+        members = {}
+        for item in self._parent:
+            members.setdefault(self.find(item), []).append(item)
+        return [group for group in members.values() if len(group) >= min_size]
+
+
+def cluster_edges(items, edges, max_size=None):
+    """
+    Connected components of a similarity graph.
+
+    Args:
+        items: All items, in their preferred order
+        edges: Iterable of (a, b, score) with a and b in items
+        max_size: Largest component allowed; None for no limit
+
+    Returns:
+        DisjointSet of the items with every kept edge applied
+    """
+    clusters = DisjointSet(items)
+    if max_size is None:
+        for a, b, _ in edges:
+            clusters.union(a, b)
+        return clusters
+
+    # Strongest edges first, ties in item order, so splits are deterministic
+    position = {item: index for index, item in enumerate(items)}
+    ordered = sorted(edges, key=lambda edge: (-edge[2], position[edge[0]], position[edge[1]]))
+    for a, b, _ in ordered:
+        clusters.union(a, b, max_size=max_size)
+    return clusters
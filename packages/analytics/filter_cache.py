@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Filtered Result Cache
+---------------------
+Server-side cache of dashboard filter results.
+
+Instead of sending every matching session_id to the browser, the filter
+callback stores the matching row positions here under a token derived from
+the filter state and the data version. Tab callbacks receive only the token
+and take the rows with a single iloc, without parsing large JSON payloads or
+re-casting id columns to strings.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def _as_list(values):
+    """Filter values as a list without empty entries"""
+    if values is None:
+        return []
+    if not isinstance(values, list):
+        values = [values]
+    return [v for v in values if v is not None and v != ""]
+
+
+def filter_state_mask(df, filter_state, time_column='entry_time', id_strings=None):
+    """
+    Boolean mask of the rows of df matching a dashboard filter state.
+
+    Company, vehicle and location selections that match nothing in the
+    current result are ignored rather than emptying it, and when nothing
+    matches at all the date range alone is used.
+
+    Args:
+        df: Net weights (or aggregate cube) frame
+        filter_state: Dict as stored in the filter-state store
+        time_column: Timestamp column the date range applies to
+        id_strings: Function returning the string form of an id column;
+            defaults to df[column].astype(str)
+    """
+    mask = np.ones(len(df), dtype=bool)
+    date_mask = None
+
+    if not filter_state.get('filters_applied', False) or df.empty:
+        return mask
+
+    if id_strings is None:
+        id_strings = lambda column: df[column].astype(str)
+
+    # Apply date filter
+    start_date = filter_state.get('start_date')
+    end_date = filter_state.get('end_date')
+    if start_date and end_date and time_column in df.columns:
+        try:
+            start_date = pd.to_datetime(start_date)
+            end_date = pd.to_datetime(end_date) + pd.Timedelta(days=1)  # Include full end day
+            times = pd.to_datetime(df[time_column])
+            date_mask = ((times >= start_date) & (times < end_date)).values
+            mask &= date_mask
+        except Exception as e:
+            logger.warning(f"Date filtering error: {e}")
+
+    # Apply delivery type filter
+    delivery_type = filter_state.get('delivery_type')
+    if delivery_type in ('normal', 'recycle') and 'is_recycle' in df.columns:
+        is_recycle = df['is_recycle'].fillna(False).astype(bool).values
+        mask &= ~is_recycle if delivery_type == 'normal' else is_recycle
+
+    # Apply company, vehicle and location filters
+    for column, key in (('company_id', 'selected_companies'),
+                        ('vehicle_id', 'selected_vehicles'),
+                        ('location', 'selected_locations')):
+        selected = _as_list(filter_state.get(key))
+        if not selected or column not in df.columns:
+            continue
+        if column == 'location':
+            column_mask = df[column].isin(selected).values
+        else:
+            # Handle string or UUID ids
+            column_mask = id_strings(column).isin([str(v) for v in selected]).values
+        if (mask & column_mask).any():
+            mask &= column_mask
+        else:
+            logger.info(f"No matching {column} values found in filtered data, ignoring that filter")
+
+    # If we have a date filter but no matches, try ignoring the company filters
+    if not mask.any() and date_mask is not None and _as_list(filter_state.get('selected_companies')):
+        if date_mask.any():
+            mask = date_mask
+
+    return mask
+
+
+class FilteredResultCache:
+    """
+    Bounded LRU cache of filtered row positions.
+
+    Entries are only valid for the data version they were computed on; the
+    version is part of the token, and clear() drops everything when the
+    underlying frame is replaced.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._column_strings = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_token(filter_state, data_version):
+        """Stable token for a filter state on a given data version"""
+        state = json.dumps(filter_state, sort_keys=True, default=str)
+        return hashlib.sha1(f"{data_version}:{state}".encode()).hexdigest()
+
+    def get(self, token):
+        """Cached row positions for token, or None"""
+        with self._lock:
+            positions = self._entries.get(token)
+            if positions is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return positions
+
+    def put(self, token, positions):
+        """Store row positions for token, evicting the least recently used entry"""
+        with self._lock:
+            self._entries[token] = positions
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def column_strings(self, df, column, data_version):
+        """
+        String form of an id column, cast once per data version.
+
+        Filter values arrive from the browser as strings while ids may be
+        UUIDs or integers, so comparisons are done on the string form.
+        """
+        key = (data_version, column)
+        with self._lock:
+            strings = self._column_strings.get(key)
+        if strings is None:
+            strings = df[column].astype(str)
+            with self._lock:
+                self._column_strings = {k: v for k, v in self._column_strings.items() if k[0] == data_version}
+                self._column_strings[key] = strings
+        return strings
+
+    def clear(self):
+        """Drop all entries, e.g. after the data was refreshed"""
+        with self._lock:
+            self._entries.clear()
+            self._column_strings.clear()
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Filter Options Index
+--------------------
+Inverted index behind the dashboard's cascading filter dropdowns.
+
+Sessions are numbered by entry time once per data refresh, so any date
+range is a contiguous run of session positions. Each company, vehicle and
+location maps to the sorted positions of its sessions, and delivery type is
+kept as a bitmap over the same positions. The options for one dropdown are
+then the values present in the date run intersected with the selections of
+the other two dropdowns, computed on NumPy arrays without copying frames or
+re-parsing timestamps on every poll.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from filter_cache import _as_list
+
+# Locations never offered as a filter value
+HIDDEN_LOCATIONS = {'LEGACY DATA'}
+
+# Listed last in the location dropdown
+RECYCLE_LOCATION = 'Recycle Collection'
+
+
+class _Dimension:
+    """Codes, keys and posting lists of one filter column"""
+
+    def __init__(self, values, key_func=None):
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        self.codes = codes
+        self.values = list(uniques)
+        self.keys = [key_func(v) if key_func else v for v in self.values]
+        self.code_of = {key: code for code, key in enumerate(self.keys)}
+
+        # Posting lists: positions of each value's sessions, ascending
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(self.values) + 1))
+        self.postings = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.values))]
+
+    def selection_mask(self, selected, size):
+        """Bitmap of the sessions of the selected keys, or None for no selection"""
+        if not selected:
+            return None
+        codes = [self.code_of[key] for key in selected if key in self.code_of]
+        mask = np.zeros(size, dtype=bool)
+        for code in codes:
+            mask[self.postings[code]] = True
+        return mask
+
+    def active_codes(self, start, stop, mask=None):
+        """Codes with at least one session in positions [start, stop) under mask"""
+        codes = self.codes[start:stop]
+        if mask is not None:
+            codes = codes[mask[start:stop]]
+        codes = codes[codes >= 0]
+        return np.flatnonzero(np.bincount(codes, minlength=len(self.values)))
+
+
+class FilterOptionsIndex:
+    """
+    Cascading dropdown options for a net weights frame.
+
+    Each dropdown lists the values that still return sessions under the date
+    range, the delivery type and the selections made in the other two
+    dropdowns. Results are memoized per filter combination, since the poll
+    interval re-requests the same options until the data changes.
+    """
+
+    def __init__(self, location_label=None, max_cached=32):
+        """
+        Args:
+            location_label: Function giving the dropdown label of a location
+            max_cached: Number of filter combinations whose options are kept
+        """
+        self.location_label = location_label or str
+        self.max_cached = max_cached
+        self._lock = threading.Lock()
+        self._cached = OrderedDict()
+        self._state = None
+
+    def rebuild(self, net_weights_df, companies_df=None, vehicles_df=None):
+        """Index a new net weights frame and its reference tables"""
+        df = net_weights_df if net_weights_df is not None else pd.DataFrame()
+        size = len(df)
+
+        if 'entry_time' in df.columns:
+            entry_times = pd.to_datetime(df['entry_time']).values.astype('datetime64[ns]')
+        else:
+            entry_times = np.full(size, np.datetime64('NaT'), dtype='datetime64[ns]')
+        # NaT sorts first as the smallest int64, so date ranges never include it
+        order = np.argsort(entry_times.view('int64'), kind='stable')
+        sorted_times = entry_times.view('int64')[order]
+
+        def column(name):
+            if name in df.columns:
+                return df[name].values[order]
+            return np.full(size, None, dtype=object)
+
+        if 'is_recycle' in df.columns:
+            is_recycle = df['is_recycle'].fillna(False).astype(bool).values[order]
+        else:
+            is_recycle = np.zeros(size, dtype=bool)
+
+        state = {
+            'size': size,
+            'has_entry_time': 'entry_time' in df.columns,
+            'sorted_times': sorted_times,
+            'is_recycle': is_recycle,
+            'company_id': _Dimension(column('company_id'), key_func=str),
+            'vehicle_id': _Dimension(column('vehicle_id'), key_func=str),
+            'location': _Dimension(column('location')),
+            'company_labels': self._labels(companies_df, 'company_id', 'name'),
+            'vehicle_labels': self._labels(vehicles_df, 'vehicle_id', 'license_plate'),
+        }
+        with self._lock:
+            self._state = state
+            self._cached.clear()
+
+    @staticmethod
+    def _labels(reference_df, id_column, label_column):
+        """Dropdown options of a reference table in table order, as (id string, label) pairs"""
+        if reference_df is None or id_column not in reference_df.columns or label_column not in reference_df.columns:
+            return []
+        labels = reference_df[label_column].where(reference_df[label_column].notna(), 'Unknown')
+        return [(str(value), f"{label}") for value, label in zip(reference_df[id_column], labels)]
+
+    def _date_run(self, state, start_date, end_date):
+        """Positions [start, stop) of sessions entering within the date range"""
+        if not (start_date and end_date and state['has_entry_time']):
+            return 0, state['size']
+        start = pd.to_datetime(start_date).to_datetime64().astype('datetime64[ns]').view('int64')
+        # Include full end day
+        end = (pd.to_datetime(end_date) + pd.Timedelta(days=1)).to_datetime64().astype('datetime64[ns]').view('int64')
+        sorted_times = state['sorted_times']
+        return (int(np.searchsorted(sorted_times, start, side='left')),
+                int(np.searchsorted(sorted_times, end, side='left')))
+
+    def options(self, start_date=None, end_date=None, delivery_type=None,
+                selected_companies=None, selected_vehicles=None, selected_locations=None):
+        """
+        Options for the company, vehicle and location dropdowns.
+
+        Returns:
+            tuple: (company_options, vehicle_options, location_options) as
+            lists of {'label', 'value'} dicts
+        """
+        selected_companies = [str(c) for c in _as_list(selected_companies)]
+        selected_vehicles = [str(v) for v in _as_list(selected_vehicles)]
+        selected_locations = _as_list(selected_locations)
+        cache_key = (start_date, end_date, delivery_type, tuple(selected_companies),
+                     tuple(selected_vehicles), tuple(selected_locations))
+
+        with self._lock:
+            state = self._state
+            if state is None:
+                return [], [], []
+            if cache_key in self._cached:
+                self._cached.move_to_end(cache_key)
+                return self._cached[cache_key]
+
+        size = state['size']
+        start, stop = self._date_run(state, start_date, end_date)
+
+        # Masks over all positions; None means "no restriction"
+        delivery_mask = None
+        if delivery_type == 'normal':
+            delivery_mask = ~state['is_recycle']
+        elif delivery_type == 'recycle':
+            delivery_mask = state['is_recycle']
+        company_mask = state['company_id'].selection_mask(selected_companies, size)
+        vehicle_mask = state['vehicle_id'].selection_mask(selected_vehicles, size)
+        location_mask = state['location'].selection_mask(selected_locations, size)
+
+        def combined(*masks):
+            masks = [m for m in (delivery_mask,) + masks if m is not None]
+            if not masks:
+                return None
+            return np.logical_and.reduce(masks) if len(masks) > 1 else masks[0]
+
+        # Each dropdown is narrowed by the other two dropdowns, not by itself
+        company_codes = state['company_id'].active_codes(start, stop, combined(vehicle_mask, location_mask))
+        vehicle_codes = state['vehicle_id'].active_codes(start, stop, combined(company_mask, location_mask))
+        location_codes = state['location'].active_codes(start, stop, combined(company_mask, vehicle_mask))
+
+        active_companies = {state['company_id'].keys[code] for code in company_codes}
+        company_options = [
+            {'label': label, 'value': value}
+            for value, label in state['company_labels'] if value in active_companies
+        ]
+        active_vehicles = {state['vehicle_id'].keys[code] for code in vehicle_codes}
+        vehicle_options = [
+            {'label': label, 'value': value}
+            for value, label in state['vehicle_labels'] if value in active_vehicles
+        ]
+        location_options = self._location_options(
+            state['location'].keys[code] for code in location_codes
+        )
+
+        result = (company_options, vehicle_options, location_options)
+        with self._lock:
+            if self._state is state:
+                self._cached[cache_key] = result
+                while len(self._cached) > self.max_cached:
+                    self._cached.popitem(last=False)
+        return result
+
+    def _location_options(self, locations):
+        """Sorted location options with the recycle collection point last"""
+        locations = [loc for loc in locations if pd.notna(loc) and loc and loc not in HIDDEN_LOCATIONS]
+        options = [
+            {'label': self.location_label(loc), 'value': loc}
+            for loc in sorted(locations) if loc != RECYCLE_LOCATION
+        ]
+        if RECYCLE_LOCATION in locations:
+            options.append({'label': RECYCLE_LOCATION, 'value': RECYCLE_LOCATION})
+        return options
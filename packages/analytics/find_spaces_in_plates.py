@@ -1,6 +1,6 @@
 import pandas as pd
 import re
-from vehicle_plate_cleaner import clean_license_plate
+from plate_normalizer import normalize_series
 
 def find_plates_with_spaces_between_letters_and_numbers():
     """Find license plates with spaces between letters and numbers"""
@@ -16,7 +16,7 @@ def find_plates_with_spaces_between_letters_and_numbers():
     plates_with_spaces = plates_with_spaces.sort_values('license_plate')
     
     # Add column with cleaned version to verify fix
-    plates_with_spaces['cleaned_plate'] = plates_with_spaces['license_plate'].apply(clean_license_plate)
+    plates_with_spaces['cleaned_plate'] = normalize_series(plates_with_spaces['license_plate'])
     
     # Print summary
     print(f"Found {len(plates_with_spaces)} plates with spaces between letters and numbers")
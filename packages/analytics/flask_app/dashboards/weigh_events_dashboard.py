@@ -28,13 +28,59 @@ sys.path.insert(0, current_dir)
 
 # Import database connection utilities
 try:
-    from database_connection import read_companies, read_vehicles, read_weigh_events, check_connection
+    from database_connection import (read_companies, read_vehicles, check_connection,
+                                     WeighEventLoader, merge_weigh_events)
     debug_print("✅ Successfully imported database connection utilities")
     DATABASE_AVAILABLE = True
 except ImportError as e:
     debug_print(f"⚠️ Could not import database utilities: {e}")
     DATABASE_AVAILABLE = False
 
+from session_pairing import pair_sessions, directional_net_weights
+from snapshot_store import SnapshotStore
+
+# Raw frames are kept in a columnar snapshot; reloads only read new weigh events
+snapshot_store = SnapshotStore('weigh_events_dashboard')
+weigh_event_loader = WeighEventLoader() if DATABASE_AVAILABLE else None
+raw_frames = {}
+
+def load_raw_frames():
+    """
+    Return raw (weigh_df, vehicles_df, companies_df) from the database.
+
+    The first call starts from the snapshot when there is one; after that
+    only weigh events past the loader's high-water mark are read and merged
+    in. Vehicles and companies are small and always re-read. The snapshot
+    is rewritten when its data changed and it is due.
+    
+    Edits to weigh events older than the loader's overlap window are not
+    read back; weigh_event_loader.reset() forces a full reload that sees them.
+    """
+    if not raw_frames:
+        frames, metadata = snapshot_store.load()
+        if frames and metadata.get('weigh_event_loader'):
+            debug_print(f"Starting from snapshot with {len(frames['weigh_events'])} weigh events")
+            weigh_event_loader.restore_state(metadata['weigh_event_loader'])
+            raw_frames.update(frames)
+    
+    if raw_frames and weigh_event_loader.has_watermark:
+        new_events_df = weigh_event_loader.load_new_events()
+        debug_print(f"Read {len(new_events_df)} new or updated weigh events")
+        weigh_df = merge_weigh_events(raw_frames['weigh_events'], new_events_df)
+        force_save = False
+        changed = not new_events_df.empty
+    else:
+        weigh_df = weigh_event_loader.load_all_events(use_csv_fallback=False)
+        force_save = changed = True
+    
+    raw_frames.update(weigh_events=weigh_df, vehicles=read_vehicles(), companies=read_companies())
+    
+    if not weigh_df.empty and (force_save or (changed and snapshot_store.is_stale())):
+        snapshot_store.save(raw_frames, metadata={'weigh_event_loader': weigh_event_loader.get_state()})
+    
+    # Processing adds columns in place, so hand out copies of the raw frames
+    return raw_frames['weigh_events'].copy(), raw_frames['vehicles'].copy(), raw_frames['companies'].copy()
+
 # Load datasets
 def load_data():
     debug_print("Loading datasets...")
@@ -45,17 +91,11 @@ def load_data():
         if is_connected:
             debug_print("✅ Database connection successful")
             
-            # Load data from database
-            debug_print("Reading weigh events from database...")
-            weigh_df = read_weigh_events(use_csv_fallback=True)
+            # Load data from the snapshot plus new events, or fully from the database
+            debug_print("Reading weigh events, vehicles and companies...")
+            weigh_df, vehicles_df, companies_df = load_raw_frames()
             debug_print(f"Loaded {len(weigh_df)} weigh event records")
-            
-            debug_print("Reading vehicles from database...")
-            vehicles_df = read_vehicles()
             debug_print(f"Loaded {len(vehicles_df)} vehicle records")
-            
-            debug_print("Reading companies from database...")
-            companies_df = read_companies()
             debug_print(f"Loaded {len(companies_df)} company records")
             
             # Process the data for dashboard use
@@ -69,7 +109,12 @@ def load_data():
         return load_data_from_csv()
 
 def load_data_from_csv():
-    """Fallback function to load data from CSV files"""
+    """Fallback function to load data from the last snapshot or CSV files"""
+    frames, _ = snapshot_store.load()
+    if frames:
+        debug_print(f"Using snapshot with {len(frames['weigh_events'])} weigh events")
+        return process_data_for_dashboard(frames['weigh_events'], frames['vehicles'], frames['companies'])
+    
     parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
     debug_print(f"Parent directory: {parent_dir}")
 
@@ -199,89 +244,52 @@ def process_data_for_dashboard(weigh_df, vehicles_df, companies_df):
 
 # Calculate net weights for entry-exit pairs
 def calculate_net_weights(df):
-    # Group by session_id
-    sessions = df.groupby('session_id')
-    
-    results = []
-    
-    for session_id, group in sessions:
-        if len(group) >= 2:  # Need at least entry and exit
-            # Sort by event_time to get entry first, exit second
-            group = group.sort_values('event_time')
-            
-            # Get entry and exit weights
-            entry = group[group['event_type'] == 1]
-            exit = group[group['event_type'] == 2]
-            
-            if not entry.empty and not exit.empty:
-                entry_row = entry.iloc[0]
-                exit_row = exit.iloc[0]
-                
-                # Calculate net weight based on delivery type
-                is_recycle = entry_row.get('is_recycle', False)
-                
-                if is_recycle:
-                    # For recycle events, exit weight is higher than entry weight
-                    # They collect recyclables, so net_weight should be positive
-                    gross_weight = exit_row['weight_kg']
-                    tare_weight = entry_row['weight_kg']
-                    if gross_weight <= tare_weight:
-                        # Skip invalid data where the pattern doesn't match
-                        continue
-                else:
-                    # For normal events, entry weight is higher than exit weight
-                    # They drop off waste, so net_weight should be positive
-                    gross_weight = entry_row['weight_kg']
-                    tare_weight = exit_row['weight_kg']
-                    if gross_weight <= tare_weight:
-                        # Skip invalid data where the pattern doesn't match
-                        continue
-                
-                # Calculate the absolute difference for net weight
-                net_weight = abs(gross_weight - tare_weight)
-                
-                # Get company name for fee calculation
-                company_name = entry_row.get('company_name', 'Unknown')
-                
-                # Calculate fee: K50 per tonne only for non-LISWMC/LCC companies AND normal disposal (not recycle)
-                fee_per_tonne = 0
-                if company_name not in ['LISWMC', 'LCC', 'LISWMC/LCC'] and not is_recycle:
-                    fee_per_tonne = 50  # K50 per tonne for dumping waste
-                
-                # Calculate fee in Kwacha (convert kg to tonnes first)
-                fee_amount = (net_weight / 1000) * fee_per_tonne
-                
-                result = {
-                    'session_id': session_id,
-                    'vehicle_id': entry_row['vehicle_id'],
-                    'company_id': entry_row['company_id'],
-                    'company_name': company_name,
-                    'license_plate': entry_row.get('license_plate', 'Unknown'),
-                    'entry_time': entry_row['event_time'],
-                    'exit_time': exit_row['event_time'],
-                    'duration_minutes': (exit_row['event_time'] - entry_row['event_time']).total_seconds() / 60,
-                    'entry_weight': entry_row['weight_kg'],
-                    'exit_weight': exit_row['weight_kg'],
-                    'net_weight': net_weight,
-                    'is_recycle': is_recycle,
-                    'delivery_type': entry_row.get('delivery_type', 'Normal Disposal'),
-                    'date': entry_row['date'],
-                    'day': entry_row['day'],
-                    'month': entry_row['month'],
-                    'year': entry_row['year'],
-                    'day_of_week': entry_row['day_of_week'],
-                    'hour': entry_row['hour'],
-                    'location': entry_row['remarks'] if not is_recycle else 'Recycle Collection',
-                    'fee_per_tonne': fee_per_tonne,
-                    'fee_amount': fee_amount
-                }
-                
-                results.append(result)
-    
-    if results:
-        net_weights_df = pd.DataFrame(results)
-        return net_weights_df
-    return pd.DataFrame()
+    paired = pair_sessions(df)
+    if paired.empty:
+        return pd.DataFrame()
+    
+    # Normal deliveries must leave lighter, recycle collections heavier;
+    # sessions that don't follow that pattern are skipped as invalid data
+    is_recycle, net_weight, valid = directional_net_weights(paired)
+    if not valid.any():
+        return pd.DataFrame()
+    
+    paired = paired[valid]
+    is_recycle = is_recycle[valid]
+    net_weight = net_weight[valid]
+    company_name = paired['company_name'].values if 'company_name' in paired.columns else np.full(len(paired), 'Unknown', dtype=object)
+    
+    # Calculate fee: K50 per tonne only for non-LISWMC/LCC companies AND normal disposal (not recycle)
+    is_exempt = pd.Series(company_name).isin(['LISWMC', 'LCC', 'LISWMC/LCC']).values
+    fee_per_tonne = np.where(~is_exempt & ~is_recycle, 50, 0)  # K50 per tonne for dumping waste
+    
+    # Calculate fee in Kwacha (convert kg to tonnes first)
+    fee_amount = (net_weight / 1000) * fee_per_tonne
+    
+    return pd.DataFrame({
+        'session_id': paired['session_id'].values,
+        'vehicle_id': paired['vehicle_id'].values,
+        'company_id': paired['company_id'].values,
+        'company_name': company_name,
+        'license_plate': paired['license_plate'].values if 'license_plate' in paired.columns else 'Unknown',
+        'entry_time': paired['entry_time'].values,
+        'exit_time': paired['exit_time'].values,
+        'duration_minutes': (paired['exit_time'] - paired['entry_time']).dt.total_seconds().values / 60,
+        'entry_weight': paired['entry_weight'].values,
+        'exit_weight': paired['exit_weight'].values,
+        'net_weight': net_weight,
+        'is_recycle': is_recycle,
+        'delivery_type': paired['delivery_type'].values if 'delivery_type' in paired.columns else 'Normal Disposal',
+        'date': paired['date'].values,
+        'day': paired['day'].values,
+        'month': paired['month'].values,
+        'year': paired['year'].values,
+        'day_of_week': paired['day_of_week'].values,
+        'hour': paired['hour'].values,
+        'location': np.where(is_recycle, 'Recycle Collection', paired['remarks'].values),
+        'fee_per_tonne': fee_per_tonne,
+        'fee_amount': fee_amount
+    })
 
 # Create a tailwind-styled Dash app
 external_stylesheets = [
@@ -526,60 +534,18 @@ def reload_from_database():
     debug_print("Reloading data from database...")
     
     try:
-        # Import the database connection module
-        sys.path.append(parent_dir)
-        from database.database_connection import read_companies, read_vehicles, read_weigh_events
+        if not DATABASE_AVAILABLE:
+            raise RuntimeError("Database utilities not available")
         
-        # Read data from database
-        weigh_df = read_weigh_events()
-        vehicles_df = read_vehicles()
-        companies_df = read_companies()
-        
-        # Write to CSV files for future use
-        weigh_df.to_csv(weigh_events_file, index=False)
-        vehicles_df.to_csv(vehicles_file, index=False)
-        companies_df.to_csv(companies_file, index=False)
+        # Snapshot plus new events instead of re-reading and re-writing everything
+        weigh_df, vehicles_df, companies_df = load_raw_frames()
         
         debug_print(f"Successfully reloaded data from database:")
         debug_print(f"  - {len(weigh_df)} weigh events")
         debug_print(f"  - {len(vehicles_df)} vehicles")
         debug_print(f"  - {len(companies_df)} companies")
         
-        # Process data
-        weigh_df['event_time'] = pd.to_datetime(weigh_df['event_time'])
-        
-        # Extract date components
-        weigh_df['date'] = weigh_df['event_time'].dt.date
-        weigh_df['day'] = weigh_df['event_time'].dt.day
-        weigh_df['month'] = weigh_df['event_time'].dt.month
-        weigh_df['year'] = weigh_df['event_time'].dt.year
-        weigh_df['day_of_week'] = weigh_df['event_time'].dt.day_name()
-        weigh_df['hour'] = weigh_df['event_time'].dt.hour
-        
-        # Map event types
-        event_type_map = {1: 'Entry (Gross Weight)', 2: 'Exit (Tare Weight)'}
-        weigh_df['event_type_name'] = weigh_df['event_type'].map(event_type_map)
-        
-        # Add delivery type
-        weigh_df['is_recycle'] = weigh_df['remarks'].str.contains('R', case=False, na=False)
-        weigh_df['delivery_type'] = weigh_df['is_recycle'].map({True: 'Recycle Collection', False: 'Normal Disposal'})
-        
-        # Merge with vehicle and company data
-        try:
-            merged_df = weigh_df.merge(vehicles_df, on='vehicle_id', how='left')
-            if 'company_id_x' in merged_df.columns and 'company_id_y' in merged_df.columns:
-                merged_df = merged_df.rename(columns={'company_id_x': 'company_id'})
-                merged_df = merged_df.drop(columns=['company_id_y'])
-            
-            if 'name' in companies_df.columns:
-                merged_df = merged_df.merge(companies_df[['company_id', 'name']], on='company_id', how='left')
-                merged_df.rename(columns={'name': 'company_name'}, inplace=True)
-            else:
-                merged_df['company_name'] = 'Unknown'
-        except Exception as e:
-            debug_print(f"Error during merge: {e}")
-            merged_df = weigh_df.copy()
-            merged_df['company_name'] = 'Unknown'
+        merged_df, weigh_df, vehicles_df, companies_df = process_data_for_dashboard(weigh_df, vehicles_df, companies_df)
         
         # Calculate net weights
         net_weights_df = calculate_net_weights(merged_df)
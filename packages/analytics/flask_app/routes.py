@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file, current_app, make_response
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file, current_app, make_response, Response, stream_with_context
 import os
 import pandas as pd
 from werkzeug.utils import secure_filename
@@ -152,7 +152,11 @@ def db_import():
             # Import to the selected table
             result = db_manager.import_table(table, file_path)
             
-            if result:
+            if isinstance(result, dict):
+                flash(f"Imported data to {table} table: {result['inserted']} inserted, "
+                      f"{result['skipped']} skipped, {result['rejected']} rejected",
+                      'success' if not result['rejected'] else 'warning')
+            elif result:
                 flash(f'Successfully imported data to {table} table', 'success')
             else:
                 flash(f'Error importing data to {table} table', 'danger')
@@ -176,20 +180,41 @@ def db_import():
     
     return render_template('db_import.html', csv_files=csv_files, tables=tables)
 
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
 @main_bp.route('/db/export/<table>')
 def db_export(table):
-    """Export data from database"""
+    """
+    Export data from database.
+    
+    Rows are streamed straight into the response; ?format=parquet selects
+    Parquet instead of CSV and ?gzip=1 compresses the output on the fly.
+    """
+    file_format = request.args.get('format', 'csv').lower()
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    
+    if file_format not in EXPORT_MIMETYPES:
+        flash(f'Unsupported export format: {file_format}', 'danger')
+        return redirect(url_for('main.index'))
+    
     try:
         # Export the selected table
-        filename = db_manager.export_table(table)
+        stream = db_manager.stream_export(table, file_format, compress)
         
-        if filename:
-            flash(f'Successfully exported {table} table to {filename}', 'success')
-            # Offer the file for download
-            return send_file(filename, as_attachment=True)
-        else:
+        if stream is None:
             flash(f'Error exporting {table} table', 'danger')
             return redirect(url_for('main.index'))
+        
+        # Offer the file for download as it is produced
+        filename = db_manager.export_filename(table, file_format, compress)
+        return Response(
+            stream_with_context(stream),
+            mimetype='application/gzip' if compress else EXPORT_MIMETYPES[file_format],
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        )
     
     except Exception as e:
         flash(f'Error during export: {str(e)}', 'danger')
@@ -278,8 +303,14 @@ def analytics_dashboard():
 
 @main_bp.route('/companies/unify')
 def company_unify():
-    """Company unification tool main page"""
+    """
+    Company unification tool main page
+    
+    ?rebuild=1 rescores the whole similarity index instead of only the
+    companies added or renamed since the last review.
+    """
     try:
+        rebuild = request.args.get('rebuild', '').lower() in ('1', 'true', 'yes') or None
         unifier = CompanyUnifier()
         success = unifier.load_companies_from_db()
         
@@ -287,8 +318,8 @@ def company_unify():
             flash('Unable to load companies from database', 'danger')
             return redirect(url_for('main.index'))
         
-        # Find duplicate groups
-        duplicate_groups = unifier.find_duplicate_groups()
+        # Find duplicate groups, scoring only companies added since the last review
+        duplicate_groups = unifier.find_duplicate_groups(incremental=True, rebuild=rebuild)
         summary = unifier.get_duplicate_summary()
         
         return render_template('company_unify.html', 
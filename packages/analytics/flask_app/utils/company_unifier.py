@@ -22,11 +22,18 @@ except ImportError:
     print("Warning: Database utilities not available")
     DATABASE_AVAILABLE = False
 
+from name_blocking import NGramIndex
+from name_similarity import score_pairs
+from similarity_index import SimilarityIndex, pair_key
+
 class CompanyUnifier:
     """
     Web-based company unification tool for identifying and merging duplicates
     """
     
+    # Component weights of calculate_similarity, for batch scoring
+    similarity_weights = {'sequence': 0.25, 'ratio': 0.25, 'token_sort': 0.25, 'token_set': 0.25}
+    
     def __init__(self, similarity_threshold=0.7):
         self.similarity_threshold = similarity_threshold
         self.companies_df = None
@@ -88,15 +95,39 @@ class CompanyUnifier:
         
         return combined_similarity
     
-    def find_duplicate_groups(self):
-        """Find groups of potentially duplicate companies"""
+    def find_duplicate_groups(self, incremental=False, rebuild=None):
+        """
+        Find groups of potentially duplicate companies.
+        
+        Each company is only scored against the candidates proposed by a
+        trigram index of the names instead of against every other company,
+        and all candidates are scored in one batch; groups are formed in the
+        same order as a full comparison would.
+        
+        With incremental=True the scored pairs come from the persisted
+        similarity index instead, so only companies added or renamed since
+        the last run are scored, and pairs already reviewed are left out.
+        rebuild=True rescores the whole index; by default it is rebuilt once
+        the number of companies has grown enough (see SimilarityIndex.sync).
+        """
         if self.companies_df is None or self.companies_df.empty:
             return []
         
         self.duplicate_groups = []
         processed_ids = set()
         
-        for idx, company in self.companies_df.iterrows():
+        companies = self.companies_df.to_dict('records')
+        names = [company['name'] for company in companies]
+        pairs = self._indexed_pairs(companies, names, rebuild) if incremental else None
+        if pairs is None:
+            pairs = self._blocked_pairs(names)
+        sources, targets, scores = pairs
+        order = np.lexsort((targets, sources))
+        matches = [[] for _ in companies]
+        for source, target, score in zip(sources[order].tolist(), targets[order].tolist(), scores[order].tolist()):
+            matches[source].append((target, score))
+        
+        for position, company in enumerate(companies):
             if company['company_id'] in processed_ids:
                 continue
                 
@@ -108,25 +139,18 @@ class CompanyUnifier:
                 'location': company.get('location', None)
             }
             
-            # Find similar companies
-            for idx2, other_company in self.companies_df.iterrows():
-                if (idx != idx2 and 
-                    other_company['company_id'] not in processed_ids):
-                    
-                    similarity = self.calculate_similarity(
-                        company['name'], 
-                        other_company['name']
-                    )
-                    
-                    if similarity >= self.similarity_threshold:
-                        similar_companies.append({
-                            'company_id': other_company['company_id'],
-                            'name': other_company['name'],
-                            'type_code': other_company.get('type_code', None),
-                            'location': other_company.get('location', None),
-                            'similarity': round(similarity, 3)
-                        })
-                        processed_ids.add(other_company['company_id'])
+            # Find similar companies among the candidates
+            for other_position, similarity in matches[position]:
+                other_company = companies[other_position]
+                if other_company['company_id'] not in processed_ids:
+                    similar_companies.append({
+                        'company_id': other_company['company_id'],
+                        'name': other_company['name'],
+                        'type_code': other_company.get('type_code', None),
+                        'location': other_company.get('location', None),
+                        'similarity': round(similarity, 3)
+                    })
+                    processed_ids.add(other_company['company_id'])
             
             if similar_companies:
                 group = {
@@ -140,6 +164,97 @@ class CompanyUnifier:
         
         return self.duplicate_groups
     
+    def _blocked_pairs(self, names):
+        """Score the trigram candidates of all names; pairs at or above the threshold, both ways round"""
+        left, right = NGramIndex(names).candidate_pairs()
+        
+        # Scored both ways round, since the main company of a group comes first
+        sources = np.concatenate([left, right])
+        targets = np.concatenate([right, left])
+        scores = score_pairs([names[i] for i in sources], [names[j] for j in targets],
+                             self.calculate_similarity, self.similarity_weights,
+                             score_cutoff=self.similarity_threshold)
+        similar = scores >= self.similarity_threshold
+        return sources[similar], targets[similar], scores[similar]
+    
+    def _indexed_pairs(self, companies, names, rebuild=None):
+        """
+        Pairs from the persisted similarity index, without reviewed pairs.
+        
+        Returns None when the index cannot be used, so the caller falls
+        back to scoring every candidate.
+        """
+        if not DATABASE_AVAILABLE:
+            return None
+        
+        conn = get_db_connection()
+        if not conn:
+            return None
+        try:
+            index = SimilarityIndex(conn, 'company')
+            company_ids = [company['company_id'] for company in companies]
+            sources, targets, scores = index.sync(company_ids, names, self.calculate_similarity,
+                                                  self.similarity_weights, self.similarity_threshold,
+                                                  rebuild=rebuild)
+            decided = index.decided_pairs()
+            print(f"✅ Similarity index{' rebuilt' if index.last_sync['rebuilt'] else ''}: "
+                  f"scored {index.last_sync['scored']} of {index.last_sync['records']} companies, "
+                  f"{len(decided)} reviewed pairs")
+        except Exception as e:
+            print(f"⚠️ Similarity index unavailable, scoring all candidates: {e}")
+            return None
+        finally:
+            conn.close()
+        
+        if decided:
+            undecided = np.array([
+                pair_key(company_ids[source], company_ids[target]) not in decided
+                for source, target in zip(sources.tolist(), targets.tolist())
+            ], dtype=bool)
+            sources, targets, scores = sources[undecided], targets[undecided], scores[undecided]
+        return sources, targets, scores
+    
+    def record_decisions(self, merge_decisions):
+        """
+        Store merge and keep-separate decisions in the similarity index, so
+        the reviewed pairs are not offered again.
+        
+        Group members the reviewer left out of a merge (unselected_companies)
+        are recorded as kept separate from the merge target.
+        
+        Returns:
+            int: Number of pairs recorded, 0 when the index is unavailable
+        """
+        decisions = []
+        for decision in merge_decisions:
+            if decision.get('action') not in ('merge', 'keep_separate'):
+                continue
+            record_ids = decision.get('selected_companies') or (
+                [decision.get('merge_to_id')] + list(decision.get('companies_to_remove', []))
+            )
+            decisions.append((decision['action'], [rid for rid in record_ids if rid is not None]))
+            
+            merge_to_id = decision.get('merge_to_id')
+            if decision['action'] == 'merge' and merge_to_id is not None:
+                decisions.extend(
+                    ('keep_separate', [merge_to_id, rid])
+                    for rid in decision.get('unselected_companies', [])
+                    if rid is not None and rid not in record_ids
+                )
+        
+        if not decisions or not DATABASE_AVAILABLE:
+            return 0
+        conn = get_db_connection()
+        if not conn:
+            return 0
+        try:
+            return SimilarityIndex(conn, 'company').record_decisions(decisions)
+        except Exception as e:
+            print(f"⚠️ Could not record review decisions: {e}")
+            return 0
+        finally:
+            conn.close()
+    
     def _suggest_merge_name(self, main_company, similar_companies):
         """Suggest the best name for merged company"""
         all_names = [main_company['name']] + [c['name'] for c in similar_companies]
@@ -181,7 +296,8 @@ class CompanyUnifier:
             'merge_to_id': 'company_id_to_keep',
             'merge_name': 'Final Company Name',
             'companies_to_remove': ['id1', 'id2', ...],
-            'selected_companies': ['id1', 'id2', 'id3', ...]  # NEW: companies selected for merge
+            'selected_companies': ['id1', 'id2', 'id3', ...],  # NEW: companies selected for merge
+            'unselected_companies': ['id4', ...]  # Group members kept separate
         }
         """
         if not merge_decisions:
@@ -247,6 +363,10 @@ class CompanyUnifier:
                 print(f"⚠️ Warning: Data reassignment had issues: {e}")
                 # Continue anyway as the main merge was successful
             
+            recorded = self.record_decisions(merge_decisions)
+            if recorded:
+                print(f"🗂️ Recorded {recorded} reviewed pairs in the similarity index")
+            
             result_message = f"Successfully merged companies with database cascading. Removed {len(companies_to_remove)} duplicates, updated {len(name_updates)} names."
             print(f"🎉 {result_message}")
             return True, result_message
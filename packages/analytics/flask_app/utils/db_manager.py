@@ -8,11 +8,20 @@ import time
 from datetime import datetime
 import logging
 import uuid
+import sys
+import os
+
+# Import database utilities
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from database_connection import bulk_import_csv, bulk_import_frame, find_existing_plates, iter_table_export
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Rows of an uploaded CSV held in memory at a time by the streaming imports
+IMPORT_CHUNK_ROWS = int(os.getenv('IMPORT_CHUNK_ROWS', 20000))
+
 class DatabaseManager:
     """Flask-compatible version of the database manager"""
     
@@ -183,29 +192,47 @@ class DatabaseManager:
             logger.error(f"Error truncating table '{table}': {e}")
             return False
     
-    def export_table(self, table):
-        """Export a table to CSV"""
+    def export_filename(self, table, file_format='csv', compress=False):
+        """Timestamped file name for an export"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"db_export_{table}_{timestamp}.{file_format}" + (".gz" if compress else "")
+    
+    def stream_export(self, table, file_format='csv', compress=False):
+        """
+        Stream a table as CSV or Parquet bytes through a server-side cursor.
+        
+        Returns a generator of bytes that holds its own connection, or None
+        if the table is not managed. Connection and query errors are raised
+        here, before any output is produced.
+        """
+        # Check if table exists in our managed tables
+        if table not in self.tables and table not in self.list_tables():
+            logger.error(f"Table {table} does not exist or is not managed")
+            return None
+        
+        logger.info(f"Exporting table '{table}' as {file_format}{' (gzip)' if compress else ''}...")
+        conn = self.get_connection()
         try:
-            # Check if table exists in our managed tables
-            if table not in self.tables and table not in self.list_tables():
-                logger.error(f"Table {table} does not exist or is not managed")
+            return iter_table_export(conn, table, file_format=file_format, compress=compress)
+        except Exception:
+            conn.close()
+            raise
+    
+    def export_table(self, table, file_format='csv', compress=False):
+        """Export a table to a file, streaming it so memory use stays constant"""
+        try:
+            stream = self.stream_export(table, file_format, compress)
+            if stream is None:
                 return None
             
-            engine = self.get_engine()
-            
-            logger.info(f"Exporting table '{table}' to CSV...")
-            
-            # Read the table
-            df = pd.read_sql(f"SELECT * FROM {table}", engine)
-            
             # Create filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"db_export_{table}_{timestamp}.csv"
+            filename = self.export_filename(table, file_format, compress)
             
-            # Save to CSV
-            df.to_csv(filename, index=False)
+            with open(filename, 'wb') as f:
+                for data in stream:
+                    f.write(data)
             
-            logger.info(f"Exported {len(df)} rows to '{filename}'")
+            logger.info(f"Exported table '{table}' to '{filename}'")
             
             return filename
         
@@ -213,8 +240,19 @@ class DatabaseManager:
             logger.error(f"Error exporting table '{table}': {e}")
             return None
     
-    def import_table(self, table, file_path):
-        """Import data from CSV to a table"""
+    def import_table(self, table, file_path, progress_callback=None):
+        """
+        Import data from CSV to a table.
+        
+        The file is never loaded whole: vehicles and companies are read,
+        cleaned and inserted in chunks, and other tables are streamed to the
+        server with COPY. progress_callback, if given, is called as rows are
+        processed with the number of rows done so far and the counts.
+        
+        Returns False on failure. Vehicle and company imports return True on
+        success; other tables return a dict with inserted, skipped and
+        rejected row counts.
+        """
         try:
             # Check if file exists
             if not Path(file_path).exists():
@@ -228,15 +266,15 @@ class DatabaseManager:
             
             # Use specialized import functions for specific tables
             if table == 'vehicle':
-                return self.import_vehicles(file_path)
+                return self.import_vehicles(file_path, progress_callback=progress_callback)
             elif table == 'company':
-                return self.import_companies(file_path)
+                return self.import_companies(file_path, progress_callback=progress_callback)
             
-            # For other tables, use a more generic import
-            # Read the CSV file
-            df = pd.read_csv(file_path)
+            # For other tables, stream the file through COPY into a staging
+            # table and merge it with ON CONFLICT DO NOTHING
+            csv_columns = pd.read_csv(file_path, nrows=0).columns.tolist()
             
-            logger.info(f"Importing {len(df)} rows to table '{table}' from '{file_path}'...")
+            logger.info(f"Importing '{file_path}' to table '{table}'...")
             
             # Get column information from the table
             engine = self.get_engine()
@@ -245,127 +283,62 @@ class DatabaseManager:
                 table_columns = table_cols['column_name'].tolist()
             
             logger.info(f"Table columns: {', '.join(table_columns)}")
-            logger.info(f"CSV columns: {', '.join(df.columns)}")
+            logger.info(f"CSV columns: {', '.join(csv_columns)}")
             
             # Check for required columns
-            missing_cols = [col for col in table_columns if col not in df.columns and col not in ['id', 'created_at', 'updated_at']]
+            missing_cols = [col for col in table_columns if col not in csv_columns and col not in ['id', 'created_at', 'updated_at']]
             if missing_cols:
                 logger.warning(f"Missing columns in CSV: {', '.join(missing_cols)}")
             
-            # Connect to database
             conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Set longer timeout for batch operations
-            cursor.execute("SET statement_timeout = '600000'")  # 10 minutes
-            
-            # Import in smaller batches with more error handling
-            BATCH_SIZE = 50  # Smaller batch size for more frequent commits
-            imported = 0
-            skipped = 0
-            error_count = 0
-            
-            # Process in batches
-            for i in range(0, len(df), BATCH_SIZE):
-                batch = df.iloc[i:i+BATCH_SIZE]
-                
-                try:
-                    for _, row in batch.iterrows():
-                        try:
-                            # Prepare columns and values
-                            valid_cols = [col for col in row.index if col in table_columns and pd.notna(row[col])]
-                            values = [row[col] for col in valid_cols]
-                            placeholders = ['%s'] * len(valid_cols)
-                            
-                            # Skip empty rows
-                            if not valid_cols:
-                                skipped += 1
-                                continue
-                            
-                            # Create and execute SQL
-                            sql = f"INSERT INTO {table} ({', '.join(valid_cols)}) VALUES ({', '.join(placeholders)})"
-                            
-                            try:
-                                cursor.execute(sql, values)
-                                imported += 1
-                            except psycopg2.errors.UniqueViolation:
-                                # Skip duplicates
-                                skipped += 1
-                                conn.rollback()  # Roll back transaction to continue
-                            except Exception as e:
-                                # Skip error rows
-                                skipped += 1
-                                error_count += 1
-                                logger.error(f"Error inserting row: {e}")
-                                conn.rollback()
-                        
-                        except Exception as e:
-                            skipped += 1
-                            error_count += 1
-                            logger.error(f"Error processing row: {e}")
-                    
-                    # Commit after processing all rows in batch
-                    conn.commit()
-                    
-                except Exception as batch_error:
-                    # If batch fails, rollback
-                    logger.error(f"Batch error: {batch_error}")
-                    conn.rollback()
-                
-                # Report progress
-                if i % (BATCH_SIZE * 10) == 0:
-                    logger.info(f"Progress: {imported} imported, {skipped} skipped, {error_count} errors")
-            
-            cursor.close()
-            conn.close()
+            try:
+                result = bulk_import_csv(conn, table, file_path, progress_callback=progress_callback)
+            finally:
+                conn.close()
             
-            logger.info(f"Import complete: {imported} rows imported, {skipped} rows skipped, {error_count} errors")
+            for rejected in result['rejected_rows']:
+                logger.warning(f"Rejected row {rejected['row']}: {rejected['error']}")
+            logger.info(f"Import complete: {result['inserted']} rows imported, {result['skipped']} rows skipped, "
+                        f"{result['rejected']} rows rejected")
             
-            return True
+            return result
         
         except Exception as e:
             logger.error(f"Error importing to table '{table}': {e}")
-            
-            # Attempt to rollback any pending transactions
-            try:
-                if 'conn' in locals() and conn:
-                    conn.rollback()
-                    conn.close()
-            except Exception:
-                pass
-            
             return False
     
-    def import_vehicles(self, file_path):
-        """Import vehicle data with new UUIDs to avoid conflicts and ensure no duplicate license plates"""
+    def import_vehicles(self, file_path, chunk_rows=None, progress_callback=None):
+        """
+        Import vehicle data with new UUIDs to avoid conflicts and ensure no duplicate license plates.
+        
+        The file is read, cleaned and inserted chunk_rows rows at a time, so
+        memory use does not depend on the size of the upload.
+        """
         try:
             # Check if file exists
             if not Path(file_path).exists():
                 logger.error(f"File not found: {file_path}")
                 return False
             
-            # Read the CSV file
-            df = pd.read_csv(file_path)
+            chunk_rows = chunk_rows or IMPORT_CHUNK_ROWS
+            csv_columns = pd.read_csv(file_path, nrows=0).columns.tolist()
             
-            logger.info(f"Importing {len(df)} vehicles from '{file_path}'...")
+            logger.info(f"Importing vehicles from '{file_path}' in chunks of {chunk_rows} rows...")
             logger.info("Generating new UUIDs for all vehicles to avoid conflicts")
             
             # Check for license_plate column which is required
-            if 'license_plate' not in df.columns:
+            if 'license_plate' not in csv_columns:
                 logger.error(f"Missing 'license_plate' column which is required")
                 return False
             
-            # Pre-process: Clean and standardize license plates
-            logger.info("Cleaning and standardizing license plates...")
-            
             # Using the existing license plate cleaner if available
             try:
-                from .plate_cleaner import clean_license_plate
+                from plate_normalizer import normalize_series
                 has_cleaner = True
-                logger.info("Using plate_cleaner for standardization")
+                logger.info("Using plate_normalizer for standardization")
             except ImportError:
                 has_cleaner = False
-                logger.info("plate_cleaner not found, using basic cleaning")
+                logger.info("plate_normalizer not found, using basic cleaning")
                 
             # Basic cleaning function if the cleaner is not available
             def basic_clean_plate(plate):
@@ -373,71 +346,64 @@ class DatabaseManager:
                     return ""
                 return str(plate).strip().upper().replace(" ", "")
             
-            # Apply cleaning function to all plates
-            if has_cleaner:
-                df['cleaned_plate'] = df['license_plate'].apply(clean_license_plate)
-            else:
-                df['cleaned_plate'] = df['license_plate'].apply(basic_clean_plate)
-            
-            # Check for empty cleaned plates (rejected by the cleaner)
-            empty_plates = df[df['cleaned_plate'] == '']
-            if not empty_plates.empty:
-                logger.warning(f"{len(empty_plates)} plates were rejected by the cleaner")
-            
-            # Check for duplicate license plates in the input data
-            duplicates_in_input = df[df['cleaned_plate'] != ''].duplicated(subset=['cleaned_plate'], keep=False)
-            input_duplicates = df[duplicates_in_input]
-            if not input_duplicates.empty:
-                logger.warning(f"Found {len(input_duplicates)} rows with duplicate license plates in the input file")
-                
-                # Group duplicates for logging
-                dup_groups = input_duplicates.groupby('cleaned_plate')
-                logger.info(f"Found {len(dup_groups)} duplicate plate groups")
+            def clean_plates(plates):
+                if has_cleaner:
+                    return normalize_series(plates)
+                return plates.apply(basic_clean_plate).fillna('').astype(str)
             
             # Get vehicle table columns and check existing plates
             engine = self.get_engine()
             with engine.connect() as connection:
                 table_cols = pd.read_sql("SELECT column_name FROM information_schema.columns WHERE table_name = 'vehicle'", connection)
                 table_columns = table_cols['column_name'].tolist()
-                
-                # Also check for existing license plates in the database
-                existing_plates_df = pd.read_sql("SELECT license_plate FROM vehicle", connection)
-                existing_plates = set()
+            
+            # With the persisted cleaned_plate column (migration 006) each
+            # chunk is looked up through its index; without it every plate
+            # in the table is cleaned up front
+            has_plate_column = 'cleaned_plate' in table_columns
+            if has_plate_column and not has_cleaner:
+                table_columns.remove('cleaned_plate')
+                has_plate_column = False
+            
+            # The index only finds vehicles whose cleaned_plate is set, so
+            # vehicles written without one are normalized first
+            use_plate_index = has_plate_column
+            if use_plate_index:
+                from backfill_cleaned_plates import ensure_cleaned_plates
+                conn = self.get_connection()
+                try:
+                    backfilled = ensure_cleaned_plates(conn)
+                    if backfilled:
+                        logger.info(f"Backfilled cleaned_plate for {backfilled} existing vehicles")
+                except Exception as e:
+                    logger.warning(f"Could not backfill cleaned_plate, cleaning every existing plate instead: {e}")
+                    use_plate_index = False
+                finally:
+                    conn.close()
+            
+            existing_plates = set()
+            if not use_plate_index:
+                with engine.connect() as connection:
+                    existing_plates_df = pd.read_sql("SELECT license_plate FROM vehicle", connection)
                 
                 # Clean existing plates for comparison
-                if has_cleaner:
-                    for plate in existing_plates_df['license_plate']:
-                        if plate and not pd.isna(plate):
-                            cleaned = clean_license_plate(plate)
-                            if cleaned:
-                                existing_plates.add(cleaned)
-                else:
-                    for plate in existing_plates_df['license_plate']:
-                        if plate and not pd.isna(plate):
-                            cleaned = basic_clean_plate(plate)
-                            if cleaned:
-                                existing_plates.add(cleaned)
+                existing_plates = set(clean_plates(existing_plates_df['license_plate'])) - {''}
+                del existing_plates_df
                 
                 if existing_plates:
                     logger.info(f"Found {len(existing_plates)} existing license plates in the database")
-                    
-                    # Check for conflicts with database
-                    conflicts_with_db = df[df['cleaned_plate'].isin(existing_plates)]
-                    if not conflicts_with_db.empty:
-                        logger.warning(f"Found {len(conflicts_with_db)} plates that already exist in the database")
             
             # Connect to database with psycopg2 for more control
             conn = self.get_connection()
             cursor = conn.cursor()
-            cursor.execute("SET statement_timeout = '900000'")  # 15 minutes
             
             # Count before import
             cursor.execute("SELECT COUNT(*) FROM vehicle")
             before_count = cursor.fetchone()[0]
             logger.info(f"Current vehicle count: {before_count}")
+            conn.commit()
             
-            # Import in larger batches for better performance
-            BATCH_SIZE = 100
+            rows_read = 0
             imported = 0
             skipped_empty = 0
             skipped_duplicates_input = 0
@@ -450,97 +416,79 @@ class DatabaseManager:
             # Keep track of license plates we've already processed to avoid duplicates
             processed_plates = set()
             
-            # Track which plates were skipped and why
-            skipped_records = {
-                'empty_plates': [],
-                'duplicates_input': [],
-                'duplicates_db': [],
-                'errors': []
-            }
+            # Skipped records are appended to this CSV as each chunk is processed
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            skipped_file = f"skipped_vehicles_{timestamp}.csv"
+            skipped_written = 0
             
-            # Process in batches to avoid memory issues with large files
-            for i in range(0, len(df), BATCH_SIZE):
-                batch = df.iloc[i:i+BATCH_SIZE]
+            for chunk in pd.read_csv(file_path, chunksize=chunk_rows):
+                rows_read += len(chunk)
                 
-                # Process each row in the batch
-                for _, row in batch.iterrows():
-                    try:
-                        # Get original and cleaned license plate
-                        license_plate = row.get('license_plate', '')
-                        cleaned_plate = row.get('cleaned_plate', '')
-                        
-                        # Skip if no license plate or it was rejected by the cleaner
-                        if not cleaned_plate:
-                            skipped_empty += 1
-                            skipped_records['empty_plates'].append(license_plate)
-                            continue
-                            
-                        # Skip if this plate already exists in the database
-                        if cleaned_plate in existing_plates:
-                            skipped_duplicates_db += 1
-                            skipped_records['duplicates_db'].append(license_plate)
-                            continue
-                            
-                        # Skip if we've already processed this plate in the current import
-                        if cleaned_plate in processed_plates:
-                            skipped_duplicates_input += 1
-                            skipped_records['duplicates_input'].append(license_plate)
-                            continue
-                        
-                        # Generate a new UUID for this vehicle
-                        new_vehicle_id = str(uuid.uuid4())
-                        
-                        # If the CSV has a vehicle_id, save the mapping for reference
-                        if 'vehicle_id' in row and not pd.isna(row['vehicle_id']):
-                            old_id = row['vehicle_id']
-                            id_mapping[old_id] = new_vehicle_id
-                        
-                        # Use the cleaned plate for insertion, as it's standardized
-                        use_plate = cleaned_plate
-                        
-                        # Prepare values for insertion, using only valid columns
-                        columns = ['vehicle_id', 'license_plate']  # Must include these
-                        values = [new_vehicle_id, use_plate]
-                        
-                        # Add any other available columns that match the database
-                        for col in table_columns:
-                            if col in row.index and col not in ['vehicle_id', 'license_plate'] and not pd.isna(row[col]):
-                                columns.append(col)
-                                values.append(row[col])
-                        
-                        # Insert the vehicle with new UUID
-                        placeholder_str = ', '.join(['%s'] * len(columns))
-                        sql = f"INSERT INTO vehicle ({', '.join(columns)}) VALUES ({placeholder_str})"
-                        
-                        try:
-                            cursor.execute(sql, values)
-                            imported += 1
-                            processed_plates.add(cleaned_plate)  # Mark as processed
-                            
-                            # Also add to existing plates set to avoid future duplicates in this session
-                            existing_plates.add(cleaned_plate)
-                            
-                        except Exception as e:
-                            # If there's an error with this specific insert
-                            conn.rollback()
-                            error_count += 1
-                            error_msg = f"{license_plate}: {str(e)[:100]}..."
-                            skipped_records['errors'].append(error_msg)
-                            logger.error(f"Error inserting vehicle {error_msg}")
-                    
-                    except Exception as row_error:
-                        error_count += 1
-                        error_msg = f"{license_plate if 'license_plate' in locals() else 'unknown'}: {str(row_error)[:100]}..."
-                        skipped_records['errors'].append(error_msg)
-                        logger.error(f"Error processing vehicle row: {error_msg}")
+                # Clean and standardize license plates
+                cleaned = clean_plates(chunk['license_plate'])
+                if use_plate_index:
+                    existing_plates.update(find_existing_plates(conn, cleaned.unique()))
+                
+                # Skip plates rejected by the cleaner, plates already in the
+                # database and plates seen earlier in the input
+                is_empty = cleaned == ''
+                in_db = ~is_empty & cleaned.isin(existing_plates)
+                in_input = ~is_empty & ~in_db & (cleaned.isin(processed_plates) | cleaned.duplicated())
+                to_insert = chunk[~(is_empty | in_db | in_input)]
                 
-                # Commit after each batch
-                conn.commit()
+                skipped_empty += int(is_empty.sum())
+                skipped_duplicates_db += int(in_db.sum())
+                skipped_duplicates_input += int(in_input.sum())
+                
+                # New UUIDs, with the cleaned plate as it's standardized
+                insert_df = pd.DataFrame({
+                    'vehicle_id': [str(uuid.uuid4()) for _ in range(len(to_insert))],
+                    'license_plate': cleaned[to_insert.index].values
+                })
+                if has_plate_column:
+                    insert_df['cleaned_plate'] = insert_df['license_plate']
+                
+                # Add any other available columns that match the database
+                for col in table_columns:
+                    if col in to_insert.columns and col not in ['vehicle_id', 'license_plate', 'cleaned_plate']:
+                        insert_df[col] = to_insert[col].values
+                
+                # If the CSV has a vehicle_id, save the mapping for reference
+                if 'vehicle_id' in to_insert.columns:
+                    has_old_id = to_insert['vehicle_id'].notna().values
+                    id_mapping.update(zip(to_insert['vehicle_id'].values[has_old_id].tolist(),
+                                          insert_df['vehicle_id'].values[has_old_id].tolist()))
+                
+                result = bulk_import_frame(conn, 'vehicle', insert_df)
+                imported += result['inserted']
+                skipped_duplicates_db += result['skipped']  # Conflicts with rows already in the table
+                error_count += result['rejected']
+                processed_plates.update(insert_df['license_plate'])
+                existing_plates.update(insert_df['license_plate'])
+                
+                # Save skipped records to a CSV for reference
+                error_msgs = []
+                for rejected in result['rejected_rows']:
+                    plate = insert_df['license_plate'].iloc[rejected['row'] - 1]
+                    error_msg = f"{plate}: {rejected['error'][:100]}..."
+                    error_msgs.append(error_msg)
+                    logger.error(f"Error inserting vehicle {error_msg}")
+                skipped_df = pd.concat([
+                    pd.DataFrame({'license_plate': chunk.loc[is_empty, 'license_plate'], 'reason': 'empty_plates'}),
+                    pd.DataFrame({'license_plate': chunk.loc[in_input, 'license_plate'], 'reason': 'duplicates_input'}),
+                    pd.DataFrame({'license_plate': chunk.loc[in_db, 'license_plate'], 'reason': 'duplicates_db'}),
+                    pd.DataFrame({'license_plate': error_msgs, 'reason': 'errors'})
+                ], ignore_index=True)
+                if not skipped_df.empty:
+                    skipped_df.to_csv(skipped_file, mode='a', header=skipped_written == 0, index=False)
+                    skipped_written += len(skipped_df)
                 
                 # Show progress
-                if i % (BATCH_SIZE * 5) == 0 or i + BATCH_SIZE >= len(df):
-                    total_skipped = skipped_empty + skipped_duplicates_input + skipped_duplicates_db
-                    logger.info(f"Progress: {imported}/{len(df)} vehicles imported ({total_skipped} skipped, {error_count} errors)")
+                total_skipped = skipped_empty + skipped_duplicates_input + skipped_duplicates_db
+                logger.info(f"Progress: {rows_read} rows read, {imported} vehicles imported "
+                            f"({total_skipped} skipped, {error_count} errors)")
+                if progress_callback:
+                    progress_callback(rows_read, {'inserted': imported, 'skipped': total_skipped, 'rejected': error_count})
             
             # Save UUID mapping to a file if needed
             if id_mapping:
@@ -549,23 +497,8 @@ class DatabaseManager:
                     json.dump(id_mapping, f, indent=2)
                 logger.info(f"Saved mapping of {len(id_mapping)} old IDs to new UUIDs in {mapping_file}")
             
-            # Save skipped records to a CSV for reference
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            skipped_file = f"skipped_vehicles_{timestamp}.csv"
-            
-            # Prepare skipped data for CSV
-            skipped_data = []
-            for reason, plates in skipped_records.items():
-                for plate in plates:
-                    skipped_data.append({
-                        'license_plate': plate,
-                        'reason': reason
-                    })
-            
-            if skipped_data:
-                skipped_df = pd.DataFrame(skipped_data)
-                skipped_df.to_csv(skipped_file, index=False)
-                logger.info(f"Saved list of {len(skipped_data)} skipped plates to {skipped_file}")
+            if skipped_written:
+                logger.info(f"Saved list of {skipped_written} skipped plates to {skipped_file}")
             
             # Count after import
             cursor.execute("SELECT COUNT(*) FROM vehicle")
@@ -602,22 +535,27 @@ class DatabaseManager:
             
             return False
 
-    def import_companies(self, file_path):
-        """Import company data with new UUIDs to avoid conflicts"""
+    def import_companies(self, file_path, chunk_rows=None, progress_callback=None):
+        """
+        Import company data with new UUIDs to avoid conflicts.
+        
+        The file is read, validated and inserted chunk_rows rows at a time,
+        so memory use does not depend on the size of the upload.
+        """
         try:
             # Check if file exists
             if not Path(file_path).exists():
                 logger.error(f"File not found: {file_path}")
                 return False
             
-            # Read the CSV file
-            df = pd.read_csv(file_path)
+            chunk_rows = chunk_rows or IMPORT_CHUNK_ROWS
+            csv_columns = pd.read_csv(file_path, nrows=0).columns.tolist()
             
-            logger.info(f"Importing {len(df)} companies from '{file_path}'...")
+            logger.info(f"Importing companies from '{file_path}' in chunks of {chunk_rows} rows...")
             logger.info("Generating new UUIDs for all companies to avoid conflicts")
             
             # Check for name column which is required
-            if 'name' not in df.columns:
+            if 'name' not in csv_columns:
                 logger.error(f"Missing 'name' column which is required")
                 return False
             
@@ -630,15 +568,14 @@ class DatabaseManager:
             # Connect to database with psycopg2 for more control
             conn = self.get_connection()
             cursor = conn.cursor()
-            cursor.execute("SET statement_timeout = '900000'")  # 15 minutes
             
             # Count before import
             cursor.execute("SELECT COUNT(*) FROM company")
             before_count = cursor.fetchone()[0]
             logger.info(f"Current company count: {before_count}")
+            conn.commit()
             
-            # Import in batches for better performance
-            BATCH_SIZE = 50
+            rows_read = 0
             imported = 0
             skipped = 0
             error_count = 0
@@ -649,81 +586,62 @@ class DatabaseManager:
             # Keep track of company names we've already imported to avoid duplicates
             imported_names = set()
             
-            # Process in batches
-            for i in range(0, len(df), BATCH_SIZE):
-                batch = df.iloc[i:i+BATCH_SIZE]
+            for chunk in pd.read_csv(file_path, chunksize=chunk_rows):
+                rows_read += len(chunk)
                 
-                # Process each row in the batch
-                for _, row in batch.iterrows():
-                    try:
-                        # Skip if no name or it's empty
-                        company_name = row.get('name')
-                        if pd.isna(company_name) or company_name == '':
-                            skipped += 1
-                            continue
-                            
-                        # Skip duplicate names (optional - comment out if you want to allow duplicates)
-                        if company_name in imported_names:
-                            skipped += 1
-                            continue
-                        
-                        # Generate a new UUID for this company
-                        new_company_id = str(uuid.uuid4())
-                        
-                        # If the CSV has a company_id, save the mapping for reference
-                        if 'company_id' in row and not pd.isna(row['company_id']):
-                            old_id = row['company_id']
-                            id_mapping[old_id] = new_company_id
-                        
-                        # Get type_code, defaulting to 1 (Private Company) if not present
-                        type_code = 1  # Default to Private Company
-                        if 'type_code' in row and not pd.isna(row['type_code']):
-                            type_code = int(row['type_code'])
-                        
-                        # Required fields for company table
-                        columns = ['company_id', 'name', 'type_code']
-                        values = [new_company_id, company_name, type_code]
-                        
-                        # Add required contact fields with defaults if not provided
-                        if 'primary_contact_name' not in row or pd.isna(row['primary_contact_name']):
-                            columns.append('primary_contact_name')
-                            values.append('Contact Required')
-                            
-                        if 'primary_contact_phone' not in row or pd.isna(row['primary_contact_phone']):
-                            columns.append('primary_contact_phone')
-                            values.append('Phone Required')
-                        
-                        # Add any other available columns that match the database
-                        for col in table_columns:
-                            if col not in ['company_id', 'name', 'type_code', 'primary_contact_name', 'primary_contact_phone'] and col in row.index and not pd.isna(row[col]):
-                                columns.append(col)
-                                values.append(row[col])
-                        
-                        # Insert the company with new UUID
-                        placeholder_str = ', '.join(['%s'] * len(columns))
-                        sql = f"INSERT INTO company ({', '.join(columns)}) VALUES ({placeholder_str})"
-                        
-                        try:
-                            cursor.execute(sql, values)
-                            imported += 1
-                            imported_names.add(company_name)  # Mark as imported
-                            
-                        except Exception as e:
-                            # If there's an error with this specific insert
-                            conn.rollback()
-                            error_count += 1
-                            logger.error(f"Error inserting company '{company_name}': {str(e)[:100]}...")
-                    
-                    except Exception as row_error:
-                        error_count += 1
-                        logger.error(f"Error processing company row: {str(row_error)[:100]}...")
+                # Skip rows without a name and duplicate names (optional - drop
+                # the duplicate check if you want to allow duplicates)
+                names = chunk['name']
+                is_empty = names.isna() | (names == '')
+                is_duplicate = ~is_empty & (names.isin(imported_names) | names.duplicated())
+                to_insert = chunk[~(is_empty | is_duplicate)]
+                skipped += int(is_empty.sum() + is_duplicate.sum())
+                
+                # Required fields for company table, with new UUIDs
+                insert_df = pd.DataFrame({
+                    'company_id': [str(uuid.uuid4()) for _ in range(len(to_insert))],
+                    'name': to_insert['name'].values
+                })
+                
+                # Get type_code, defaulting to 1 (Private Company) if not present
+                if 'type_code' in to_insert.columns:
+                    insert_df['type_code'] = pd.to_numeric(to_insert['type_code'], errors='coerce').fillna(1).astype(int).values
+                else:
+                    insert_df['type_code'] = 1
+                
+                # Add required contact fields with defaults if not provided
+                for col, default in (('primary_contact_name', 'Contact Required'),
+                                     ('primary_contact_phone', 'Phone Required')):
+                    if col in to_insert.columns:
+                        insert_df[col] = to_insert[col].fillna(default).values
+                    else:
+                        insert_df[col] = default
+                
+                # Add any other available columns that match the database
+                for col in table_columns:
+                    if col in to_insert.columns and col not in insert_df.columns:
+                        insert_df[col] = to_insert[col].values
                 
-                # Commit after each batch
-                conn.commit()
+                # If the CSV has a company_id, save the mapping for reference
+                if 'company_id' in to_insert.columns:
+                    has_old_id = to_insert['company_id'].notna().values
+                    id_mapping.update(zip(to_insert['company_id'].values[has_old_id].tolist(),
+                                          insert_df['company_id'].values[has_old_id].tolist()))
+                
+                result = bulk_import_frame(conn, 'company', insert_df)
+                imported += result['inserted']
+                skipped += result['skipped']
+                error_count += result['rejected']
+                imported_names.update(insert_df['name'])
+                for rejected in result['rejected_rows']:
+                    company_name = insert_df['name'].iloc[rejected['row'] - 1]
+                    logger.error(f"Error inserting company '{company_name}': {rejected['error'][:100]}...")
                 
                 # Show progress
-                if i % (BATCH_SIZE * 2) == 0 or i + BATCH_SIZE >= len(df):
-                    logger.info(f"Progress: {imported}/{len(df)} companies imported ({skipped} skipped, {error_count} errors)")
+                logger.info(f"Progress: {rows_read} rows read, {imported} companies imported "
+                            f"({skipped} skipped, {error_count} errors)")
+                if progress_callback:
+                    progress_callback(rows_read, {'inserted': imported, 'skipped': skipped, 'rejected': error_count})
             
             # Save UUID mapping to a file
             if id_mapping:
@@ -762,4 +680,4 @@ class DatabaseManager:
             except Exception as rollback_error:
                 logger.error(f"Error during rollback: {rollback_error}")
             
-            return False
\ No newline at end of file
+            return False
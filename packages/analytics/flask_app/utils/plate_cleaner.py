@@ -1,8 +1,12 @@
 import pandas as pd
-import re
 import logging
+import sys
+import os
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from plate_normalizer import normalize_plate, normalize_series
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -10,86 +14,10 @@ logger = logging.getLogger(__name__)
 def clean_license_plate(plate):
     """Clean and standardize vehicle license plates according to Zambian standards
     
-    Rules applied:
-    1. Convert to string and remove ALL spaces immediately
-    2. Convert to uppercase
-    3. Remove special characters, dashes, etc.
-    4. Ensure proper format for common patterns (GRZ, ABC1234, etc.)
-    5. Handle special cases (CD for diplomatic, ZP for police, etc.)
-    6. Strip decimal parts from plates with decimal points
-    7. Reject plates that are only numbers
+    The rules live in plate_normalizer.normalize_plate; use
+    plate_normalizer.normalize_series for whole columns.
     """
-    if not plate or pd.isna(plate):
-        return ""
-    
-    # Convert to string and IMMEDIATELY remove all spaces
-    plate = str(plate).replace(' ', '').strip().upper()
-    
-    # Check if the plate contains only digits or only letters (after stripping)
-    if re.match(r'^\d+$', plate) or re.match(r'^\d+\.\d+$', plate):
-        return ""  # Return empty string for plates that are just numbers
-    
-    if re.match(r'^[A-Z]+$', plate):
-        return ""  # Return empty string for plates that are just letters
-    
-    # Handle plates with decimal points (like "BAD52.00")
-    if '.' in plate:
-        # Extract the part before the decimal
-        parts = plate.split('.')
-        plate = parts[0]
-    
-    # Remove dots, commas, slashes, etc.
-    plate = re.sub(r'[^\w\-]', '', plate)
-    
-    # Remove underscores
-    plate = plate.replace('_', '')
-    
-    # Format GRZ plates (government vehicles)
-    if plate.startswith('GRZ'):
-        # Just keep GRZ followed by the digits, no spaces or dashes
-        grz_match = re.match(r'GRZ[-\s]*(\d+[A-Z]*)', plate)
-        if grz_match:
-            plate = f"GRZ{grz_match.group(1)}"
-        # For cases with just GRZ, keep it as is
-    
-    # Try to extract letters and numbers wherever they appear
-    # Look for different letter-number patterns
-    
-    # First try standard format of 2-3 letters followed by 3-4 digits
-    std_match = re.match(r'([A-Z]{2,3})[-\s]*(\d{3,4})', plate)
-    
-    # If no match, try a more general pattern for any letters followed by any numbers
-    if not std_match:
-        std_match = re.match(r'([A-Z]+)[-\s]*(\d+)', plate)
-    
-    if std_match:
-        letters = std_match.group(1)
-        numbers = std_match.group(2)
-        
-        # Make sure we have 3 letters
-        if len(letters) < 3:
-            # Add leading letters as needed
-            letters = 'A' * (3 - len(letters)) + letters
-        elif len(letters) > 3:
-            # Truncate to 3 letters if longer
-            letters = letters[:3]
-        
-        # Make sure we have 4 digits
-        if len(numbers) < 4:
-            # Add leading zeros as needed
-            numbers = '0' * (4 - len(numbers)) + numbers
-        elif len(numbers) > 4:
-            # Truncate to 4 digits if longer
-            numbers = numbers[:4]
-            
-        plate = f"{letters}{numbers}"
-    
-    # Final check - don't return plates that are too short
-    if len(plate) < 3:
-        return ""
-    
-    # Return the cleaned plate
-    return plate
+    return normalize_plate(plate)
 
 def batch_clean_plates(file_path):
     """Clean all license plates in a CSV file"""
@@ -102,7 +30,7 @@ def batch_clean_plates(file_path):
         raise ValueError("CSV file must have a license_plate column")
     
     # Apply plate cleaning function
-    df['cleaned_plate'] = df['license_plate'].apply(clean_license_plate)
+    df['cleaned_plate'] = normalize_series(df['license_plate'])
     
     # Count before filtering
     total_count = len(df)
@@ -153,7 +81,7 @@ def analyze_plates(df):
         return {"error": "No license_plate column found"}
     
     # Apply cleaning to get standardized plates
-    df['cleaned_plate'] = df['license_plate'].apply(clean_license_plate)
+    df['cleaned_plate'] = normalize_series(df['license_plate'])
     
     # Count total plates
     total_plates = len(df)
@@ -37,6 +37,7 @@ debug_print("Using database connection for data")
 
 # Import database connection module
 from database.database_connection import read_companies, read_vehicles, read_weigh_events, check_connection
+from session_pairing import pair_sessions, directional_net_weights
 
 # Check database connection
 connection_status, message = check_connection()
@@ -108,79 +109,44 @@ def load_data():
 
 # Calculate net weights for entry-exit pairs
 def calculate_net_weights(df):
-    # Group by session_id
-    sessions = df.groupby('session_id')
-    
-    results = []
-    
-    for session_id, group in sessions:
-        if len(group) >= 2:  # Need at least entry and exit
-            # Sort by event_time to get entry first, exit second
-            group = group.sort_values('event_time')
-            
-            # Get entry and exit weights
-            entry = group[group['event_type'] == 1]
-            exit = group[group['event_type'] == 2]
-            
-            if not entry.empty and not exit.empty:
-                entry_row = entry.iloc[0]
-                exit_row = exit.iloc[0]
-                
-                # Calculate net weight based on delivery type
-                is_recycle = entry_row.get('is_recycle', False)
-                
-                if is_recycle:
-                    # For recycle events, exit weight is higher than entry weight
-                    # They collect recyclables, so net_weight should be positive
-                    gross_weight = exit_row['weight_kg']
-                    tare_weight = entry_row['weight_kg']
-                    if gross_weight <= tare_weight:
-                        # Skip invalid data where the pattern doesn't match
-                        continue
-                else:
-                    # For normal events, entry weight is higher than exit weight
-                    # They drop off waste, so net_weight should be positive
-                    gross_weight = entry_row['weight_kg']
-                    tare_weight = exit_row['weight_kg']
-                    if gross_weight <= tare_weight:
-                        # Skip invalid data where the pattern doesn't match
-                        continue
-                
-                # Calculate the absolute difference for net weight
-                net_weight = abs(gross_weight - tare_weight)
-                
-                result = {
-                    'session_id': session_id,
-                    'vehicle_id': entry_row['vehicle_id'],
-                    'company_id': entry_row['company_id'],
-                    'company_name': entry_row.get('company_name', 'Unknown'),
-                    'license_plate': entry_row.get('license_plate', 'Unknown'),
-                    'entry_time': entry_row['event_time'],
-                    'exit_time': exit_row['event_time'],
-                    'duration_minutes': (exit_row['event_time'] - entry_row['event_time']).total_seconds() / 60,
-                    'entry_weight': entry_row['weight_kg'],
-                    'exit_weight': exit_row['weight_kg'],
-                    'net_weight': net_weight,
-                    'is_recycle': is_recycle,
-                    'delivery_type': entry_row.get('delivery_type', 'Normal Disposal'),
-                    'date': entry_row['date'],
-                    'day': entry_row['day'],
-                    'month': entry_row['month'],
-                    'month_name': entry_row.get('month_name', ''),
-                    'year': entry_row['year'],
-                    'day_of_week': entry_row['day_of_week'],
-                    'day_of_week_num': entry_row.get('day_of_week_num', 0),
-                    'hour': entry_row['hour'],
-                    'week': entry_row.get('week', 0),
-                    'location': entry_row['remarks'] if not is_recycle else 'Recycle Collection'
-                }
-                
-                results.append(result)
-    
-    if results:
-        net_weights_df = pd.DataFrame(results)
-        return net_weights_df
-    return pd.DataFrame()
+    paired = pair_sessions(df)
+    if paired.empty:
+        return pd.DataFrame()
+    
+    # Normal deliveries must leave lighter, recycle collections heavier;
+    # sessions that don't follow that pattern are skipped as invalid data
+    is_recycle, net_weight, valid = directional_net_weights(paired)
+    if not valid.any():
+        return pd.DataFrame()
+    
+    paired = paired[valid]
+    is_recycle = is_recycle[valid]
+    
+    return pd.DataFrame({
+        'session_id': paired['session_id'].values,
+        'vehicle_id': paired['vehicle_id'].values,
+        'company_id': paired['company_id'].values,
+        'company_name': paired['company_name'].values if 'company_name' in paired.columns else 'Unknown',
+        'license_plate': paired['license_plate'].values if 'license_plate' in paired.columns else 'Unknown',
+        'entry_time': paired['entry_time'].values,
+        'exit_time': paired['exit_time'].values,
+        'duration_minutes': (paired['exit_time'] - paired['entry_time']).dt.total_seconds().values / 60,
+        'entry_weight': paired['entry_weight'].values,
+        'exit_weight': paired['exit_weight'].values,
+        'net_weight': net_weight[valid],
+        'is_recycle': is_recycle,
+        'delivery_type': paired['delivery_type'].values if 'delivery_type' in paired.columns else 'Normal Disposal',
+        'date': paired['date'].values,
+        'day': paired['day'].values,
+        'month': paired['month'].values,
+        'month_name': paired['month_name'].values if 'month_name' in paired.columns else '',
+        'year': paired['year'].values,
+        'day_of_week': paired['day_of_week'].values,
+        'day_of_week_num': paired['day_of_week_num'].values if 'day_of_week_num' in paired.columns else 0,
+        'hour': paired['hour'].values,
+        'week': paired['week'].values if 'week' in paired.columns else 0,
+        'location': np.where(is_recycle, 'Recycle Collection', paired['remarks'].values)
+    })
 
 # Database polling interval in seconds
 DATABASE_POLL_INTERVAL = 300  # 5 minutes
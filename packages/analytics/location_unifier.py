@@ -12,6 +12,8 @@ from pathlib import Path
 import logging
 import uuid
 
+from parallel_dedup import score_blocks
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -82,6 +84,9 @@ class DuplicateGroup:
 class LocationUnificationEngine:
     """High-performance location unification engine"""
     
+    # Component weights of calculate_similarity, for batch scoring
+    similarity_weights = {'sequence': 0.2, 'ratio': 0.2, 'token_sort': 0.3, 'token_set': 0.3}
+    
     def __init__(self, similarity_threshold: float = 0.7):
         self.similarity_threshold = similarity_threshold
         self.locations: List[Location] = []
@@ -192,31 +197,36 @@ class LocationUnificationEngine:
         
         return blocks
     
-    def find_duplicates_with_blocking(self, prefix_length=2):
-        """Find duplicate location groups using blocking for efficiency"""
-        logger.info(f"Finding duplicate groups with prefix blocking (length={prefix_length})...")
+    def find_duplicates_with_blocking(self, prefix_length=2, workers=1):
+        """
+        Find duplicate location groups using blocking for efficiency
+        
+        Args:
+            prefix_length: Length of the name prefix that defines a block
+            workers: Processes scoring the blocks (None for every core)
+        """
+        logger.info(f"Finding duplicate groups with prefix blocking (length={prefix_length}, workers={workers})...")
         
         self.duplicate_groups = []
         processed = set()
         
-        # Create blocks
-        blocks = self.prefix_block_locations(self.locations, prefix_length)
+        # Create blocks, skipping blocks with only one location
+        blocks = [block for block in self.prefix_block_locations(self.locations, prefix_length).values()
+                  if len(block) > 1]
+        block_matches = score_blocks([[location.cleaned_name for location in block] for block in blocks],
+                                     self, score_cutoff=self.similarity_threshold, workers=workers)
         
         # Process each block
-        for block_key, block_locations in blocks.items():
-            if len(block_locations) <= 1:
-                continue  # Skip blocks with only one location
-                
+        for block_locations, matches in zip(blocks, block_matches):
             for i, location1 in enumerate(block_locations):
                 if location1.id in processed:
                     continue
                     
                 similar_matches = []
                 
-                for j, location2 in enumerate(block_locations):
+                for j, similarity in matches.get(i, []):
+                    location2 = block_locations[j]
                     if i != j and location2.id not in processed:
-                        similarity = self.calculate_similarity(location1.cleaned_name, location2.cleaned_name)
-                        
                         if similarity > self.similarity_threshold:
                             match = SimilarityMatch(location1, location2, similarity)
                             similar_matches.append(match)
@@ -741,15 +751,15 @@ class LocationUnificationReviewer:
             <p>Exported unified locations to: {locations_file}</p>
             """))
 
-def run_location_unification(weigh_events_file: str, similarity_threshold: float = 0.7):
-    """Run the location unification process with an interactive UI"""
+def run_location_unification(weigh_events_file: str, similarity_threshold: float = 0.7, workers: Optional[int] = 1):
+    """Run the location unification process with an interactive UI (workers=None scores on every core)"""
     engine = LocationUnificationEngine(similarity_threshold=similarity_threshold)
     
     # Extract locations from weigh events
     engine.extract_locations_from_weigh_events(weigh_events_file)
     
     # Find potential duplicates
-    engine.find_duplicates_with_blocking(prefix_length=2)
+    engine.find_duplicates_with_blocking(prefix_length=2, workers=workers)
     
     # Create the review interface
     reviewer = LocationUnificationReviewer(engine)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Name Blocking
+-------------
+Candidate pair generation for duplicate detection on names.
+
+Comparing every name with every other name is quadratic, and each comparison
+runs several fuzzy scorers. NGramIndex gives every name a signature made of
+its rarest padded character trigrams (rarest across all the names indexed)
+and proposes only the pairs whose signatures overlap enough, so the
+expensive scorers run on a small number of plausible pairs per name.
+
+Spelling variants of a name keep most of its distinctive trigrams, so their
+signatures overlap; names that only share common words ("trading",
+"limited", ...) do not, since those trigrams are outranked by rarer ones.
+Common trigrams only enter the signature of names that have few rarer ones,
+which keeps their posting lists short.
+"""
+
+import numpy as np
+import pandas as pd
+
+NGRAM_SIZE = 3
+
+PAD = '#'
+
+# Rarest trigrams kept per name
+SIGNATURE_SIZE = 16
+
+# Share of the smaller of two signatures that must be shared for a candidate pair
+MIN_OVERLAP = 0.5
+
+
+def normalize_name(name):
+    """Lower-case name with runs of whitespace collapsed; '' for missing names"""
+    if name is None or pd.isna(name):
+        return ''
+    return ' '.join(str(name).lower().split())
+
+
+def name_ngrams(name, n=NGRAM_SIZE):
+    """Set of padded character n-grams of a normalized name"""
+    if not name:
+        return set()
+    padded = PAD * (n - 1) + name + PAD * (n - 1)
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class NGramIndex:
+    """
+    Inverted index over the trigram signatures of a list of names.
+
+    Usage:
+        index = NGramIndex(companies_df['name'])
+        left, right = index.candidate_pairs()     # positions, left < right
+        neighbours = index.neighbours()           # candidates of each name
+    """
+
+    def __init__(self, names, signature_size=SIGNATURE_SIZE, min_overlap=MIN_OVERLAP):
+        self.signature_size = signature_size
+        self.min_overlap = min_overlap
+        self.names = [normalize_name(name) for name in names]
+        self.size = len(self.names)
+
+        gram_ids = {}
+        record_grams = [
+            np.fromiter((gram_ids.setdefault(gram, len(gram_ids)) for gram in name_ngrams(name)), dtype=np.int64)
+            for name in self.names
+        ]
+        all_grams = np.concatenate(record_grams) if record_grams else np.empty(0, dtype=np.int64)
+        document_frequency = np.bincount(all_grams, minlength=len(gram_ids))
+
+        # Signatures: each name's trigrams from rarest to most common (ties by id), cut to size
+        self._signatures = [
+            grams[np.lexsort((grams, document_frequency[grams]))][:signature_size]
+            for grams in record_grams
+        ]
+        self._signature_sizes = np.fromiter((len(s) for s in self._signatures), dtype=np.int64, count=self.size)
+
+        # Posting lists: names whose signature holds each trigram, in ascending order
+        records = np.repeat(np.arange(self.size), self._signature_sizes)
+        grams = np.concatenate(self._signatures) if self._signatures else np.empty(0, dtype=np.int64)
+        signature_frequency = np.bincount(grams, minlength=len(gram_ids))
+        order = np.argsort(grams, kind='stable')
+        bounds = np.concatenate([[0], np.cumsum(signature_frequency)])
+        sorted_records = records[order]
+        self._postings = [sorted_records[bounds[g]:bounds[g + 1]] for g in range(len(gram_ids))]
+
+    def candidates(self, position, following_only=True):
+        """
+        Positions whose signature overlaps enough with the signature of
+        position: only those after it, or with following_only=False all of them
+        """
+        signature = self._signatures[position]
+        if len(signature) == 0:
+            return np.empty(0, dtype=np.int64)
+        others = np.concatenate([self._postings[g] for g in signature])
+        others = others[others > position] if following_only else others[others != position]
+        if len(others) == 0:
+            return others
+        others, shared = np.unique(others, return_counts=True)
+        smaller = np.minimum(self._signature_sizes[position], self._signature_sizes[others])
+        return others[shared >= np.ceil(self.min_overlap * smaller)]
+
+    def candidate_pairs(self):
+        """
+        All candidate pairs.
+
+        Returns:
+            tuple: (left, right) arrays of positions with left < right,
+            sorted by left then right
+        """
+        lefts, rights = [], []
+        for position in range(self.size):
+            others = self.candidates(position)
+            if len(others):
+                lefts.append(np.full(len(others), position, dtype=np.int64))
+                rights.append(others)
+        if not lefts:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        return np.concatenate(lefts), np.concatenate(rights)
+
+    def neighbours(self):
+        """Candidate positions of every name (in both directions), each list ascending"""
+        if self.size == 0:
+            return []
+        left, right = self.candidate_pairs()
+        sources = np.concatenate([left, right])
+        targets = np.concatenate([right, left])
+        order = np.lexsort((targets, sources))
+        counts = np.bincount(sources, minlength=self.size)
+        return np.split(targets[order], np.cumsum(counts)[:-1])
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Name Similarity
+---------------
+Batch scoring for the weighted name similarity used by the unifiers.
+
+Each unifier scores a pair of names as a weighted sum of a difflib sequence
+ratio, fuzzywuzzy's ratio, token sort ratio and token set ratio (plus, in
+some unifiers, a prefix bonus), floored at the prefix bonus. Computing that
+pair by pair in Python dominates duplicate detection.
+
+With rapidfuzz installed, the four ratios are computed for whole arrays at
+once by its C++ cdist/cpdist (optionally on several cores). rapidfuzz's
+ratios are never below the difflib/fuzzywuzzy values they stand in for, so
+the weighted sum over them is an upper bound of the unifier's own score.
+Only pairs whose bound reaches the score cutoff are scored again with the
+unifier's calculate_similarity, which keeps every reported score, and so
+every duplicate decision, exactly what it was. Pairs below the cutoff score
+0, like rapidfuzz's own score_cutoff.
+
+Without rapidfuzz every pair is scored with calculate_similarity, as before.
+
+Usage:
+    scores = score_matrix(names, names, engine.calculate_similarity,
+                          engine.similarity_weights, score_cutoff=0.7)
+"""
+
+import numpy as np
+import pandas as pd
+from fuzzywuzzy.utils import full_process
+
+try:
+    from rapidfuzz import fuzz as rf_fuzz
+    from rapidfuzz import process as rf_process
+    from rapidfuzz.distance import Prefix
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+# Weighted components of the composite score
+COMPONENTS = ('sequence', 'ratio', 'token_sort', 'token_set', 'prefix')
+
+# fuzzywuzzy rounds its ratios to whole percents, which can add up to half a percent
+ROUNDING_SLACK = 0.005
+
+# Upper bound on the number of cells scored in one cdist call
+MAX_BATCH_CELLS = 2_000_000
+
+
+def _normalize(names):
+    """Names as calculate_similarity sees them: lower-cased and stripped, '' if missing"""
+    return ['' if name is None or (not isinstance(name, str) and pd.isna(name))
+            else str(name).lower().strip() for name in names]
+
+
+def _cut(score, score_cutoff):
+    """score, or 0 if it falls below score_cutoff"""
+    return score if score_cutoff is None or score >= score_cutoff else 0.0
+
+
+def _token_process(name):
+    """fuzzywuzzy's preprocessing for the token ratios"""
+    return full_process(name, force_ascii=True)
+
+
+def _bound(scores, weights, lengths_q, lengths_c, common_prefix, paired=False):
+    """
+    Upper bound of the composite score from rapidfuzz ratios.
+
+    Args:
+        scores: Dict of rapidfuzz ratios (0-100) for 'indel', 'token_sort'
+            and 'token_set'
+        weights: Component weights
+        lengths_q, lengths_c: Lengths of the normalized names
+        common_prefix: Length of the common prefix of each pair
+        paired: Whether the arrays are aligned pairs rather than a matrix
+    """
+    if not paired:
+        lengths_q = lengths_q[:, None]
+        lengths_c = lengths_c[None, :]
+    min_len = np.minimum(lengths_q, lengths_c)
+    max_len = np.maximum(lengths_q, lengths_c)
+    # One name starts with the other exactly when their common prefix is the shorter name
+    is_prefix = common_prefix == min_len
+    length_ratio = np.where(max_len > 0, min_len / np.maximum(max_len, 1), 0.0)
+    prefix_similarity = np.where(is_prefix, 0.8 + 0.2 * length_ratio, 0.0)
+
+    indel = scores['indel'] / 100
+    weighted = (
+        weights.get('sequence', 0) * indel
+        + weights.get('ratio', 0) * (indel + ROUNDING_SLACK)
+        + weights.get('token_sort', 0) * (scores['token_sort'] / 100 + ROUNDING_SLACK)
+        + weights.get('token_set', 0) * (scores['token_set'] / 100 + ROUNDING_SLACK)
+        + weights.get('prefix', 0) * prefix_similarity
+    )
+    bound = np.maximum(weighted, prefix_similarity)
+    # Identical names may be special-cased to a perfect score
+    bound[is_prefix & (lengths_q == lengths_c)] = 1.0
+    return bound
+
+
+def _rapidfuzz_scores(queries, choices, workers, paired=False):
+    """rapidfuzz ratios and common prefix lengths as matrices, or arrays for aligned pairs"""
+    compute = rf_process.cpdist if paired else rf_process.cdist
+    token_queries = [_token_process(name) for name in queries]
+    token_choices = [_token_process(name) for name in choices]
+    scores = {
+        'indel': compute(queries, choices, scorer=rf_fuzz.ratio, dtype=np.float64, workers=workers),
+        'token_sort': compute(token_queries, token_choices, scorer=rf_fuzz.token_sort_ratio,
+                              dtype=np.float64, workers=workers),
+        'token_set': compute(token_queries, token_choices, scorer=rf_fuzz.token_set_ratio,
+                             dtype=np.float64, workers=workers),
+    }
+    common_prefix = compute(queries, choices, scorer=Prefix.similarity, dtype=np.int64, workers=workers)
+    return scores, common_prefix
+
+
+def score_matrix(queries, choices, similarity, weights, score_cutoff=None, workers=-1):
+    """
+    Composite similarity of every query against every choice.
+
+    Args:
+        queries: Names to score (rows)
+        choices: Names to score them against (columns)
+        similarity: The unifier's calculate_similarity(name1, name2)
+        weights: Dict of component weights of that calculate_similarity,
+            keyed by COMPONENTS
+        score_cutoff: Scores below this are returned as 0; None scores
+            every pair with similarity
+        workers: Cores rapidfuzz may use (-1 for all)
+
+    Returns:
+        np.ndarray of shape (len(queries), len(choices))
+    """
+    queries = list(queries)
+    choices = list(choices)
+    result = np.zeros((len(queries), len(choices)))
+    if not queries or not choices:
+        return result
+
+    if not RAPIDFUZZ_AVAILABLE or score_cutoff is None:
+        for row, query in enumerate(queries):
+            for column, choice in enumerate(choices):
+                result[row, column] = _cut(similarity(query, choice), score_cutoff)
+        return result
+
+    normalized_queries = _normalize(queries)
+    normalized_choices = _normalize(choices)
+    lengths_q = np.fromiter(map(len, normalized_queries), dtype=np.int64, count=len(queries))
+    lengths_c = np.fromiter(map(len, normalized_choices), dtype=np.int64, count=len(choices))
+
+    batch_rows = max(1, MAX_BATCH_CELLS // len(choices))
+    for start in range(0, len(queries), batch_rows):
+        stop = min(start + batch_rows, len(queries))
+        scores, common_prefix = _rapidfuzz_scores(normalized_queries[start:stop], normalized_choices, workers)
+        bound = _bound(scores, weights, lengths_q[start:stop], lengths_c, common_prefix)
+        for row, column in zip(*np.nonzero(bound >= score_cutoff)):
+            score = similarity(queries[start + row], choices[column])
+            if score >= score_cutoff:
+                result[start + row, column] = score
+    return result
+
+
+def iter_score_rows(names, similarity, weights, score_cutoff=None, workers=-1):
+    """
+    Rows of score_matrix(names, names, ...), computed a batch at a time.
+
+    Yields:
+        np.ndarray of the scores of each name against all names, in order
+    """
+    names = list(names)
+    batch_rows = max(1, MAX_BATCH_CELLS // max(len(names), 1))
+    for start in range(0, len(names), batch_rows):
+        yield from score_matrix(names[start:start + batch_rows], names, similarity, weights,
+                                score_cutoff=score_cutoff, workers=workers)
+
+
+def score_pairs(left, right, similarity, weights, score_cutoff=None, workers=-1):
+    """
+    Composite similarity of aligned pairs of names.
+
+    Args:
+        left, right: Equal-length sequences; pair i is (left[i], right[i])
+        similarity, weights, score_cutoff, workers: As for score_matrix
+
+    Returns:
+        np.ndarray of len(left) scores
+    """
+    left = list(left)
+    right = list(right)
+    if len(left) != len(right):
+        raise ValueError("left and right must have the same length")
+    result = np.zeros(len(left))
+
+    if not RAPIDFUZZ_AVAILABLE or score_cutoff is None:
+        for position, (name1, name2) in enumerate(zip(left, right)):
+            result[position] = _cut(similarity(name1, name2), score_cutoff)
+        return result
+
+    normalized_left = _normalize(left)
+    normalized_right = _normalize(right)
+    lengths_l = np.fromiter(map(len, normalized_left), dtype=np.int64, count=len(left))
+    lengths_r = np.fromiter(map(len, normalized_right), dtype=np.int64, count=len(right))
+
+    for start in range(0, len(left), MAX_BATCH_CELLS):
+        stop = min(start + MAX_BATCH_CELLS, len(left))
+        scores, common_prefix = _rapidfuzz_scores(normalized_left[start:stop], normalized_right[start:stop],
+                                                  workers, paired=True)
+        bound = _bound(scores, weights, lengths_l[start:stop], lengths_r[start:stop], common_prefix, paired=True)
+        for position in np.flatnonzero(bound >= score_cutoff) + start:
+            score = similarity(left[position], right[position])
+            if score >= score_cutoff:
+                result[position] = score
+    return result
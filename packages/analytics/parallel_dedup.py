@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Parallel Dedup
+--------------
+Scores the prefix blocks of the deduplication engines on a process pool.
+
+Blocks are independent (every name falls in exactly one block), but their
+sizes are very uneven, so blocks are cut into row slices of similar cost and
+the slices are queued largest first. Each worker takes the next slice as soon
+as it finishes one, so a large block is spread over all the workers instead
+of leaving one of them running long after the others are idle.
+
+Workers return only the pairs scoring at least the cutoff. The engine then
+forms groups from them block by block in its usual order, so the groups are
+the same whatever the number of workers or the order slices finish in.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from name_similarity import score_matrix
+
+# Target number of name pairs scored per task
+TASK_CELLS = 250_000
+
+# Engine used by the scoring tasks of this worker process
+_worker_engine = None
+
+
+def _init_worker(engine_class, similarity_threshold):
+    global _worker_engine
+    _worker_engine = engine_class(similarity_threshold=similarity_threshold)
+
+
+def _score_slice(engine, block_index, start, row_names, block_names, score_cutoff, workers):
+    """Pairs of one row slice of a block scoring at least score_cutoff"""
+    scores = score_matrix(row_names, block_names, engine.calculate_similarity,
+                          engine.similarity_weights, score_cutoff=score_cutoff, workers=workers)
+    rows, columns = np.nonzero(scores)
+    return block_index, start + rows, columns, scores[rows, columns]
+
+
+def _score_slice_in_worker(block_index, start, row_names, block_names, score_cutoff):
+    # One core per process: the pool already keeps every core busy
+    return _score_slice(_worker_engine, block_index, start, row_names, block_names, score_cutoff, workers=1)
+
+
+def _slices(blocks):
+    """(block index, start, stop) row slices of every block, most expensive first"""
+    slices = []
+    for block_index, names in enumerate(blocks):
+        step = max(1, TASK_CELLS // max(len(names), 1))
+        for start in range(0, len(names), step):
+            slices.append((block_index, start, min(start + step, len(names))))
+    slices.sort(key=lambda s: (-(s[2] - s[1]) * len(blocks[s[0]]), s[0], s[1]))
+    return slices
+
+
+def score_blocks(blocks, engine, score_cutoff, workers=1):
+    """
+    Matching pairs within each block.
+
+    Args:
+        blocks: List of blocks, each a list of names
+        engine: Engine providing calculate_similarity and similarity_weights;
+            workers build their own engine of the same class
+        score_cutoff: Lowest score of a match
+        workers: Worker processes; 1 scores in this process, None uses
+            every core
+
+    Returns:
+        list: For each block, a dict from row position to the list of
+        (column position, score) of its matches in ascending column order
+    """
+    workers = workers or os.cpu_count() or 1
+    matches = [{} for _ in blocks]
+    slices = _slices(blocks)
+
+    if workers == 1 or len(slices) <= 1:
+        results = (
+            _score_slice(engine, block_index, start, blocks[block_index][start:stop], blocks[block_index],
+                         score_cutoff, workers=-1)
+            for block_index, start, stop in slices
+        )
+        return _collect(matches, results)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(type(engine), engine.similarity_threshold)) as pool:
+        futures = [
+            pool.submit(_score_slice_in_worker, block_index, start,
+                        blocks[block_index][start:stop], blocks[block_index], score_cutoff)
+            for block_index, start, stop in slices
+        ]
+        return _collect(matches, (future.result() for future in futures))
+
+
+def _collect(matches, results):
+    """Gather slice results into per-block match lists"""
+    for block_index, rows, columns, scores in results:
+        block_matches = matches[block_index]
+        # Each row belongs to a single slice and comes back in column order
+        for row, column, score in zip(rows.tolist(), columns.tolist(), scores.tolist()):
+            block_matches.setdefault(row, []).append((column, score))
+    return matches
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Plate Normalizer
+----------------
+License plate standardization according to Zambian conventions.
+
+normalize_plate cleans a single plate with precompiled patterns and keeps
+the results of recently seen raw values, since the same plates come back on
+every import. normalize_series applies the same rules to a whole column with
+pandas string operations, running them once per distinct value.
+
+Rules applied:
+1. Convert to string and remove ALL spaces immediately
+2. Convert to uppercase
+3. Reject plates that are only numbers or only letters
+4. Strip decimal parts from plates with decimal points
+5. Remove special characters, dashes, etc.
+6. Keep GRZ (government) plates as GRZ followed by their digits
+7. Standardize letter/number plates to three letters and four digits
+8. Reject plates shorter than three characters
+"""
+
+import re
+from functools import lru_cache
+
+import pandas as pd
+
+# Distinct raw plates whose normalized value is kept
+CACHE_SIZE = 65536
+
+NUMERIC_PATTERN = re.compile(r'^\d+$')
+DECIMAL_PATTERN = re.compile(r'^\d+\.\d+$')
+LETTERS_PATTERN = re.compile(r'^[A-Z]+$')
+SPECIAL_CHARS_PATTERN = re.compile(r'[^\w\-]')
+GRZ_PATTERN = re.compile(r'GRZ[-\s]*(\d+[A-Z]*)')
+STANDARD_PATTERN = re.compile(r'([A-Z]{2,3})[-\s]*(\d{3,4})')
+GENERAL_PATTERN = re.compile(r'([A-Z]+)[-\s]*(\d+)')
+
+
+def _standardize(letters, numbers):
+    """Three letters (padded with A, or truncated) and four digits (zero-padded, or truncated)"""
+    return letters[:3].rjust(3, 'A') + numbers[:4].rjust(4, '0')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _normalize_text(plate):
+    """Normalize the string form of a plate"""
+    plate = plate.replace(' ', '').strip().upper()
+
+    if NUMERIC_PATTERN.match(plate) or DECIMAL_PATTERN.match(plate):
+        return ""
+
+    if LETTERS_PATTERN.match(plate):
+        return ""
+
+    # Handle plates with decimal points (like "BAD52.00")
+    if '.' in plate:
+        plate = plate.split('.')[0]
+
+    plate = SPECIAL_CHARS_PATTERN.sub('', plate).replace('_', '')
+
+    if plate.startswith('GRZ'):
+        grz_match = GRZ_PATTERN.match(plate)
+        if grz_match:
+            plate = f"GRZ{grz_match.group(1)}"
+
+    std_match = STANDARD_PATTERN.match(plate) or GENERAL_PATTERN.match(plate)
+    if std_match:
+        plate = _standardize(std_match.group(1), std_match.group(2))
+
+    if len(plate) < 3:
+        return ""
+
+    return plate
+
+
+def normalize_plate(plate):
+    """Clean and standardize one license plate; '' for missing or rejected plates"""
+    if not plate or pd.isna(plate):
+        return ""
+    return _normalize_text(str(plate))
+
+
+def _extract_standard(plates, pattern):
+    """Standardized plates where pattern matches at the start, NaN elsewhere"""
+    parts = plates.str.extract('^' + pattern.pattern)
+    letters = parts[0].str[:3].str.rjust(3, 'A')
+    numbers = parts[1].str[:4].str.rjust(4, '0')
+    return letters + numbers
+
+
+def normalize_series(plates):
+    """
+    Vectorized normalize_plate over a Series of raw plates.
+
+    The rules run once per distinct raw value, with pandas string
+    operations, and the results are mapped back onto the original index.
+
+    Args:
+        plates: Series of raw license plates (any dtype)
+
+    Returns:
+        Series of cleaned plates (str, '' for rejected plates) with the same index
+    """
+    plates = pd.Series(plates)
+    if plates.empty:
+        return pd.Series([], index=plates.index, dtype=object)
+
+    # Missing values get code -1; other falsy values (0, False, '') are
+    # rejected by the text rules below, as in normalize_plate
+    codes, uniques = pd.factorize(plates)
+    text = pd.Series(uniques).astype(str).str.replace(' ', '', regex=False).str.strip().str.upper()
+    rejected = (
+        text.str.match(NUMERIC_PATTERN.pattern)
+        | text.str.match(DECIMAL_PATTERN.pattern)
+        | text.str.match(LETTERS_PATTERN.pattern)
+    )
+
+    text = text.str.split('.', n=1, regex=False).str[0]
+    text = text.str.replace(SPECIAL_CHARS_PATTERN.pattern, '', regex=True).str.replace('_', '', regex=False)
+
+    grz = 'GRZ' + text.str.extract('^' + GRZ_PATTERN.pattern)[0]
+    text = grz.fillna(text)
+
+    standard = _extract_standard(text, STANDARD_PATTERN)
+    standard = standard.fillna(_extract_standard(text, GENERAL_PATTERN))
+    text = standard.fillna(text)
+
+    rejected |= text.str.len() < 3
+    cleaned = text.where(~rejected, '').to_numpy(dtype=object)
+
+    result = pd.Series('', index=plates.index, dtype=object)
+    present = codes >= 0
+    result[present] = cleaned[codes[present]]
+    return result
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tiered Pricing
+--------------
+Vectorized disposal fee calculation for weigh sessions.
+
+Tier tables come from AnalyticsConfig.PRICING_TIERS (or the JSON file named
+by PRICING_CONFIG_FILE) and are compiled once into NumPy lookup arrays, so a
+whole batch of sessions is priced with a handful of array operations.
+"""
+
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+
+from config import AnalyticsConfig
+
+logger = logging.getLogger(__name__)
+
+
+def load_pricing_tiers(config_file=None):
+    """
+    Load the pricing tier tables.
+
+    Args:
+        config_file: Optional JSON file overriding AnalyticsConfig.PRICING_TIERS
+
+    Returns:
+        dict: Tier tables with integer company type keys
+    """
+    config_file = config_file or AnalyticsConfig.PRICING_CONFIG_FILE
+    if not config_file:
+        return AnalyticsConfig.PRICING_TIERS
+
+    try:
+        with open(config_file) as f:
+            tiers = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error loading pricing config {config_file}, using defaults: {e}")
+        return AnalyticsConfig.PRICING_TIERS
+
+    # JSON object keys are always strings; type codes are compared numerically
+    tiers['company_types'] = {
+        int(type_code): type_tiers
+        for type_code, type_tiers in tiers.get('company_types', {}).items()
+    }
+    return tiers
+
+
+def billable_tonnes(net_weight_kg):
+    """Whole tonnes to bill for each weight (no fractional billing)"""
+    net_weight_kg = np.asarray(net_weight_kg, dtype=float)
+    return np.trunc(net_weight_kg / 1000) + (np.mod(net_weight_kg, 1000) > 0)
+
+
+class TieredPricing:
+    """Prices batches of sessions against compiled tier tables"""
+
+    def __init__(self, tiers=None):
+        tiers = tiers or load_pricing_tiers()
+
+        # Flat list of tiers; index 0 is recycle and 1 the default tier
+        labels = [tiers['recycle']['label'], tiers['default']['label']]
+        fees = [tiers['recycle']['fee_per_tonne'], tiers['default']['fee_per_tonne']]
+
+        # Per company type: upper tonnage bounds and the flat index of each tier
+        self.type_tiers = {}
+        for type_code, type_tiers in tiers['company_types'].items():
+            bounds = []
+            indices = []
+            for tier in type_tiers:
+                max_tonnes = tier.get('max_tonnes')
+                bounds.append(np.inf if max_tonnes is None else float(max_tonnes))
+                indices.append(len(labels))
+                labels.append(tier['label'])
+                fees.append(tier['fee_per_tonne'])
+            self.type_tiers[type_code] = (np.array(bounds), np.array(indices))
+
+        self.fees = np.array(fees)
+        # Tier labels are categories; tiers sharing a label share a category
+        self.categories = list(dict.fromkeys(labels))
+        self.label_codes = np.array([self.categories.index(label) for label in labels])
+
+    def calculate(self, net_weight_kg, company_type, is_recycle=False):
+        """
+        Calculate fees for a batch of sessions.
+
+        Args:
+            net_weight_kg: Array of net weights in kilograms
+            company_type: Array of company type codes (6, 7, 8, or other)
+            is_recycle: Array of recycle flags, or a single flag for all sessions
+
+        Returns:
+            tuple: (fee_per_tonne, fee_amount, pricing_tier) where pricing_tier
+            is a pandas Categorical of tier labels
+        """
+        tonnes = billable_tonnes(net_weight_kg)
+        company_type = pd.Series(np.asarray(company_type, dtype=object))
+        is_recycle = np.broadcast_to(np.asarray(is_recycle, dtype=bool), tonnes.shape)
+
+        # Start everyone on the default tier, then assign configured types
+        tier_index = np.ones(len(tonnes), dtype=np.int64)
+        for type_code, (bounds, indices) in self.type_tiers.items():
+            type_mask = (company_type == type_code).values
+            if type_mask.any():
+                position = np.searchsorted(bounds, tonnes[type_mask], side='left')
+                tier_index[type_mask] = indices[np.minimum(position, len(indices) - 1)]
+        tier_index[is_recycle] = 0
+
+        fee_per_tonne = self.fees[tier_index]
+        fee_amount = np.where(fee_per_tonne > 0, tonnes * fee_per_tonne, 0)
+        pricing_tier = pd.Categorical.from_codes(self.label_codes[tier_index], categories=self.categories)
+        return fee_per_tonne, fee_amount, pricing_tier
+
+
+_default_pricing = None
+
+
+def get_pricing():
+    """Shared TieredPricing instance built from the configured tier tables"""
+    global _default_pricing
+    if _default_pricing is None:
+        _default_pricing = TieredPricing()
+    return _default_pricing
+
+
+def calculate_tiered_pricing(net_weight_kg, company_type, is_recycle=False):
+    """
+    Calculate pricing for a single session.
+
+    Returns:
+        tuple: (fee_per_tonne, fee_amount, pricing_tier)
+    """
+    fee_per_tonne, fee_amount, pricing_tier = get_pricing().calculate(
+        [net_weight_kg], [company_type], [is_recycle]
+    )
+    return int(fee_per_tonne[0]), fee_amount[0], pricing_tier[0]
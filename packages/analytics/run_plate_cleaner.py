@@ -1,5 +1,6 @@
 import pandas as pd
 from vehicle_plate_cleaner import run_license_plate_cleaner, batch_clean_plates, clean_license_plate
+from plate_normalizer import normalize_series
 
 # For batch cleaning without interactive review
 def clean_all_plates_batch():
@@ -19,7 +20,7 @@ def clean_all_plates_batch():
     plates_with_spaces = original_df[original_df['license_plate'].str.contains(r'\s', na=False)].shape[0]
     
     # Count how many plates were changed
-    original_df['temp_cleaned'] = original_df['license_plate'].apply(clean_license_plate)
+    original_df['temp_cleaned'] = normalize_series(original_df['license_plate'])
     changed_plates = original_df[original_df['license_plate'] != original_df['temp_cleaned']].shape[0]
     rejected_plates = original_df[original_df['temp_cleaned'] == ''].shape[0]
     
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Session Pairing Engine
+----------------------
+Vectorized pairing of entry/exit weigh events into sessions.
+
+Replaces the per-session groupby loops used by the dashboards: events are
+sorted once, the first entry and first exit of every session are taken with
+drop_duplicates, and net weight, duration and fees are computed as column
+operations over the paired frame.
+"""
+
+import numpy as np
+import pandas as pd
+
+from pricing import get_pricing
+
+# Event type codes for entry (gross) and exit (tare) weighings, numeric and string forms
+ENTRY_EVENT_TYPES = [1, 'ARRIVAL']
+EXIT_EVENT_TYPES = [2, 'DEPARTURE']
+
+# Columns returned by calculate_session_net_weights
+NET_WEIGHT_COLUMNS = [
+    'session_id', 'vehicle_id', 'company_id', 'company_name', 'company_type',
+    'pricing_tier', 'license_plate', 'entry_time', 'exit_time', 'duration_minutes',
+    'entry_weight', 'exit_weight', 'net_weight', 'fee_per_tonne', 'fee_amount',
+    'is_recycle', 'delivery_type', 'date', 'day', 'month', 'month_name', 'year',
+    'day_of_week', 'day_of_week_num', 'hour', 'week', 'location', 'clean_location'
+]
+
+
+def _event_type_masks(df):
+    """Boolean masks for entry and exit events"""
+    if 'event_type_std' in df.columns:
+        return df['event_type_std'] == 1, df['event_type_std'] == 2
+    return df['event_type'].isin(ENTRY_EVENT_TYPES), df['event_type'].isin(EXIT_EVENT_TYPES)
+
+
+def pair_sessions(df):
+    """
+    Pair the first entry and first exit event of every session.
+
+    Events are sorted by (session_id, event_time) once; the earliest entry and
+    the earliest exit of each session are then selected with drop_duplicates,
+    matching what sorting and filtering every group individually produced.
+
+    Args:
+        df: DataFrame of weigh events with session_id, event_type (or
+            event_type_std), event_time and weight_kg
+
+    Returns:
+        DataFrame with one row per session that has both an entry and an
+        exit, ordered by session_id. All columns of the entry event are kept;
+        entry_time, entry_weight, exit_time, exit_weight and exit_event_id
+        are added.
+    """
+    if df.empty:
+        return pd.DataFrame()
+
+    events = df[df['session_id'].notna()]
+    events = events.sort_values(['session_id', 'event_time'], kind='mergesort')
+    entry_mask, exit_mask = _event_type_masks(events)
+
+    entries = events[entry_mask].drop_duplicates(subset='session_id', keep='first')
+    exit_columns = ['session_id', 'event_time', 'weight_kg']
+    if 'event_id' in events.columns:
+        exit_columns.append('event_id')
+    exits = events.loc[exit_mask, exit_columns].drop_duplicates(subset='session_id', keep='first')
+    exits = exits.rename(columns={
+        'event_time': 'exit_time',
+        'weight_kg': 'exit_weight',
+        'event_id': 'exit_event_id'
+    })
+
+    paired = entries.merge(exits, on='session_id', how='inner', sort=False)
+    paired['entry_time'] = paired['event_time']
+    paired['entry_weight'] = paired['weight_kg']
+    return paired
+
+
+def _entry_values(paired, column, default=None):
+    """Values of an entry-event column, or a default when the column is missing"""
+    if column in paired.columns:
+        return paired[column].values
+    return default
+
+
+def calculate_session_net_weights(df, location_fn=None):
+    """
+    Calculate net weights and tiered fees for every entry/exit session.
+
+    Args:
+        df: DataFrame of weigh events merged with vehicle and company data
+        location_fn: Function mapping remarks to a clean location, used when
+            df has no clean_location column
+
+    Returns:
+        DataFrame with NET_WEIGHT_COLUMNS, one row per paired session
+    """
+    paired = pair_sessions(df)
+    if paired.empty:
+        return pd.DataFrame(columns=NET_WEIGHT_COLUMNS)
+
+    # Determine if this is a recycle event based on remarks
+    # Exclude corrected events (they start with "CORRECTED:")
+    if 'remarks' in paired.columns:
+        remarks = paired['remarks'].fillna('').astype(str).str.strip()
+    else:
+        remarks = pd.Series('', index=paired.index)
+    is_recycle = (
+        remarks.str.upper().str.contains('R', regex=False) &
+        ~remarks.str.startswith('CORRECTED:')
+    ).values
+
+    # Calculate net weight (always positive)
+    net_weight = (paired['entry_weight'] - paired['exit_weight']).abs().values
+
+    company_type = _entry_values(paired, 'type_code')
+    if company_type is None:
+        company_type = np.full(len(paired), None, dtype=object)
+    fee_per_tonne, fee_amount, pricing_tier = get_pricing().calculate(net_weight, company_type, is_recycle)
+
+    # Get clean location for both location and clean_location columns
+    if 'clean_location' in paired.columns:
+        clean_location = paired['clean_location'].values
+    elif location_fn is not None and 'remarks' in paired.columns:
+        clean_location = paired['remarks'].map(location_fn).values
+    else:
+        clean_location = paired['remarks'].values if 'remarks' in paired.columns else ''
+    clean_location = np.where(is_recycle, 'Recycle Collection', clean_location)
+
+    duration = (pd.to_datetime(paired['exit_time']) - pd.to_datetime(paired['entry_time']))
+
+    return pd.DataFrame({
+        'session_id': paired['session_id'].values,
+        'vehicle_id': paired['vehicle_id'].values,
+        'company_id': _entry_values(paired, 'company_id', 'Unknown'),
+        'company_name': _entry_values(paired, 'company_name', 'Unknown'),
+        'company_type': company_type,
+        'pricing_tier': pricing_tier,
+        'license_plate': _entry_values(paired, 'license_plate', 'Unknown'),
+        'entry_time': paired['entry_time'].values,
+        'exit_time': paired['exit_time'].values,
+        'duration_minutes': duration.dt.total_seconds().values / 60,
+        'entry_weight': paired['entry_weight'].values,
+        'exit_weight': paired['exit_weight'].values,
+        'net_weight': net_weight,
+        'fee_per_tonne': fee_per_tonne,
+        'fee_amount': fee_amount,
+        'is_recycle': is_recycle,
+        'delivery_type': _entry_values(paired, 'delivery_type', 'Normal Disposal'),
+        'date': _entry_values(paired, 'date'),
+        'day': _entry_values(paired, 'day'),
+        'month': _entry_values(paired, 'month'),
+        'month_name': _entry_values(paired, 'month_name', ''),
+        'year': _entry_values(paired, 'year'),
+        'day_of_week': _entry_values(paired, 'day_of_week'),
+        'day_of_week_num': _entry_values(paired, 'day_of_week_num', 0),
+        'hour': _entry_values(paired, 'hour', 0),
+        'week': _entry_values(paired, 'week', 0),
+        'location': clean_location,
+        'clean_location': clean_location
+    }, columns=NET_WEIGHT_COLUMNS)
+
+
+def directional_net_weights(paired):
+    """
+    Net weights using the delivery direction of each session.
+
+    Normal deliveries must leave lighter (gross = entry), recycle collections
+    must leave heavier (gross = exit). Sessions whose weights do not follow
+    that pattern are marked invalid.
+
+    Args:
+        paired: Output of pair_sessions with an is_recycle column
+
+    Returns:
+        tuple: (is_recycle, net_weight, valid) arrays
+    """
+    if 'is_recycle' in paired.columns:
+        is_recycle = paired['is_recycle'].fillna(False).astype(bool).values
+    else:
+        is_recycle = np.zeros(len(paired), dtype=bool)
+    entry_weight = paired['entry_weight'].values
+    exit_weight = paired['exit_weight'].values
+    gross_weight = np.where(is_recycle, exit_weight, entry_weight)
+    tare_weight = np.where(is_recycle, entry_weight, exit_weight)
+    valid = gross_weight > tare_weight
+    return is_recycle, np.abs(gross_weight - tare_weight), valid
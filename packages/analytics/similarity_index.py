@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Similarity Index
+----------------
+Persisted duplicate candidates, so unification only scores what changed.
+
+The index lives in four tables (migration 005_create_similarity_index.sql):
+
+- similarity_record: every indexed record with a signature of its
+  name and the threshold its pairs were scored at
+- similarity_pair: the pairs scoring at least that threshold, both ways
+- similarity_decision: pairs a reviewer already merged or kept separate
+- similarity_build: the record count at the last full build
+
+On sync, only new records and records whose signature or threshold changed
+are scored, against their candidates from a trigram index of all current
+names. Their old pairs and the pairs of deleted records are replaced; every
+other pair is read back from the table as it was scored before. Decisions
+are kept when records are rescored, so a reviewed pair stays out of later
+review sessions.
+
+Candidates come from the rarest trigrams of the current names, so new names
+also change which unchanged records are proposed as pairs. The stored pairs
+drift from a full comparison as records are added, and the whole index is
+rebuilt once the record count has grown by REBUILD_GROWTH since the last
+full build.
+
+Usage:
+    index = SimilarityIndex(conn, 'company')
+    sources, targets, scores = index.sync(ids, names, unifier.calculate_similarity,
+                                          unifier.similarity_weights, 0.7)
+    decided = index.decided_pairs()
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from name_blocking import NGramIndex
+from name_similarity import score_pairs
+
+# Growth in record count since the last full build (0.2 = 20%) that makes
+# sync rebuild the whole index
+REBUILD_GROWTH = float(os.getenv('SIMILARITY_REBUILD_GROWTH', 0.2))
+
+
+def name_signature(name):
+    """Hex digest of the name as scored; records are rescored when it changes"""
+    name = '' if name is None or pd.isna(name) else str(name)
+    return hashlib.sha1(name.encode('utf-8')).hexdigest()
+
+
+def pair_key(record_a, record_b):
+    """Unordered pair of record ids as stored in similarity_decision"""
+    record_a, record_b = str(record_a), str(record_b)
+    return (record_a, record_b) if record_a < record_b else (record_b, record_a)
+
+
+class SimilarityIndex:
+    """
+    Incremental store of the scored duplicate candidates of one entity.
+
+    Nothing is committed by the caller: sync and record_decisions commit
+    their own changes, and roll back if they fail.
+    """
+
+    def __init__(self, conn, entity):
+        self.conn = conn
+        self.entity = entity
+        self.last_sync = {'records': 0, 'scored': 0, 'removed': 0, 'pairs': 0, 'rebuilt': False}
+
+    def _stored_records(self):
+        """record_id -> (signature, similarity_threshold)"""
+        with self.conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT record_id, signature, similarity_threshold FROM similarity_record WHERE entity = %s",
+                (self.entity,)
+            )
+            return {record_id: (signature, threshold) for record_id, signature, threshold in cursor.fetchall()}
+
+    def _built_record_count(self):
+        """Record count at the last full build, or None if there was none"""
+        with self.conn.cursor() as cursor:
+            cursor.execute("SELECT record_count FROM similarity_build WHERE entity = %s", (self.entity,))
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def needs_rebuild(self, record_count):
+        """Whether record_count has grown by more than REBUILD_GROWTH since the last full build"""
+        built = self._built_record_count()
+        return built is None or record_count > built * (1 + REBUILD_GROWTH)
+
+    def sync(self, ids, names, similarity, weights, similarity_threshold, rebuild=None):
+        """
+        Bring the index up to date with the current records and return all
+        pairs scoring at least similarity_threshold.
+
+        Args:
+            ids, names: Current records, in order
+            similarity: The unifier's calculate_similarity(name1, name2)
+            weights: Component weights of that calculate_similarity
+            similarity_threshold: Lowest score of a stored pair
+            rebuild: Score every record again, ignoring the stored pairs;
+                by default only when needs_rebuild() says so
+
+        Returns:
+            tuple: (sources, targets, scores) arrays, with positions into ids
+        """
+        record_ids = [str(record_id) for record_id in ids]
+        signatures = [name_signature(name) for name in names]
+        if rebuild is None:
+            rebuild = self.needs_rebuild(len(record_ids))
+        stored = {} if rebuild else self._stored_records()
+
+        changed = [
+            position for position, (record_id, signature) in enumerate(zip(record_ids, signatures))
+            if stored.get(record_id) != (signature, similarity_threshold)
+        ]
+        removed = sorted(set(stored) - set(record_ids))
+
+        # Candidate pairs touching a changed record, each once
+        index = NGramIndex(names)
+        is_changed = np.zeros(len(record_ids), dtype=bool)
+        is_changed[changed] = True
+        lefts, rights = [], []
+        for position in changed:
+            others = index.candidates(position, following_only=False)
+            others = others[~is_changed[others] | (others > position)]
+            lefts.append(np.full(len(others), position, dtype=np.int64))
+            rights.append(others)
+        left = np.concatenate(lefts) if lefts else np.empty(0, dtype=np.int64)
+        right = np.concatenate(rights) if rights else np.empty(0, dtype=np.int64)
+
+        # Scored both ways round, like a full comparison
+        sources = np.concatenate([left, right])
+        targets = np.concatenate([right, left])
+        scores = score_pairs([names[i] for i in sources], [names[j] for j in targets],
+                             similarity, weights, score_cutoff=similarity_threshold)
+        similar = scores >= similarity_threshold
+        new_pairs = [
+            (self.entity, record_ids[source], record_ids[target], score)
+            for source, target, score in zip(sources[similar].tolist(), targets[similar].tolist(),
+                                             scores[similar].tolist())
+        ]
+
+        stale = removed + [record_ids[position] for position in changed]
+        try:
+            with self.conn.cursor() as cursor:
+                if rebuild:
+                    cursor.execute("DELETE FROM similarity_pair WHERE entity = %s", (self.entity,))
+                    cursor.execute("DELETE FROM similarity_record WHERE entity = %s", (self.entity,))
+                    cursor.execute(
+                        """
+                        INSERT INTO similarity_build (entity, record_count) VALUES (%s, %s)
+                        ON CONFLICT (entity) DO UPDATE SET record_count = EXCLUDED.record_count, built_at = NOW()
+                        """,
+                        (self.entity, len(record_ids))
+                    )
+                elif stale:
+                    cursor.execute(
+                        "DELETE FROM similarity_pair WHERE entity = %s AND (record_a = ANY(%s) OR record_b = ANY(%s))",
+                        (self.entity, stale, stale)
+                    )
+                    cursor.execute(
+                        "DELETE FROM similarity_record WHERE entity = %s AND record_id = ANY(%s)",
+                        (self.entity, stale)
+                    )
+                execute_values(
+                    cursor,
+                    "INSERT INTO similarity_record (entity, record_id, signature, similarity_threshold) VALUES %s",
+                    [(self.entity, record_ids[position], signatures[position], similarity_threshold)
+                     for position in changed]
+                )
+                execute_values(
+                    cursor,
+                    "INSERT INTO similarity_pair (entity, record_a, record_b, score) VALUES %s",
+                    new_pairs
+                )
+                cursor.execute(
+                    "SELECT record_a, record_b, score FROM similarity_pair WHERE entity = %s",
+                    (self.entity,)
+                )
+                pairs = cursor.fetchall()
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        positions = {record_id: position for position, record_id in enumerate(record_ids)}
+        pairs = [(positions[a], positions[b], score) for a, b, score in pairs if a in positions and b in positions]
+        self.last_sync = {'records': len(record_ids), 'scored': len(changed), 'removed': len(removed),
+                          'pairs': len(pairs), 'rebuilt': rebuild}
+        if not pairs:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0)
+        sources, targets, scores = zip(*pairs)
+        return np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64), np.array(scores)
+
+    def decided_pairs(self):
+        """pair_key -> decision for every reviewed pair"""
+        with self.conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT record_a, record_b, decision FROM similarity_decision WHERE entity = %s",
+                (self.entity,)
+            )
+            return {(record_a, record_b): decision for record_a, record_b, decision in cursor.fetchall()}
+
+    def record_decisions(self, decisions):
+        """
+        Store review decisions for every pair of records in each decision.
+
+        Args:
+            decisions: Iterable of (action, record_ids) with action 'merge'
+                or 'keep_separate'
+
+        Returns:
+            int: Number of pairs recorded
+        """
+        rows = {}
+        for action, decision_ids in decisions:
+            decision_ids = list(dict.fromkeys(str(record_id) for record_id in decision_ids))
+            for i, record_a in enumerate(decision_ids):
+                for record_b in decision_ids[i + 1:]:
+                    rows[pair_key(record_a, record_b)] = action
+        if not rows:
+            return 0
+
+        try:
+            with self.conn.cursor() as cursor:
+                execute_values(
+                    cursor,
+                    """
+                    INSERT INTO similarity_decision (entity, record_a, record_b, decision) VALUES %s
+                    ON CONFLICT (entity, record_a, record_b)
+                    DO UPDATE SET decision = EXCLUDED.decision, decided_at = NOW()
+                    """,
+                    [(self.entity, record_a, record_b, action) for (record_a, record_b), action in rows.items()]
+                )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return len(rows)
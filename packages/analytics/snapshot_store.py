@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Snapshot Store
+--------------
+Versioned columnar snapshots of the dashboard DataFrames.
+
+A snapshot is a directory of Arrow IPC (or Parquet) files, one per frame,
+plus a manifest.json pointing at the current version. The manifest is
+replaced atomically, so a worker reading while another writes always sees
+a complete snapshot. Uncompressed Arrow files are read memory-mapped, so
+loading skips decompression and an intermediate read buffer, and several
+Gunicorn workers start from the same file without each re-querying the
+database or parsing CSVs. Each worker still converts the tables into its
+own pandas DataFrames, so the frames themselves are not shared.
+"""
+
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+
+from config import AnalyticsConfig
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of stored frames changes so old snapshots are ignored
+SNAPSHOT_SCHEMA_VERSION = 1
+
+FILE_EXTENSIONS = {'arrow': '.arrow', 'parquet': '.parquet'}
+
+
+def _to_arrow_table(df):
+    """
+    Convert a DataFrame to an Arrow table.
+
+    Object columns Arrow cannot type (UUIDs, mixed values) are stored as
+    strings; the names of UUID columns are returned so they can be restored.
+    """
+    df = df.reset_index(drop=True)
+    uuid_columns = []
+    converted = {}
+    for column in df.columns[df.dtypes == object]:
+        values = df[column]
+        try:
+            pa.array(values, from_pandas=True)
+            continue
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+        non_null = values.dropna()
+        if not non_null.empty and non_null.map(lambda v: isinstance(v, uuid.UUID)).all():
+            uuid_columns.append(column)
+        converted[column] = values.where(values.isna(), values.astype(str))
+    if converted:
+        df = df.assign(**converted)
+    return pa.Table.from_pandas(df, preserve_index=False), uuid_columns
+
+
+def _restore_uuids(df, uuid_columns):
+    """Turn string columns that were UUIDs back into uuid.UUID objects"""
+    for column in uuid_columns:
+        if column in df.columns:
+            uniques = df[column].dropna().unique()
+            lookup = {value: uuid.UUID(value) for value in uniques}
+            df[column] = df[column].map(lookup)
+    return df
+
+
+class SnapshotStore:
+    """
+    Reads and writes versioned snapshots of a named set of DataFrames.
+
+    Usage:
+        store = SnapshotStore('db_dashboard')
+        store.save({'weigh_events': weigh_df}, metadata={'watermark': ...})
+        frames, metadata = store.load()
+    """
+
+    def __init__(self, name, directory=None, file_format=None, keep_versions=2):
+        self.name = name
+        self.directory = os.path.join(str(directory or AnalyticsConfig.SNAPSHOT_DIR), name)
+        self.file_format = file_format or AnalyticsConfig.SNAPSHOT_FORMAT
+        if self.file_format not in FILE_EXTENSIONS:
+            raise ValueError(f"Unsupported snapshot format: {self.file_format}")
+        self.keep_versions = keep_versions
+
+    @property
+    def enabled(self):
+        return AnalyticsConfig.SNAPSHOT_ENABLED and PYARROW_AVAILABLE
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, 'manifest.json')
+
+    def read_manifest(self):
+        """Manifest of the current snapshot, or None when there is none"""
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('schema_version') != SNAPSHOT_SCHEMA_VERSION:
+            return None
+        return manifest
+
+    def age(self):
+        """Age of the current snapshot as a timedelta, or None"""
+        manifest = self.read_manifest()
+        if manifest is None:
+            return None
+        return datetime.now() - datetime.fromisoformat(manifest['created_at'])
+
+    def is_stale(self, max_age_minutes=None):
+        """Whether the snapshot is missing or older than max_age_minutes"""
+        if max_age_minutes is None:
+            max_age_minutes = AnalyticsConfig.SNAPSHOT_SAVE_INTERVAL_MINUTES
+        age = self.age()
+        return age is None or age > timedelta(minutes=max_age_minutes)
+
+    def save(self, frames, metadata=None):
+        """
+        Write frames as a new snapshot version and make it current.
+
+        Args:
+            frames: Dict of frame name -> DataFrame
+            metadata: JSON-serializable dict stored in the manifest
+
+        Returns:
+            str: The new version, or None if snapshots are disabled or the
+            write failed
+        """
+        if not self.enabled:
+            return None
+
+        version = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        version_dir = os.path.join(self.directory, version)
+        extension = FILE_EXTENSIONS[self.file_format]
+
+        try:
+            os.makedirs(version_dir, exist_ok=True)
+            frame_entries = {}
+            for frame_name, df in frames.items():
+                table, uuid_columns = _to_arrow_table(df)
+                file_name = f"{frame_name}{extension}"
+                path = os.path.join(version_dir, file_name)
+                if self.file_format == 'arrow':
+                    # Uncompressed so readers can memory-map without decoding
+                    feather.write_feather(table, path, compression='uncompressed')
+                else:
+                    pq.write_table(table, path)
+                frame_entries[frame_name] = {
+                    'file': file_name,
+                    'rows': len(df),
+                    'uuid_columns': uuid_columns
+                }
+
+            manifest = {
+                'schema_version': SNAPSHOT_SCHEMA_VERSION,
+                'version': version,
+                'format': self.file_format,
+                'created_at': datetime.now().isoformat(),
+                'frames': frame_entries,
+                'metadata': metadata or {}
+            }
+            temp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(manifest, f, default=str)
+            os.replace(temp_path, self.manifest_path)
+        except Exception as e:
+            logger.error(f"Error writing snapshot {self.name}/{version}: {e}")
+            shutil.rmtree(version_dir, ignore_errors=True)
+            return None
+
+        row_counts = ', '.join(f"{frame_name}: {entry['rows']}" for frame_name, entry in frame_entries.items())
+        logger.info(f"Saved snapshot {self.name}/{version} ({row_counts})")
+        self._prune(version)
+        return version
+
+    def load(self, max_age_hours=None):
+        """
+        Load the current snapshot.
+
+        Args:
+            max_age_hours: Ignore snapshots older than this; defaults to
+                AnalyticsConfig.SNAPSHOT_MAX_AGE_HOURS
+
+        Returns:
+            tuple: (frames dict, metadata dict), or (None, None) when there
+            is no usable snapshot
+        """
+        if not self.enabled:
+            return None, None
+
+        manifest = self.read_manifest()
+        if manifest is None:
+            return None, None
+
+        if max_age_hours is None:
+            max_age_hours = AnalyticsConfig.SNAPSHOT_MAX_AGE_HOURS
+        created_at = datetime.fromisoformat(manifest['created_at'])
+        if datetime.now() - created_at > timedelta(hours=max_age_hours):
+            logger.info(f"Snapshot {self.name}/{manifest['version']} is older than {max_age_hours}h, ignoring")
+            return None, None
+
+        version_dir = os.path.join(self.directory, manifest['version'])
+        frames = {}
+        try:
+            for frame_name, entry in manifest['frames'].items():
+                path = os.path.join(version_dir, entry['file'])
+                if manifest['format'] == 'arrow':
+                    table = feather.read_table(path, memory_map=True)
+                else:
+                    table = pq.read_table(path, memory_map=True)
+                frames[frame_name] = _restore_uuids(table.to_pandas(), entry.get('uuid_columns', []))
+        except Exception as e:
+            logger.error(f"Error reading snapshot {self.name}/{manifest['version']}: {e}")
+            return None, None
+
+        logger.info(f"Loaded snapshot {self.name}/{manifest['version']} created {manifest['created_at']}")
+        return frames, manifest.get('metadata', {})
+
+    def _prune(self, current_version):
+        """Remove old versions, keeping the newest keep_versions"""
+        try:
+            versions = sorted(
+                entry for entry in os.listdir(self.directory)
+                if os.path.isdir(os.path.join(self.directory, entry))
+            )
+        except OSError:
+            return
+        # Readers may still be mapping the previous version, so never drop the current one
+        for version in versions[:-self.keep_versions]:
+            if version != current_version:
+                shutil.rmtree(os.path.join(self.directory, version), ignore_errors=True)
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tare Weight Estimation
+----------------------
+Per-vehicle and per-company tare statistics for auto-closing open sessions.
+
+The index is built once from historical net weights with a few groupbys and
+can be extended with newly paired sessions, so estimating the tare of every
+open session is a constant-time lookup instead of a scan of the history.
+"""
+
+from collections import defaultdict, deque
+
+import numpy as np
+import pandas as pd
+
+# Number of most recent exit weights averaged for a high-confidence estimate
+RECENT_EXITS = 5
+
+
+def default_tare_estimate(entry_weight, is_recycle=False):
+    """Estimate used when there is no history at all"""
+    if is_recycle:
+        # Recycle vehicles typically have lower tare weights
+        return max(entry_weight * 0.15, 500), "low"  # 15% of entry weight, min 500kg
+    # Regular waste vehicles
+    return max(entry_weight * 0.25, 1000), "low"  # 25% of entry weight, min 1000kg
+
+
+def weight_class_tare_estimate(entry_weight):
+    """General estimate based on entry weight ranges"""
+    if entry_weight < 3000:  # Light vehicle
+        return max(entry_weight * 0.20, 800), "low"
+    elif entry_weight < 8000:  # Medium vehicle
+        return max(entry_weight * 0.25, 1200), "low"
+    # Heavy vehicle
+    return max(entry_weight * 0.30, 2000), "low"
+
+
+class TareWeightIndex:
+    """
+    Exit-weight statistics keyed by vehicle, license plate and company.
+
+    Estimates follow the same rules as before: the vehicle's own exits
+    (matched by vehicle_id or license plate) first, then the exits of its
+    company, then a fallback based on the entry weight.
+    """
+
+    def __init__(self, net_weights_df=None):
+        self.session_ids = set()
+        self.row_count = 0
+        self._next_position = 0
+
+        # key -> [exit count, exit weight sum]
+        self._vehicle_stats = defaultdict(lambda: [0, 0.0])
+        self._plate_stats = defaultdict(lambda: [0, 0.0])
+        self._vehicle_plate_stats = defaultdict(lambda: [0, 0.0])
+        self._company_stats = defaultdict(lambda: [0, 0.0])
+
+        # key -> most recent (position, exit_weight) pairs
+        self._vehicle_recent = defaultdict(lambda: deque(maxlen=RECENT_EXITS))
+        self._plate_recent = defaultdict(lambda: deque(maxlen=RECENT_EXITS))
+
+        # vehicle_id -> company name of its first session
+        self._vehicle_company = {}
+
+        if net_weights_df is not None:
+            self.add(net_weights_df)
+
+    @property
+    def is_empty(self):
+        return self.row_count == 0
+
+    def add(self, net_weights_df):
+        """Add paired sessions to the index; sessions already indexed are skipped"""
+        if net_weights_df is None or net_weights_df.empty:
+            return
+
+        df = net_weights_df
+        if 'session_id' in df.columns:
+            df = df[~df['session_id'].isin(self.session_ids)]
+            self.session_ids.update(df['session_id'])
+        if df.empty:
+            return
+
+        positions = np.arange(self._next_position, self._next_position + len(df))
+        self._next_position += len(df)
+        self.row_count += len(df)
+
+        if 'vehicle_id' in df.columns and 'company_name' in df.columns:
+            first_rows = df.dropna(subset=['vehicle_id']).drop_duplicates(subset='vehicle_id', keep='first')
+            for vehicle_id, company_name in zip(first_rows['vehicle_id'], first_rows['company_name']):
+                self._vehicle_company.setdefault(vehicle_id, company_name)
+
+        if 'exit_weight' not in df.columns:
+            return
+
+        exits = pd.DataFrame({
+            'position': positions,
+            'vehicle_id': df['vehicle_id'].values if 'vehicle_id' in df.columns else np.nan,
+            'license_plate': df['license_plate'].values if 'license_plate' in df.columns else np.nan,
+            'company_name': df['company_name'].values if 'company_name' in df.columns else np.nan,
+            'exit_weight': pd.to_numeric(df['exit_weight'], errors='coerce').values
+        })
+        exits = exits[exits['exit_weight'].notna()]
+        if exits.empty:
+            return
+
+        self._add_stats(self._vehicle_stats, exits, 'vehicle_id')
+        self._add_stats(self._plate_stats, exits, 'license_plate')
+        self._add_stats(self._vehicle_plate_stats, exits, ['vehicle_id', 'license_plate'])
+        self._add_stats(self._company_stats, exits, 'company_name')
+        self._add_recent(self._vehicle_recent, exits, 'vehicle_id')
+        self._add_recent(self._plate_recent, exits, 'license_plate')
+
+    @staticmethod
+    def _add_stats(stats, exits, keys):
+        grouped = exits.groupby(keys)['exit_weight'].agg(['count', 'sum'])
+        for key, count, total in zip(grouped.index, grouped['count'], grouped['sum']):
+            stats[key][0] += int(count)
+            stats[key][1] += float(total)
+
+    @staticmethod
+    def _add_recent(recent, exits, key):
+        latest = exits.groupby(key).tail(RECENT_EXITS)
+        for value, position, weight in zip(latest[key], latest['position'], latest['exit_weight']):
+            recent[value].append((position, weight))
+
+    def estimate(self, vehicle_id, license_plate, entry_weight, is_recycle=False):
+        """
+        Estimate the tare weight of one vehicle.
+
+        Returns:
+            tuple: (estimated_tare, confidence) with confidence high/medium/low
+        """
+        if self.is_empty:
+            return default_tare_estimate(entry_weight, is_recycle)
+
+        # Exits of this vehicle, matched by vehicle_id or license plate
+        vehicle_count, vehicle_sum = self._vehicle_stats.get(vehicle_id, (0, 0.0))
+        plate_count, plate_sum = self._plate_stats.get(license_plate, (0, 0.0))
+        both_count, both_sum = self._vehicle_plate_stats.get((vehicle_id, license_plate), (0, 0.0))
+        exit_count = vehicle_count + plate_count - both_count
+
+        if exit_count >= 3:
+            # Use average of recent exit weights
+            recent = dict(self._vehicle_recent.get(vehicle_id, ()))
+            recent.update(self._plate_recent.get(license_plate, ()))
+            latest = sorted(recent.items())[-RECENT_EXITS:]
+            return float(np.mean([weight for _, weight in latest])), "high"
+        elif exit_count >= 1:
+            return (vehicle_sum + plate_sum - both_sum) / exit_count, "medium"
+
+        # Look for similar vehicles from same company
+        company_name = self._vehicle_company.get(vehicle_id)
+        if company_name:
+            company_count, company_sum = self._company_stats.get(company_name, (0, 0.0))
+            if company_count >= 3:
+                return company_sum / company_count, "medium"
+
+        return weight_class_tare_estimate(entry_weight)
+
+    def estimate_many(self, open_sessions_df):
+        """
+        Estimate tare weights for a frame of open sessions.
+
+        Returns:
+            tuple: (estimated_tare, confidence) arrays aligned with open_sessions_df
+        """
+        estimates = [
+            self.estimate(vehicle_id, license_plate, entry_weight, is_recycle)
+            for vehicle_id, license_plate, entry_weight, is_recycle in zip(
+                open_sessions_df['vehicle_id'],
+                open_sessions_df['license_plate'],
+                open_sessions_df['entry_weight'],
+                open_sessions_df['is_recycle']
+            )
+        ]
+        if not estimates:
+            return np.array([], dtype=float), np.array([], dtype=object)
+        tares, confidences = zip(*estimates)
+        return np.array(tares, dtype=float), np.array(confidences, dtype=object)
@@ -1,5 +1,4 @@
 import pandas as pd
-import re
 import uuid
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Set, Tuple
@@ -11,6 +10,14 @@ import numpy as np
 import ipywidgets as widgets
 from IPython.display import display, HTML, clear_output
 
+from plate_normalizer import normalize_plate, normalize_series
+
+try:
+    from database_connection import read_duplicate_plate_vehicles
+    DATABASE_AVAILABLE = True
+except ImportError:
+    DATABASE_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -78,86 +85,10 @@ class DuplicatePlateGroup:
 def clean_license_plate(plate: str) -> str:
     """Clean and standardize vehicle license plates according to Zambian standards
     
-    Rules applied:
-    1. Convert to string and remove ALL spaces immediately
-    2. Convert to uppercase
-    3. Remove special characters, dashes, etc.
-    4. Ensure proper format for common patterns (GRZ, ABC1234, etc.)
-    5. Handle special cases (CD for diplomatic, ZP for police, etc.)
-    6. Strip decimal parts from plates with decimal points
-    7. Reject plates that are only numbers
+    The rules live in plate_normalizer.normalize_plate; use
+    plate_normalizer.normalize_series for whole columns.
     """
-    if not plate or pd.isna(plate):
-        return ""
-    
-    # Convert to string and IMMEDIATELY remove all spaces
-    plate = str(plate).replace(' ', '').strip().upper()
-    
-    # Check if the plate contains only digits or only letters (after stripping)
-    if re.match(r'^\d+$', plate) or re.match(r'^\d+\.\d+$', plate):
-        return ""  # Return empty string for plates that are just numbers
-    
-    if re.match(r'^[A-Z]+$', plate):
-        return ""  # Return empty string for plates that are just letters
-    
-    # Handle plates with decimal points (like "BAD52.00")
-    if '.' in plate:
-        # Extract the part before the decimal
-        parts = plate.split('.')
-        plate = parts[0]
-    
-    # Remove dots, commas, slashes, etc.
-    plate = re.sub(r'[^\w\-]', '', plate)
-    
-    # Remove underscores
-    plate = plate.replace('_', '')
-    
-    # Format GRZ plates (government vehicles)
-    if plate.startswith('GRZ'):
-        # Just keep GRZ followed by the digits, no spaces or dashes
-        grz_match = re.match(r'GRZ[-\s]*(\d+[A-Z]*)', plate)
-        if grz_match:
-            plate = f"GRZ{grz_match.group(1)}"
-        # For cases with just GRZ, keep it as is
-    
-    # Try to extract letters and numbers wherever they appear
-    # Look for different letter-number patterns
-    
-    # First try standard format of 2-3 letters followed by 3-4 digits
-    std_match = re.match(r'([A-Z]{2,3})[-\s]*(\d{3,4})', plate)
-    
-    # If no match, try a more general pattern for any letters followed by any numbers
-    if not std_match:
-        std_match = re.match(r'([A-Z]+)[-\s]*(\d+)', plate)
-    
-    if std_match:
-        letters = std_match.group(1)
-        numbers = std_match.group(2)
-        
-        # Make sure we have 3 letters
-        if len(letters) < 3:
-            # Add leading letters as needed
-            letters = 'A' * (3 - len(letters)) + letters
-        elif len(letters) > 3:
-            # Truncate to 3 letters if longer
-            letters = letters[:3]
-        
-        # Make sure we have 4 digits
-        if len(numbers) < 4:
-            # Add leading zeros as needed
-            numbers = '0' * (4 - len(numbers)) + numbers
-        elif len(numbers) > 4:
-            # Truncate to 4 digits if longer
-            numbers = numbers[:4]
-            
-        plate = f"{letters}{numbers}"
-    
-    # Final check - don't return plates that are too short
-    if len(plate) < 3:
-        return ""
-    
-    # Return the cleaned plate
-    return plate
+    return normalize_plate(plate)
 
 
 def identify_duplicates(vehicles: List[Vehicle]) -> List[DuplicatePlateGroup]:
@@ -759,9 +690,12 @@ def load_vehicles_from_csv(file_path: str) -> List[Vehicle]:
     logger.info(f"Loading data from {file_path}")
     df = pd.read_csv(file_path)
     
+    # Clean all plates in one pass before building the Vehicle objects
+    cleaned_plates = normalize_series(df['license_plate'])
+    
     # Convert to Vehicle objects
     vehicles = []
-    for _, row in df.iterrows():
+    for index, row in df.iterrows():
         # Handle potential missing columns
         vehicle = Vehicle(
             id=row['vehicle_id'],
@@ -772,7 +706,8 @@ def load_vehicles_from_csv(file_path: str) -> List[Vehicle]:
             vehicle_color=row.get('vehicle_color'),
             carrying_capacity_kg=row.get('carrying_capacity_kg'),
             created_at=row.get('created_at'),
-            updated_at=row.get('updated_at')
+            updated_at=row.get('updated_at'),
+            cleaned_plate=cleaned_plates[index]
         )
         vehicles.append(vehicle)
     
@@ -780,12 +715,44 @@ def load_vehicles_from_csv(file_path: str) -> List[Vehicle]:
     return vehicles
 
 
+def load_duplicate_vehicles_from_db() -> List[Vehicle]:
+    """
+    Load the vehicles whose stored cleaned_plate is shared with another
+    vehicle, for identify_duplicates.
+    
+    The duplicates come from one indexed query on vehicle.cleaned_plate
+    (see backfill_cleaned_plates.py), so no plate is cleaned again.
+    """
+    if not DATABASE_AVAILABLE:
+        logger.error("Database utilities not available")
+        return []
+    
+    df = read_duplicate_plate_vehicles()
+    vehicles = []
+    for _, row in df.iterrows():
+        vehicles.append(Vehicle(
+            id=row['vehicle_id'],
+            license_plate=row['license_plate'],
+            company_id=row.get('company_id'),
+            tare_weight_kg=row.get('tare_weight_kg'),
+            vehicle_model=row.get('vehicle_model'),
+            vehicle_color=row.get('vehicle_color'),
+            carrying_capacity_kg=row.get('carrying_capacity_kg'),
+            created_at=row.get('created_at'),
+            updated_at=row.get('updated_at'),
+            cleaned_plate=row['cleaned_plate']
+        ))
+    
+    logger.info(f"Loaded {len(vehicles)} vehicles with duplicate plates")
+    return vehicles
+
+
 def clean_all_plates(file_path: str) -> pd.DataFrame:
     """Simple function to clean all license plates in a CSV file without deduplication"""
     df = pd.read_csv(file_path)
     
     # Apply plate cleaning function
-    df['cleaned_plate'] = df['license_plate'].apply(clean_license_plate)
+    df['cleaned_plate'] = normalize_series(df['license_plate'])
     
     # Clear out company_id and tare_weight columns as requested
     df['company_id'] = None
@@ -3,25 +3,43 @@
 from .database_connection import (
     get_db_connection, 
     get_db_engine,
+    dispose_db_engine,
+    get_pool_stats,
     read_companies, 
     read_vehicles, 
     read_weigh_events, 
     check_connection, 
     write_multiple_weigh_events,
     write_weigh_event,
+    bulk_update_weigh_event_remarks,
     read_table,
-    execute_query
+    execute_query,
+    WeighEventLoader,
+    merge_weigh_events,
+    BulkImporter,
+    bulk_import_csv,
+    bulk_import_frame,
+    iter_table_export
 )
 
 __all__ = [
     'get_db_connection', 
     'get_db_engine',
+    'dispose_db_engine',
+    'get_pool_stats',
     'read_companies', 
     'read_vehicles', 
     'read_weigh_events', 
     'check_connection', 
     'write_multiple_weigh_events',
     'write_weigh_event',
+    'bulk_update_weigh_event_remarks',
     'read_table',
-    'execute_query'
+    'execute_query',
+    'WeighEventLoader',
+    'merge_weigh_events',
+    'BulkImporter',
+    'bulk_import_csv',
+    'bulk_import_frame',
+    'iter_table_export'
 ] 
\ No newline at end of file
@@ -0,0 +1,50 @@
+-- Migration: 005_create_similarity_index.sql
+-- Description: Persisted similarity index for incremental duplicate detection
+-- Date: 2026-10-16
+
+-- One row per indexed record: the signature of its normalized name and the
+-- threshold its pairs were scored at. A record whose signature or threshold
+-- no longer matches is scored again.
+CREATE TABLE IF NOT EXISTS similarity_record (
+    entity VARCHAR(50) NOT NULL,
+    record_id VARCHAR(100) NOT NULL,
+    signature CHAR(40) NOT NULL,
+    similarity_threshold DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (entity, record_id)
+);
+
+-- Scored pairs at or above the threshold, in both directions
+CREATE TABLE IF NOT EXISTS similarity_pair (
+    entity VARCHAR(50) NOT NULL,
+    record_a VARCHAR(100) NOT NULL,
+    record_b VARCHAR(100) NOT NULL,
+    score DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (entity, record_a, record_b)
+);
+
+-- Review decisions on pairs (record_a < record_b), kept when records are rescored
+CREATE TABLE IF NOT EXISTS similarity_decision (
+    entity VARCHAR(50) NOT NULL,
+    record_a VARCHAR(100) NOT NULL,
+    record_b VARCHAR(100) NOT NULL,
+    decision VARCHAR(20) NOT NULL CHECK (decision IN ('merge', 'keep_separate')),
+    decided_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (entity, record_a, record_b)
+);
+
+-- Record count at the last full build; the index is rebuilt once the
+-- number of records has grown past it by SIMILARITY_REBUILD_GROWTH
+CREATE TABLE IF NOT EXISTS similarity_build (
+    entity VARCHAR(50) PRIMARY KEY,
+    record_count INTEGER NOT NULL,
+    built_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Pairs are replaced by either record when it changes
+CREATE INDEX IF NOT EXISTS idx_similarity_pair_record_b ON similarity_pair(entity, record_b);
+
+COMMENT ON TABLE similarity_record IS 'Records covered by the similarity index, with the signature they were scored with';
+COMMENT ON TABLE similarity_pair IS 'Duplicate candidate pairs scoring at least the record threshold';
+COMMENT ON TABLE similarity_decision IS 'Reviewed duplicate pairs, excluded from later review sessions';
+COMMENT ON TABLE similarity_build IS 'Record count at the last full rebuild of the similarity index';
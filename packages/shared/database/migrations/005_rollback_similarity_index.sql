@@ -0,0 +1,12 @@
+-- Rollback Migration: 005_rollback_similarity_index.sql
+-- Description: Drop the similarity index tables
+-- Date: 2026-10-16
+
+-- Drop indexes
+DROP INDEX IF EXISTS idx_similarity_pair_record_b;
+
+-- Drop tables
+DROP TABLE IF EXISTS similarity_build;
+DROP TABLE IF EXISTS similarity_decision;
+DROP TABLE IF EXISTS similarity_pair;
+DROP TABLE IF EXISTS similarity_record;
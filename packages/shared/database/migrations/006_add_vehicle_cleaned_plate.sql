@@ -0,0 +1,17 @@
+-- Migration: 006_add_vehicle_cleaned_plate.sql
+-- Description: Persisted normalized license plate for vehicle matching
+-- Date: 2026-10-16
+
+-- Normalized plate (plate_normalizer.normalize_plate): '' for plates the
+-- normalizer rejects, NULL until backfilled. Fill existing rows with
+-- `python backfill_cleaned_plates.py` from packages/analytics.
+ALTER TABLE vehicle ADD COLUMN IF NOT EXISTS cleaned_plate VARCHAR(50);
+
+-- Lookups by plate on import and the duplicate plate join
+CREATE INDEX IF NOT EXISTS idx_vehicle_cleaned_plate ON vehicle(cleaned_plate);
+
+-- The unique index uq_vehicle_cleaned_plate (cleaned_plate, WHERE
+-- cleaned_plate <> '') is created by the backfill job once no two vehicles
+-- share a plate; existing duplicates have to be merged first.
+
+COMMENT ON COLUMN vehicle.cleaned_plate IS 'License plate normalized by plate_normalizer, maintained by the vehicle imports';
@@ -0,0 +1,10 @@
+-- Rollback Migration: 006_rollback_vehicle_cleaned_plate.sql
+-- Description: Drop the normalized license plate column
+-- Date: 2026-10-16
+
+-- Drop indexes
+DROP INDEX IF EXISTS uq_vehicle_cleaned_plate;
+DROP INDEX IF EXISTS idx_vehicle_cleaned_plate;
+
+-- Drop column
+ALTER TABLE vehicle DROP COLUMN IF EXISTS cleaned_plate;
@@ -14,6 +14,8 @@ from datetime import datetime, timedelta
 from typing import Any, Dict, Optional, Union
 from functools import wraps
 
+from app.utils.geometry_fingerprint import geometry_fingerprint
+
 try:
     import redis
     REDIS_AVAILABLE = True
@@ -100,9 +102,8 @@ class AnalyticsCache:
         Returns:
             Cache key string
         """
-        # Create a hash of the geometry
-        geometry_str = json.dumps(zone_geometry, sort_keys=True)
-        geometry_hash = hashlib.md5(geometry_str.encode()).hexdigest()[:16]
+        # Hash the canonical geometry so equivalent polygons share a key
+        geometry_hash = geometry_fingerprint(zone_geometry)[:16]
         return f"zone:{analysis_type}:{geometry_hash}"
     
     def get(self, key: str) -> Optional[Any]:
@@ -11,8 +11,77 @@ import hashlib
 import math
 from typing import Dict, List, Optional, Union
 from app.models import Zone
+from app.utils.geometry_fingerprint import geometry_fingerprint
 from config.config import Config
 
+# GPWv4.11 has ~1km (30 arc-second) resolution
+GPW_SCALE = 927.67
+
+# Zones reduced together per Earth Engine request in batch analysis
+BATCH_MAX_ZONES = int(os.getenv('EE_BATCH_MAX_ZONES', 100))
+
+
+def _is_quota_error(error: Exception) -> bool:
+    """Whether an Earth Engine error means the request hit a quota or rate limit"""
+    message = str(error).lower()
+    return 'quota' in message or 'limit' in message
+
+
+class ReductionPlan:
+    """
+    Earth Engine values needed for one zone, fetched in a single round-trip
+
+    Each metric is registered as a computed object (ee.Number, the
+    ee.Dictionary of a combined-reducer reduceRegion, ...) under a name, and
+    fetch() evaluates them all through one ee.Dictionary getInfo instead of
+    one blocking request per metric.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self.results = {}
+        self.errors = {}
+
+    def add(self, name: str, value) -> None:
+        """Register a computed value under name"""
+        self._values[name] = value
+
+    def fetch(self) -> Dict:
+        """
+        Evaluate every registered value
+
+        Quota errors are raised so callers can back off and retry. Any other
+        error fails the combined request as a whole, so the values are then
+        evaluated one by one and only the failing ones are recorded in
+        self.errors.
+
+        Returns:
+            Dict: Evaluated values by name
+        """
+        self.results, self.errors = {}, {}
+        if not self._values:
+            return self.results
+        try:
+            self.results = ee.Dictionary(self._values).getInfo()
+            return self.results
+        except ee.EEException as e:
+            if _is_quota_error(e):
+                raise
+        for name, value in self._values.items():
+            try:
+                self.results[name] = value.getInfo()
+            except ee.EEException as e:
+                if _is_quota_error(e):
+                    raise
+                self.errors[name] = e
+        return self.results
+
+    def result(self, name: str):
+        """Evaluated value of name; raises the error its evaluation failed with"""
+        if name in self.errors:
+            raise self.errors[name]
+        return self.results[name]
+
 
 class EarthEngineAnalyzer:
     """Analyzes zones using Google Earth Engine satellite data"""
@@ -203,30 +272,28 @@ class EarthEngineAnalyzer:
         """
         for attempt in range(max_retries + 1):
             try:
-                # Load buildings
+                # Load buildings and temporal data for heights
                 buildings = self.load_google_open_buildings(ee_geometry, confidence_threshold)
-                
-                # Get building count
-                building_count = buildings.size()
-                
-                # Extract building features
-                building_features = self._extract_building_features(buildings, ee_geometry)
-                
-                # Get temporal data for heights
                 temporal_data = self.load_open_buildings_temporal(ee_geometry)
-                height_stats = self._extract_height_statistics(temporal_data, ee_geometry)
+                
+                # Count, features and heights in one round-trip
+                plan = ReductionPlan()
+                plan.add('building_count', buildings.size())
+                self._plan_building_features(plan, buildings, ee_geometry)
+                self._plan_height_statistics(plan, temporal_data, ee_geometry)
+                plan.fetch()
                 
                 return {
-                    'building_count': building_count.getInfo(),
-                    'features': building_features,
-                    'height_stats': height_stats,
+                    'building_count': plan.result('building_count'),
+                    'features': self._building_features_from_plan(plan),
+                    'height_stats': self._height_statistics_from_plan(plan),
                     'confidence_threshold': confidence_threshold,
                     'extraction_date': datetime.datetime.now().isoformat(),
                     'data_source': 'Google Open Buildings v3'
                 }
                 
             except ee.EEException as e:
-                if 'quota' in str(e).lower() or 'limit' in str(e).lower():
+                if _is_quota_error(e):
                     if attempt < max_retries:
                         wait_time = (2 ** attempt) + (attempt * 0.1)  # Exponential backoff
                         print(f"Quota limit hit, retrying in {wait_time:.1f} seconds (attempt {attempt + 1})")
@@ -259,28 +326,39 @@ class EarthEngineAnalyzer:
             Dict: Building feature statistics
         """
         try:
-            # Calculate area statistics
-            def add_area(feature):
-                return feature.set('area_sqm', feature.geometry().area())
-            
-            buildings_with_area = buildings.map(add_area)
-            
-            # Get area statistics
-            area_stats = buildings_with_area.aggregate_stats('area_sqm')
-            
-            # Calculate building density (buildings per square kilometer)
-            zone_area_sqm = ee_geometry.area()
-            zone_area_sqkm = zone_area_sqm.divide(1000000)
-            building_density = buildings.size().divide(zone_area_sqkm)
-            
-            # Get confidence statistics
-            confidence_stats = buildings.aggregate_stats('confidence')
+            plan = ReductionPlan()
+            self._plan_building_features(plan, buildings, ee_geometry)
+            plan.fetch()
+            return self._building_features_from_plan(plan)
             
+        except Exception as e:
+            return {"error": f"Feature extraction failed: {str(e)}"}
+    
+    def _plan_building_features(self, plan: ReductionPlan, buildings: ee.FeatureCollection,
+                                ee_geometry: ee.Geometry) -> None:
+        """Add the building feature statistics to a reduction plan"""
+        # Calculate area statistics
+        def add_area(feature):
+            return feature.set('area_sqm', feature.geometry().area())
+        
+        buildings_with_area = buildings.map(add_area)
+        
+        # Calculate building density (buildings per square kilometer)
+        zone_area_sqkm = ee_geometry.area().divide(1000000)
+        
+        plan.add('area_statistics', buildings_with_area.aggregate_stats('area_sqm'))
+        plan.add('building_density_per_sqkm', buildings.size().divide(zone_area_sqkm))
+        plan.add('confidence_statistics', buildings.aggregate_stats('confidence'))
+        plan.add('zone_area_sqkm', zone_area_sqkm)
+    
+    def _building_features_from_plan(self, plan: ReductionPlan) -> Dict:
+        """Building feature statistics from a fetched reduction plan"""
+        try:
             return {
-                'area_statistics': area_stats.getInfo(),
-                'building_density_per_sqkm': building_density.getInfo(),
-                'confidence_statistics': confidence_stats.getInfo(),
-                'zone_area_sqkm': zone_area_sqkm.getInfo()
+                'area_statistics': plan.result('area_statistics'),
+                'building_density_per_sqkm': plan.result('building_density_per_sqkm'),
+                'confidence_statistics': plan.result('confidence_statistics'),
+                'zone_area_sqkm': plan.result('zone_area_sqkm')
             }
             
         except Exception as e:
@@ -298,24 +376,42 @@ class EarthEngineAnalyzer:
             Dict: Height statistics
         """
         try:
-            # Extract building height band
-            height_band = temporal_data.select('building_height')
-            
-            # Calculate height statistics
-            height_stats = height_band.reduceRegion(
-                reducer=ee.Reducer.mean().combine(
-                    ee.Reducer.stdDev(), '', True
-                ).combine(
-                    ee.Reducer.minMax(), '', True
-                ).combine(
-                    ee.Reducer.percentile([25, 50, 75, 90]), '', True
-                ),
-                geometry=ee_geometry,
-                scale=4,  # 4m resolution for building data
-                maxPixels=1e9
-            )
+            plan = ReductionPlan()
+            self._plan_height_statistics(plan, temporal_data, ee_geometry)
+            plan.fetch()
+            return self._height_statistics_from_plan(plan)
             
-            return height_stats.getInfo()
+        except Exception as e:
+            return {"error": f"Height extraction failed: {str(e)}"}
+    
+    def _plan_height_statistics(self, plan: ReductionPlan, temporal_data: ee.Image,
+                                ee_geometry: ee.Geometry) -> None:
+        """Add the building height statistics to a reduction plan"""
+        # Extract building height band
+        height_band = temporal_data.select('building_height')
+        
+        # Calculate height statistics
+        plan.add('height_stats', height_band.reduceRegion(
+            reducer=self._height_reducer(),
+            geometry=ee_geometry,
+            scale=4,  # 4m resolution for building data
+            maxPixels=1e9
+        ))
+    
+    def _height_reducer(self) -> ee.Reducer:
+        """Mean, stdDev, min/max and quartile/p90 building heights"""
+        return ee.Reducer.mean().combine(
+            ee.Reducer.stdDev(), '', True
+        ).combine(
+            ee.Reducer.minMax(), '', True
+        ).combine(
+            ee.Reducer.percentile([25, 50, 75, 90]), '', True
+        )
+    
+    def _height_statistics_from_plan(self, plan: ReductionPlan) -> Dict:
+        """Building height statistics from a fetched reduction plan"""
+        try:
+            return plan.result('height_stats')
             
         except Exception as e:
             return {"error": f"Height extraction failed: {str(e)}"}
@@ -325,14 +421,14 @@ class EarthEngineAnalyzer:
         Generate a unique cache key for the geometry and parameters
         
         Args:
-            geojson: GeoJSON geometry
+            geojson: GeoJSON geometry or Feature
             confidence_threshold: Confidence threshold
             
         Returns:
-            str: Unique cache key
+            str: Unique cache key, shared by equivalent geometries
         """
-        # Create a string representation of the geometry and parameters
-        key_string = f"{json.dumps(geojson, sort_keys=True)}_{confidence_threshold}"
+        # Combine the canonical geometry fingerprint with the parameters
+        key_string = f"{geometry_fingerprint(geojson)}_{confidence_threshold}"
         
         # Generate hash
         return hashlib.md5(key_string.encode()).hexdigest()
@@ -411,6 +507,205 @@ class EarthEngineAnalyzer:
             'cache_keys': list(self.cache.keys())
         }
 
+    # ==================== BATCH ZONE ANALYSIS ====================
+    
+    def analyze_zones_batch(self, zones: List[Dict], year: int = 2020) -> List[Dict]:
+        """
+        Building and population data for many zones with one reduction per dataset
+        
+        All zone geometries go into one ee.FeatureCollection; GPWv4.11,
+        WorldPop and building heights are reduced over it with reduceRegions
+        and Open Buildings statistics are mapped over it, all fetched in a
+        single round-trip per BATCH_MAX_ZONES zones.
+        
+        Args:
+            zones: Dicts with 'geometry' (GeoJSON geometry) and optionally
+                'confidence_threshold' (default 0.75) and 'user_classification'
+            year: Year of GPWv4.11 data
+            
+        Returns:
+            List[Dict]: Per zone, in input order, {'buildings': ..., 'population': ...}
+            shaped like extract_buildings_for_zone and get_population_estimate
+            (get_population_estimate_with_user_classification when the zone has
+            a user_classification); a section that failed holds {"error": ...}
+        """
+        if not self.initialized:
+            error = {"error": "Earth Engine not initialized"}
+            return [{'buildings': dict(error), 'population': dict(error)} for _ in zones]
+        
+        results = []
+        for start in range(0, len(zones), BATCH_MAX_ZONES):
+            results.extend(self._analyze_zones_chunk(zones[start:start + BATCH_MAX_ZONES], year))
+        return results
+    
+    def _analyze_zones_chunk(self, zones: List[Dict], year: int) -> List[Dict]:
+        """analyze_zones_batch for at most BATCH_MAX_ZONES zones"""
+        try:
+            zone_collection = ee.FeatureCollection([
+                ee.Feature(ee.Geometry(zone['geometry']), {
+                    'zone_index': index,
+                    'confidence_threshold': zone.get('confidence_threshold', 0.75)
+                })
+                for index, zone in enumerate(zones)
+            ]).map(lambda feature: feature.set('zone_area_sqm', feature.geometry().area()))
+            
+            plan = ReductionPlan()
+            self._plan_buildings_batch(plan, zone_collection)
+            year = self._plan_population_batch(plan, zone_collection, year)
+            plan.fetch()
+            
+        except Exception as e:
+            return [{
+                'buildings': {"error": f"Building extraction failed: {str(e)}"},
+                'population': {"error": f"Population estimation failed: {str(e)}"}
+            } for _ in zones]
+        
+        buildings = self._zone_properties_from_plan(plan, 'buildings')
+        heights = self._zone_properties_from_plan(plan, 'heights')
+        gpw = self._zone_properties_from_plan(plan, 'gpw')
+        worldpop = self._zone_properties_from_plan(plan, 'worldpop')
+        
+        results = []
+        for index, zone in enumerate(zones):
+            results.append({
+                'buildings': self._zone_buildings_from_batch(
+                    buildings, heights, index, zone.get('confidence_threshold', 0.75)
+                ),
+                'population': self._zone_population_from_batch(
+                    gpw, worldpop, index, year, zone.get('user_classification')
+                )
+            })
+        return results
+    
+    def _plan_buildings_batch(self, plan: ReductionPlan, zone_collection: ee.FeatureCollection) -> None:
+        """Add per-zone Open Buildings statistics and height reductions to a reduction plan"""
+        open_buildings = self.load_google_open_buildings(confidence_threshold=None)
+        
+        def zone_building_statistics(zone):
+            buildings = open_buildings.filterBounds(zone.geometry()).filter(
+                ee.Filter.gte('confidence', zone.getNumber('confidence_threshold'))
+            )
+            buildings_with_area = buildings.map(lambda feature: feature.set('area_sqm', feature.geometry().area()))
+            zone_area_sqkm = zone.getNumber('zone_area_sqm').divide(1000000)
+            return ee.Feature(None, {
+                'zone_index': zone.get('zone_index'),
+                'building_count': buildings.size(),
+                'area_statistics': buildings_with_area.aggregate_stats('area_sqm'),
+                'building_density_per_sqkm': buildings.size().divide(zone_area_sqkm),
+                'confidence_statistics': buildings.aggregate_stats('confidence'),
+                'zone_area_sqkm': zone_area_sqkm
+            })
+        
+        plan.add('buildings', zone_collection.map(zone_building_statistics))
+        
+        height_band = self.load_open_buildings_temporal(zone_collection.geometry()).select('building_height')
+        plan.add('heights', self._without_geometry(height_band.reduceRegions(
+            collection=zone_collection,
+            reducer=self._height_reducer(),
+            scale=4  # 4m resolution for building data
+        )))
+    
+    def _plan_population_batch(self, plan: ReductionPlan, zone_collection: ee.FeatureCollection,
+                               year: int) -> int:
+        """
+        Add GPWv4.11 and WorldPop reductions over all zones to a reduction plan
+        
+        Returns:
+            int: GPWv4.11 year used
+        """
+        population_band, year = self._gpw_population_image(year)
+        plan.add('gpw', self._without_geometry(population_band.reduceRegions(
+            collection=zone_collection,
+            reducer=self._gpw_reducer(),
+            scale=GPW_SCALE
+        )))
+        plan.add('worldpop', self._without_geometry(self._worldpop_image().reduceRegions(
+            collection=zone_collection,
+            reducer=self._worldpop_validation_reducer(),
+            scale=100
+        )))
+        return year
+    
+    def _without_geometry(self, collection: ee.FeatureCollection) -> ee.FeatureCollection:
+        """Drop feature geometries so only the reduced properties are downloaded"""
+        return collection.map(lambda feature: feature.setGeometry(None))
+    
+    def _zone_properties_from_plan(self, plan: ReductionPlan, name: str) -> Dict:
+        """
+        Feature properties of a fetched per-zone collection by zone index,
+        or the exception its evaluation failed with
+        """
+        try:
+            return {
+                int(feature['properties']['zone_index']): feature['properties']
+                for feature in plan.result(name)['features']
+            }
+        except Exception as e:
+            return e
+    
+    def _band_statistics(self, properties: Dict, band: str) -> Dict:
+        """
+        reduceRegions output of a single-band image keyed like reduceRegion
+        output (<band>_<statistic>), without the zone's own properties
+        """
+        return {
+            (name if name.startswith(f'{band}_') else f'{band}_{name}'): value
+            for name, value in properties.items()
+            if name not in ('zone_index', 'confidence_threshold', 'zone_area_sqm')
+        }
+    
+    def _zone_buildings_from_batch(self, buildings, heights, index: int, confidence_threshold: float) -> Dict:
+        """extract_buildings_for_zone result for one zone of a batch"""
+        if isinstance(buildings, Exception):
+            return {"error": f"Building extraction failed: {str(buildings)}"}
+        
+        statistics = buildings[index]
+        if isinstance(heights, Exception):
+            height_stats = {"error": f"Height extraction failed: {str(heights)}"}
+        else:
+            height_stats = self._band_statistics(heights[index], 'building_height')
+        
+        return {
+            'building_count': statistics['building_count'],
+            'features': {
+                'area_statistics': statistics['area_statistics'],
+                'building_density_per_sqkm': statistics['building_density_per_sqkm'],
+                'confidence_statistics': statistics['confidence_statistics'],
+                'zone_area_sqkm': statistics['zone_area_sqkm']
+            },
+            'height_stats': height_stats,
+            'confidence_threshold': confidence_threshold,
+            'extraction_date': datetime.datetime.now().isoformat(),
+            'data_source': 'Google Open Buildings v3'
+        }
+    
+    def _zone_population_from_batch(self, gpw, worldpop, index: int, year: int,
+                                    user_classification: Optional[Dict]) -> Dict:
+        """get_population_estimate(_with_user_classification) result for one zone of a batch"""
+        if isinstance(gpw, Exception):
+            return {"error": f"GHSL population extraction failed: {str(gpw)}"}
+        
+        gpw_result = self._gpw_population_from_stats(
+            self._band_statistics(gpw[index], 'population_count'), gpw[index]['zone_area_sqm'], year
+        )
+        if gpw_result.get('error'):
+            return gpw_result
+        
+        if isinstance(worldpop, Exception):
+            worldpop_validation = {'error': str(worldpop), 'data_source': 'WorldPop validation unavailable'}
+        else:
+            worldpop_validation = self._worldpop_validation_from_stats(
+                self._band_statistics(worldpop[index], 'population')
+            )
+        
+        try:
+            population = self._population_estimate_from_gpw(gpw_result, worldpop_validation)
+            if user_classification:
+                population = self._apply_user_classification(population, user_classification)
+            return population
+        except Exception as e:
+            return {"error": f"Population estimation failed: {str(e)}"}
+
     # ==================== BUILDING FEATURE EXTRACTION ====================
     
     def extract_comprehensive_building_features(self, zone: Zone, year: int = 2023) -> Dict:
@@ -432,7 +727,7 @@ class EarthEngineAnalyzer:
             ee_geometry = ee.Geometry(zone.geojson['geometry'])
             
             # Generate comprehensive cache key that includes year and analysis type
-            comprehensive_cache_key = f"comprehensive_{zone.id}_{year}_{hashlib.md5(json.dumps(zone.geojson, sort_keys=True).encode()).hexdigest()}"
+            comprehensive_cache_key = f"comprehensive_{zone.id}_{year}_{geometry_fingerprint(zone.geojson)}"
             
             # Check comprehensive cache first
             if comprehensive_cache_key in self.cache:
@@ -1548,7 +1843,6 @@ class EarthEngineAnalyzer:
             if hasattr(zone_or_geojson, 'geojson'):
                 # Zone object with .geojson attribute
                 geometry = zone_or_geojson.geojson['geometry']
-                zone_obj = zone_or_geojson
             elif isinstance(zone_or_geojson, dict):
                 # Check if it's a GeoJSON Feature
                 if zone_or_geojson.get('type') == 'Feature':
@@ -1558,46 +1852,21 @@ class EarthEngineAnalyzer:
                     geometry = zone_or_geojson
                 else:
                     return {"error": "Invalid GeoJSON format"}
-                
-                # Create a temporary zone-like object for GPWv4.11 method
-                zone_obj = type('TempZone', (), {
-                    'geojson': {'type': 'Feature', 'geometry': geometry, 'properties': {}}
-                })()
             else:
                 return {"error": "Invalid input - expected zone object or GeoJSON"}
-            
-            # Step 1: Get GPWv4.11 population estimate (more reliable for totals)
+
+            # Step 1: Get GPWv4.11 population estimate (more reliable for totals),
+            # fetched in one round-trip with the WorldPop validation statistics
             try:
-                gpw_result = self.extract_ghsl_population_for_zone(zone_obj)
-                
+                plan = ReductionPlan()
+                gpw_year = self._plan_gpw_population(plan, ee.Geometry(geometry))
+                self._plan_worldpop_validation(plan, ee.Geometry(geometry))
+                plan.fetch()
+                gpw_result = self._gpw_population_from_plan(plan, gpw_year)
+
                 if gpw_result and not gpw_result.get('error'):
-                    gpw_population = gpw_result.get('total_population', 0)
-                    density_per_sqkm = gpw_result.get('population_density_per_sqkm', 0)
-                    density_category = gpw_result.get('density_category', 'Unknown')
-                    
-                    # Step 2: Apply urban correction factors for Lusaka high-density areas
-                    corrected_population = self._apply_urban_density_corrections(
-                        gpw_population, density_per_sqkm, density_category
-                    )
-                    
                     # Step 3: Get WorldPop for spatial validation (but don't rely on its totals)
-                    worldpop_validation = self._get_worldpop_validation(geometry)
-                    
-                    # Determine confidence based on data quality and urban context
-                    confidence = self._calculate_population_confidence(
-                        corrected_population, density_per_sqkm, density_category, worldpop_validation
-                    )
-                    
-                    return {
-                        'estimated_population': int(corrected_population),
-                        'population_density_per_sqkm': density_per_sqkm,
-                        'density_category': density_category,
-                        'data_source': f'GPWv4.11 with Urban Corrections ({density_category})',
-                        'confidence': confidence,
-                        'raw_gpw_population': int(gpw_population),
-                        'correction_factor': round(corrected_population / gpw_population, 2) if gpw_population > 0 else 1.0,
-                        'validation_data': worldpop_validation
-                    }
+                    return self._population_estimate_from_gpw(gpw_result, self._worldpop_validation_from_plan(plan))
                     
             except Exception as gpw_error:
                 print(f"GPWv4.11 failed: {gpw_error}, falling back to WorldPop...")
@@ -1684,6 +1953,42 @@ class EarthEngineAnalyzer:
             except Exception as fallback_error:
                 return {"error": f"Population estimation failed: {str(e)}, Fallback also failed: {str(fallback_error)}"}
     
+    def _population_estimate_from_gpw(self, gpw_result: Dict, worldpop_validation: Dict) -> Dict:
+        """
+        Population estimate from GPWv4.11 statistics with urban corrections
+        
+        Args:
+            gpw_result: Zone statistics from _gpw_population_from_stats
+            worldpop_validation: WorldPop spatial validation data for the zone
+            
+        Returns:
+            Dict: Population estimate as returned by get_population_estimate
+        """
+        gpw_population = gpw_result.get('total_population', 0)
+        density_per_sqkm = gpw_result.get('population_density_per_sqkm', 0)
+        density_category = gpw_result.get('density_category', 'Unknown')
+        
+        # Step 2: Apply urban correction factors for Lusaka high-density areas
+        corrected_population = self._apply_urban_density_corrections(
+            gpw_population, density_per_sqkm, density_category
+        )
+        
+        # Determine confidence based on data quality and urban context
+        confidence = self._calculate_population_confidence(
+            corrected_population, density_per_sqkm, density_category, worldpop_validation
+        )
+        
+        return {
+            'estimated_population': int(corrected_population),
+            'population_density_per_sqkm': density_per_sqkm,
+            'density_category': density_category,
+            'data_source': f'GPWv4.11 with Urban Corrections ({density_category})',
+            'confidence': confidence,
+            'raw_gpw_population': int(gpw_population),
+            'correction_factor': round(corrected_population / gpw_population, 2) if gpw_population > 0 else 1.0,
+            'validation_data': worldpop_validation
+        }
+    
     def analyze_environmental_factors(self, zone):
         """Analyze environmental factors like temperature, precipitation"""
         if not self.initialized:
@@ -2528,50 +2833,98 @@ class EarthEngineAnalyzer:
         try:
             # Convert zone geometry to Earth Engine geometry
             ee_geometry = ee.Geometry(zone.geojson['geometry'])
-            
-            # Map year to available GPWv4.11 years (use closest available)
-            available_years = [2000, 2005, 2010, 2015, 2020]
-            if year not in available_years:
-                # Find closest available year
-                year = min(available_years, key=lambda x: abs(x - year))
-            
-            # Load GPWv4.11 Population Count data - authoritative global population estimates
-            gpw_collection = ee.ImageCollection("CIESIN/GPWv411/GPW_Population_Count")
-            
-            # Filter to the specific year
-            gpw_population = gpw_collection.filter(ee.Filter.date(f'{year}-01-01', f'{year}-12-31')).first()
-            
-            # Select the population count band
-            population_band = gpw_population.select('population_count')
-            
-            # Mask to only consider populated areas (population > 0)
-            population_band = population_band.updateMask(population_band.gt(0))
-            
-            # Extract population for zone
-            zone_population = population_band.clip(ee_geometry)
-            
-            # Calculate comprehensive statistics
-            pop_stats = zone_population.reduceRegion(
-                reducer=ee.Reducer.sum().combine(
-                    ee.Reducer.mean().combine(
-                        ee.Reducer.stdDev().combine(
-                            ee.Reducer.min().combine(
-                                ee.Reducer.max().combine(
-                                    ee.Reducer.count(), '', True
-                                ), '', True
-                            ), '', True
+
+            plan = ReductionPlan()
+            year = self._plan_gpw_population(plan, ee_geometry, year)
+            plan.fetch()
+            return self._gpw_population_from_plan(plan, year)
+
+        except Exception as e:
+            return {"error": f"GHSL population extraction failed: {str(e)}"}
+
+    def _gpw_population_image(self, year: int = 2020):
+        """
+        GPWv4.11 population count band, masked to populated pixels
+
+        Returns:
+            Tuple of (ee.Image, GPWv4.11 year used - the closest available to year)
+        """
+        # Map year to available GPWv4.11 years (use closest available)
+        available_years = [2000, 2005, 2010, 2015, 2020]
+        if year not in available_years:
+            # Find closest available year
+            year = min(available_years, key=lambda x: abs(x - year))
+
+        # Load GPWv4.11 Population Count data - authoritative global population estimates
+        gpw_collection = ee.ImageCollection("CIESIN/GPWv411/GPW_Population_Count")
+
+        # Filter to the specific year
+        gpw_population = gpw_collection.filter(ee.Filter.date(f'{year}-01-01', f'{year}-12-31')).first()
+
+        # Select the population count band
+        population_band = gpw_population.select('population_count')
+
+        # Mask to only consider populated areas (population > 0)
+        return population_band.updateMask(population_band.gt(0)), year
+
+    def _gpw_reducer(self) -> ee.Reducer:
+        """Sum, mean, stdDev, min, max and count of GPWv4.11 pixels"""
+        return ee.Reducer.sum().combine(
+            ee.Reducer.mean().combine(
+                ee.Reducer.stdDev().combine(
+                    ee.Reducer.min().combine(
+                        ee.Reducer.max().combine(
+                            ee.Reducer.count(), '', True
                         ), '', True
                     ), '', True
-                ),
-                geometry=ee_geometry,
-                scale=927.67,  # GPWv4.11 has ~1km (30 arc-second) resolution
-                maxPixels=1e9
-            )
-            
-            stats_info = pop_stats.getInfo()
-            
+                ), '', True
+            ), '', True
+        )
+
+    def _plan_gpw_population(self, plan: ReductionPlan, ee_geometry: ee.Geometry, year: int = 2020) -> int:
+        """
+        Add the GPWv4.11 population statistics and zone area to a reduction plan
+
+        Returns:
+            int: GPWv4.11 year used (the closest available to year)
+        """
+        population_band, year = self._gpw_population_image(year)
+
+        # Extract population for zone
+        zone_population = population_band.clip(ee_geometry)
+
+        # Calculate comprehensive statistics
+        plan.add('gpw_stats', zone_population.reduceRegion(
+            reducer=self._gpw_reducer(),
+            geometry=ee_geometry,
+            scale=GPW_SCALE,
+            maxPixels=1e9
+        ))
+        plan.add('gpw_zone_area_sqm', ee_geometry.area())
+
+        return year
+
+    def _gpw_population_from_plan(self, plan: ReductionPlan, year: int) -> Dict:
+        """GPWv4.11 population statistics from a fetched reduction plan"""
+        try:
+            stats_info = plan.result('gpw_stats')
+            zone_area_sqm = plan.result('gpw_zone_area_sqm')
+        except Exception as e:
+            return {"error": f"GHSL population extraction failed: {str(e)}"}
+
+        return self._gpw_population_from_stats(stats_info, zone_area_sqm, year)
+
+    def _gpw_population_from_stats(self, stats_info: Dict, zone_area_sqm: float, year: int) -> Dict:
+        """
+        GPWv4.11 population statistics for a zone
+
+        Args:
+            stats_info: Zone reduction by _gpw_reducer (population_count_* keys)
+            zone_area_sqm: Zone area in square meters
+            year: GPWv4.11 year reduced
+        """
+        try:
             # Calculate zone area in square kilometers
-            zone_area_sqm = ee_geometry.area().getInfo()
             zone_area_sqkm = zone_area_sqm / 1000000
             
             # Extract population statistics
@@ -2584,7 +2937,7 @@ class EarthEngineAnalyzer:
             
             # Calculate enhanced metrics
             population_density_per_sqkm = total_population / zone_area_sqkm if zone_area_sqkm > 0 else 0
-            populated_area_sqkm = (pixel_count * 927.67 * 927.67) / 1000000  # Convert pixels to sq km (GPWv4.11 resolution)
+            populated_area_sqkm = (pixel_count * GPW_SCALE * GPW_SCALE) / 1000000  # Convert pixels to sq km (GPWv4.11 resolution)
             populated_coverage_percent = (populated_area_sqkm / zone_area_sqkm * 100) if zone_area_sqkm > 0 else 0
             
             # Calculate confidence metrics
@@ -3098,38 +3451,49 @@ class EarthEngineAnalyzer:
             dict: WorldPop validation data
         """
         try:
-            ee_geometry = ee.Geometry(geometry)
-            
-            # Get WorldPop 2020 data for spatial distribution validation
-            worldpop = ee.ImageCollection('WorldPop/GP/100m/pop') \
-                .filter(ee.Filter.eq('country', 'ZMB')) \
-                .filter(ee.Filter.eq('year', 2020)) \
-                .first()
-            
-            # Calculate spatial statistics
-            pop_stats = worldpop.reduceRegion(
-                reducer=ee.Reducer.mean().combine(
-                    reducer2=ee.Reducer.max(),
-                    sharedInputs=True
-                ).combine(
-                    reducer2=ee.Reducer.stdDev(),
-                    sharedInputs=True
-                ),
-                geometry=ee_geometry,
-                scale=100,
-                maxPixels=1e9
-            )
-            
-            results = pop_stats.getInfo()
-            
+            plan = ReductionPlan()
+            self._plan_worldpop_validation(plan, ee.Geometry(geometry))
+            plan.fetch()
+            return self._worldpop_validation_from_plan(plan)
+
+        except Exception as e:
+            print(f"WorldPop validation failed: {e}")
             return {
-                'mean_density': results.get('population_mean', 0),
-                'max_density': results.get('population_max', 0),
-                'std_deviation': results.get('population_stdDev', 0),
-                'spatial_variability': 'high' if results.get('population_stdDev', 0) > 50 else 'low',
-                'data_source': 'WorldPop 2020 (validation only)'
+                'error': str(e),
+                'data_source': 'WorldPop validation unavailable'
             }
-            
+
+    def _plan_worldpop_validation(self, plan: ReductionPlan, ee_geometry: ee.Geometry) -> None:
+        """Add the WorldPop spatial statistics to a reduction plan"""
+        # Calculate spatial statistics
+        plan.add('worldpop_stats', self._worldpop_image().reduceRegion(
+            reducer=self._worldpop_validation_reducer(),
+            geometry=ee_geometry,
+            scale=100,
+            maxPixels=1e9
+        ))
+
+    def _worldpop_image(self) -> ee.Image:
+        """WorldPop 2020 population for Zambia"""
+        return ee.ImageCollection('WorldPop/GP/100m/pop') \
+            .filter(ee.Filter.eq('country', 'ZMB')) \
+            .filter(ee.Filter.eq('year', 2020)) \
+            .first()
+
+    def _worldpop_validation_reducer(self) -> ee.Reducer:
+        """Mean, max and stdDev of WorldPop pixels for spatial distribution validation"""
+        return ee.Reducer.mean().combine(
+            reducer2=ee.Reducer.max(),
+            sharedInputs=True
+        ).combine(
+            reducer2=ee.Reducer.stdDev(),
+            sharedInputs=True
+        )
+
+    def _worldpop_validation_from_plan(self, plan: ReductionPlan) -> dict:
+        """WorldPop validation data from a fetched reduction plan"""
+        try:
+            results = plan.result('worldpop_stats')
         except Exception as e:
             print(f"WorldPop validation failed: {e}")
             return {
@@ -3137,6 +3501,18 @@ class EarthEngineAnalyzer:
                 'data_source': 'WorldPop validation unavailable'
             }
 
+        return self._worldpop_validation_from_stats(results)
+
+    def _worldpop_validation_from_stats(self, results: dict) -> dict:
+        """WorldPop validation data from a zone reduction by _worldpop_validation_reducer"""
+        return {
+            'mean_density': results.get('population_mean', 0),
+            'max_density': results.get('population_max', 0),
+            'std_deviation': results.get('population_stdDev', 0),
+            'spatial_variability': 'high' if (results.get('population_stdDev') or 0) > 50 else 'low',
+            'data_source': 'WorldPop 2020 (validation only)'
+        }
+
     def _calculate_population_confidence(self, corrected_population: float, density_per_sqkm: float, 
                                        density_category: str, worldpop_validation: dict) -> float:
         """
@@ -3201,56 +3577,69 @@ class EarthEngineAnalyzer:
             if base_result.get('error'):
                 return base_result
             
-            # Extract user's area classification
-            settlement_density = user_classification.get('settlement_density', 'medium_density')
-            socioeconomic_level = user_classification.get('socioeconomic_level', 'middle_income')
-            
-            # Map user's settlement density to our correction categories
-            user_density_mapping = {
-                'very_low_density': 'Low Density (<1000/km²)',
-                'low_density': 'Low-Medium Density (1000-2000/km²)', 
-                'medium_density': 'Medium Density (2000-5000/km²)',
-                'high_density': 'Medium-High Density (5000-8000/km²)',
-                'very_high_density': 'Very High Density (>15000/km²)'
-            }
-            
-            # Use user's classification as the primary density category
-            user_density_category = user_density_mapping.get(settlement_density, 'Medium Density (2000-5000/km²)')
-            
-            # Get raw population from base result
-            raw_population = base_result.get('raw_gpw_population', base_result.get('estimated_population', 0))
-            if not raw_population:
-                raw_population = base_result.get('estimated_population', 0)
-            
-            # Apply user-based corrections instead of satellite-derived ones
-            corrected_population = self._apply_user_density_corrections(
-                raw_population, user_density_category, socioeconomic_level
-            )
-            
-            # Calculate confidence based on user input quality
-            confidence = self._calculate_user_classification_confidence(
-                settlement_density, socioeconomic_level
-            )
-            
-            return {
-                'estimated_population': int(corrected_population),
-                'population_density_per_sqkm': base_result.get('population_density_per_sqkm', 0),
-                'density_category': user_density_category,
-                'data_source': f'User Classification: {settlement_density.replace("_", " ").title()} + Satellite Data',
-                'confidence': confidence,
-                'raw_satellite_population': raw_population,
-                'user_correction_factor': round(corrected_population / raw_population, 2) if raw_population > 0 else 1.0,
-                'user_classification': {
-                    'settlement_density': settlement_density,
-                    'socioeconomic_level': socioeconomic_level,
-                    'source': 'user_input'
-                },
-                'validation_data': base_result.get('validation_data', {})
-            }
+            return self._apply_user_classification(base_result, user_classification)
             
         except Exception as e:
             return {"error": f"User classification population estimation failed: {str(e)}"}
 
+    def _apply_user_classification(self, base_result: Dict, user_classification: dict) -> Dict:
+        """
+        Re-correct a satellite population estimate with the user's area classification
+        
+        Args:
+            base_result: Estimate from get_population_estimate
+            user_classification: Dict containing user's area settings like settlement_density, socioeconomic_level
+        
+        Returns:
+            Dict: Population estimate with user classification prioritized
+        """
+        # Extract user's area classification
+        settlement_density = user_classification.get('settlement_density', 'medium_density')
+        socioeconomic_level = user_classification.get('socioeconomic_level', 'middle_income')
+        
+        # Map user's settlement density to our correction categories
+        user_density_mapping = {
+            'very_low_density': 'Low Density (<1000/km²)',
+            'low_density': 'Low-Medium Density (1000-2000/km²)', 
+            'medium_density': 'Medium Density (2000-5000/km²)',
+            'high_density': 'Medium-High Density (5000-8000/km²)',
+            'very_high_density': 'Very High Density (>15000/km²)'
+        }
+        
+        # Use user's classification as the primary density category
+        user_density_category = user_density_mapping.get(settlement_density, 'Medium Density (2000-5000/km²)')
+        
+        # Get raw population from base result
+        raw_population = base_result.get('raw_gpw_population', base_result.get('estimated_population', 0))
+        if not raw_population:
+            raw_population = base_result.get('estimated_population', 0)
+        
+        # Apply user-based corrections instead of satellite-derived ones
+        corrected_population = self._apply_user_density_corrections(
+            raw_population, user_density_category, socioeconomic_level
+        )
+        
+        # Calculate confidence based on user input quality
+        confidence = self._calculate_user_classification_confidence(
+            settlement_density, socioeconomic_level
+        )
+        
+        return {
+            'estimated_population': int(corrected_population),
+            'population_density_per_sqkm': base_result.get('population_density_per_sqkm', 0),
+            'density_category': user_density_category,
+            'data_source': f'User Classification: {settlement_density.replace("_", " ").title()} + Satellite Data',
+            'confidence': confidence,
+            'raw_satellite_population': raw_population,
+            'user_correction_factor': round(corrected_population / raw_population, 2) if raw_population > 0 else 1.0,
+            'user_classification': {
+                'settlement_density': settlement_density,
+                'socioeconomic_level': socioeconomic_level,
+                'source': 'user_input'
+            },
+            'validation_data': base_result.get('validation_data', {})
+        }
+
     def _apply_user_density_corrections(self, raw_population: float, user_density_category: str, socioeconomic_level: str) -> float:
         """
         Apply corrections based on user's area classification
@@ -0,0 +1,169 @@
+"""
+Canonical geometry fingerprints for cache keys.
+
+A zone redrawn in the map UI often comes back as the same polygon with a
+different ring start vertex, reversed orientation, float noise in the last
+digits or wrapped in a GeoJSON Feature. geometry_fingerprint hashes a
+canonical form of the geometry so all of these share cached results:
+
+- Features are unwrapped to their geometry (properties are ignored)
+- Coordinates are rounded to GEOMETRY_KEY_PRECISION decimal places
+- Repeated vertices left by rounding are dropped
+- Polygon exterior rings are counter-clockwise and holes clockwise (RFC 7946)
+- Rings start at their smallest vertex; holes, polygons and members of
+  multi-geometries are sorted
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+try:
+    from shapely.geometry import shape
+    SHAPELY_AVAILABLE = True
+except ImportError:
+    SHAPELY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Decimal places kept in fingerprinted coordinates (6 places is ~0.1 m)
+GEOMETRY_KEY_PRECISION = int(os.getenv('GEOMETRY_KEY_PRECISION', 6))
+
+# Hash the WKB of the canonical geometry instead of its JSON (needs shapely)
+GEOMETRY_KEY_USE_WKB = os.getenv('GEOMETRY_KEY_USE_WKB', 'false').lower() == 'true'
+
+
+def _quantize(position: List[float], precision: int) -> List[float]:
+    """Position rounded to precision decimal places, without negative zeros"""
+    return [round(float(value), precision) + 0.0 for value in position]
+
+
+def _quantize_positions(positions: List[List[float]], precision: int) -> List[List[float]]:
+    """Rounded positions with consecutive repeats removed"""
+    quantized = []
+    for position in positions:
+        position = _quantize(position, precision)
+        if not quantized or position != quantized[-1]:
+            quantized.append(position)
+    return quantized
+
+
+def _signed_area(ring: List[List[float]]) -> float:
+    """Shoelace area of an open ring; positive when counter-clockwise"""
+    return sum(
+        ring[i][0] * ring[(i + 1) % len(ring)][1] - ring[(i + 1) % len(ring)][0] * ring[i][1]
+        for i in range(len(ring))
+    ) / 2
+
+
+def _canonical_ring(ring: List[List[float]], precision: int, counter_clockwise: bool) -> List[List[float]]:
+    """Closed ring in the given orientation, starting at its smallest vertex"""
+    ring = _quantize_positions(ring, precision)
+    if len(ring) > 1 and ring[0] == ring[-1]:
+        ring = ring[:-1]
+    if not ring:
+        return ring
+
+    if (_signed_area(ring) > 0) != counter_clockwise and len(ring) > 2:
+        ring = ring[::-1]
+
+    start = ring.index(min(ring))
+    ring = ring[start:] + ring[:start]
+    return ring + [ring[0]]
+
+
+def _canonical_polygon(rings: List[List[List[float]]], precision: int) -> List[List[List[float]]]:
+    """Exterior ring counter-clockwise, then holes clockwise in sorted order"""
+    if not rings:
+        return []
+    exterior = _canonical_ring(rings[0], precision, counter_clockwise=True)
+    holes = sorted(_canonical_ring(ring, precision, counter_clockwise=False) for ring in rings[1:])
+    return [exterior] + holes
+
+
+def _canonical_line(line: List[List[float]], precision: int) -> List[List[float]]:
+    """Line in whichever direction starts at the smaller end"""
+    line = _quantize_positions(line, precision)
+    return min(line, line[::-1])
+
+
+def canonical_geometry(geometry: Dict[str, Any], precision: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Canonical GeoJSON geometry for fingerprinting.
+
+    Args:
+        geometry: GeoJSON Geometry or Feature
+        precision: Decimal places kept (default GEOMETRY_KEY_PRECISION)
+
+    Returns:
+        GeoJSON geometry with only 'type' and 'coordinates' (or 'geometries')
+
+    Raises:
+        ValueError: If geometry is not a GeoJSON geometry or Feature
+    """
+    precision = GEOMETRY_KEY_PRECISION if precision is None else precision
+
+    if isinstance(geometry, dict) and geometry.get('type') == 'Feature':
+        geometry = geometry.get('geometry')
+    if not isinstance(geometry, dict):
+        raise ValueError("Expected a GeoJSON geometry or Feature")
+
+    geometry_type = geometry.get('type')
+    coordinates = geometry.get('coordinates')
+
+    if geometry_type == 'GeometryCollection':
+        members = [canonical_geometry(member, precision) for member in geometry.get('geometries') or []]
+        return {'type': geometry_type, 'geometries': sorted(members, key=lambda member: json.dumps(member, sort_keys=True))}
+    if coordinates is None:
+        raise ValueError(f"GeoJSON {geometry_type} has no coordinates")
+
+    if geometry_type == 'Point':
+        coordinates = _quantize(coordinates, precision)
+    elif geometry_type == 'MultiPoint':
+        coordinates = sorted(_quantize(position, precision) for position in coordinates)
+    elif geometry_type == 'LineString':
+        coordinates = _canonical_line(coordinates, precision)
+    elif geometry_type == 'MultiLineString':
+        coordinates = sorted(_canonical_line(line, precision) for line in coordinates)
+    elif geometry_type == 'Polygon':
+        coordinates = _canonical_polygon(coordinates, precision)
+    elif geometry_type == 'MultiPolygon':
+        coordinates = sorted(_canonical_polygon(polygon, precision) for polygon in coordinates)
+    else:
+        raise ValueError(f"Unsupported GeoJSON geometry type: {geometry_type}")
+
+    return {'type': geometry_type, 'coordinates': coordinates}
+
+
+def geometry_fingerprint(geometry: Dict[str, Any], precision: Optional[int] = None,
+                         use_wkb: Optional[bool] = None) -> str:
+    """
+    Hash of a geometry that is equal for equivalent geometries.
+
+    Args:
+        geometry: GeoJSON Geometry or Feature
+        precision: Decimal places kept (default GEOMETRY_KEY_PRECISION)
+        use_wkb: Hash the canonical geometry's WKB rather than its JSON
+            (default GEOMETRY_KEY_USE_WKB; JSON is used without shapely)
+
+    Returns:
+        str: MD5 hex digest. Input that is not valid GeoJSON is hashed as
+        its raw JSON, as before canonical fingerprints.
+    """
+    use_wkb = GEOMETRY_KEY_USE_WKB if use_wkb is None else use_wkb
+
+    try:
+        canonical = canonical_geometry(geometry, precision)
+    except (ValueError, TypeError, IndexError) as e:
+        logger.debug(f"Fingerprinting raw geometry JSON: {e}")
+        return hashlib.md5(json.dumps(geometry, sort_keys=True, default=str).encode()).hexdigest()
+
+    if use_wkb and SHAPELY_AVAILABLE:
+        try:
+            return hashlib.md5(shape(canonical).wkb).hexdigest()
+        except Exception as e:
+            logger.debug(f"WKB fingerprint failed, using JSON: {e}")
+
+    return hashlib.md5(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
@@ -54,24 +54,7 @@ class PopulationService:
             else:
                 result = self.earth_engine.get_population_estimate(zone_or_geojson)
             
-            if result and not result.get('error'):
-                return {
-                    'estimated_population': result.get('estimated_population', 0),
-                    'confidence_level': 'high',
-                    'data_source': result.get('data_source', 'Earth Engine'),
-                    'method': result.get('method', method_priority),
-                    'success': True
-                }
-            else:
-                error_msg = result.get('error', 'Unknown Earth Engine error') if result else 'No result from Earth Engine'
-                logger.warning(f"Earth Engine population estimate failed: {error_msg}")
-                return {
-                    'estimated_population': 0,
-                    'confidence_level': 'none',
-                    'data_source': 'earth_engine_error',
-                    'error': error_msg,
-                    'success': False
-                }
+            return self.format_population_result(result, method_priority)
                 
         except Exception as e:
             logger.error(f"Population service error: {str(e)}")
@@ -83,6 +66,36 @@ class PopulationService:
                 'success': False
             }
     
+    def format_population_result(self, result: Optional[Dict], method_priority: str = "worldpop") -> Dict[str, Any]:
+        """
+        Service response for an Earth Engine population estimate
+        
+        Args:
+            result: Estimate from EarthEngineAnalyzer (single zone or analyze_zones_batch)
+            method_priority: Preferred method reported when the estimate names none
+            
+        Returns:
+            Dictionary with population estimate and metadata
+        """
+        if result and not result.get('error'):
+            return {
+                'estimated_population': result.get('estimated_population', 0),
+                'confidence_level': 'high',
+                'data_source': result.get('data_source', 'Earth Engine'),
+                'method': result.get('method', method_priority),
+                'success': True
+            }
+        
+        error_msg = result.get('error', 'Unknown Earth Engine error') if result else 'No result from Earth Engine'
+        logger.warning(f"Earth Engine population estimate failed: {error_msg}")
+        return {
+            'estimated_population': 0,
+            'confidence_level': 'none',
+            'data_source': 'earth_engine_error',
+            'error': error_msg,
+            'success': False
+        }
+    
     def get_minimal_fallback_estimate(self, area_sqm: float) -> Dict[str, Any]:
         """
         Provide minimal fallback estimate only when Earth Engine is completely unavailable
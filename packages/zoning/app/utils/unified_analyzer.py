@@ -16,15 +16,22 @@ Date: 2025
 """
 
 import logging
+import os
 import time
 import math
-from typing import Dict, Any, Optional, List, Union
+import copy
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Any, Optional, List, Union, Callable, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import json
 import hashlib
 from datetime import datetime, timedelta
 
+from .geometry_fingerprint import geometry_fingerprint
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,6 +44,23 @@ except ImportError as e:
     logger.warning(f"Gemini recommendations not available: {e}")
     GEMINI_AVAILABLE = False
 
+# Process-wide analysis result cache: entries kept, and hours before an entry expires
+ANALYSIS_CACHE_MAX_ITEMS = int(os.getenv('ANALYSIS_CACHE_MAX_ITEMS', 256))
+ANALYSIS_CACHE_TTL_HOURS = float(os.getenv('ANALYSIS_CACHE_TTL_HOURS', 24))
+
+# Results that fell back from Earth Engine data, have a lower confidence level
+# or lost a stage are only kept this many minutes, so they are recomputed
+# soon after an outage or quota error clears
+ANALYSIS_CACHE_DEGRADED_TTL_MINUTES = float(os.getenv('ANALYSIS_CACHE_DEGRADED_TTL_MINUTES', 5))
+ANALYSIS_CACHE_MIN_CONFIDENCE = float(os.getenv('ANALYSIS_CACHE_MIN_CONFIDENCE', 0.5))
+
+# Threads running the stages of a comprehensive analysis
+ANALYSIS_STAGE_WORKERS = int(os.getenv('ANALYSIS_STAGE_WORKERS', 4))
+
+# Satellite estimate passed to the population stage when its fetch failed,
+# so that the failure is not retried serially there
+SATELLITE_POPULATION_UNAVAILABLE = {'estimated_population': 0, 'data_source': 'earth_engine_unavailable'}
+
 
 class AnalysisType(Enum):
     """Types of analysis that can be performed"""
@@ -112,6 +136,9 @@ class AnalysisResult:
     data_sources: Optional[List[str]] = None
     validation_metrics: Optional[Dict[str, float]] = None
     
+    # Performance
+    stage_timings: Optional[Dict[str, float]] = None  # seconds per analysis stage
+    
     # Error information
     error_message: Optional[str] = None
     warnings: Optional[List[str]] = None
@@ -142,7 +169,8 @@ class AnalysisResult:
             'performance_metrics': {
                 'total_analysis_time_seconds': getattr(self, '_execution_time', 0.1),
                 'modules_completed': 3 if self.success else 0,
-                'modules_total': 3
+                'modules_total': 3,
+                'stage_timings_seconds': self.stage_timings or {}
             },
             'critical_issues': self._get_critical_issues()
         }
@@ -178,6 +206,143 @@ class AnalysisResult:
         return issues
 
 
+@dataclass
+class AnalysisStage:
+    """One stage of an analysis and the stages whose output it needs"""
+    name: str
+    run: Callable[[Dict[str, Any]], Any]  # called with the outputs of finished stages
+    after: Tuple[str, ...] = ()
+
+
+class StageScheduler:
+    """
+    Runs analysis stages on a thread pool in dependency order.
+    
+    A stage starts as soon as every stage in its `after` has finished, so
+    stages that do not depend on each other (such as the Earth Engine
+    population and building extractions) wait on their I/O at the same time.
+    Dependencies on stages that are not scheduled are ignored. A failed stage
+    still releases the stages after it, with None as its output.
+    """
+    
+    def __init__(self, max_workers: int = ANALYSIS_STAGE_WORKERS):
+        self.max_workers = max_workers
+    
+    def run(self, stages: List[AnalysisStage]) -> Tuple[Dict[str, Any], Dict[str, Exception], Dict[str, float]]:
+        """
+        Run the stages and wait for all of them
+        
+        Returns:
+            Tuple of (outputs by stage, exceptions of failed stages, seconds per stage)
+        """
+        names = {stage.name for stage in stages}
+        pending = list(stages)
+        running = {}
+        finished_names = set()
+        outputs, errors, timings = {}, {}, {}
+        
+        def run_timed(stage: AnalysisStage, inputs: Dict[str, Any]) -> Any:
+            start = time.time()
+            try:
+                return stage.run(inputs)
+            finally:
+                timings[stage.name] = round(time.time() - start, 3)
+        
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers),
+                                thread_name_prefix='analysis-stage') as executor:
+            while pending or running:
+                ready = [stage for stage in pending
+                         if all(name in finished_names or name not in names for name in stage.after)]
+                for stage in ready:
+                    pending.remove(stage)
+                    running[executor.submit(run_timed, stage, dict(outputs))] = stage
+                
+                if not running:
+                    raise ValueError(f"Circular stage dependencies: {', '.join(s.name for s in pending)}")
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    finished_names.add(stage.name)
+                    try:
+                        outputs[stage.name] = future.result()
+                    except Exception as e:
+                        errors[stage.name] = e
+                        outputs[stage.name] = None
+        
+        return outputs, errors, timings
+
+
+class AnalysisResultCache:
+    """
+    Bounded, thread-safe LRU cache of analysis results with a TTL.
+    
+    Results are copied on the way in and out, so callers can change the
+    result they get back without affecting later hits.
+    """
+    
+    def __init__(self, max_items: int = ANALYSIS_CACHE_MAX_ITEMS,
+                 ttl: timedelta = timedelta(hours=ANALYSIS_CACHE_TTL_HOURS)):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._entries = OrderedDict()  # request_id -> (expires_at, result)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, request_id: str) -> Optional['AnalysisResult']:
+        """Cached result for request_id, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(request_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, result = entry
+            if datetime.now() > expires_at:
+                del self._entries[request_id]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(request_id)
+            self.hits += 1
+        return copy.deepcopy(result)
+    
+    def put(self, request_id: str, result: 'AnalysisResult', ttl: Optional[timedelta] = None):
+        """Store result for ttl (default self.ttl), evicting the least recently used entries beyond max_items"""
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._entries[request_id] = (datetime.now() + (ttl or self.ttl), result)
+            self._entries.move_to_end(request_id)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Drop all entries; the counters are kept"""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'items': len(self._entries),
+                'max_items': self.max_items,
+                'ttl_seconds': self.ttl.total_seconds(),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+
 class UnifiedAnalyzer:
     """
     Unified Analysis Engine for Lusaka Zone Planning
@@ -187,17 +352,18 @@ class UnifiedAnalyzer:
     using best practices for developing cities.
     """
     
-    def __init__(self, cache_enabled: bool = True):
+    def __init__(self, cache_enabled: bool = True, cache: Optional[AnalysisResultCache] = None):
         """
         Initialize the unified analyzer
         
         Args:
             cache_enabled: Whether to enable result caching
+            cache: Result cache to use; a private one by default. The
+                analyzer from get_unified_analyzer uses the process-wide one.
         """
         self.cache_enabled = cache_enabled
-        self.cache = {}
-        self.cache_expiry = {}
-        self.cache_ttl = timedelta(hours=24)  # Cache results for 24 hours
+        self.cache = cache if cache is not None else AnalysisResultCache()
+        self.cache_ttl = self.cache.ttl
         
         # Initialize Gemini recommendation engine
         self.gemini_engine = None
@@ -300,6 +466,89 @@ class UnifiedAnalyzer:
                 logger.info(f"📦 Returning cached result for {request_id}")
                 return cached_result
         
+        return self._run_analysis(request, request_id)
+    
+    def analyze_many(self, requests: List[AnalysisRequest]) -> List[AnalysisResult]:
+        """
+        Perform analyses for many zones, fetching their Earth Engine data together
+        
+        Building and satellite population data of the requests that are not
+        cached are fetched with EarthEngineAnalyzer.analyze_zones_batch (one
+        reduction per dataset for all zones); each request is then analyzed as
+        by analyze(). A zone whose batch data could not be computed fetches
+        its own, as in analyze().
+        
+        Args:
+            requests: Analysis requests, one per zone
+            
+        Returns:
+            AnalysisResults in request order
+        """
+        request_ids = [self._generate_request_id(request) for request in requests]
+        results = [None] * len(requests)
+        
+        pending = []
+        for index, request_id in enumerate(request_ids):
+            cached_result = self._get_cached_result(request_id) if self.cache_enabled else None
+            if cached_result:
+                results[index] = cached_result
+            else:
+                pending.append(index)
+        
+        prefetched = self._prefetch_earth_engine_data([requests[index] for index in pending])
+        logger.info(f"🔍 Batch analysis of {len(requests)} zones ({len(requests) - len(pending)} cached, "
+                    f"{sum(1 for data in prefetched if data)} prefetched from Earth Engine)")
+        
+        for index, data in zip(pending, prefetched):
+            results[index] = self._run_analysis(requests[index], request_ids[index], data)
+        
+        return results
+    
+    def _prefetch_earth_engine_data(self, requests: List[AnalysisRequest]) -> List[Dict[str, Any]]:
+        """
+        Earth Engine building and satellite population data for each request
+        
+        Returns:
+            Per request, the 'buildings' (extract_buildings_for_zone shape) and
+            'satellite_population' (population service shape) entries that
+            were fetched successfully
+        """
+        prefetched = [{} for _ in requests]
+        batch = [index for index, request in enumerate(requests) if request.analysis_type != AnalysisType.WASTE]
+        if not batch or not (self.earth_engine and self.earth_engine.initialized):
+            return prefetched
+        
+        try:
+            from .population_service import get_population_service
+            
+            zones_data = self.earth_engine.analyze_zones_batch([
+                {
+                    'geometry': requests[index].geometry,
+                    'confidence_threshold': requests[index].options.get('confidence_threshold', 0.80),
+                    'user_classification': self._get_user_classification(requests[index])
+                }
+                for index in batch
+            ])
+            population_service = get_population_service()
+            
+            for index, zone_data in zip(batch, zones_data):
+                if not zone_data['buildings'].get('error'):
+                    prefetched[index]['buildings'] = zone_data['buildings']
+                if not zone_data['population'].get('error'):
+                    prefetched[index]['satellite_population'] = population_service.format_population_result(
+                        zone_data['population']
+                    )
+                    
+        except Exception as e:
+            logger.warning(f"Batch Earth Engine extraction failed, analyzing zones one by one: {str(e)}")
+        
+        return prefetched
+    
+    def _run_analysis(self, request: AnalysisRequest, request_id: str,
+                      prefetched: Optional[Dict[str, Any]] = None) -> AnalysisResult:
+        """Run and cache the analysis of a request, using prefetched Earth Engine data where given"""
+        prefetched = prefetched or {}
+        
         # Start timing
         start_time = time.time()
         
@@ -328,13 +577,22 @@ class UnifiedAnalyzer:
             
             # Route to appropriate analysis method
             if request.analysis_type == AnalysisType.POPULATION:
-                result = self._analyze_population(request, result)
+                building_result = None
+                if prefetched.get('buildings'):
+                    building_result = self._analyze_buildings(
+                        request, self._new_stage_result(request, result), buildings_data=prefetched['buildings']
+                    )
+                result = self._analyze_population(
+                    request, result,
+                    satellite_result=prefetched.get('satellite_population'),
+                    building_result=building_result
+                )
             elif request.analysis_type == AnalysisType.BUILDINGS:
-                result = self._analyze_buildings(request, result)
+                result = self._analyze_buildings(request, result, buildings_data=prefetched.get('buildings'))
             elif request.analysis_type == AnalysisType.WASTE:
                 result = self._analyze_waste(request, result)
             elif request.analysis_type == AnalysisType.COMPREHENSIVE:
-                result = self._analyze_comprehensive(request, result)
+                result = self._analyze_comprehensive(request, result, prefetched)
             
             # Mark as successful if we got here without exceptions
             result.success = True
@@ -356,38 +614,30 @@ class UnifiedAnalyzer:
         
         return result
     
-    def _analyze_population(self, request: AnalysisRequest, result: AnalysisResult) -> AnalysisResult:
-        """Perform population analysis using satellite data first, then building-based fallback with smart validation"""
+    def _analyze_population(self, request: AnalysisRequest, result: AnalysisResult,
+                            satellite_result: Optional[Dict[str, Any]] = None,
+                            building_result: Optional[AnalysisResult] = None) -> AnalysisResult:
+        """
+        Perform population analysis using satellite data first, then building-based fallback with smart validation
+        
+        The satellite estimate and the building analysis used for validation are
+        fetched here unless they are passed in already fetched (a failed
+        satellite fetch is passed as SATELLITE_POPULATION_UNAVAILABLE).
+        """
         
         # Step 1: Try satellite/Earth Engine population data first (highest accuracy)
         satellite_population = 0
         satellite_success = False
+        user_classification = self._get_user_classification(request)
+        
+        if satellite_result is None:
+            satellite_result = self._fetch_satellite_population(request)
+        if (not satellite_result or satellite_result.get('error')
+                or satellite_result.get('data_source') == 'earth_engine_unavailable'):
+            result._degraded_by = (getattr(result, '_degraded_by', None) or []) + ['satellite_population']
         
         try:
-            from .population_service import get_earth_engine_population
-            logger.info("Attempting satellite population analysis...")
-            
-            # Convert geometry to geojson format if needed
-            geojson = request.geometry
-            if not isinstance(geojson, dict) or 'type' not in geojson:
-                # If it's a raw geometry, wrap it in a feature
-                geojson = {
-                    'type': 'Feature',
-                    'geometry': request.geometry,
-                    'properties': {}
-                }
-            
-            # Extract user classification for Earth Engine analysis
-            user_classification = {
-                'settlement_density': request.options.get('settlement_density', 'medium_density'),
-                'socioeconomic_level': request.options.get('socioeconomic_level', 'middle_income'),
-                'average_household_charge': request.options.get('average_household_charge'),
-                'waste_generation_rate': request.options.get('waste_generation_rate')
-            }
-            
-            satellite_result = get_earth_engine_population(geojson, prefer_worldpop=True, user_classification=user_classification)
-            
-            if satellite_result.get('estimated_population', 0) > 0 and satellite_result.get('data_source') != 'earth_engine_unavailable':
+            if satellite_result and satellite_result.get('estimated_population', 0) > 0 and satellite_result.get('data_source') != 'earth_engine_unavailable':
                 satellite_population = int(satellite_result['estimated_population'])
                 satellite_success = True
                 
@@ -421,12 +671,8 @@ class UnifiedAnalyzer:
             else:
                 # Extract building count for validation
                 try:
-                    building_result = self._analyze_buildings(request, AnalysisResult(
-                        request_id=result.request_id,
-                        analysis_type=request.analysis_type,
-                        timestamp=result.timestamp,
-                        success=False
-                    ))
+                    if building_result is None:
+                        building_result = self._analyze_buildings(request, self._new_stage_result(request, result))
                     if building_result.building_count:
                         building_count = building_result.building_count
                         # Store building data in main result
@@ -600,9 +846,57 @@ class UnifiedAnalyzer:
         
         logger.info(f"📏 Area-based population estimate: {result.population_estimate} people (confidence: {result.confidence_level:.1%})")
         return result
-    
-    def _analyze_buildings(self, request: AnalysisRequest, result: AnalysisResult) -> AnalysisResult:
-        """Perform building analysis using Google Earth Engine with 83% confidence threshold"""
+
+    def _get_user_classification(self, request: AnalysisRequest) -> Dict[str, Any]:
+        """User classification of the zone passed to Earth Engine analysis"""
+        return {
+            'settlement_density': request.options.get('settlement_density', 'medium_density'),
+            'socioeconomic_level': request.options.get('socioeconomic_level', 'middle_income'),
+            'average_household_charge': request.options.get('average_household_charge'),
+            'waste_generation_rate': request.options.get('waste_generation_rate')
+        }
+
+    def _fetch_satellite_population(self, request: AnalysisRequest) -> Optional[Dict[str, Any]]:
+        """Satellite/Earth Engine population estimate for the request geometry, None if it failed"""
+        try:
+            from .population_service import get_earth_engine_population
+            logger.info("Attempting satellite population analysis...")
+
+            # Convert geometry to geojson format if needed
+            geojson = request.geometry
+            if not isinstance(geojson, dict) or 'type' not in geojson:
+                # If it's a raw geometry, wrap it in a feature
+                geojson = {
+                    'type': 'Feature',
+                    'geometry': request.geometry,
+                    'properties': {}
+                }
+
+            return get_earth_engine_population(
+                geojson, prefer_worldpop=True, user_classification=self._get_user_classification(request)
+            )
+
+        except Exception as e:
+            logger.warning(f"Satellite population analysis failed: {str(e)}")
+            return None
+
+    def _new_stage_result(self, request: AnalysisRequest, result: AnalysisResult) -> AnalysisResult:
+        """Empty result for a stage that runs apart from the main result"""
+        return AnalysisResult(
+            request_id=result.request_id,
+            analysis_type=request.analysis_type,
+            timestamp=result.timestamp,
+            success=False
+        )
+
+    def _analyze_buildings(self, request: AnalysisRequest, result: AnalysisResult,
+                           buildings_data: Optional[Dict[str, Any]] = None) -> AnalysisResult:
+        """
+        Perform building analysis using Google Earth Engine with 83% confidence threshold
+        
+        buildings_data is the zone's extract_buildings_for_zone result when it
+        was fetched already (see analyze_many).
+        """
         confidence_threshold = request.options.get('confidence_threshold', 0.80)
         
         if self.earth_engine and self.earth_engine.initialized:
@@ -621,11 +915,12 @@ class UnifiedAnalyzer:
                 })()
                 
                 # Extract buildings using Earth Engine
-                buildings_data = self.earth_engine.extract_buildings_for_zone(
-                    temp_zone, 
-                    confidence_threshold=confidence_threshold,
-                    use_cache=True
-                )
+                if buildings_data is None:
+                    buildings_data = self.earth_engine.extract_buildings_for_zone(
+                        temp_zone, 
+                        confidence_threshold=confidence_threshold,
+                        use_cache=True
+                    )
                 
                 if 'error' in buildings_data:
                     raise Exception(buildings_data['error'])
@@ -896,65 +1191,135 @@ class UnifiedAnalyzer:
         
         return result
     
-    def _analyze_comprehensive(self, request: AnalysisRequest, result: AnalysisResult) -> AnalysisResult:
-        """Perform comprehensive analysis (all types)"""
-        warnings = []
-        
-        # Population analysis first (tries satellite data, then building-based fallback)
-        if request.options.get('include_population', True):
-            try:
-                result = self._analyze_population(request, result)
-            except Exception as e:
-                warnings.append(f"Population analysis failed: {str(e)}")
+    def _analyze_comprehensive(self, request: AnalysisRequest, result: AnalysisResult,
+                               prefetched: Optional[Dict[str, Any]] = None) -> AnalysisResult:
+        """
+        Perform comprehensive analysis (all types)
         
-        # Building analysis (needed for building count and types, but not population)
-        if request.options.get('include_buildings', True):
-            try:
-                result = self._analyze_buildings(request, result)
-            except Exception as e:
-                warnings.append(f"Building analysis failed: {str(e)}")
+        The satellite population estimate and the building extraction are
+        independent Earth Engine requests and run concurrently, unless they
+        were prefetched; population, waste, revenue and validation each start
+        once their inputs are ready. Seconds spent in each stage are recorded
+        in result.stage_timings.
+        """
+        options = request.options
+        prefetched = prefetched or {}
+        stages = []
+        
+        # Population analysis (tries satellite data, then building-based fallback),
+        # validated against the building stage's count
+        if options.get('include_population', True):
+            stages.append(AnalysisStage(
+                'satellite_population',
+                lambda outputs: prefetched.get('satellite_population') or self._fetch_satellite_population(request)
+            ))
+            stages.append(AnalysisStage(
+                'population',
+                lambda outputs: self._analyze_population(
+                    request, result,
+                    satellite_result=outputs.get('satellite_population') or SATELLITE_POPULATION_UNAVAILABLE,
+                    building_result=outputs.get('buildings')
+                ),
+                after=('satellite_population', 'buildings')
+            ))
+        
+        # Building analysis (needed for building count and types, but not population),
+        # on its own result and merged after population
+        if options.get('include_buildings', True):
+            stages.append(AnalysisStage(
+                'buildings',
+                lambda outputs: self._analyze_buildings(
+                    request, self._new_stage_result(request, result), buildings_data=prefetched.get('buildings')
+                )
+            ))
+            stages.append(AnalysisStage(
+                'merge_buildings',
+                lambda outputs: self._merge_building_result(result, outputs['buildings']),
+                after=('population', 'buildings')
+            ))
         
         # Waste analysis
-        if request.options.get('include_waste', True):
-            try:
-                result = self._analyze_waste(request, result)
-            except Exception as e:
-                warnings.append(f"Waste analysis failed: {str(e)}")
+        if options.get('include_waste', True):
+            stages.append(AnalysisStage(
+                'waste', lambda outputs: self._analyze_waste(request, result),
+                after=('population', 'merge_buildings')
+            ))
+        
+        # Revenue analysis (replaces the waste stage's revenue projections)
+        stages.append(AnalysisStage(
+            'revenue', lambda outputs: self._calculate_projected_revenue(result),
+            after=('population', 'merge_buildings', 'waste')
+        ))
         
-        # Revenue analysis
-        try:
-            revenue_data = self._calculate_projected_revenue(result)
-            result.revenue_projections = revenue_data
-        except Exception as e:
-            warnings.append(f"Revenue analysis failed: {str(e)}")
+        # Validation
+        if options.get('include_validation', True) and self.validation_engine:
+            stages.append(AnalysisStage(
+                'validation', lambda outputs: self.validation_engine.validate_results(result),
+                after=('population', 'merge_buildings', 'waste', 'revenue')
+            ))
+        
+        outputs, errors, timings = StageScheduler().run(stages)
+        result.stage_timings = timings
+        if errors:
+            result._degraded_by = (getattr(result, '_degraded_by', None) or []) + sorted(errors)
+        
+        warnings = []
+        for stage, label in (('population', 'Population analysis'), ('buildings', 'Building analysis'),
+                             ('merge_buildings', 'Building analysis'), ('waste', 'Waste analysis'),
+                             ('revenue', 'Revenue analysis')):
+            if stage in errors:
+                warnings.append(f"{label} failed: {str(errors[stage])}")
+        
+        if 'revenue' in errors:
             result.revenue_projections = {
                 'success': False,
-                'error': str(e),
+                'error': str(errors['revenue']),
                 'total_buildings': 0,
                 'projected_monthly_revenue_kwacha': 0
             }
+        else:
+            result.revenue_projections = outputs['revenue']
         
-        # Validation
-        if request.options.get('include_validation', True) and self.validation_engine:
-            try:
-                validation_data = self.validation_engine.validate_results(result)
-                result.validation_metrics = validation_data.get('metrics')
-                if validation_data.get('warnings'):
-                    warnings.extend(validation_data['warnings'])
-            except Exception as e:
-                warnings.append(f"Validation failed: {str(e)}")
+        if 'validation' in errors:
+            warnings.append(f"Validation failed: {str(errors['validation'])}")
+        elif outputs.get('validation') is not None:
+            validation_data = outputs['validation']
+            result.validation_metrics = validation_data.get('metrics')
+            if validation_data.get('warnings'):
+                warnings.extend(validation_data['warnings'])
         
         if warnings:
             result.warnings = warnings
         
+        logger.info(f"Analysis stage timings for {result.request_id}: {timings}")
         return result
     
+    def _merge_building_result(self, result: AnalysisResult, building_result: Optional[AnalysisResult]):
+        """Apply a building analysis run on its own result to the main result"""
+        if building_result is None:
+            return
+        
+        result.building_count = building_result.building_count
+        result.building_types = building_result.building_types
+        result.settlement_classification = building_result.settlement_classification
+        result.confidence_level = building_result.confidence_level
+        result.data_sources = (result.data_sources or []) + (building_result.data_sources or [])
+        if building_result.warnings:
+            result.warnings = (result.warnings or []) + building_result.warnings
+        
+        # Building-based population estimate only when there is none yet
+        if not result.population_estimate or result.population_estimate <= 0:
+            result.population_estimate = building_result.population_estimate
+            result.household_estimate = building_result.household_estimate
+    
     def _generate_request_id(self, request: AnalysisRequest) -> str:
         """Generate unique request ID for caching"""
-        # Create hash of geometry and options
+        # Create hash of geometry fingerprint, zone type and options; zone_id
+        # and zone_name only label the result
         content = json.dumps({
             'analysis_type': request.analysis_type.value,
-            'geometry': request.geometry,
+            'geometry': geometry_fingerprint(request.geometry),
+            'zone_type': request.zone_type,
             'options': request.options
         }, sort_keys=True)
         
@@ -962,26 +1327,27 @@ class UnifiedAnalyzer:
     
     def _get_cached_result(self, request_id: str) -> Optional[AnalysisResult]:
         """Get cached result if available and not expired"""
-        if request_id not in self.cache:
-            return None
-        
-        # Check if cache expired
-        if datetime.now() > self.cache_expiry.get(request_id, datetime.min):
-            del self.cache[request_id]
-            del self.cache_expiry[request_id]
-            return None
-        
-        return self.cache[request_id]
+        return self.cache.get(request_id)
     
     def _cache_result(self, request_id: str, result: AnalysisResult):
-        """Cache analysis result"""
-        self.cache[request_id] = result
-        self.cache_expiry[request_id] = datetime.now() + self.cache_ttl
+        """Cache analysis result; degraded results only for ANALYSIS_CACHE_DEGRADED_TTL_MINUTES"""
+        if self._is_degraded(result):
+            logger.info(f"Caching degraded result {request_id} for {ANALYSIS_CACHE_DEGRADED_TTL_MINUTES:g} minutes")
+            self.cache.put(request_id, result, ttl=timedelta(minutes=ANALYSIS_CACHE_DEGRADED_TTL_MINUTES))
+        else:
+            self.cache.put(request_id, result)
+    
+    def _is_degraded(self, result: AnalysisResult) -> bool:
+        """Whether result used a fallback estimate, has low confidence or lost an Earth Engine input or stage"""
+        if any('fallback' in source.lower() for source in result.data_sources or []):
+            return True
+        if result.confidence_level is not None and result.confidence_level < ANALYSIS_CACHE_MIN_CONFIDENCE:
+            return True
+        return bool(getattr(result, '_degraded_by', None))
     
     def clear_cache(self):
         """Clear all cached results"""
         self.cache.clear()
-        self.cache_expiry.clear()
         logger.info("🧹 Analysis cache cleared")
     
     def get_status(self) -> Dict[str, Any]:
@@ -996,6 +1362,7 @@ class UnifiedAnalyzer:
             },
             'cache_enabled': self.cache_enabled,
             'cached_results': len(self.cache),
+            'cache_stats': self.cache.get_stats(),
             'initialization_errors': self.initialization_errors
         }
     
@@ -1625,5 +1992,28 @@ class UnifiedAnalyzer:
             }
 
 
-# Global analyzer instance
-analyzer = UnifiedAnalyzer()
\ No newline at end of file
+# Process-wide result cache and analyzer, created on first use
+_analysis_cache = AnalysisResultCache()
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+
+def get_analysis_cache() -> AnalysisResultCache:
+    """The result cache shared by the process-wide analyzer"""
+    return _analysis_cache
+
+
+def get_unified_analyzer() -> UnifiedAnalyzer:
+    """
+    Get the process-wide analyzer.
+    
+    Its engines (Earth Engine, population, validation, Gemini) are set up
+    once, on the first call, and its results go to the shared cache, so
+    analyzing the same zone again is answered from memory.
+    """
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                _analyzer = UnifiedAnalyzer(cache=_analysis_cache)
+    return _analyzer
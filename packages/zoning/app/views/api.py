@@ -5,10 +5,13 @@ from sqlalchemy import func
 import json
 from app import db
 from app.models import Zone, ZoneAnalysis, CSVImport, User
-from app.utils.unified_analyzer import UnifiedAnalyzer, AnalysisRequest, AnalysisType
+from app.utils.unified_analyzer import get_unified_analyzer, AnalysisRequest, AnalysisType
 
 api_bp = Blueprint('api', __name__)
 
+# Zones accepted by one batch analysis request (MAX_BATCH_ANALYSIS_ZONES in app config overrides)
+MAX_BATCH_ANALYSIS_ZONES = 500
+
 
 # Schemas for API responses
 class ZoneSchema(Schema):
@@ -183,10 +186,74 @@ def analyze_zone(zone_id):
     zone = Zone.query.get_or_404(zone_id)
     
     # Run analysis using unified analyzer
-    analyzer = UnifiedAnalyzer()
+    results = get_unified_analyzer().analyze(_zone_analysis_request(zone))
+    
+    analysis = _store_zone_analysis(zone, results)
+    db.session.commit()
     
-    # Create analysis request
-    analysis_request = AnalysisRequest(
+    return jsonify({
+        'analysis_id': analysis.id,
+        'results': results.to_dict()
+    })
+
+
+@api_bp.route('/zones/analyze', methods=['POST'])
+@login_required
+def analyze_zones():
+    """Run analysis on many zones, fetching their Earth Engine data together"""
+    data = request.get_json() or {}
+    zone_ids = data.get('zone_ids')
+    if not zone_ids or not isinstance(zone_ids, list):
+        return jsonify({'error': 'zone_ids must be a non-empty list'}), 400
+    
+    max_zones = current_app.config.get('MAX_BATCH_ANALYSIS_ZONES', MAX_BATCH_ANALYSIS_ZONES)
+    if len(zone_ids) > max_zones:
+        return jsonify({'error': f'At most {max_zones} zones can be analyzed per request'}), 400
+    
+    # Zone ids may arrive as JSON numbers or numeric strings
+    parsed_ids = [_parse_zone_id(zone_id) for zone_id in zone_ids]
+    invalid = [str(zone_id) for zone_id, parsed_id in zip(zone_ids, parsed_ids) if parsed_id is None]
+    if invalid:
+        return jsonify({'error': f'Invalid zone ids: {", ".join(invalid)}'}), 400
+    zone_ids = parsed_ids
+    
+    zones = Zone.query.filter(Zone.id.in_(zone_ids)).all()
+    missing = sorted(set(zone_ids) - {zone.id for zone in zones})
+    if missing:
+        return jsonify({'error': f'Zones not found: {", ".join(str(zone_id) for zone_id in missing)}'}), 404
+    
+    # Run analyses using unified analyzer
+    results = get_unified_analyzer().analyze_many([_zone_analysis_request(zone) for zone in zones])
+    
+    analyses = [_store_zone_analysis(zone, zone_results) for zone, zone_results in zip(zones, results)]
+    db.session.commit()
+    
+    return jsonify({
+        'zones': [
+            {
+                'zone_id': zone.id,
+                'analysis_id': analysis.id,
+                'results': zone_results.to_dict()
+            }
+            for zone, analysis, zone_results in zip(zones, analyses, results)
+        ]
+    })
+
+
+def _parse_zone_id(zone_id):
+    """Zone id as an int, or None if it is not an integer or numeric string"""
+    if isinstance(zone_id, bool):
+        return None
+    if isinstance(zone_id, int):
+        return zone_id
+    if isinstance(zone_id, str) and zone_id.strip().isdecimal():
+        return int(zone_id)
+    return None
+
+
+def _zone_analysis_request(zone):
+    """Comprehensive analysis request for a zone"""
+    return AnalysisRequest(
         analysis_type=AnalysisType.COMPREHENSIVE,
         geometry=zone.geometry,
         zone_id=str(zone.id),
@@ -199,11 +266,10 @@ def analyze_zone(zone_id):
             'include_validation': True
         }
     )
-    
-    # Run analysis
-    results = analyzer.analyze(analysis_request)
-    
-    # Update zone with analysis results
+
+
+def _store_zone_analysis(zone, results):
+    """Update zone with analysis results and add a ZoneAnalysis record (not committed)"""
     zone.estimated_population = results.population_estimate or 0
     zone.household_count = results.household_estimate or 0
     zone.waste_generation_kg_day = results.waste_generation_kg_per_day or 0
@@ -221,12 +287,7 @@ def analyze_zone(zone_id):
     )
     
     db.session.add(analysis)
-    db.session.commit()
-    
-    return jsonify({
-        'analysis_id': analysis.id,
-        'results': results.to_dict()
-    })
+    return analysis
 
 
 @api_bp.route('/imports', methods=['GET'])
@@ -293,6 +354,13 @@ def dashboard_stats():
     return jsonify(stats)
 
 
+@api_bp.route('/stats/analyzer', methods=['GET'])
+@login_required
+def analyzer_stats():
+    """Get analyzer engine status and result cache hit/miss counters"""
+    return jsonify(get_unified_analyzer().get_status())
+
+
 @api_bp.route('/geojson/zones', methods=['GET'])
 @login_required
 def zones_geojson():
@@ -6,7 +6,7 @@ from app import db
 from app.models import Zone, ZoneTypeEnum, ZoneStatusEnum, ZoneAnalysis
 from app.forms.zone import ZoneForm, CSVUploadForm
 from app.utils.csv_processor import CSVProcessor
-from app.utils.unified_analyzer import UnifiedAnalyzer, AnalysisRequest, AnalysisType
+from app.utils.unified_analyzer import get_unified_analyzer, AnalysisRequest, AnalysisType
 import json
 
 zones_bp = Blueprint('zones', __name__)
@@ -564,7 +564,7 @@ def run_analysis(id):
     
     try:
         # Use unified analyzer
-        analyzer = UnifiedAnalyzer()
+        analyzer = get_unified_analyzer()
         
         # Create analysis request
         analysis_request = AnalysisRequest(
@@ -661,7 +661,7 @@ def analyze_zone():
             return jsonify({'error': 'Invalid zone data'}), 400
         
         # Initialize the unified analyzer
-        analyzer = UnifiedAnalyzer()
+        analyzer = get_unified_analyzer()
         
         # Get zone metadata if provided
         zone_metadata = data.get('metadata', {})
@@ -836,7 +836,7 @@ def validate_zone_boundary():
             return jsonify({'error': 'Invalid zone data'}), 400
         
         # Use unified analyzer for validation
-        analyzer = UnifiedAnalyzer()
+        analyzer = get_unified_analyzer()
         
         # Create a minimal analysis request for geometry validation
         analysis_request = AnalysisRequest(
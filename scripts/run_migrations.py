@@ -2,12 +2,19 @@
 """
 Database Migration Runner for LISWMC Dashboard
 ----------------------------------------------
-Runs the database migrations to create the user authentication table.
+Runs the shared database migrations in packages/shared/database/migrations:
+the user authentication table, the similarity index tables and the
+vehicle.cleaned_plate column.
 """
 
 import os
 import sys
 import psycopg2
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIGRATIONS_DIR = os.path.join(REPO_ROOT, 'packages', 'shared', 'database', 'migrations')
+
+sys.path.insert(0, os.path.join(REPO_ROOT, 'packages'))
 from analytics.database_connection import get_db_connection
 
 def run_migration(migration_file):
@@ -50,9 +57,11 @@ def main():
     """Run all migrations"""
     print("🚀 Starting LISWMC Database Migrations...")
     
-    # List of migration files to run (in order)
+    # List of migration files to run (in order); each can be run again safely
     migrations = [
-        "migrations/001_create_users_table.sql"
+        os.path.join(MIGRATIONS_DIR, "001_create_users_table.sql"),
+        os.path.join(MIGRATIONS_DIR, "005_create_similarity_index.sql"),
+        os.path.join(MIGRATIONS_DIR, "006_add_vehicle_cleaned_plate.sql")
     ]
     
     success_count = 0
@@ -80,6 +89,8 @@ def main():
         print("   👤 Admin: username=admin, password=admin123")
         print("   👁️  Viewer: username=viewer, password=viewer123")
         print("   ⚠️  Please change these passwords after first login!")
+        print("\n📋 Fill vehicle.cleaned_plate for existing vehicles with:")
+        print("   python backfill_cleaned_plates.py  (from packages/analytics)")
         return True
     else:
         print("❌ Some migrations failed. Please check the error messages above.")